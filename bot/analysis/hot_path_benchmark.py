@@ -0,0 +1,698 @@
+# Created: 2026-10-19
+"""
+Solver Hot-Path Latency Benchmark (OFFLINE)
+===========================================
+Drives ZINSolver.run_cycle, QuoteAggregator and GraphArbScanner.discover_once
+against deterministic local stand-ins, so optimisations can be compared
+objectively on any CPU box without network access:
+
+- FakeChain: in-process JSON-RPC node. Answers gas price, ZIN pool liquidity
+  and the DEX quoter/router eth_calls from a fixed, arbitrage-free price table.
+- ReplayFetcher: recorded venue API responses fed through each real fetcher's
+  order normalisation (deadlines are rebased so old recordings stay valid).
+- CannedQuoteProvider: fixed-rate stand-ins for the HTTP aggregators
+  (1inch, Paraswap); the on-chain providers run for real against FakeChain.
+
+Reports p50/p99 per stage and throughput in intents per second.
+
+Usage:
+    python bot/analysis/hot_path_benchmark.py --cycles 50 --intents 40
+    python bot/analysis/hot_path_benchmark.py --payloads recorded.json --json report.json
+
+Recorded payloads are a JSON object keyed by venue (cowswap, uniswapx, fusion,
+lifi, aori), each holding that venue's raw API response body.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+# Repo root on the path so the solver package imports resolve when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Deterministic, dry-run solver config. zin_solver reads these into module
+# globals at import time; run_benchmark pins them on the module and in the
+# environment for its own duration only, so importing this module changes nothing.
+BENCH_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"  # public Anvil dev key #0
+BENCH_SOLVER_CONFIG: Dict[str, Any] = {
+    "PRIVATE_KEY": BENCH_PRIVATE_KEY,
+    "ZIN_SOLVER_LIVE": False,
+    "ZIN_CHAINS": "base",
+    "ZIN_MAX_INTENTS_PER_CYCLE": 1000,  # evaluate every replayed intent
+    "ZIN_MIN_PROFIT_BPS": 8,
+    "ZIN_MAX_INTENT_AMOUNT": 0,
+    "ZIN_MAX_INTENT_AMOUNT_BY_TOKEN": "",
+    "ZIN_MAX_GAS_PRICE_GWEI": 40,
+    "ZIN_MIN_ORDER_TTL_SECONDS": 30,
+    "ZIN_MAX_PRICE_IMPACT_BPS": 75,
+}
+
+import numpy as np
+from eth_abi import decode, encode
+from loguru import logger
+from web3 import Web3
+
+from bot.flash_arb_scanner import GraphArbScanner
+from bot.solver.fetchers import (
+    AoriIntentFetcher,
+    BaseIntentFetcher,
+    ChainContext,
+    CowSwapFetcher,
+    FusionIntentFetcher,
+    IntentData,
+    LifiIntentFetcher,
+    UniswapXFetcher,
+)
+from bot.solver.quotes import (
+    AerodromeQuoteProvider,
+    BaseQuoteProvider,
+    QuoteAggregator,
+    QuoteResult,
+    UniswapV3QuoteProvider,
+)
+import bot.solver.zin_solver as zin_solver_module
+from bot.solver.zin_solver import (
+    BASE_CBETH,
+    BASE_RETH,
+    BASE_USDC,
+    BASE_WETH,
+    BASE_WSTETH,
+    ZINSolver,
+)
+
+LIQUIDITY_PER_TOKEN = 10 ** 30  # ZIN pool maxFlashLoan answer; never the binding constraint
+GAS_PRICE_WEI = 10_000_000      # 0.01 gwei, well inside the gas guardrail
+
+
+# =============================================================================
+# PRICES
+# =============================================================================
+
+@dataclass
+class BenchToken:
+    symbol: str
+    address: str
+    decimals: int
+    usd: float
+
+
+def default_tokens() -> List[BenchToken]:
+    """Every token the ZIN targets and the graph scanner's pool set touch."""
+    g = GraphArbScanner
+    usd = {"WETH": 3000.0, "USDC": 1.0, "kUSD": 1.0, "cbETH": 3200.0, "DAI": 1.0, "wstETH": 3500.0,
+           "SNX": 2.5, "LINK": 15.0, "LUSD": 1.0, "USDbC": 1.0, "cbBTC": 60000.0}
+    tokens = [BenchToken(t.symbol, t.address, t.decimals, usd[t.symbol])
+              for t in (g.WETH, g.USDC, g.KUSD, g.CBETH, g.DAI, g.WSTETH, g.SNX, g.LINK, g.LUSD, g.USDBC, g.CBBTC)]
+    tokens += [BenchToken("wstETH", BASE_WSTETH, 18, 3500.0), BenchToken("rETH", BASE_RETH, 18, 3350.0)]
+    return tokens
+
+
+class PriceTable:
+    """Fixed USD prices; every swap loses its fee, so no cycle is ever profitable."""
+
+    def __init__(self, tokens: List[BenchToken]):
+        self.by_address = {t.address.lower(): t for t in tokens}
+
+    def convert(self, token_in: str, token_out: str, amount_in: int, fee_bps: float = 0.0) -> int:
+        t_in = self.by_address.get(token_in.lower())
+        t_out = self.by_address.get(token_out.lower())
+        if t_in is None or t_out is None or t_in is t_out:
+            return 0
+        value = amount_in / 10 ** t_in.decimals * t_in.usd * (1 - fee_bps / 10_000)
+        return int(value / t_out.usd * 10 ** t_out.decimals)
+
+    def amount_for_usd(self, token: str, usd: float) -> int:
+        t = self.by_address[token.lower()]
+        return int(usd / t.usd * 10 ** t.decimals)
+
+
+# =============================================================================
+# FAKE CHAIN (local JSON-RPC node)
+# =============================================================================
+
+def _selector(signature: str) -> str:
+    return Web3.keccak(text=signature)[:4].hex().removeprefix("0x")
+
+
+class FakeChain:
+    """
+    Deterministic JSON-RPC node on 127.0.0.1. Supports batches, the handful of
+    node methods web3 needs, and eth_call for the quoters/routers the solver
+    and scanner use. `delay_ms` simulates per-request network latency.
+
+    Like a real pool, a quote that rounds down to nothing returns 0; only calls
+    for an unknown selector or token revert (counted in `reverts`).
+    """
+
+    AERODROME_GET_AMOUNTS_OUT = _selector("getAmountsOut(uint256,(address,address,bool,address)[])")
+    V2_GET_AMOUNTS_OUT = _selector("getAmountsOut(uint256,address[])")
+    V3_QUOTE_EXACT_INPUT_SINGLE = _selector("quoteExactInputSingle((address,address,uint256,uint24,uint160))")
+    MAVERICK_CALCULATE_SWAP = _selector("calculateSwap((address,address,address,address,uint256,uint256,uint256,uint160))")
+    MAX_FLASH_LOAN = _selector("maxFlashLoan(address)")
+
+    def __init__(self, prices: PriceTable, chain_id: int = 8453, delay_ms: float = 0.0):
+        self.prices = prices
+        self.chain_id = chain_id
+        self.delay_ms = delay_ms
+        self.calls: Counter = Counter()
+        self.reverts = 0
+        self._calls_lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeChain":
+        chain = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, as a real node's HTTP endpoint would; headers and body
+            # go out in one write so small responses don't stall on delayed ACKs
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            wbufsize = -1
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if chain.delay_ms:
+                    time.sleep(chain.delay_ms / 1000)
+                answer = [chain.handle(p) for p in body] if isinstance(body, list) else chain.handle(body)
+                data = json.dumps(answer).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                self.wfile.flush()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, name="fake-chain", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def handle(self, payload: Dict) -> Dict:
+        method = payload.get("method")
+        with self._calls_lock:
+            self.calls[method] += 1
+        try:
+            result = self._dispatch(method, payload.get("params") or [])
+            return {"jsonrpc": "2.0", "id": payload.get("id"), "result": result}
+        except Exception as e:
+            with self._calls_lock:
+                self.reverts += 1
+            return {"jsonrpc": "2.0", "id": payload.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+    def _dispatch(self, method: str, params: List) -> Any:
+        if method == "web3_clientVersion":
+            return "KerneFakeChain/v1"
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "net_version":
+            return str(self.chain_id)
+        if method in ("eth_gasPrice", "eth_maxPriorityFeePerGas"):
+            return hex(GAS_PRICE_WEI)
+        if method == "eth_blockNumber":
+            return hex(1)
+        if method == "eth_call":
+            tx = params[0]
+            return "0x" + self._eth_call(tx.get("data") or tx.get("input") or "0x").hex()
+        raise ValueError(f"method {method} not supported by FakeChain")
+
+    def _eth_call(self, data: str) -> bytes:
+        raw = bytes.fromhex(data.removeprefix("0x"))
+        selector, args = raw[:4].hex(), raw[4:]
+
+        if selector == self.MAX_FLASH_LOAN:
+            return encode(["uint256"], [LIQUIDITY_PER_TOKEN])
+        if selector == self.AERODROME_GET_AMOUNTS_OUT:
+            amount_in, routes = decode(["uint256", "(address,address,bool,address)[]"], args)
+            token_in, token_out, stable, _ = routes[0]
+            out = self._quote(token_in, token_out, amount_in, 5 if stable else 30)
+            return encode(["uint256[]"], [[amount_in, out]])
+        if selector == self.V2_GET_AMOUNTS_OUT:
+            amount_in, path = decode(["uint256", "address[]"], args)
+            return encode(["uint256[]"], [[amount_in, self._quote(path[0], path[-1], amount_in, 30)]])
+        if selector == self.V3_QUOTE_EXACT_INPUT_SINGLE:
+            (token_in, token_out, amount_in, fee, _), = decode(["(address,address,uint256,uint24,uint160)"], args)
+            out = self._quote(token_in, token_out, amount_in, fee / 100)
+            return encode(["uint256", "uint160", "uint32", "uint256"], [out, 0, 1, 90_000])
+        if selector == self.MAVERICK_CALCULATE_SWAP:
+            params, = decode(["(address,address,address,address,uint256,uint256,uint256,uint160)"], args)
+            return encode(["uint256"], [self._quote(params[0], params[1], params[5], 10)])
+        raise ValueError("execution reverted")
+
+    def _quote(self, token_in: str, token_out: str, amount_in: int, fee_bps: float) -> int:
+        if token_in.lower() not in self.prices.by_address or token_out.lower() not in self.prices.by_address:
+            raise ValueError("execution reverted: no pool")
+        return self.prices.convert(token_in, token_out, amount_in, fee_bps)
+
+
+# =============================================================================
+# STAGE TIMER
+# =============================================================================
+
+class StageTimer:
+    """Collects wall-clock samples per named stage."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def measure(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[stage].append(time.perf_counter() - started)
+
+    def count(self, stage: str) -> int:
+        return len(self.samples.get(stage, []))
+
+    def total(self, stage: str) -> float:
+        return float(sum(self.samples.get(stage, [])))
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        report = {}
+        for stage, samples in sorted(self.samples.items()):
+            ms = np.asarray(samples) * 1000
+            report[stage] = {
+                "n": len(ms),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p99_ms": round(float(np.percentile(ms, 99)), 3),
+                "mean_ms": round(float(ms.mean()), 3),
+                "max_ms": round(float(ms.max()), 3),
+            }
+        return report
+
+
+# =============================================================================
+# STAND-INS
+# =============================================================================
+
+VENUE_FETCHERS = {
+    "cowswap": CowSwapFetcher,
+    "uniswapx": UniswapXFetcher,
+    "fusion": FusionIntentFetcher,
+    "lifi": LifiIntentFetcher,
+    "aori": AoriIntentFetcher,
+}
+VENUE_RESPONSE_KEYS = {"cowswap": "orders", "uniswapx": "orders", "fusion": "items", "lifi": "intents", "aori": "orders"}
+DEADLINE_FIELDS = ("validTo", "deadline", "endTime")
+
+
+class ReplayFetcher(BaseIntentFetcher):
+    """Replays a recorded API response through a real fetcher's order normalisation."""
+
+    def __init__(self, venue: str, fetcher: BaseIntentFetcher, response: Dict, timer: StageTimer):
+        self.venue = venue
+        self.fetcher = fetcher
+        self.response = response
+        self.timer = timer
+
+    async def fetch_intents(self, context: ChainContext) -> List[IntentData]:
+        with self.timer.measure(f"zin.fetch.{self.venue}"):
+            valid_until = int(time.time()) + 600
+            intents = []
+            for order in self.response.get(VENUE_RESPONSE_KEYS[self.venue], []):
+                if self.venue == "fusion":
+                    order = order.get("order", {})
+                order = {**order, **{f: valid_until for f in DEADLINE_FIELDS if f in order}}
+                intent = self.fetcher._normalize_order(order, context)
+                if intent:
+                    intents.append(intent)
+            await asyncio.sleep(0)  # yield once, like awaiting a response body
+        return intents
+
+
+class CannedQuoteProvider(BaseQuoteProvider):
+    """Stand-in for an HTTP aggregator API: fixed fee off the fair price, optional delay."""
+
+    def __init__(self, name: str, prices: PriceTable, fee_bps: float, gas_estimate: int = 250_000,
+                 delay_ms: float = 0.0):
+        self.name = name
+        self.prices = prices
+        self.fee_bps = fee_bps
+        self.gas_estimate = gas_estimate
+        self.delay_ms = delay_ms
+        self.router_address = Web3.to_checksum_address(Web3.keccak(text=name)[-20:])
+
+    async def get_quote(self, chain_id: int, token_in: str, token_out: str, amount_in: int,
+                        recipient: str, w3: Web3) -> Optional[QuoteResult]:
+        if self.delay_ms:
+            await asyncio.sleep(self.delay_ms / 1000)
+        out = self.prices.convert(token_in, token_out, amount_in, self.fee_bps)
+        if out == 0:
+            return None
+        return QuoteResult(
+            provider=self.name,
+            calldata=b"\x12\xaa\x3c\xaf" + amount_in.to_bytes(32, "big"),
+            router_address=self.router_address,
+            expected_output=out,
+            gas_estimate=self.gas_estimate,
+        )
+
+
+class TimedQuoteAggregator(QuoteAggregator):
+    def __init__(self, providers: List[BaseQuoteProvider], timer: StageTimer):
+        super().__init__(providers)
+        self.timer = timer
+
+    async def get_best_quote(self, *args, **kwargs) -> Optional[QuoteResult]:
+        with self.timer.measure("zin.quote"):
+            return await super().get_best_quote(*args, **kwargs)
+
+
+class OfflineZINSolver(ZINSolver):
+    """ZINSolver wired to FakeChain, replayed intents and the benchmark quote providers (dry run)."""
+
+    def __init__(self, chain_url: str, responses: Dict[str, Dict], providers: List[BaseQuoteProvider],
+                 timer: StageTimer, profit_log_path: str):
+        self._chain_url = chain_url
+        self._profit_log_path = profit_log_path
+        self.timer = timer
+        super().__init__()
+        self.live_mode = False
+        self.fetchers = [
+            ReplayFetcher(venue, VENUE_FETCHERS[venue](self), response, timer)
+            for venue, response in responses.items() if venue in VENUE_FETCHERS
+        ]
+        self.quote_aggregator = TimedQuoteAggregator(providers, timer)
+
+    def _build_chain_configs(self):
+        configs = super()._build_chain_configs()
+        for config in configs.values():
+            config.rpc_urls = [self._chain_url]
+        return configs
+
+    def _init_logging(self):
+        self.profit_log_path = self._profit_log_path
+
+    def _is_gas_price_ok(self, context: ChainContext) -> bool:
+        with self.timer.measure("zin.rpc.gas_price"):
+            return super()._is_gas_price_ok(context)
+
+    async def check_vault_liquidity(self, context: ChainContext, token: str) -> int:
+        with self.timer.measure("zin.rpc.liquidity"):
+            return await super().check_vault_liquidity(context, token)
+
+    async def process_intent(self, context: ChainContext, intent: IntentData) -> bool:
+        with self.timer.measure("zin.process_intent"):
+            return await super().process_intent(context, intent)
+
+
+class TimedGraphArbScanner(GraphArbScanner):
+    """
+    Counts edge quotes instead of timing them: get_quote coroutines interleave
+    during retry backoff, so per-call wall time would include other edges' work.
+    An empty quote is a revert or a dust amount that rounds to zero output.
+    """
+
+    def __init__(self, timer: StageTimer):
+        self.timer = timer
+        self.edge_quotes = 0
+        self.empty_edge_quotes = 0
+        super().__init__()
+
+    async def find_profitable_cycles_bellman_ford(self, start_token, amount_in):
+        with self.timer.measure("graph.bellman_ford"):
+            return await super().find_profitable_cycles_bellman_ford(start_token, amount_in)
+
+    async def get_quote(self, pool, token_in, amount_in, retries: int = 3) -> int:
+        out = await super().get_quote(pool, token_in, amount_in, retries)
+        self.edge_quotes += 1
+        self.empty_edge_quotes += out == 0
+        return out
+
+
+@contextmanager
+def _env(**overrides):
+    previous = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+@contextmanager
+def _pinned_solver_config():
+    """Applies BENCH_SOLVER_CONFIG to zin_solver's import-time globals for the duration."""
+    previous = {key: getattr(zin_solver_module, key) for key in BENCH_SOLVER_CONFIG}
+    for key, value in BENCH_SOLVER_CONFIG.items():
+        setattr(zin_solver_module, key, value)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            setattr(zin_solver_module, key, value)
+
+
+def _solver_env():
+    """BENCH_SOLVER_CONFIG as environment variables, for anything reading os.environ at runtime."""
+    values = {key: str(value).lower() if isinstance(value, bool) else str(value)
+              for key, value in BENCH_SOLVER_CONFIG.items()}
+    return _env(ZIN_AUTO_SCALE="true", **values)
+
+
+@contextmanager
+def _cwd(path: str):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+# =============================================================================
+# PAYLOADS
+# =============================================================================
+
+def synthetic_payloads(prices: PriceTable, n_intents: int, seed: int = 7) -> Dict[str, Dict]:
+    """
+    Deterministic venue API responses. Limit prices straddle the fair price
+    (-20..+60 bps) so some intents clear the profit guardrail and some don't.
+    """
+    rng = random.Random(seed)
+    responses = {"cowswap": {"orders": []}, "uniswapx": {"orders": []}, "fusion": {"items": []},
+                 "lifi": {"intents": []}, "aori": {"orders": []}}
+    venues = list(responses)
+    sources = [BASE_WSTETH, BASE_CBETH, BASE_RETH, BASE_WETH, BASE_USDC]
+    valid_until = int(time.time()) + 600
+
+    for i in range(n_intents):
+        venue = venues[i % len(venues)]
+        token_out = rng.choice([BASE_WETH, BASE_USDC])
+        token_in = rng.choice([t for t in sources if t != token_out])
+        amount_in = prices.amount_for_usd(token_in, rng.uniform(500, 20_000))
+        amount_out = int(prices.convert(token_in, token_out, amount_in) * (1 - rng.uniform(-20, 60) / 10_000))
+        order_id = Web3.keccak(text=f"{venue}:{seed}:{i}").hex()
+        user = Web3.to_checksum_address(Web3.keccak(text=f"user:{i}")[-20:])
+
+        if venue == "cowswap":
+            responses[venue]["orders"].append({
+                "uid": order_id, "sellToken": token_in, "buyToken": token_out, "sellAmount": str(amount_in),
+                "buyAmount": str(amount_out), "validTo": valid_until, "owner": user, "signature": "0x",
+            })
+        elif venue == "uniswapx":
+            responses[venue]["orders"].append({
+                "orderHash": order_id, "input": {"token": token_in, "amount": str(amount_in)},
+                "outputs": [{"token": token_out, "amount": str(amount_out), "recipient": user}],
+                "swapper": user, "encodedOrder": "0x",
+            })
+        elif venue == "fusion":
+            responses[venue]["items"].append({"order": {
+                "orderHash": order_id, "makerAsset": token_in, "takerAsset": token_out,
+                "makingAmount": str(amount_in), "takingAmount": str(amount_out), "maker": user,
+            }})
+        elif venue == "lifi":
+            responses[venue]["intents"].append({
+                "id": order_id, "inputToken": token_in, "outputToken": token_out, "inputAmount": str(amount_in),
+                "outputAmount": str(amount_out), "user": user, "deadline": valid_until,
+            })
+        else:
+            responses[venue]["orders"].append({
+                "orderHash": order_id, "inputToken": token_in, "outputToken": token_out,
+                "inputAmount": str(amount_in), "outputAmount": str(amount_out), "offerer": user,
+                "endTime": valid_until,
+            })
+    return responses
+
+
+def default_providers(prices: PriceTable, delay_ms: float) -> List[BaseQuoteProvider]:
+    """Production line-up: on-chain providers hit FakeChain, HTTP aggregators are canned."""
+    return [
+        AerodromeQuoteProvider(),
+        UniswapV3QuoteProvider(),
+        CannedQuoteProvider("1inch", prices, fee_bps=3, delay_ms=delay_ms),
+        CannedQuoteProvider("Paraswap", prices, fee_bps=4, delay_ms=delay_ms),
+    ]
+
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+async def bench_quote_aggregator(aggregator: QuoteAggregator, w3: Web3, requests: List[Tuple[str, str, int]],
+                                 timer: StageTimer, chain_id: int = 8453):
+    """Each request once against an empty cache, then once more served from the cache."""
+    recipient = Web3.to_checksum_address(Web3.keccak(text="bench-recipient")[-20:])
+    aggregator.clear_cache()
+    for stage in ("aggregator.cold", "aggregator.cached"):
+        for token_in, token_out, amount_in in requests:
+            with timer.measure(stage):
+                await aggregator.get_best_quote(chain_id, token_in, token_out, amount_in, recipient, w3)
+
+
+async def bench_zin_cycles(solver: OfflineZINSolver, cycles: int, timer: StageTimer) -> Dict[str, float]:
+    fulfilled = 0
+    for _ in range(cycles):
+        # Every cycle sees fresh quotes, as it would with a new auction
+        solver.quote_aggregator.clear_cache()
+        with timer.measure("zin.cycle"):
+            fulfilled += await solver.run_cycle()
+
+    elapsed = timer.total("zin.cycle")
+    evaluated = timer.count("zin.process_intent")
+    return {
+        "cycles": cycles,
+        "intents_evaluated": evaluated,
+        "intents_fulfilled": fulfilled,
+        "intents_per_s": round(evaluated / elapsed, 2) if elapsed else 0.0,
+        "fulfilled_per_s": round(fulfilled / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def bench_graph_discovery(scanner: TimedGraphArbScanner, chain: FakeChain, rounds: int,
+                                timer: StageTimer) -> Dict[str, float]:
+    reverts_before = chain.reverts
+    for _ in range(rounds):
+        with timer.measure("graph.discover_once"):
+            await scanner.discover_once()
+    elapsed = timer.total("graph.discover_once")
+    return {
+        "rounds": rounds,
+        "edge_quotes": scanner.edge_quotes,
+        "empty_edge_quotes": scanner.empty_edge_quotes,
+        "reverted_calls": chain.reverts - reverts_before,
+        "edge_quotes_per_s": round(scanner.edge_quotes / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def run_benchmark(cycles: int = 20, intents: int = 40, discovery_rounds: int = 2, seed: int = 7,
+                  quote_delay_ms: float = 0.0, rpc_delay_ms: float = 0.0,
+                  payloads: Optional[Dict[str, Dict]] = None) -> Dict[str, Any]:
+    """Runs every stage against fresh stand-ins and returns the report dict."""
+    prices = PriceTable(default_tokens())
+    responses = payloads or synthetic_payloads(prices, intents, seed)
+    chain = FakeChain(prices, delay_ms=rpc_delay_ms).start()
+    timer = StageTimer()
+    report: Dict[str, Any] = {
+        "config": {"cycles": cycles, "intents": intents, "discovery_rounds": discovery_rounds, "seed": seed,
+                   "quote_delay_ms": quote_delay_ms, "rpc_delay_ms": rpc_delay_ms,
+                   "recorded_payloads": payloads is not None},
+    }
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp, _pinned_solver_config(), _solver_env():
+            solver = OfflineZINSolver(
+                chain.url, responses, default_providers(prices, quote_delay_ms), timer,
+                profit_log_path=os.path.join(tmp, "zin_profit_log.csv"),
+            )
+            context = next(iter(solver.chain_contexts.values()))
+            requests = [
+                (intent.token_in, intent.token_out, intent.amount_in)
+                for fetcher in solver.fetchers
+                for intent in asyncio.run(fetcher.fetch_intents(context))
+            ]
+            aggregator = QuoteAggregator(default_providers(prices, quote_delay_ms))
+            asyncio.run(bench_quote_aggregator(aggregator, context.w3, requests, timer, context.config.chain_id))
+            report["zin"] = asyncio.run(bench_zin_cycles(solver, cycles, timer))
+
+        if discovery_rounds > 0:
+            # RiskEngine persists its PnL state under a relative path; keep it out of the repo
+            with tempfile.TemporaryDirectory() as tmp, _cwd(tmp), \
+                    _env(RPC_URL=chain.url, METRICS_PORT="0", PRIVATE_KEY=BENCH_PRIVATE_KEY):
+                scanner = TimedGraphArbScanner(timer)
+            report["graph"] = asyncio.run(bench_graph_discovery(scanner, chain, discovery_rounds, timer))
+    finally:
+        chain.stop()
+
+    report["stages"] = timer.summary()
+    report["rpc_calls"] = dict(chain.calls)
+    return report
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n{'stage':<28}{'n':>8}{'p50 ms':>11}{'p99 ms':>11}{'mean ms':>11}")
+    print("-" * 69)
+    for stage, s in report["stages"].items():
+        print(f"{stage:<28}{s['n']:>8}{s['p50_ms']:>11.3f}{s['p99_ms']:>11.3f}{s['mean_ms']:>11.3f}")
+    print("-" * 69)
+    zin = report.get("zin", {})
+    if zin:
+        print(f"ZIN: {zin['intents_evaluated']} intents in {zin['cycles']} cycles -> "
+              f"{zin['intents_per_s']} intents/s ({zin['fulfilled_per_s']} fulfilled/s, dry run)")
+    graph = report.get("graph", {})
+    if graph:
+        print(f"Graph: {graph['edge_quotes']} edge quotes ({graph['empty_edge_quotes']} empty, "
+              f"{graph['reverted_calls']} reverted calls) in "
+              f"{graph['rounds']} rounds -> {graph['edge_quotes_per_s']} quotes/s")
+    print(f"RPC calls: {report['rpc_calls']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline latency benchmark for the solver hot path")
+    parser.add_argument("--cycles", type=int, default=20, help="ZINSolver.run_cycle iterations")
+    parser.add_argument("--intents", type=int, default=40, help="Synthetic intents per cycle")
+    parser.add_argument("--discovery-rounds", type=int, default=2, help="GraphArbScanner rounds (0 to skip)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--quote-delay-ms", type=float, default=0.0, help="Simulated HTTP aggregator latency")
+    parser.add_argument("--rpc-delay-ms", type=float, default=0.0, help="Simulated JSON-RPC latency")
+    parser.add_argument("--payloads", help="Recorded venue API responses (JSON, keyed by venue)")
+    parser.add_argument("--json", help="Also write the full report to this path")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")  # dry-run fills log at WARNING
+
+    payloads = None
+    if args.payloads:
+        with open(args.payloads) as f:
+            payloads = json.load(f)
+
+    report = run_benchmark(
+        cycles=args.cycles, intents=args.intents, discovery_rounds=args.discovery_rounds, seed=args.seed,
+        quote_delay_ms=args.quote_delay_ms, rpc_delay_ms=args.rpc_delay_ms, payloads=payloads,
+    )
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
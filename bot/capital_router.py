@@ -29,7 +29,6 @@ from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from web3 import Web3
-from web3.middleware import geth_poa_middleware
 from dotenv import load_dotenv
 
 # Ensure bot module is importable
@@ -48,6 +47,8 @@ except ImportError:
     # Add success method for compatibility
     logger.success = logger.info
 
+from bot.rpc_pool import get_web3
+
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
 
 # ============================================================================
@@ -210,18 +211,16 @@ class BalanceScanner:
             
         rpc_urls = [u.strip() for u in raw_rpc.split(",") if u.strip() and u.strip().startswith("http")]
         
-        for rpc_url in rpc_urls:
+        if rpc_urls:
             try:
-                # Ensure we don't have trailing commas or malformed URLs
-                clean_url = rpc_url.strip().split()[0] 
-                w3 = Web3(Web3.HTTPProvider(clean_url, request_kwargs={"timeout": 10}))
-                w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+                # Shared pool: fails over between the URLs per request
+                w3 = get_web3(rpc_urls, name=chain_key, poa=True)
                 # Quick check: try getting chain ID instead of is_connected (faster)
                 w3.eth.chain_id
                 self._w3_cache[chain_key] = w3
                 return w3
             except Exception as e:
-                continue
+                logger.debug(f"RPC pool check failed for {cfg.name}: {e}")
 
         logger.warning(f"All RPCs failed for {cfg.name}")
         return None
@@ -472,14 +471,13 @@ class BridgeEngine:
         cfg = CHAINS[chain_key]
         # Handle comma-separated RPCs
         rpc_urls = [u.strip() for u in cfg.rpc_url.split(",") if u.strip() and u.strip().startswith("http")]
-        for rpc_url in rpc_urls:
+        if rpc_urls:
             try:
-                w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={"timeout": 10}))
-                w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+                w3 = get_web3(rpc_urls, name=chain_key, poa=True)
                 w3.eth.chain_id
                 return w3
             except Exception:
-                continue
+                pass
         raise ConnectionError(f"All RPCs failed for {chain_key}")
 
     def resolve_token_address(self, symbol: str, chain_key: str) -> str:
@@ -5,8 +5,10 @@ from dotenv import load_dotenv
 from loguru import logger
 try:
     from bot.alerts import send_discord_alert
+    from bot.rpc_pool import get_web3
 except ImportError:
     from alerts import send_discord_alert
+    from rpc_pool import get_web3
 
 # Created: 2025-12-28
 
@@ -435,10 +437,12 @@ class ChainManager:
 
     def _connect_with_retry(self, url: str, name: str, retries: int = 3) -> Web3:
         """
-        Connects to an RPC URL with retry logic and failover support.
+        Connects to the shared RPC pool for a chain. The pool scores, hedges and
+        fails over between the comma-separated fallback RPCs on every request.
         """
         # Support for comma-separated fallback RPCs in environment variables
         urls = [u.strip() for u in url.split(",")] if url else []
+        trusted = []
         
         for current_url in urls:
             # SECURITY FIX (KRN-24-007): Reject any RPC URL not on the trusted allowlist.
@@ -448,17 +452,17 @@ class ChainManager:
                     f"{current_url[:80]}… — add it to _TRUSTED_RPC_PREFIXES if legitimate."
                 )
                 continue
+            trusted.append(current_url)
 
+        if trusted:
+            w3 = get_web3(trusted, name=name)
             for i in range(retries):
                 try:
-                    w3 = Web3(Web3.HTTPProvider(current_url, request_kwargs={'timeout': 10}))
                     if w3.is_connected():
-                        logger.info(f"Connected to {name} RPC: {current_url}")
+                        logger.info(f"Connected to {name} RPC pool ({len(trusted)} endpoint(s))")
                         return w3
                 except Exception as e:
-                    logger.warning(f"Retry {i+1}/{retries} for {name} RPC ({current_url}) failed: {_sanitize_exc(e)}")
-            
-            logger.error(f"Failed to connect to {name} RPC at {current_url}. Trying next fallback...")
+                    logger.warning(f"Retry {i+1}/{retries} for {name} RPC pool failed: {_sanitize_exc(e)}")
         
         logger.critical(f"ALL RPC FALLBACKS FAILED FOR {name}!")
         send_discord_alert(f"CRITICAL: All RPC fallbacks failed for {name}!", level="CRITICAL")
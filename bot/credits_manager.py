@@ -1,95 +1,251 @@
 # Created: 2025-12-29
+# Updated: 2026-10-19 - SQLite (WAL) ledger with batched accrual and indexed leaderboards
+# Updated: 2026-10-19 - Atomic JSON snapshots for the dashboard; payouts claimed through the ledger
 import os
 import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
 from loguru import logger
 
+CREDITS_COLUMNS = ("total_credits", "last_update", "multiplier", "referred_by", "referral_count")
+REFERRAL_COLUMNS = ("pending_commissions", "total_earned", "total_volume_referred", "referral_count", "wealth_velocity")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS credits (
+    address         TEXT PRIMARY KEY,
+    total_credits   REAL    NOT NULL DEFAULT 0,
+    last_update     INTEGER NOT NULL DEFAULT 0,
+    multiplier      REAL    NOT NULL DEFAULT 1.0,
+    referred_by     TEXT,
+    referral_count  INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_credits_total ON credits (total_credits DESC);
+
+CREATE TABLE IF NOT EXISTS referrals (
+    address               TEXT PRIMARY KEY,
+    pending_commissions   REAL    NOT NULL DEFAULT 0,
+    total_earned          REAL    NOT NULL DEFAULT 0,
+    total_volume_referred REAL    NOT NULL DEFAULT 0,
+    referral_count        INTEGER NOT NULL DEFAULT 0,
+    wealth_velocity       REAL    NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_referrals_earned ON referrals (total_earned DESC);
+"""
+
+
 class CreditsManager:
     """
     Manages the Kerne Credits (Points Program) and Referral Commissions.
     Points are awarded based on TVL contribution and time.
     Commissions are real ETH-based rewards from performance fees.
+
+    Storage is a SQLite ledger in WAL mode: each update touches only the
+    affected rows, leaderboards are served from indexes, and a whole points
+    epoch can be committed as one transaction via accrue_epoch() or batch().
+
+    The ledger is the source of truth. db_path / referral_db_path are the
+    JSON files the dashboard reads: they are imported once on first start and
+    then re-exported atomically at most every `snapshot_interval` seconds
+    after a commit (and on close). Commission payouts go through
+    claim_commissions(), never through the snapshots.
     """
-    
-    def __init__(self, db_path: str = "bot/data/credits.json", referral_db_path: str = "bot/data/referrals.json"):
+
+    def __init__(self, db_path: str = "bot/data/credits.json", referral_db_path: str = "bot/data/referrals.json",
+                 ledger_path: str = "bot/data/credits.db", snapshot_interval: float = 30.0):
         self.db_path = db_path
         self.referral_db_path = referral_db_path
-        self._ensure_db_exists()
-        self.credits_data = self._load_db()
-        self.referral_data = self._load_referral_db()
-
-    def _ensure_db_exists(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        if not os.path.exists(self.db_path):
-            with open(self.db_path, "w") as f:
-                json.dump({}, f)
-        if not os.path.exists(self.referral_db_path):
-            with open(self.referral_db_path, "w") as f:
-                json.dump({}, f)
-
-    def _load_db(self):
-        try:
-            with open(self.db_path, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
-
-    def _load_referral_db(self):
-        try:
-            with open(self.referral_db_path, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
-
-    def _save_db(self):
-        with open(self.db_path, "w") as f:
-            json.dump(self.credits_data, f, indent=4)
-        with open(self.referral_db_path, "w") as f:
-            json.dump(self.referral_data, f, indent=4)
+        self.ledger_path = ledger_path
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot = float("-inf")
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        os.makedirs(os.path.dirname(self.ledger_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.ledger_path, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._import_legacy_json(self.db_path, self.referral_db_path)
 
-    def update_credits(self, address: str, balance_eth: float, referred_by: str = None):
+    def _import_legacy_json(self, credits_path: str, referral_path: str):
+        """One-time migration from the old whole-file JSON databases."""
+        if self.conn.execute("SELECT 1 FROM credits LIMIT 1").fetchone():
+            return
+
+        def _load(path):
+            try:
+                with open(path, "r") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                return {}
+
+        credits_data = _load(credits_path)
+        referral_data = _load(referral_path)
+        if not credits_data and not referral_data:
+            return
+
+        with self.batch():
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO credits (address, total_credits, last_update, multiplier, referred_by, referral_count) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (addr.lower(), row.get("total_credits", 0.0), row.get("last_update", 0),
+                     row.get("multiplier", 1.0), row.get("referred_by"), row.get("referral_count", 0))
+                    for addr, row in credits_data.items()
+                ]
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO referrals (address, pending_commissions, total_earned, total_volume_referred, referral_count, wealth_velocity) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (addr.lower(), *(row.get(col, 0.0) for col in REFERRAL_COLUMNS))
+                    for addr, row in referral_data.items()
+                ]
+            )
+        logger.info(f"Imported {len(credits_data)} credit accounts and {len(referral_data)} referrers from legacy JSON")
+
+    @contextmanager
+    def batch(self):
         """
-        Updates credits for a specific address.
-        Called periodically by the main loop.
-        Implements Tiered Referrals: 10% for direct, 5% for secondary.
+        Groups all writes inside the block into a single transaction.
+        Nested batches join the outermost one; an exception rolls everything back.
         """
+        with self._lock:
+            outermost = self._batch_depth == 0
+            if outermost:
+                self.conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth += 1
+            try:
+                yield
+            except Exception:
+                self._batch_depth -= 1
+                if outermost:
+                    self.conn.execute("ROLLBACK")
+                raise
+            self._batch_depth -= 1
+            if outermost:
+                self.conn.execute("COMMIT")
+                if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+                    self.export_snapshots()
+
+    def _write_snapshot(self, path: str, payload: Dict):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, indent=4)
+        os.replace(tmp_path, path)
+
+    def export_snapshots(self):
+        """Atomically rewrites the credits and referral JSON files the dashboard reads."""
+        with self._lock:
+            credits_rows = self.conn.execute("SELECT * FROM credits").fetchall()
+            referral_rows = self.conn.execute("SELECT * FROM referrals").fetchall()
+            self._last_snapshot = time.monotonic()
+        self._write_snapshot(self.db_path, {row["address"]: {col: row[col] for col in CREDITS_COLUMNS}
+                                            for row in credits_rows})
+        self._write_snapshot(self.referral_db_path, {row["address"]: {col: row[col] for col in REFERRAL_COLUMNS}
+                                                     for row in referral_rows})
+
+    def checkpoint(self):
+        """Folds the WAL back into the main database file (crash-safe snapshot point)."""
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.export_snapshots()
+        self.checkpoint()
+        self.conn.close()
+
+    def _get_account(self, address: str) -> Optional[sqlite3.Row]:
+        return self.conn.execute("SELECT * FROM credits WHERE address = ?", (address,)).fetchone()
+
+    def _add_credits(self, address: str, amount: float):
+        self.conn.execute(
+            "UPDATE credits SET total_credits = total_credits + ? WHERE address = ?", (amount, address)
+        )
+
+    def _accrue(self, address: str, balance_eth: float, referred_by: str = None) -> float:
+        """Accrual for one address; must run inside batch()."""
         address = address.lower()
-        if address not in self.credits_data:
-            self.credits_data[address] = {
-                "total_credits": 0.0,
-                "last_update": 0,
-                "multiplier": 1.0,
-                "referred_by": referred_by.lower() if referred_by else None,
-                "referral_count": 0
-            }
+        account = self._get_account(address)
+        if account is None:
+            ref_addr = referred_by.lower() if referred_by else None
+            self.conn.execute(
+                "INSERT INTO credits (address, total_credits, last_update, multiplier, referred_by, referral_count) "
+                "VALUES (?, 0.0, 0, 1.0, ?, 0)",
+                (address, ref_addr)
+            )
             # If this user was referred, update the referrer's count and multiplier
-            if referred_by:
-                ref_addr = referred_by.lower()
-                if ref_addr in self.credits_data:
-                    self.credits_data[ref_addr]["referral_count"] += 1
-                    # Each referral adds 0.1 to multiplier, max 3.0 (Viral Expansion)
-                    self.credits_data[ref_addr]["multiplier"] = min(3.0, 1.0 + (self.credits_data[ref_addr]["referral_count"] * 0.1))
-                    logger.info(f"Referrer {ref_addr} multiplier updated to {self.credits_data[ref_addr]['multiplier']:.2f}")
-        
+            if ref_addr and self._get_account(ref_addr) is not None:
+                # Each referral adds 0.1 to multiplier, max 3.0 (Viral Expansion)
+                self.conn.execute(
+                    "UPDATE credits SET referral_count = referral_count + 1, "
+                    "multiplier = MIN(3.0, 1.0 + (referral_count + 1) * 0.1) WHERE address = ?",
+                    (ref_addr,)
+                )
+                logger.debug(f"Referrer {ref_addr} multiplier updated")
+            account = self._get_account(address)
+
         # Simple accrual logic: 1 credit per ETH per hour
-        accrual = balance_eth * self.credits_data[address]["multiplier"]
-        self.credits_data[address]["total_credits"] += accrual
-        
+        accrual = balance_eth * account["multiplier"]
+        self.conn.execute(
+            "UPDATE credits SET total_credits = total_credits + ?, last_update = ? WHERE address = ?",
+            (accrual, int(time.time()), address)
+        )
+
         # Tier 1 Referral bonus: Direct referrer gets 10%
-        ref_addr = self.credits_data[address].get("referred_by")
-        if ref_addr and ref_addr in self.credits_data:
-            ref_bonus = accrual * 0.10
-            self.credits_data[ref_addr]["total_credits"] += ref_bonus
-            logger.info(f"Tier 1 Referral bonus of {ref_bonus:.4f} awarded to {ref_addr}")
+        ref_addr = account["referred_by"]
+        referrer = self._get_account(ref_addr) if ref_addr else None
+        if referrer is not None:
+            self._add_credits(ref_addr, accrual * 0.10)
 
             # Tier 2 Referral bonus: Secondary referrer gets 5%
-            secondary_ref_addr = self.credits_data[ref_addr].get("referred_by")
-            if secondary_ref_addr and secondary_ref_addr in self.credits_data:
-                sec_bonus = accrual * 0.05
-                self.credits_data[secondary_ref_addr]["total_credits"] += sec_bonus
-                logger.info(f"Tier 2 Referral bonus of {sec_bonus:.4f} awarded to {secondary_ref_addr}")
+            secondary_ref_addr = referrer["referred_by"]
+            if secondary_ref_addr and self._get_account(secondary_ref_addr) is not None:
+                self._add_credits(secondary_ref_addr, accrual * 0.05)
+
+        return accrual
+
+    def update_credits(self, address: str, balance_eth: float, referred_by: str = None):
+        """
+        Updates credits for a specific address.
+        Called periodically by the main loop.
+        Implements Tiered Referrals: 10% for direct, 5% for secondary.
+        """
+        with self.batch():
+            accrual = self._accrue(address, balance_eth, referred_by)
+        logger.info(f"Accrued {accrual:.4f} credits for {address.lower()}. Total: {self.get_credits(address):.4f}")
+
+    def accrue_epoch(self, balances: Iterable[Tuple]) -> int:
+        """
+        Accrues a whole points epoch in one transaction.
+        balances: iterable of (address, balance_eth) or (address, balance_eth, referred_by).
+        Returns the number of accounts accrued.
+        """
+        count = 0
+        total = 0.0
+        started = time.perf_counter()
+        with self.batch():
+            for entry in balances:
+                address, balance_eth = entry[0], entry[1]
+                referred_by = entry[2] if len(entry) > 2 else None
+                total += self._accrue(address, balance_eth, referred_by)
+                count += 1
+        logger.info(f"Epoch accrual committed: {count} accounts, {total:.4f} credits in {time.perf_counter() - started:.2f}s")
+        return count
 
-        logger.info(f"Accrued {accrual:.4f} credits for {address}. Total: {self.credits_data[address]['total_credits']:.4f}")
-        self._save_db()
+    def _ensure_referrer(self, address: str):
+        self.conn.execute("INSERT OR IGNORE INTO referrals (address) VALUES (?)", (address,))
+
+    def _add_commission(self, address: str, amount: float):
+        self.conn.execute(
+            "UPDATE referrals SET pending_commissions = pending_commissions + ?, total_earned = total_earned + ? "
+            "WHERE address = ?",
+            (amount, amount, address)
+        )
 
     def calculate_referral_commissions(self, address: str, harvested_yield_eth: float):
         """
@@ -97,76 +253,89 @@ class CreditsManager:
         harvested_yield_eth: The total yield harvested for this user in this period.
         """
         address = address.lower()
-        if address not in self.credits_data:
-            return
+        with self.batch():
+            account = self._get_account(address)
+            if account is None:
+                return
+
+            # Tier 1 Referral bonus: Direct referrer gets 10% of performance fee
+            # Assuming performance fee is 20% of yield
+            performance_fee = harvested_yield_eth * 0.20
 
-        # Tier 1 Referral bonus: Direct referrer gets 10% of performance fee
-        # Assuming performance fee is 20% of yield
-        performance_fee = harvested_yield_eth * 0.20
-        
-        ref_addr = self.credits_data[address].get("referred_by")
-        if ref_addr:
-            ref_addr = ref_addr.lower()
-            if ref_addr not in self.referral_data:
-                self.referral_data[ref_addr] = {
-                    "pending_commissions": 0.0,
-                    "total_earned": 0.0,
-                    "total_volume_referred": 0.0,
-                    "referral_count": 0,
-                    "wealth_velocity": 0.0
-                }
-            
-            tier1_bonus = performance_fee * 0.10
-            self.referral_data[ref_addr]["pending_commissions"] += tier1_bonus
-            self.referral_data[ref_addr]["total_earned"] += tier1_bonus
-            logger.info(f"Tier 1 ETH Commission of {tier1_bonus:.6f} awarded to {ref_addr}")
-
-            # Tier 2 Referral bonus: Secondary referrer gets 5% of performance fee
-            secondary_ref_addr = self.credits_data.get(ref_addr, {}).get("referred_by")
-            if secondary_ref_addr:
-                secondary_ref_addr = secondary_ref_addr.lower()
-                if secondary_ref_addr not in self.referral_data:
-                    self.referral_data[secondary_ref_addr] = {
-                        "pending_commissions": 0.0,
-                        "total_earned": 0.0,
-                        "total_volume_referred": 0.0,
-                        "referral_count": 0,
-                        "wealth_velocity": 0.0
-                    }
-                
-                tier2_bonus = performance_fee * 0.05
-                self.referral_data[secondary_ref_addr]["pending_commissions"] += tier2_bonus
-                self.referral_data[secondary_ref_addr]["total_earned"] += tier2_bonus
-                logger.info(f"Tier 2 ETH Commission of {tier2_bonus:.6f} awarded to {secondary_ref_addr}")
-
-        self._save_db()
+            ref_addr = account["referred_by"]
+            if ref_addr:
+                ref_addr = ref_addr.lower()
+                self._ensure_referrer(ref_addr)
+                tier1_bonus = performance_fee * 0.10
+                self._add_commission(ref_addr, tier1_bonus)
+                logger.info(f"Tier 1 ETH Commission of {tier1_bonus:.6f} awarded to {ref_addr}")
+
+                # Tier 2 Referral bonus: Secondary referrer gets 5% of performance fee
+                referrer = self._get_account(ref_addr)
+                secondary_ref_addr = referrer["referred_by"] if referrer is not None else None
+                if secondary_ref_addr:
+                    secondary_ref_addr = secondary_ref_addr.lower()
+                    self._ensure_referrer(secondary_ref_addr)
+                    tier2_bonus = performance_fee * 0.05
+                    self._add_commission(secondary_ref_addr, tier2_bonus)
+                    logger.info(f"Tier 2 ETH Commission of {tier2_bonus:.6f} awarded to {secondary_ref_addr}")
+
+    def claim_commissions(self, address: str) -> float:
+        """
+        Zeroes an address's pending ETH commissions in the ledger and returns
+        the amount claimed (0.0 if nothing was pending). The read and the reset
+        share one transaction, so a balance can only be claimed once.
+        """
+        address = address.lower()
+        with self.batch():
+            row = self.conn.execute(
+                "SELECT pending_commissions FROM referrals WHERE address = ?", (address,)
+            ).fetchone()
+            amount = row["pending_commissions"] if row else 0.0
+            if amount > 0:
+                self.conn.execute("UPDATE referrals SET pending_commissions = 0 WHERE address = ?", (address,))
+        if amount > 0:
+            self.export_snapshots()
+            logger.info(f"Commission payout of {amount:.6f} ETH claimed by {address}")
+        return amount
 
     def get_credits(self, address: str) -> float:
-        return self.credits_data.get(address.lower(), {}).get("total_credits", 0.0)
+        row = self.conn.execute(
+            "SELECT total_credits FROM credits WHERE address = ?", (address.lower(),)
+        ).fetchone()
+        return row["total_credits"] if row else 0.0
 
-    def get_leaderboard(self, limit: int = 10):
+    def get_leaderboard(self, limit: int = 10) -> List[Tuple[str, Dict]]:
         """
-        Returns the top addresses by total credits.
+        Returns the top addresses by total credits (index scan, O(limit)).
         """
-        sorted_data = sorted(
-            self.credits_data.items(),
-            key=lambda x: x[1].get("total_credits", 0.0),
-            reverse=True
-        )
-        return sorted_data[:limit]
+        rows = self.conn.execute(
+            "SELECT * FROM credits ORDER BY total_credits DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [(row["address"], {col: row[col] for col in CREDITS_COLUMNS}) for row in rows]
 
-    def get_referral_leaderboard(self, limit: int = 10):
+    def get_referral_leaderboard(self, limit: int = 10) -> List[Tuple[str, Dict]]:
         """
-        Returns the top referrers by total volume referred or referral count.
+        Returns the top referrers by total ETH commissions earned.
         """
-        sorted_data = sorted(
-            self.referral_data.items(),
-            key=lambda x: x[1].get("total_earned", 0.0),
-            reverse=True
-        )
-        return sorted_data[:limit]
+        rows = self.conn.execute(
+            "SELECT * FROM referrals ORDER BY total_earned DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [(row["address"], {col: row[col] for col in REFERRAL_COLUMNS}) for row in rows]
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kerne Credits ledger")
+    subparsers = parser.add_subparsers(dest="command")
+    claim_parser = subparsers.add_parser("claim", help="Claim an address's pending commissions; prints JSON")
+    claim_parser.add_argument("address")
+    args = parser.parse_args()
+
     manager = CreditsManager()
-    manager.update_credits("0x1234567890123456789012345678901234567890", 10.5)
-    print(f"Credits: {manager.get_credits('0x1234567890123456789012345678901234567890')}")
+    if args.command == "claim":
+        print(json.dumps({"address": args.address.lower(), "amount": manager.claim_commissions(args.address)}))
+    else:
+        manager.update_credits("0x1234567890123456789012345678901234567890", 10.5)
+        print(f"Credits: {manager.get_credits('0x1234567890123456789012345678901234567890')}")
+    manager.close()
@@ -1,11 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import Tuple, Dict
+from typing import Tuple, Dict, List
 
 class BaseExchange(ABC):
     """
     Abstract base class for all exchange adapters (CEX and DEX).
     Standardizes the interface for hedging and solvency reporting.
     """
+
+    # Execution cost model used by SmartRouter (override per venue)
+    TAKER_FEE_BPS: float = 5.0
+    EXPECTED_LATENCY_MS: float = 150.0
+    ORDER_BOOK_DEPTH: int = 100
+    # Hours between funding payments; get_funding_rate returns the rate per interval
+    FUNDING_INTERVAL_HOURS: float = 8.0
     
     @abstractmethod
     def get_market_price(self, symbol: str) -> float:
@@ -55,9 +62,17 @@ class BaseExchange(ABC):
         pass
 
     @abstractmethod
-    def get_order_book(self, symbol: str) -> Dict:
+    def get_order_book(self, symbol: str, depth: int = None) -> Dict:
         """
         Returns the order book for a symbol.
+        depth: levels per side (defaults to ORDER_BOOK_DEPTH, the deepest the venue serves).
         """
         pass
 
+    def get_funding_universe(self) -> List[Dict]:
+        """
+        Funding for every perp the venue lists, in one request where the venue allows.
+        Rows: {symbol, asset, funding_rate (per interval), interval_hours, mark_price, open_interest_usd}.
+        Venues that cannot list their universe return [].
+        """
+        return []
@@ -5,6 +5,10 @@ from loguru import logger
 from exchanges.base import BaseExchange
 
 class BinanceExchange(BaseExchange):
+    TAKER_FEE_BPS = 4.0
+    EXPECTED_LATENCY_MS = 120.0
+    ORDER_BOOK_DEPTH = 1000
+
     def __init__(self):
         self.api_key = os.getenv("BINANCE_API_KEY")
         self.secret = os.getenv("BINANCE_SECRET")
@@ -92,10 +96,31 @@ class BinanceExchange(BaseExchange):
             logger.error(f"Binance Error liquidation price: {e}")
             return 0.0
 
-    def get_order_book(self, symbol: str) -> dict:
+    def get_order_book(self, symbol: str, depth: int = None) -> dict:
         try:
-            return self.exchange.fetch_order_book(symbol)
+            return self.exchange.fetch_order_book(symbol, limit=depth or self.ORDER_BOOK_DEPTH)
         except Exception as e:
             logger.error(f"Binance Error order book: {e}")
             return {"bids": [], "asks": []}
 
+    def get_funding_universe(self) -> list:
+        try:
+            rates = self.exchange.fetch_funding_rates()
+        except Exception as e:
+            logger.error(f"Binance Error funding universe: {e}")
+            return []
+        rows = []
+        for symbol, funding in rates.items():
+            if funding.get('fundingRate') is None:
+                continue
+            oi = (funding.get('info') or {}).get('openInterestValue')
+            interval = funding.get('interval') or ''
+            rows.append({
+                "symbol": symbol,
+                "asset": symbol.split('/')[0],
+                "funding_rate": float(funding['fundingRate']),
+                "interval_hours": float(interval[:-1]) if interval.endswith('h') else self.FUNDING_INTERVAL_HOURS,
+                "mark_price": float(funding['markPrice']) if funding.get('markPrice') else None,
+                "open_interest_usd": float(oi) if oi else None,
+            })
+        return rows
@@ -5,6 +5,10 @@ from loguru import logger
 from exchanges.base import BaseExchange
 
 class BybitExchange(BaseExchange):
+    TAKER_FEE_BPS = 5.5
+    EXPECTED_LATENCY_MS = 150.0
+    ORDER_BOOK_DEPTH = 500
+
     def __init__(self, use_linear: bool = True):
         self.api_key = os.getenv("BYBIT_API_KEY")
         self.secret = os.getenv("BYBIT_SECRET")
@@ -89,10 +93,31 @@ class BybitExchange(BaseExchange):
             logger.error(f"Bybit Error liquidation price: {e}")
             return 0.0
 
-    def get_order_book(self, symbol: str) -> dict:
+    def get_order_book(self, symbol: str, depth: int = None) -> dict:
         try:
-            return self.exchange.fetch_order_book(symbol)
+            return self.exchange.fetch_order_book(symbol, limit=depth or self.ORDER_BOOK_DEPTH)
         except Exception as e:
             logger.error(f"Bybit Error order book: {e}")
             return {"bids": [], "asks": []}
 
+    def get_funding_universe(self) -> list:
+        try:
+            rates = self.exchange.fetch_funding_rates()
+        except Exception as e:
+            logger.error(f"Bybit Error funding universe: {e}")
+            return []
+        rows = []
+        for symbol, funding in rates.items():
+            if funding.get('fundingRate') is None:
+                continue
+            oi = (funding.get('info') or {}).get('openInterestValue')
+            interval = funding.get('interval') or ''
+            rows.append({
+                "symbol": symbol,
+                "asset": symbol.split('/')[0],
+                "funding_rate": float(funding['fundingRate']),
+                "interval_hours": float(interval[:-1]) if interval.endswith('h') else self.FUNDING_INTERVAL_HOURS,
+                "mark_price": float(funding['markPrice']) if funding.get('markPrice') else None,
+                "open_interest_usd": float(oi) if oi else None,
+            })
+        return rows
@@ -8,8 +8,14 @@ import eth_account
 from exchanges.base import BaseExchange
 
 class HyperliquidExchange(BaseExchange):
-    def __init__(self, use_testnet: bool = False):
-        self.private_key = os.getenv("HYPERLIQUID_PRIVATE_KEY") or os.getenv("STRATEGIST_PRIVATE_KEY")
+    TAKER_FEE_BPS = 4.5
+    EXPECTED_LATENCY_MS = 200.0
+    # l2Book always returns the top 20 levels per side
+    ORDER_BOOK_DEPTH = 20
+    FUNDING_INTERVAL_HOURS = 1.0
+
+    def __init__(self, use_testnet: bool = False, private_key: str = None):
+        self.private_key = private_key or os.getenv("HYPERLIQUID_PRIVATE_KEY") or os.getenv("STRATEGIST_PRIVATE_KEY")
         if not self.private_key:
             raise ValueError("Missing Hyperliquid Private Key")
 
@@ -135,7 +141,7 @@ class HyperliquidExchange(BaseExchange):
             logger.error(f"HL Error liquidation price: {e}")
             return 0.0
 
-    def get_order_book(self, symbol: str) -> dict:
+    def get_order_book(self, symbol: str, depth: int = None) -> dict:
         try:
             l2_snapshot = self.info.l2_snapshot(symbol)
             levels = l2_snapshot.get("levels", [[], []])
@@ -147,6 +153,25 @@ class HyperliquidExchange(BaseExchange):
             logger.error(f"HL Error order book: {e}")
             return {"bids": [], "asks": []}
 
+    def get_funding_universe(self) -> list:
+        try:
+            universe, asset_ctxs = self.info.meta_and_asset_ctxs()
+        except Exception as e:
+            logger.error(f"HL Error funding universe: {e}")
+            return []
+        rows = []
+        for asset, ctx in zip(universe["universe"], asset_ctxs):
+            mark = float(ctx.get("markPx") or 0.0)
+            rows.append({
+                "symbol": asset["name"],
+                "asset": asset["name"],
+                "funding_rate": float(ctx["funding"]),
+                "interval_hours": self.FUNDING_INTERVAL_HOURS,
+                "mark_price": mark or None,
+                "open_interest_usd": float(ctx.get("openInterest") or 0.0) * mark or None,
+            })
+        return rows
+
     def withdraw_to_onchain(self, amount_usd: float, destination_address: str = None) -> bool:
         """
         Withdraws USDC from Hyperliquid to an on-chain address (Arbitrum).
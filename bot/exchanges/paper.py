@@ -0,0 +1,67 @@
+# Created: 2026-10-19
+import threading
+from typing import Callable, Dict, Tuple
+
+try:
+    from bot.exchanges.base import BaseExchange
+except ImportError:
+    from exchanges.base import BaseExchange
+
+
+class PaperExchange(BaseExchange):
+    """
+    In-memory exchange for local runs and tests. Fills every market order at
+    the mark price supplied by `price_feed` and keeps positions per instance.
+    """
+    TAKER_FEE_BPS = 0.0
+    EXPECTED_LATENCY_MS = 0.0
+
+    def __init__(self, price_feed: Callable[[str], float], collateral_usd: float = 100_000.0,
+                 funding_rate: float = 0.0):
+        self.price_feed = price_feed
+        self.collateral_usd = collateral_usd
+        self.funding_rate = funding_rate
+        self.positions: Dict[str, Tuple[float, float]] = {}  # symbol -> (signed size, avg entry)
+        self.orders = 0
+        self._lock = threading.Lock()
+
+    def get_market_price(self, symbol: str) -> float:
+        return self.price_feed(symbol)
+
+    def get_position(self, symbol: str) -> Tuple[float, float]:
+        """Absolute size like the live adapters (the hedge is short), plus signed uPnL."""
+        size, entry = self.positions.get(symbol, (0.0, 0.0))
+        return abs(size), size * (self.get_market_price(symbol) - entry) if size else 0.0
+
+    def get_collateral_balance(self) -> float:
+        return self.collateral_usd
+
+    def get_total_equity(self) -> float:
+        return self.collateral_usd + sum(self.get_position(symbol)[1] for symbol in self.positions)
+
+    def execute_order(self, symbol: str, size: float, side: str) -> bool:
+        price = self.get_market_price(symbol)
+        signed = size if side.lower() == "buy" else -size
+        with self._lock:
+            current, entry = self.positions.get(symbol, (0.0, 0.0))
+            new_size = current + signed
+            if abs(new_size) < 1e-12:
+                self.positions.pop(symbol, None)
+            elif current == 0 or (current > 0) != (new_size > 0):
+                self.positions[symbol] = (new_size, price)
+            elif abs(new_size) > abs(current):
+                self.positions[symbol] = (new_size, (current * entry + signed * price) / new_size)
+            else:
+                self.positions[symbol] = (new_size, entry)
+            self.orders += 1
+        return True
+
+    def get_funding_rate(self, symbol: str) -> float:
+        return self.funding_rate
+
+    def get_liquidation_price(self, symbol: str) -> float:
+        return 0.0
+
+    def get_order_book(self, symbol: str, depth: int = None) -> Dict:
+        price = self.get_market_price(symbol)
+        return {"bids": [[price * 0.9999, 1_000.0]], "asks": [[price * 1.0001, 1_000.0]]}
@@ -1,5 +1,6 @@
 # Created: 2026-01-15
 # Updated: 2026-01-16 - Productionization: RiskGate, MEV Protection, Precise Gas, Metrics
+# Updated: 2026-10-19 - Single-round discover_once() split out of run_discovery for benchmarking; EIP-55 token addresses
 """
 Graph-Based Flash Arbitrage Discovery Engine
 ============================================
@@ -106,11 +107,11 @@ class GraphArbScanner:
     USDC = Token("USDC", "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913", 6)
     KUSD = Token("kUSD", "0xb50bFec5FF426744b9d195a8C262da376637Cb6A", 6)
     CBETH = Token("cbETH", "0x2Ae3F1Ec7F1F5012CFEab0185bfc7aa3cf0DEc22", 18)
-    DAI = Token("DAI", "0x50c5725949A6F0c72E6C4a641F24049A917FA061", 18)
+    DAI = Token("DAI", "0x50C5725949A6f0c72E6C4a641F24049a917fA061", 18)
     WSTETH = Token("wstETH", "0x5979D7b546E38E414F7E9822514be443A4800529", 18)
-    SNX = Token("SNX", "0x22e6966B799c4D5d13BE9b3d189446752621ec0C", 18)
-    LINK = Token("LINK", "0xfab36e4CE90CdfF5Af996a7a8f737eB327263b62", 18)
-    LUSD = Token("LUSD", "0x1693521fd90BB9707Cc0660AcAA00161Cbcc2Bc0", 18)
+    SNX = Token("SNX", "0x22e6966b799c4D5d13Be9b3d189446752621EC0c", 18)
+    LINK = Token("LINK", "0xFaB36e4cE90CdFF5Af996a7A8f737Eb327263b62", 18)
+    LUSD = Token("LUSD", "0x1693521Fd90Bb9707Cc0660AcaA00161cbCc2bC0", 18)
     USDBC = Token("USDbC", "0xd9aAEc86B65D86f6A7B5B1b0c42FFA531710b6CA", 6)
     CBBTC = Token("cbBTC", "0xcbB7C0000aB88B473b1f5aFd9ef808440eed33Bf", 8)
 
@@ -551,51 +552,60 @@ class GraphArbScanner:
             logger.error(f"Risk check failed: {e}")
             return False, 0.0
 
+    async def discover_once(self, multiplier: float = 1.0) -> List[ArbPath]:
+        """
+        One discovery round over every base token: Bellman-Ford over fresh edge
+        quotes, then exact evaluation of each candidate cycle.
+        Returns opportunities sorted by net profit (best first).
+        """
+        start_time = time.time()
+        base_tokens = [self.WETH, self.USDC, self.KUSD]
+
+        tasks = []
+        for base_token in base_tokens:
+            # Determine amount for discovery
+            amount = int(self.max_trade_size_eth * multiplier * (10 ** base_token.decimals)) if base_token == self.WETH else int(10000 * multiplier * (10 ** base_token.decimals))
+            if amount == 0: continue
+
+            # Use Bellman-Ford for discovery
+            # Note: BF is heavier on RPC (fetches all edges), so we might want to alternate or use it less frequently
+            # For now, we replace DFS with BF as requested.
+            cycles = await self.find_profitable_cycles_bellman_ford(base_token, amount)
+
+            # If BF returns nothing (or fails), fallback to DFS? 
+            # BF is superior, so let's trust it. But we still need to evaluate the specific path 
+            # with exact amounts to get the ArbPath object with profit_usd.
+
+            for cycle in cycles:
+                # BF finds the cycle structure. We still need to run evaluate_cycle 
+                # to get the precise profit/gas estimation and ArbPath object.
+                tasks.append(self.evaluate_cycle(cycle, base_token, amount))
+
+        results = await asyncio.gather(*tasks)
+        opportunities = [r for r in results if r]
+
+        latency = time.time() - start_time
+        for base_token in base_tokens:
+            self.metrics.record_discovery(base_token.symbol, 4, latency)
+
+        opportunities.sort(key=lambda x: x.profit_usd, reverse=True)
+        return opportunities
+
     async def run_discovery(self):
         logger.info("Starting production graph-based discovery...")
-        base_tokens = [self.WETH, self.USDC, self.KUSD]
         
         while True:
-            start_time = time.time()
             # Check risk before starting a round
             allowed, multiplier = await self.check_sentinel_risk(10000.0) # Assume $10k avg arb size for check
             if not allowed:
                 await asyncio.sleep(10.0)
                 continue
 
-            tasks = []
-            for base_token in base_tokens:
-                # Determine amount for discovery
-                amount = int(self.max_trade_size_eth * multiplier * (10 ** base_token.decimals)) if base_token == self.WETH else int(10000 * multiplier * (10 ** base_token.decimals))
-                if amount == 0: continue
-
-                # Use Bellman-Ford for discovery
-                # Note: BF is heavier on RPC (fetches all edges), so we might want to alternate or use it less frequently
-                # For now, we replace DFS with BF as requested.
-                cycles = await self.find_profitable_cycles_bellman_ford(base_token, amount)
-                
-                # If BF returns nothing (or fails), fallback to DFS? 
-                # BF is superior, so let's trust it. But we still need to evaluate the specific path 
-                # with exact amounts to get the ArbPath object with profit_usd.
-                
-                for cycle in cycles:
-                    # BF finds the cycle structure. We still need to run evaluate_cycle 
-                    # to get the precise profit/gas estimation and ArbPath object.
-                    tasks.append(self.evaluate_cycle(cycle, base_token, amount))
-            
             try:
-                results = await asyncio.gather(*tasks)
-                opportunities = [r for r in results if r]
-                
-                latency = time.time() - start_time
-                for base_token in base_tokens:
-                    self.metrics.record_discovery(base_token.symbol, 4, latency)
-
-                if opportunities:
-                    opportunities.sort(key=lambda x: x.profit_usd, reverse=True)
-                    for opp in opportunities:
-                        logger.success(f"🎯 Found Opportunity! {opp}")
-                        await self.execute_arb(opp)
+                opportunities = await self.discover_once(multiplier)
+                for opp in opportunities:
+                    logger.success(f"🎯 Found Opportunity! {opp}")
+                    await self.execute_arb(opp)
             except Exception as e:
                 logger.error(f"Discovery loop error: {e}")
                 if "429" in str(e): self._switch_rpc()
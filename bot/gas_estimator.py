@@ -1,6 +1,11 @@
 # Created: 2026-01-16
+# Updated: 2026-10-19 - Block-keyed gas oracle with local L1 data fee and batch estimates
+import time
+import numpy as np
+from dataclasses import dataclass
 from web3 import Web3
-from typing import Tuple, List
+from hexbytes import HexBytes
+from typing import Optional, Sequence, Tuple, List, Union
 from loguru import logger
 from enum import IntEnum
 
@@ -11,10 +16,28 @@ class DEX(IntEnum):
     MAVERICK = 3
     PANCAKE_V3 = 4
 
+@dataclass
+class GasOracleSnapshot:
+    """Fee parameters for one Base block."""
+    block_number: int
+    l2_gas_price: int          # base fee + priority fee (wei)
+    l1_base_fee: int
+    blob_base_fee: int
+    base_fee_scalar: int
+    blob_base_fee_scalar: int
+    fetched_at: float
+
+
 class BaseGasEstimator:
     """
     Precise gas cost estimation for Base L2.
     Accounts for L2 execution gas and L1 data availability fees.
+
+    Fee parameters are fetched once per new head and cached; the L1 data fee
+    is computed locally with the Ecotone formula, so estimates cost no RPC
+    round trips within a block. Post-Fjord the on-chain oracle discounts
+    compressible calldata, which makes the local figure a slight overestimate
+    (the conservative side for profitability checks).
     """
     
     GAS_ORACLE = "0x420000000000000000000000000000000000000F"
@@ -22,8 +45,23 @@ class BaseGasEstimator:
     GAS_ORACLE_ABI = [
         {"inputs": [{"name": "_data", "type": "bytes"}], "name": "getL1Fee", 
          "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+        {"inputs": [], "name": "l1BaseFee",
+         "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+        {"inputs": [], "name": "blobBaseFee",
+         "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+        {"inputs": [], "name": "baseFeeScalar",
+         "outputs": [{"name": "", "type": "uint32"}], "stateMutability": "view", "type": "function"},
+        {"inputs": [], "name": "blobBaseFeeScalar",
+         "outputs": [{"name": "", "type": "uint32"}], "stateMutability": "view", "type": "function"},
     ]
     
+    # Base produces a block every 2s; the head is not re-polled more often than this
+    BLOCK_TIME_S = 2.0
+    # Ecotone: signature/RLP overhead of the signed tx, in calldata gas
+    TX_OVERHEAD_CALLDATA_GAS = 68 * 16
+    SCALAR_DECIMALS = 10 ** 6
+    FALLBACK_L1_FEE_WEI = int(0.00005 * 1e18)
+    
     # Empirical gas estimates per DEX swap
     GAS_PER_SWAP = {
         DEX.AERODROME: 180_000,
@@ -41,29 +79,117 @@ class BaseGasEstimator:
             address=Web3.to_checksum_address(self.GAS_ORACLE),
             abi=self.GAS_ORACLE_ABI
         )
+        self.snapshot: Optional[GasOracleSnapshot] = None
+        self.refresh_count = 0
+    
+    def _fetch_snapshot(self, block_number: int) -> GasOracleSnapshot:
+        block = self.w3.eth.get_block(block_number)
+        try:
+            priority_fee = self.w3.eth.max_priority_fee
+        except Exception:
+            priority_fee = 0
+        fns = self.oracle.functions
+        return GasOracleSnapshot(
+            block_number=block_number,
+            l2_gas_price=block.get("baseFeePerGas", 0) + priority_fee,
+            l1_base_fee=fns.l1BaseFee().call(block_identifier=block_number),
+            blob_base_fee=fns.blobBaseFee().call(block_identifier=block_number),
+            base_fee_scalar=fns.baseFeeScalar().call(block_identifier=block_number),
+            blob_base_fee_scalar=fns.blobBaseFeeScalar().call(block_identifier=block_number),
+            fetched_at=time.monotonic(),
+        )
+    
+    def update_head(self, block_number: int) -> Optional[GasOracleSnapshot]:
+        """Refresh fee parameters if `block_number` is a new head (e.g. from a block subscription)."""
+        if self.snapshot is not None and block_number <= self.snapshot.block_number:
+            self.snapshot.fetched_at = time.monotonic()
+            return self.snapshot
+        try:
+            self.snapshot = self._fetch_snapshot(block_number)
+            self.refresh_count += 1
+        except Exception as e:
+            logger.warning(f"Gas oracle refresh failed at block {block_number}: {e}")
+        return self.snapshot
+    
+    def get_snapshot(self) -> Optional[GasOracleSnapshot]:
+        """
+        Current fee parameters. Within BLOCK_TIME_S of the last check the cached
+        snapshot is returned without touching the RPC.
+        """
+        if self.snapshot is not None and time.monotonic() - self.snapshot.fetched_at < self.BLOCK_TIME_S:
+            return self.snapshot
+        try:
+            head = self.w3.eth.block_number
+        except Exception as e:
+            logger.warning(f"Gas oracle head poll failed: {e}")
+            return self.snapshot
+        return self.update_head(head)
+    
+    @staticmethod
+    def _as_bytes(calldata: Union[bytes, str]) -> bytes:
+        return bytes(HexBytes(calldata)) if isinstance(calldata, str) else bytes(calldata)
+    
+    @classmethod
+    def calldata_gas(cls, calldata: Union[bytes, str]) -> int:
+        """Ecotone L1 gas for a tx carrying `calldata` (4 per zero byte, 16 per non-zero, plus overhead)."""
+        data = cls._as_bytes(calldata)
+        zeros = data.count(0)
+        return zeros * 4 + (len(data) - zeros) * 16 + cls.TX_OVERHEAD_CALLDATA_GAS
+    
+    def l1_fee_from_gas(self, l1_gas, snapshot: GasOracleSnapshot):
+        """Ecotone L1 data fee; works on ints and numpy arrays alike."""
+        weighted_price = (16 * snapshot.base_fee_scalar * snapshot.l1_base_fee
+                          + snapshot.blob_base_fee_scalar * snapshot.blob_base_fee)
+        return l1_gas * weighted_price // (16 * self.SCALAR_DECIMALS)
+    
+    def l2_gas_limit(self, swap_dexes: Sequence[DEX]) -> int:
+        gas = self.BASE_FLASH_LOAN_GAS
+        for dex in swap_dexes:
+            gas += self.GAS_PER_SWAP.get(dex, 150_000)
+        # Add buffer
+        return int(gas * 1.2)
     
     def estimate_arb_gas(self, swap_dexes: List[DEX], calldata: bytes) -> Tuple[int, int, int]:
         """
         Returns: (l2_gas_cost_wei, l1_fee_wei, total_cost_wei)
         """
-        # L2 execution gas
-        l2_gas_limit = self.BASE_FLASH_LOAN_GAS
-        for dex in swap_dexes:
-            l2_gas_limit += self.GAS_PER_SWAP.get(dex, 150_000)
+        l2_gas_limit = self.l2_gas_limit(swap_dexes)
+        snapshot = self.get_snapshot()
         
-        # Add buffer
-        l2_gas_limit = int(l2_gas_limit * 1.2)
+        if snapshot is None:
+            # Oracle never reachable: fall back to live gas price and a conservative L1 fee
+            l2_cost = l2_gas_limit * self.w3.eth.gas_price
+            return l2_cost, self.FALLBACK_L1_FEE_WEI, l2_cost + self.FALLBACK_L1_FEE_WEI
         
-        l2_gas_price = self.w3.eth.gas_price
-        l2_cost = l2_gas_limit * l2_gas_price
+        l2_cost = l2_gas_limit * snapshot.l2_gas_price
+        l1_fee = self.l1_fee_from_gas(self.calldata_gas(calldata), snapshot)
+        return l2_cost, l1_fee, l2_cost + l1_fee
+    
+    def estimate_batch(self, swap_dex_lists: Sequence[Sequence[DEX]],
+                       calldatas: Sequence[Union[bytes, str]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Vectorised estimate_arb_gas for many candidate transactions against
+        one snapshot. Returns (l2_cost_wei, l1_fee_wei, total_cost_wei) as
+        int64 arrays (float64 if costs could overflow).
+        """
+        l2_limits = np.fromiter((self.l2_gas_limit(d) for d in swap_dex_lists), dtype=np.int64,
+                                count=len(swap_dex_lists))
+        l1_gas = np.fromiter((self.calldata_gas(c) for c in calldatas), dtype=np.int64, count=len(calldatas))
+        snapshot = self.get_snapshot()
         
-        # L1 data fee
-        try:
-            l1_fee = self.oracle.functions.getL1Fee(calldata).call()
-        except Exception as e:
-            logger.warning(f"L1 fee estimation failed: {e}")
-            l1_fee = int(0.00005 * 1e18) # Conservative fallback
+        if snapshot is None:
+            l2_cost = l2_limits.astype(np.float64) * self.w3.eth.gas_price
+            l1_fee = np.full(len(l1_gas), float(self.FALLBACK_L1_FEE_WEI))
+            return l2_cost, l1_fee, l2_cost + l1_fee
         
+        # Wei amounts can exceed int64 at extreme fee levels; use float64 then
+        weighted_price = 16 * snapshot.base_fee_scalar * snapshot.l1_base_fee + snapshot.blob_base_fee_scalar * snapshot.blob_base_fee
+        if int(l1_gas.max(initial=0)) * weighted_price < 2 ** 62 and int(l2_limits.max(initial=0)) * snapshot.l2_gas_price < 2 ** 62:
+            l2_cost = l2_limits * snapshot.l2_gas_price
+            l1_fee = self.l1_fee_from_gas(l1_gas, snapshot)
+        else:
+            l2_cost = l2_limits.astype(np.float64) * snapshot.l2_gas_price
+            l1_fee = l1_gas.astype(np.float64) * weighted_price / (16 * self.SCALAR_DECIMALS)
         return l2_cost, l1_fee, l2_cost + l1_fee
     
     def is_profitable_after_gas(
@@ -1,9 +1,15 @@
 # Created: 2026-01-15
+# Updated: 2026-10-19 - Persistent token/allowance cache, parallel multi-bridge quoting under a latency budget,
+#                       routes ranked by net output after gas
 import os
 import sys
 import json
 import time
+import asyncio
 import argparse
+from typing import Dict, List, Optional
+
+import aiohttp
 import requests
 from web3 import Web3
 from dotenv import load_dotenv
@@ -19,12 +25,75 @@ except ImportError:
     from chain_manager import ChainManager
     from alerts import send_discord_alert
 
+NATIVE_TOKEN = "0x0000000000000000000000000000000000000000"
+MAX_UINT256 = 2**256 - 1
+
+# Fallbacks if Li.Fi token lookup fails
+FALLBACK_TOKENS = {
+    ("USDC", 8453): {"address": "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913", "decimals": 6},
+    ("USDC", 42161): {"address": "0xaf88d065e77c8cC2239327C5EDb3A432268e5831", "decimals": 6},
+    ("USDC", 10): {"address": "0x0b2C639c533413bc44a77d5ec4f02fC03b0c8C33", "decimals": 6},
+}
+
+
+class RouteCache:
+    """
+    Token metadata and ERC20 allowances persisted across runs, so a command
+    only goes to Li.Fi or the chain for data it has never seen.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.tokens: Dict[str, Dict] = {}
+        self.allowances: Dict[str, int] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    data = json.load(f)
+                self.tokens = data.get("tokens", {})
+                self.allowances = {k: int(v) for k, v in data.get("allowances", {}).items()}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable route cache {path}: {e}")
+
+    @staticmethod
+    def _allowance_key(chain_id: int, token: str, spender: str) -> str:
+        return f"{chain_id}:{token.lower()}:{spender.lower()}"
+
+    def token(self, chain_id: int, symbol: str) -> Optional[Dict]:
+        return self.tokens.get(f"{chain_id}:{symbol.upper()}")
+
+    def set_token(self, chain_id: int, symbol: str, meta: Dict):
+        self.tokens[f"{chain_id}:{symbol.upper()}"] = meta
+
+    def allowance(self, chain_id: int, token: str, spender: str) -> Optional[int]:
+        return self.allowances.get(self._allowance_key(chain_id, token, spender))
+
+    def set_allowance(self, chain_id: int, token: str, spender: str, amount: int):
+        self.allowances[self._allowance_key(chain_id, token, spender)] = amount
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"tokens": self.tokens, "allowances": {k: str(v) for k, v in self.allowances.items()}}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
 class OmniOrchestrator:
     """
     The "God Mode" Omnichain Command Center.
     Uses Li.Fi API to bridge and swap anything to anywhere.
+
+    Every command quotes all candidate routes in one parallel round: each
+    bridge on its own, plus two-leg routes through intermediate tokens
+    (bridge into the intermediate, swap on the destination chain). Quotes
+    that miss the latency budget are dropped; the rest are ranked by
+    destination output net of gas and non-included fees.
     """
     LIFI_API_URL = "https://li.quest/v1"
+    DEFAULT_BRIDGES = ["across", "stargateV2", "relay", "hop"]
+    DEFAULT_INTERMEDIATES = ["USDC", "WETH"]
+    QUOTE_BUDGET_SECONDS = 4.0
+    BRIDGE_TIMEOUT_SECONDS = 1800
     
     CHAIN_MAP = {
         "ETH": 1,
@@ -49,62 +118,172 @@ class OmniOrchestrator:
         "KERNE": os.getenv("KERNE_TOKEN_ADDRESS", "0xfEA3D217F5f2304C8551dc9F5B5169F2c2d87340")
     }
 
-    def __init__(self):
+    def __init__(self, chain_manager=None, api_url: str = None, cache_path: str = None,
+                 bridges: List[str] = None, intermediates: List[str] = None, quote_budget: float = None):
         load_dotenv()
-        self.chain_manager = ChainManager()
+        self.chain_manager = chain_manager or ChainManager()
         self.private_key = os.getenv("PRIVATE_KEY")
         if not self.private_key:
             raise ValueError("PRIVATE_KEY not found in environment")
-        
+
         self.wallet_address = self.chain_manager.account.address
+        self.api_url = api_url or os.getenv("LIFI_API_URL", self.LIFI_API_URL)
+        self.cache = RouteCache(cache_path or os.getenv("OMNI_CACHE_PATH", "bot/data/omni_route_cache.json"))
+        self.bridges = bridges or [b for b in os.getenv("OMNI_BRIDGES", ",".join(self.DEFAULT_BRIDGES)).split(",") if b]
+        self.intermediates = intermediates if intermediates is not None else [
+            t for t in os.getenv("OMNI_INTERMEDIATES", ",".join(self.DEFAULT_INTERMEDIATES)).split(",") if t
+        ]
+        self.quote_budget = quote_budget or float(os.getenv("OMNI_QUOTE_BUDGET", self.QUOTE_BUDGET_SECONDS))
         logger.info(f"OmniOrchestrator initialized for wallet: {self.wallet_address}")
 
-    def resolve_token(self, symbol: str, chain_id: int) -> str:
-        """Resolves a token symbol to an address on a specific chain using Li.Fi."""
+    async def _get_json(self, session: aiohttp.ClientSession, path: str, params: Dict) -> Dict:
+        params = {k: str(v) for k, v in params.items() if v is not None}
+        async with session.get(f"{self.api_url}{path}", params=params) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Li.Fi {path} {response.status}: {await response.text()}")
+            return await response.json()
+
+    def _onchain_decimals(self, chain_id: int, token: str) -> int:
+        w3 = Web3(Web3.HTTPProvider(self.get_rpc_for_chain(chain_id)))
+        erc20_abi = [{"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"stateMutability":"view","type":"function"}]
+        return w3.eth.contract(address=token, abi=erc20_abi).functions.decimals().call()
+
+    async def resolve_token_meta(self, session: aiohttp.ClientSession, symbol: str, chain_id: int) -> Dict:
+        """Resolves a token symbol to {address, decimals} on a chain, via the cache first."""
         symbol = symbol.upper()
         if symbol == "ETH":
-            return "0x0000000000000000000000000000000000000000"
-        
+            return {"address": NATIVE_TOKEN, "decimals": 18}
+        cached = self.cache.token(chain_id, symbol)
+        if cached:
+            return cached
+
         # Try local map first for Kerne or specific overrides
         if symbol == "KERNE" and chain_id == 8453:
-            return self.TOKEN_MAP["KERNE"]
+            address = self.TOKEN_MAP["KERNE"]
+            meta = {"address": address, "decimals": await asyncio.to_thread(self._onchain_decimals, chain_id, address)}
+        else:
+            logger.info(f"Resolving {symbol} on chain {chain_id} via Li.Fi...")
+            try:
+                data = await self._get_json(session, "/token", {"chain": chain_id, "symbol": symbol})
+                meta = {"address": data["address"], "decimals": int(data["decimals"])}
+            except Exception as e:
+                logger.error(f"Failed to resolve token {symbol} on chain {chain_id}: {e}")
+                if (symbol, chain_id) not in FALLBACK_TOKENS:
+                    raise
+                meta = FALLBACK_TOKENS[(symbol, chain_id)]
+        self.cache.set_token(chain_id, symbol, meta)
+        return meta
 
-        logger.info(f"Resolving {symbol} on chain {chain_id} via Li.Fi...")
-        try:
-            params = {"chain": chain_id, "symbol": symbol}
-            response = requests.get(f"{self.LIFI_API_URL}/token", params=params)
-            response.raise_for_status()
-            data = response.json()
-            return data["address"]
-        except Exception as e:
-            logger.error(f"Failed to resolve token {symbol} on chain {chain_id}: {e}")
-            # Fallback to some common addresses if Li.Fi fails
-            if symbol == "USDC":
-                if chain_id == 8453: return "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
-                if chain_id == 42161: return "0xaf88d065e77c8cC2239327C5EDb3A432268e5831"
-                if chain_id == 10: return "0x0b2C639c533413bc44a77d5ec4f02fC03b0c8C33"
-            raise
+    def resolve_token(self, symbol: str, chain_id: int) -> str:
+        """Resolves a token symbol to an address on a specific chain using Li.Fi."""
+        async def resolve():
+            async with aiohttp.ClientSession() as session:
+                return await self.resolve_token_meta(session, symbol, chain_id)
+        address = asyncio.run(resolve())["address"]
+        self.cache.save()
+        return address
 
-    def get_quote(self, from_chain: int, to_chain: int, from_token: str, to_token: str, amount: str):
-        """Fetches a bridge/swap quote from Li.Fi."""
-        params = {
+    def _quote_params(self, from_chain: int, to_chain: int, from_token: str, to_token: str, amount: str,
+                      bridge: str = None) -> Dict:
+        return {
             "fromChain": from_chain,
             "toChain": to_chain,
             "fromToken": from_token,
             "toToken": to_token,
             "fromAmount": amount,
             "fromAddress": self.wallet_address,
-            "slippage": 0.005 # 0.5%
+            "slippage": 0.005, # 0.5%
+            "allowBridges": bridge,
         }
-        
+
+    def get_quote(self, from_chain: int, to_chain: int, from_token: str, to_token: str, amount: str, bridge: str = None):
+        """Fetches a bridge/swap quote from Li.Fi."""
+        params = {k: v for k, v in self._quote_params(from_chain, to_chain, from_token, to_token, amount, bridge).items()
+                  if v is not None}
+
         logger.info(f"Fetching Li.Fi quote: {from_chain}:{from_token} -> {to_chain}:{to_token} Amount: {amount}")
-        response = requests.get(f"{self.LIFI_API_URL}/quote", params=params)
+        response = requests.get(f"{self.api_url}/quote", params=params)
         if response.status_code != 200:
             logger.error(f"Quote failed: {response.text}")
             response.raise_for_status()
-        
+
         return response.json()
 
+    @staticmethod
+    def net_output(legs: List[Dict]) -> Dict:
+        """Destination output of a route minus gas and non-included fees, in destination token units."""
+        final = legs[-1]
+        to_token = final["action"]["toToken"]
+        to_amount = int(final["estimate"]["toAmount"])
+        cost_usd = 0.0
+        for leg in legs:
+            estimate = leg.get("estimate", {})
+            cost_usd += sum(float(c.get("amountUSD", 0)) for c in estimate.get("gasCosts", []))
+            cost_usd += sum(float(c.get("amountUSD", 0)) for c in estimate.get("feeCosts", []) if not c.get("included", False))
+        price = float(to_token.get("priceUSD") or 0)
+        cost_units = int(cost_usd / price * 10 ** int(to_token.get("decimals", 18))) if price else 0
+        return {"to_amount": to_amount, "cost_usd": cost_usd, "net_out": to_amount - cost_units}
+
+    async def _quote_route(self, session: aiohttp.ClientSession, label: str, legs: List[Dict]) -> Dict:
+        """Quotes a route leg by leg; each leg after the first spends the previous leg's minimum output."""
+        quotes = []
+        for leg in legs:
+            amount = leg["amount"] if not quotes else quotes[-1]["estimate"]["toAmountMin"]
+            params = self._quote_params(leg["from_chain"], leg["to_chain"], leg["from_token"], leg["to_token"],
+                                        amount, leg.get("bridge"))
+            quotes.append(await self._get_json(session, "/quote", params))
+        return {"label": label, "legs": quotes, **self.net_output(quotes)}
+
+    async def discover_routes(self, amount_str: str, from_token_sym: str, from_chain: int,
+                              to_token_sym: str, to_chain: int) -> List[Dict]:
+        """All candidate routes quoted concurrently under the latency budget, best net output first."""
+        from_token_sym, to_token_sym = from_token_sym.upper(), to_token_sym.upper()
+        cross_chain = from_chain != to_chain
+        vias = [v.upper() for v in self.intermediates if cross_chain and v.upper() not in (from_token_sym, to_token_sym)]
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.quote_budget)) as session:
+            wanted = [(from_token_sym, from_chain), (to_token_sym, to_chain)] + [(v, to_chain) for v in vias]
+            metas = await asyncio.gather(*(self.resolve_token_meta(session, s, c) for s, c in wanted),
+                                         return_exceptions=True)
+            resolved = {key: meta for key, meta in zip(wanted, metas) if not isinstance(meta, Exception)}
+            for key in wanted[:2]:
+                if key not in resolved:
+                    raise metas[wanted.index(key)]
+
+            from_meta, to_meta = resolved[wanted[0]], resolved[wanted[1]]
+            amount_raw = str(int(float(amount_str) * (10 ** from_meta["decimals"])))
+            direct = {"from_chain": from_chain, "to_chain": to_chain, "from_token": from_meta["address"],
+                      "to_token": to_meta["address"], "amount": amount_raw}
+
+            candidates = {}
+            for bridge in (self.bridges if cross_chain else [None]):
+                candidates[bridge or "direct"] = [{**direct, "bridge": bridge}]
+            for via in vias:
+                if (via, to_chain) not in resolved:
+                    continue
+                via_address = resolved[(via, to_chain)]["address"]
+                candidates[f"via {via}"] = [
+                    {**direct, "to_token": via_address},
+                    {**direct, "from_chain": to_chain, "from_token": via_address},
+                ]
+
+            tasks = {asyncio.create_task(self._quote_route(session, label, legs)): label
+                     for label, legs in candidates.items()}
+            done, pending = await asyncio.wait(tasks, timeout=self.quote_budget)
+            for task in pending:
+                task.cancel()
+                logger.debug(f"Route {tasks[task]} missed the {self.quote_budget}s quote budget")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        self.cache.save()
+        routes = []
+        for task in done:
+            if task.exception() is not None:
+                logger.debug(f"Route {tasks[task]} failed: {task.exception()}")
+                continue
+            routes.append(task.result())
+        return sorted(routes, key=lambda r: r["net_out"], reverse=True)
+
     def parse_command(self, cmd: str):
         """
         Parses command like '0.1 ETH BASE -> ARBITRUM'
@@ -207,87 +386,97 @@ class OmniOrchestrator:
         }
         return public_rpcs.get(chain_id)
 
+    def ensure_allowance(self, w3: Web3, chain_id: int, token: str, spender: str, amount: int):
+        """Approves `spender` if needed; the on-chain allowance is only read when the cache can't cover `amount`."""
+        if token == NATIVE_TOKEN:
+            return
+        cached = self.cache.allowance(chain_id, token, spender)
+        if cached is not None and cached >= amount:
+            self.cache.set_allowance(chain_id, token, spender, cached - amount)
+            return
+
+        erc20_abi = [
+            {"inputs":[{"name":"owner","type":"address"},{"name":"spender","type":"address"}],"name":"allowance","outputs":[{"name":"","type":"uint256"}],"stateMutability":"view","type":"function"},
+            {"inputs":[{"name":"spender","type":"address"},{"name":"amount","type":"uint256"}],"name":"approve","outputs":[{"name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"}
+        ]
+        spender = Web3.to_checksum_address(spender)
+        token_contract = w3.eth.contract(address=Web3.to_checksum_address(token), abi=erc20_abi)
+        allowance = token_contract.functions.allowance(self.wallet_address, spender).call()
+
+        if allowance < amount:
+            logger.info(f"Insufficient allowance. Approving {token}...")
+            nonce = w3.eth.get_transaction_count(self.wallet_address)
+            approve_tx = token_contract.functions.approve(spender, MAX_UINT256).build_transaction({
+                'from': self.wallet_address,
+                'nonce': nonce,
+                'gasPrice': w3.eth.gas_price
+            })
+            signed_approve = w3.eth.account.sign_transaction(approve_tx, self.private_key)
+            app_hash = w3.eth.send_raw_transaction(signed_approve.raw_transaction)
+            logger.info(f"Approval sent: {app_hash.hex()}. Waiting for confirmation...")
+            w3.eth.wait_for_transaction_receipt(app_hash)
+            logger.success("Approval confirmed.")
+            allowance = MAX_UINT256
+        # Cached value is a lower bound: spends are deducted locally, approvals from elsewhere are picked up on a miss
+        self.cache.set_allowance(chain_id, token, spender, allowance - amount)
+
+    def wait_for_bridge(self, tx_hash: str, from_chain: int, to_chain: int) -> int:
+        """Polls Li.Fi status until the bridge leg lands; returns the amount received on the destination."""
+        deadline = time.time() + self.BRIDGE_TIMEOUT_SECONDS
+        while time.time() < deadline:
+            response = requests.get(f"{self.api_url}/status",
+                                    params={"txHash": tx_hash, "fromChain": from_chain, "toChain": to_chain})
+            if response.status_code == 200:
+                status = response.json()
+                if status.get("status") == "DONE":
+                    return int(status.get("receiving", {}).get("amount", 0))
+                if status.get("status") == "FAILED":
+                    raise RuntimeError(f"Bridge transfer {tx_hash} failed: {status.get('substatusMessage')}")
+            time.sleep(10)
+        raise TimeoutError(f"Bridge transfer {tx_hash} not delivered after {self.BRIDGE_TIMEOUT_SECONDS}s")
+
     def run_command(self, cmd: str, dry_run: bool = False):
-        """Full flow: parse -> resolve -> quote -> execute."""
+        """Full flow: parse -> resolve -> quote all routes in parallel -> execute the best."""
         logger.info(f"--- Omnichain Execution Started: '{cmd}' ---")
-        
+
         amount_str, from_token_sym, from_chain, to_token_sym, to_chain = self.parse_command(cmd)
-        
-        from_token_addr = self.resolve_token(from_token_sym, from_chain)
-        to_token_addr = self.resolve_token(to_token_sym, to_chain)
-        
-        # Get decimals for amount conversion
-        w3_from = Web3(Web3.HTTPProvider(self.get_rpc_for_chain(from_chain)))
-        if from_token_addr == "0x0000000000000000000000000000000000000000":
-            decimals = 18
-        else:
-            erc20_abi = [{"inputs":[],"name":"decimals","outputs":[{"name":"","type":"uint8"}],"stateMutability":"view","type":"function"}]
-            token_contract = w3_from.eth.contract(address=from_token_addr, abi=erc20_abi)
-            decimals = token_contract.functions.decimals().call()
-        
-        amount_raw = str(int(float(amount_str) * (10 ** decimals)))
-        
-        quote = self.get_quote(from_chain, to_chain, from_token_addr, to_token_addr, amount_raw)
-        
-        try:
-            tool = quote.get('tool', 'unknown')
-            action = quote.get('action', {})
-            estimate = quote.get('estimate', {})
-            
-            from_chain_res = action.get('fromChain', from_chain)
-            to_chain_res = action.get('toChain', to_chain)
-            
-            logger.info(f"Route Found: {tool} via {from_chain_res} -> {to_chain_res}")
-            
-            to_amount = estimate.get('toAmount', '0')
-            to_token_data = action.get('toToken', {})
-            to_decimals = to_token_data.get('decimals', 18)
-            logger.info(f"Estimated Output: {float(to_amount) / (10**to_decimals):.6f} {to_token_sym}")
-            
-            gas_costs = estimate.get('gasCosts', [])
-            gas_usd = gas_costs[0].get('amountUsd', '0') if gas_costs else '0'
-            logger.info(f"Estimated Gas: ${gas_usd}")
-        except Exception as e:
-            logger.error(f"Error parsing quote data: {e}")
-            logger.debug(f"Full Quote Structure: {json.dumps(quote, indent=2)}")
-            raise
-        
+
+        routes = asyncio.run(self.discover_routes(amount_str, from_token_sym, from_chain, to_token_sym, to_chain))
+        if not routes:
+            raise RuntimeError(f"No route quoted within {self.quote_budget}s")
+
+        for route in routes:
+            to_token_data = route["legs"][-1]["action"]["toToken"]
+            to_decimals = int(to_token_data.get("decimals", 18))
+            tools = " + ".join(leg.get("tool", "unknown") for leg in route["legs"])
+            logger.info(f"Route {route['label']} ({tools}): output {route['to_amount'] / 10**to_decimals:.6f} {to_token_sym}, "
+                        f"costs ${route['cost_usd']:.2f}, net {route['net_out'] / 10**to_decimals:.6f}")
+        best = routes[0]
+        logger.info(f"Best route: {best['label']}")
+
         if dry_run:
             logger.info("DRY RUN: Transaction would be executed now.")
-            return
-        
-        # 1. Check Approval
-        if from_token_addr != "0x0000000000000000000000000000000000000000":
-            approval_address = quote['transactionRequest']['to']
-            # Simple approval check could be added here, but Li.Fi quote usually includes it in steps if needed.
-            # However, /quote often assumes you have approved or provides the tx for the swap itself.
-            # We'll check allowance manually.
-            erc20_abi = [
-                {"inputs":[{"name":"owner","type":"address"},{"name":"spender","type":"address"}],"name":"allowance","outputs":[{"name":"","type":"uint256"}],"stateMutability":"view","type":"function"},
-                {"inputs":[{"name":"spender","type":"address"},{"name":"amount","type":"uint256"}],"name":"approve","outputs":[{"name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"}
-            ]
-            token_contract = w3_from.eth.contract(address=from_token_addr, abi=erc20_abi)
-            allowance = token_contract.functions.allowance(self.wallet_address, approval_address).call()
-            
-            if allowance < int(amount_raw):
-                logger.info(f"Insufficient allowance. Approving {from_token_sym}...")
-                nonce = w3_from.eth.get_transaction_count(self.wallet_address)
-                approve_tx = token_contract.functions.approve(approval_address, 2**256 - 1).build_transaction({
-                    'from': self.wallet_address,
-                    'nonce': nonce,
-                    'gasPrice': w3_from.eth.gas_price
-                })
-                signed_approve = w3_from.eth.account.sign_transaction(approve_tx, self.private_key)
-                app_hash = w3_from.eth.send_raw_transaction(signed_approve.raw_transaction)
-                logger.info(f"Approval sent: {app_hash.hex()}. Waiting for confirmation...")
-                w3_from.eth.wait_for_transaction_receipt(app_hash)
-                logger.success("Approval confirmed.")
-
-        # 2. Execute Swap/Bridge
-        tx_hash = self.execute_transaction(quote['transactionRequest'], from_chain)
-        
-        send_discord_alert(f"🚀 **Omnichain Transfer Initiated**\nCommand: `{cmd}`\nHash: {tx_hash}\nTool: {quote['tool']}", level="INFO")
-        
+            return best
+
+        tx_hash = None
+        for i, leg in enumerate(best["legs"]):
+            action = leg["action"]
+            if i > 0:
+                # Later legs start from what actually arrived, quoted fresh
+                previous = best["legs"][i - 1]["action"]
+                received = self.wait_for_bridge(tx_hash, previous["fromChainId"], previous["toChainId"])
+                leg = self.get_quote(action["fromChainId"], action["toChainId"], action["fromToken"]["address"],
+                                     action["toToken"]["address"], str(received))
+            chain_id = leg["action"]["fromChainId"]
+            w3 = Web3(Web3.HTTPProvider(self.get_rpc_for_chain(chain_id)))
+            spender = leg.get("estimate", {}).get("approvalAddress") or leg["transactionRequest"]["to"]
+            self.ensure_allowance(w3, chain_id, leg["action"]["fromToken"]["address"], spender,
+                                  int(leg["action"]["fromAmount"]))
+            self.cache.save()
+            tx_hash = self.execute_transaction(leg["transactionRequest"], chain_id)
+
+        send_discord_alert(f"🚀 **Omnichain Transfer Initiated**\nCommand: `{cmd}`\nHash: {tx_hash}\nRoute: {best['label']}", level="INFO")
+
         return tx_hash
 
 if __name__ == "__main__":
@@ -2,24 +2,49 @@
 """
 Kerne Price Oracle Updater
 
-This script updates the TWAP observation on the KernePriceOracle contract.
-It should be run periodically (e.g., every 5-10 minutes) to keep the oracle fresh.
+Keeps the TWAP observation on the KernePriceOracle contract fresh.
+
+One-shot mode (cron) updates when the observation is older than the heartbeat.
+Daemon mode watches every configured network concurrently: each new block it
+reads the oracle state with a single Multicall3 call and sends
+`updateObservation` when the price has moved more than --deviation-bps since
+the last update, or when the heartbeat expires, whichever comes first.
+Transactions are sent with locally tracked nonces and their receipts are
+checked on later blocks, so a slow confirmation never stalls the watch loop.
 
 Usage:
     python oracle_updater.py [--network base]
+    python oracle_updater.py --daemon --networks base,base_sepolia
 
 Environment Variables:
     PRIVATE_KEY: Private key for the updater account
-    RPC_URL: RPC URL for the network (optional, uses default)
+    RPC_URL / ORACLE_ADDRESS: RPC URL and oracle for the selected network
+        (single-network runs; optional RPC, uses default)
+    <NETWORK>_RPC_URL / <NETWORK>_ORACLE_ADDRESS: per-network overrides,
+        e.g. BASE_SEPOLIA_ORACLE_ADDRESS
 """
 
 import os
 import sys
 import json
 import time
+import asyncio
+from typing import Dict, List, Optional
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 from eth_account import Account
 
+try:
+    from bot.por_collector import MULTICALL3_ADDRESS, MULTICALL3_ABI
+except ImportError:
+    from por_collector import MULTICALL3_ADDRESS, MULTICALL3_ABI
+
+HEARTBEAT_SECONDS = 600       # observation age that always triggers an update
+DEVIATION_BPS = 50            # price move since the last update that triggers one early
+MIN_UPDATE_INTERVAL = 30      # never refresh an observation younger than this
+POLL_SECONDS = 2.0            # how often each network is checked for a new block
+PENDING_TIMEOUT = 180         # unconfirmed tx after this long -> resync nonce
+
 # Network configurations
 NETWORKS = {
     'base': {
@@ -83,16 +108,42 @@ ORACLE_ABI = [
     }
 ]
 
+GET_BLOCK_TIMESTAMP_ABI = {
+    "inputs": [],
+    "name": "getCurrentBlockTimestamp",
+    "outputs": [{"internalType": "uint256", "name": "timestamp", "type": "uint256"}],
+    "stateMutability": "view",
+    "type": "function"
+}
+
+
+def update_reason(status: dict, reference_price: Optional[float], deviation_bps: float = DEVIATION_BPS,
+                  heartbeat_seconds: int = HEARTBEAT_SECONDS,
+                  min_interval: int = MIN_UPDATE_INTERVAL) -> Optional[str]:
+    """Why an update is due ('heartbeat' / 'deviation'), or None if the observation is still good."""
+    if status['age_seconds'] >= heartbeat_seconds:
+        return 'heartbeat'
+    if status['age_seconds'] < min_interval or not reference_price or status.get('price') is None:
+        return None
+    moved_bps = abs(status['price'] - reference_price) / reference_price * 10000
+    return 'deviation' if moved_bps >= deviation_bps else None
+
+
 class OracleUpdater:
-    def __init__(self, network_name: str):
+    def __init__(self, network_name: str, generic_env: bool = True):
+        """
+        generic_env: also honour RPC_URL / ORACLE_ADDRESS (single-network runs).
+        Per-network <NETWORK>_RPC_URL / <NETWORK>_ORACLE_ADDRESS always take precedence.
+        """
         self.network_name = network_name
         self.config = NETWORKS.get(network_name)
         
         if not self.config:
             raise ValueError(f"Unknown network: {network_name}")
+        prefix = network_name.upper()
         
         # Initialize Web3
-        rpc_url = os.getenv('RPC_URL', self.config['rpc'])
+        rpc_url = os.getenv(f'{prefix}_RPC_URL') or (os.getenv('RPC_URL') if generic_env else None) or self.config['rpc']
         self.w3 = Web3(Web3.HTTPProvider(rpc_url))
         
         if not self.w3.is_connected():
@@ -107,62 +158,145 @@ class OracleUpdater:
         print(f"Loaded account: {self.account.address}")
         
         # Load oracle address
-        self.oracle_address = os.getenv('ORACLE_ADDRESS', self.config['oracle_address'])
+        self.oracle_address = (
+            os.getenv(f'{prefix}_ORACLE_ADDRESS')
+            or (os.getenv('ORACLE_ADDRESS') if generic_env else None)
+            or self.config['oracle_address']
+        )
         if not self.oracle_address:
-            raise ValueError("ORACLE_ADDRESS not set. Set it in environment or config.")
+            raise ValueError(f"ORACLE_ADDRESS not set for {network_name}. Set it in environment or config.")
         
         # Initialize contract
         self.oracle = self.w3.eth.contract(
             address=Web3.to_checksum_address(self.oracle_address),
             abi=ORACLE_ABI
         )
+        self.multicall = self.w3.eth.contract(
+            address=Web3.to_checksum_address(MULTICALL3_ADDRESS),
+            abi=MULTICALL3_ABI + [GET_BLOCK_TIMESTAMP_ABI]
+        )
+
+        # Pipelined sends: local nonce plus tx_hash -> sent_at for unconfirmed updates
+        self.nonce: Optional[int] = None
+        self.pending: Dict[str, float] = {}
+        # Price at the last observation we pushed (deviation baseline)
+        self.reference_price: Optional[float] = None
     
-    def get_status(self) -> dict:
-        """Get current oracle status"""
+    def _status_calls(self) -> list:
+        return [
+            (self.oracle.address, True, self.oracle.encodeABI(fn_name="isPriceValid")),
+            (self.oracle.address, True, self.oracle.encodeABI(fn_name="getPrice")),
+            (self.oracle.address, True, self.oracle.encodeABI(fn_name="getPriceSources")),
+            (self.multicall.address, True, self.multicall.encodeABI(fn_name="getCurrentBlockTimestamp")),
+        ]
+
+    def get_status(self, block_identifier='latest') -> dict:
+        """Get current oracle status in one Multicall3 eth_call (falls back to direct calls)"""
         try:
-            is_valid = self.oracle.functions.isPriceValid().call()
-            price = self.oracle.functions.getPrice().call()
-            chainlink_price, twap_price, timestamp = self.oracle.functions.getPriceSources().call()
+            try:
+                results = self.multicall.functions.aggregate3(self._status_calls()).call(
+                    block_identifier=block_identifier
+                )
+            except Exception:
+                return self._get_status_direct(block_identifier)
+
+            def decode(i, types):
+                ok, data = results[i]
+                return self.w3.codec.decode(types, data) if ok and data else None
+
+            valid = decode(0, ["bool"])
+            price = decode(1, ["uint256"])
+            sources = decode(2, ["uint256", "uint256", "uint256"])
+            block_ts = decode(3, ["uint256"])
+            if sources is None:
+                return {'error': 'getPriceSources reverted'}
+            chainlink_price, twap_price, timestamp = sources
+            now = block_ts[0] if block_ts else int(time.time())
             
             # Convert price from 18 decimals to readable
-            price_readable = price / 1e18
-            
             return {
-                'is_valid': is_valid,
-                'price': price_readable,
+                'is_valid': bool(valid and valid[0]),
+                'price': price[0] / 1e18 if price else None,
                 'chainlink_price': chainlink_price / 1e18,
                 'twap_price': twap_price / 1e18,
                 'last_update': timestamp,
-                'age_seconds': int(time.time()) - timestamp
+                'age_seconds': now - timestamp
             }
         except Exception as e:
             return {'error': str(e)}
+
+    def _get_status_direct(self, block_identifier='latest') -> dict:
+        is_valid = self.oracle.functions.isPriceValid().call(block_identifier=block_identifier)
+        price = self.oracle.functions.getPrice().call(block_identifier=block_identifier)
+        chainlink_price, twap_price, timestamp = self.oracle.functions.getPriceSources().call(
+            block_identifier=block_identifier
+        )
+        return {
+            'is_valid': is_valid,
+            'price': price / 1e18,
+            'chainlink_price': chainlink_price / 1e18,
+            'twap_price': twap_price / 1e18,
+            'last_update': timestamp,
+            'age_seconds': int(time.time()) - timestamp
+        }
+
+    def send_update(self) -> str:
+        """Sign and broadcast updateObservation without waiting; returns the tx hash"""
+        if self.nonce is None:
+            self.nonce = self.w3.eth.get_transaction_count(self.account.address, 'pending')
+        tx = self.oracle.functions.updateObservation().build_transaction({
+            'from': self.account.address,
+            'gas': 100000,  # Conservative gas limit
+            'gasPrice': self.w3.eth.gas_price,
+            'nonce': self.nonce,
+            'chainId': self.config['chain_id']
+        })
+        signed_tx = self.w3.eth.account.sign_transaction(tx, self.account.key)
+        try:
+            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction).hex()
+        except Exception:
+            self.nonce = None  # resync from the node next time
+            raise
+        self.nonce += 1
+        self.pending[tx_hash] = time.time()
+        print(f"[{self.network_name}] Transaction sent: {tx_hash}")
+        print(f"[{self.network_name}] Explorer: {self.config['explorer']}/tx/{tx_hash}")
+        return tx_hash
+
+    def poll_pending(self) -> List[dict]:
+        """Non-blocking receipt check for sent updates; returns the ones that settled"""
+        settled = []
+        for tx_hash, sent_at in list(self.pending.items()):
+            try:
+                receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                if time.time() - sent_at > PENDING_TIMEOUT:
+                    print(f"[{self.network_name}] {tx_hash} not mined after {PENDING_TIMEOUT}s, dropping")
+                    del self.pending[tx_hash]
+                    self.nonce = None
+                continue
+            del self.pending[tx_hash]
+            result = {
+                'success': receipt['status'] == 1,
+                'tx_hash': tx_hash,
+                'gas_used': receipt['gasUsed'],
+                'block_number': receipt['blockNumber']
+            }
+            if not result['success']:
+                self.nonce = None
+            settled.append(result)
+        return settled
     
     def update_observation(self) -> dict:
-        """Update the TWAP observation"""
+        """Update the TWAP observation and wait for the receipt (one-shot mode)"""
         try:
-            # Build transaction
-            tx = self.oracle.functions.updateObservation().build_transaction({
-                'from': self.account.address,
-                'gas': 100000,  # Conservative gas limit
-                'gasPrice': self.w3.eth.gas_price,
-                'nonce': self.w3.eth.get_transaction_count(self.account.address),
-                'chainId': self.config['chain_id']
-            })
-            
-            # Sign and send
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.account.key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            
-            print(f"Transaction sent: {tx_hash.hex()}")
-            print(f"Explorer: {self.config['explorer']}/tx/{tx_hash.hex()}")
-            
-            # Wait for confirmation
+            tx_hash = self.send_update()
             receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            self.pending.pop(tx_hash, None)
             
             return {
                 'success': receipt['status'] == 1,
-                'tx_hash': tx_hash.hex(),
+                'tx_hash': tx_hash,
                 'gas_used': receipt['gasUsed'],
                 'block_number': receipt['blockNumber']
             }
@@ -184,15 +318,15 @@ class OracleUpdater:
             return False
         
         print(f"Current Status:")
-        print(f"  Price: ${status['price']:.2f}")
+        print(f"  Price: ${status['price']:.2f}" if status['price'] is not None else "  Price: unavailable")
         print(f"  Chainlink: ${status['chainlink_price']:.2f}")
         print(f"  TWAP: ${status['twap_price']:.2f}")
         print(f"  Valid: {status['is_valid']}")
         print(f"  Last Update: {status['age_seconds']} seconds ago")
         
-        # Check if update needed (every 10 minutes)
-        if status['age_seconds'] < 600:
-            print(f"\nObservation is fresh (< 10 minutes old). No update needed.")
+        # Check if update needed (heartbeat)
+        if status['age_seconds'] < HEARTBEAT_SECONDS:
+            print(f"\nObservation is fresh (< {HEARTBEAT_SECONDS // 60} minutes old). No update needed.")
             return True
         
         if dry_run:
@@ -213,6 +347,71 @@ class OracleUpdater:
             return False
 
 
+class OracleDaemon:
+    """Watches several networks concurrently; one batched state read per new block each."""
+
+    def __init__(self, updaters: List[OracleUpdater], deviation_bps: float = DEVIATION_BPS,
+                 heartbeat_seconds: int = HEARTBEAT_SECONDS, min_interval: int = MIN_UPDATE_INTERVAL,
+                 poll_seconds: float = POLL_SECONDS, dry_run: bool = False):
+        self.updaters = updaters
+        self.deviation_bps = deviation_bps
+        self.heartbeat_seconds = heartbeat_seconds
+        self.min_interval = min_interval
+        self.poll_seconds = poll_seconds
+        self.dry_run = dry_run
+        self.updates_sent = 0
+
+    async def check_block(self, updater: OracleUpdater, block_number: int) -> Optional[str]:
+        """Handle one new block: settle receipts, read state, maybe send. Returns the trigger reason."""
+        for result in await asyncio.to_thread(updater.poll_pending):
+            mark = "✅" if result['success'] else "❌"
+            print(f"[{updater.network_name}] {mark} {result['tx_hash']} in block {result['block_number']}")
+
+        status = await asyncio.to_thread(updater.get_status, block_number)
+        if 'error' in status:
+            print(f"[{updater.network_name}] Error getting status: {status['error']}")
+            return None
+        if updater.reference_price is None:
+            updater.reference_price = status['price'] or status['twap_price']
+        if updater.pending:
+            return None  # an update is already in flight; it will refresh the observation
+
+        reason = update_reason(status, updater.reference_price, self.deviation_bps,
+                               self.heartbeat_seconds, self.min_interval)
+        if reason is None:
+            return None
+        print(f"[{updater.network_name}] Block {block_number}: {reason} "
+              f"(age {status['age_seconds']}s, price {status['price']}, reference {updater.reference_price})")
+        if self.dry_run:
+            print(f"[{updater.network_name}] [DRY RUN] Would update observation")
+        else:
+            try:
+                await asyncio.to_thread(updater.send_update)
+                self.updates_sent += 1
+            except Exception as e:
+                print(f"[{updater.network_name}] Send failed: {e}")
+                return None
+        updater.reference_price = status['price'] or status['twap_price']
+        return reason
+
+    async def watch(self, updater: OracleUpdater):
+        last_block = None
+        while True:
+            try:
+                block_number = await asyncio.to_thread(lambda: updater.w3.eth.block_number)
+                if block_number != last_block:
+                    last_block = block_number
+                    await self.check_block(updater, block_number)
+            except Exception as e:
+                print(f"[{updater.network_name}] Watch error: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    async def run(self):
+        print(f"Kerne Price Oracle daemon: {', '.join(u.network_name for u in self.updaters)} "
+              f"(deviation {self.deviation_bps} bps, heartbeat {self.heartbeat_seconds}s)")
+        await asyncio.gather(*(self.watch(updater) for updater in self.updaters))
+
+
 def main():
     import argparse
     
@@ -220,9 +419,23 @@ def main():
     parser.add_argument('--network', default='base', help='Network to use')
     parser.add_argument('--dry-run', action='store_true', help='Simulate without sending tx')
     parser.add_argument('--status-only', action='store_true', help='Only show status')
+    parser.add_argument('--daemon', action='store_true', help='Watch continuously instead of a one-shot check')
+    parser.add_argument('--networks', help='Comma-separated networks for --daemon (default: --network)')
+    parser.add_argument('--deviation-bps', type=float, default=DEVIATION_BPS, help='Price move that triggers an update')
+    parser.add_argument('--heartbeat', type=int, default=HEARTBEAT_SECONDS, help='Max observation age in seconds')
+    parser.add_argument('--min-interval', type=int, default=MIN_UPDATE_INTERVAL, help='Min seconds between updates')
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS, help='New-block poll interval in seconds')
     args = parser.parse_args()
     
     try:
+        if args.daemon:
+            networks = [n.strip() for n in (args.networks or args.network).split(',') if n.strip()]
+            updaters = [OracleUpdater(n, generic_env=len(networks) == 1) for n in networks]
+            daemon = OracleDaemon(updaters, args.deviation_bps, args.heartbeat, args.min_interval,
+                                  args.poll, args.dry_run)
+            asyncio.run(daemon.run())
+            return
+
         updater = OracleUpdater(args.network)
         
         if args.status_only:
@@ -237,4 +450,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,22 +1,51 @@
 import os
-import subprocess
 import json
 import asyncio
 import time
 from loguru import logger
-from typing import Dict
+from typing import Callable, Dict, Optional
+
+try:
+    from bot.tenant_runtime import (CircuitBreaker, HedgeStrategy, SharedMarketData, Tenant,
+                                    TenantRuntime, TenantSecrets)
+    from bot.exchanges.paper import PaperExchange
+except ImportError:
+    from tenant_runtime import (CircuitBreaker, HedgeStrategy, SharedMarketData, Tenant,
+                                TenantRuntime, TenantSecrets)
+    from exchanges.paper import PaperExchange
 
 # Created: 2026-01-09
 # Updated: 2026-01-12 - Institutional Deep Hardening: Sub-millisecond latency optimization and high-availability orchestration
+# Updated: 2026-10-19 - Host white-label vaults in one in-process TenantRuntime instead of a Docker container per vault
+
+ExchangeFactory = Callable[[dict, TenantSecrets, SharedMarketData], object]
+
+
+def default_exchange_factory(partner_config: dict, secrets: TenantSecrets, market: SharedMarketData):
+    """Paper vaults fill against the shared marks; live vaults get their own signed Hyperliquid client."""
+    if partner_config.get("paper"):
+        return PaperExchange(market.price, collateral_usd=partner_config.get("paper_collateral_usd", 100_000.0))
+    from exchanges.hyperliquid import HyperliquidExchange
+    return HyperliquidExchange(use_testnet=partner_config.get("testnet", False), private_key=secrets.private_key)
+
 
 class BotOrchestrator:
     """
-    Manages isolated HedgingEngine instances for white-label vaults.
-    Optimized for sub-millisecond latency and high availability.
+    Manages isolated hedging tenants for white-label vaults.
+    All vaults share one process, one market-data feed and one worker pool;
+    exchange clients, secrets, state and circuit breakers stay per tenant.
     """
-    def __init__(self, config_path: str = "bot/orchestrator_config.json"):
+    def __init__(self, config_path: str = "bot/orchestrator_config.json",
+                 market_source=None, exchange_factory: ExchangeFactory = default_exchange_factory,
+                 tvl_source: Optional[Callable[[str], float]] = None, max_workers: int = 16,
+                 cycle_timeout: float = 5.0):
         self.config_path = config_path
-        self.active_instances: Dict[str, Dict] = {} # vault_address -> metadata
+        self.active_instances: Dict[str, Dict] = {} # vault_address -> metadata (never secrets)
+        self.exchange_factory = exchange_factory
+        self._tvl_source = tvl_source
+        self._market_source = market_source
+        self._runtime_args = (max_workers, cycle_timeout)
+        self.runtime: Optional[TenantRuntime] = None
         self._load_config()
 
     def _load_config(self):
@@ -28,102 +57,97 @@ class BotOrchestrator:
         with open(self.config_path, "w") as f:
             json.dump(self.active_instances, f)
 
+    def _ensure_runtime(self) -> TenantRuntime:
+        if self.runtime is None:
+            source = self._market_source
+            if source is None:
+                from exchanges.hyperliquid import HyperliquidExchange
+                source = HyperliquidExchange()
+            max_workers, cycle_timeout = self._runtime_args
+            self.runtime = TenantRuntime(SharedMarketData(source, ["ETH"]), max_workers, cycle_timeout)
+        return self.runtime
+
+    def _vault_tvl(self, vault_address: str) -> float:
+        if self._tvl_source is None:
+            from chain_manager import ChainManager
+            self._tvl_source = ChainManager().get_vault_assets
+        return self._tvl_source(vault_address)
+
     async def deploy_instance(self, vault_address: str, partner_config: dict):
         """
-        Deploys a new Docker container with high-performance settings.
+        Registers the vault's hedging strategy with the shared runtime.
+        Returns the tenant id (the vault address).
         """
         start_time = time.perf_counter()
-        
+
         if vault_address in self.active_instances:
             status = await self.get_status(vault_address)
             if status == "RUNNING":
                 logger.warning(f"Instance already running for vault {vault_address}")
-                return self.active_instances[vault_address]["container_id"]
+                return self.active_instances[vault_address]["tenant_id"]
             else:
                 await self.stop_instance(vault_address)
 
-        # Construct high-performance Docker run command
-        container_name = f"kerne-vault-{vault_address[:8]}"
-        cmd = [
-            "docker", "run", "-d",
-            "--name", container_name,
-            "--restart", "always",
-            "--cpus", "1.0", # Dedicated CPU core
-            "--memory", "512m",
-            "--ulimit", "nofile=65535:65535", # High file descriptor limit for networking
-            "--network", "host", # Use host network for lowest latency
-            "--health-cmd", "python -c 'import os; exit(0 if os.path.exists(\"/tmp/heartbeat\") else 1)'",
-            "--health-interval", "10s",
-            "--health-timeout", "5s"
-        ]
-        
-        env_vars = {
-            "VAULT_ADDRESS": vault_address,
-            "EXCHANGE_API_KEY": partner_config.get("api_key"),
-            "EXCHANGE_SECRET": partner_config.get("secret"),
-            "STRATEGIST_PRIVATE_KEY": partner_config.get("private_key"),
-            "RPC_URL": partner_config.get("rpc_url", "https://mainnet.base.org"),
-            "LATENCY_MODE": "ULTRA_LOW"
-        }
-        
-        for k, v in env_vars.items():
-            if v: cmd.extend(["-e", f"{k}={v}"])
-        
-        cmd.append("kerne-hedging-engine")
-
+        runtime = self._ensure_runtime()
+        secrets = TenantSecrets(
+            api_key=partner_config.get("api_key"),
+            secret=partner_config.get("secret"),
+            private_key=partner_config.get("private_key"),
+        )
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                raise Exception(f"Docker error: {stderr.decode().strip()}")
-
-            container_id = stdout.decode().strip()
-            self.active_instances[vault_address] = {
-                "container_id": container_id,
-                "deployed_at": time.time(),
-                "config_hash": hash(json.dumps(partner_config, sort_keys=True))
-            }
-            self._save_config()
-            
-            end_time = time.perf_counter()
-            logger.success(f"Deployed high-performance instance {container_id} in {(end_time - start_time)*1000:.2f}ms")
-            return container_id
+            exchange = await asyncio.to_thread(self.exchange_factory, partner_config, secrets, runtime.market)
         except Exception as e:
             logger.error(f"Orchestrator deployment failed: {e}")
             raise
 
+        strategy = HedgeStrategy(
+            threshold_eth=partner_config.get("hedge_threshold_eth", 0.01),
+            max_trade_eth=partner_config.get("max_trade_eth", 50.0),
+            max_overhedge_ratio=partner_config.get("max_overhedge_ratio", 1.05),
+        )
+        runtime.add_tenant(Tenant(
+            vault_address=vault_address,
+            exchange=exchange,
+            secrets=secrets,
+            strategy=strategy,
+            tvl_source=self._vault_tvl,
+            breaker=CircuitBreaker(partner_config.get("breaker_max_failures", 3),
+                                   partner_config.get("breaker_cooldown_s", 60.0)),
+        ))
+        public_config = {k: v for k, v in partner_config.items() if k not in ("api_key", "secret", "private_key")}
+        self.active_instances[vault_address] = {
+            "tenant_id": vault_address,
+            "deployed_at": time.time(),
+            "config_hash": hash(json.dumps(public_config, sort_keys=True))
+        }
+        self._save_config()
+
+        end_time = time.perf_counter()
+        logger.success(f"Deployed tenant {vault_address} in {(end_time - start_time)*1000:.2f}ms")
+        return vault_address
+
     async def stop_instance(self, vault_address: str):
         if vault_address not in self.active_instances: return
 
-        container_id = self.active_instances[vault_address]["container_id"]
-        try:
-            # Force remove for speed in emergency
-            await asyncio.create_subprocess_exec("docker", "rm", "-f", container_id)
-            del self.active_instances[vault_address]
-            self._save_config()
-            logger.success(f"Force stopped instance for vault {vault_address}")
-        except Exception as e:
-            logger.error(f"Failed to stop container: {e}")
+        if self.runtime is not None:
+            self.runtime.remove_tenant(vault_address)
+        del self.active_instances[vault_address]
+        self._save_config()
+        logger.success(f"Stopped tenant for vault {vault_address}")
 
     async def get_status(self, vault_address: str):
         if vault_address not in self.active_instances: return "NOT_DEPLOYED"
-        
-        container_id = self.active_instances[vault_address]["container_id"]
-        try:
-            process = await asyncio.create_subprocess_exec(
-                "docker", "inspect", "-f", "{{.State.Status}}", container_id,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await process.communicate()
-            return stdout.decode().strip().upper()
-        except Exception:
-            return "ERROR"
+        # Config entries survive restarts, but tenants must be redeployed with their secrets
+        if self.runtime is None or vault_address not in self.runtime.tenants:
+            return "STOPPED"
+        breaker = self.runtime.tenants[vault_address].breaker.state
+        return "RUNNING" if breaker == CircuitBreaker.CLOSED else f"BREAKER_{breaker}"
+
+    def report(self) -> Dict[str, Dict]:
+        return self.runtime.report() if self.runtime else {}
+
+    async def run(self, interval: float = 10.0):
+        await self._ensure_runtime().run_forever(interval)
 
 if __name__ == "__main__":
     orchestrator = BotOrchestrator()
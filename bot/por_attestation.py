@@ -1,6 +1,7 @@
 # Created: 2026-01-12
 # Updated: 2026-01-13 (Automated Solvency Pulse)
 # Updated: 2026-02-22 (ZK-Proof Solvency Attestation — Task 12)
+# Updated: 2026-10-19 (Block-pinned reserve reads via ReserveCollector)
 
 import os
 import json
@@ -13,6 +14,11 @@ from dotenv import load_dotenv
 from loguru import logger
 from exchange_manager import ExchangeManager
 
+try:
+    from bot.por_collector import ReserveCollector
+except ImportError:
+    from por_collector import ReserveCollector
+
 # ──────────────────────────────────────────────────────────────────────────────
 # ZK-Proof Solvency Attestation Bot
 # ──────────────────────────────────────────────────────────────────────────────
@@ -102,6 +108,13 @@ class PoRAttestationBot:
         ]
         self.vault = self.w3.eth.contract(address=self.vault_address, abi=self.vault_abi)
 
+        # totalAssets / totalSupply are read together at one pinned block
+        self.collector = ReserveCollector(
+            {"base": self.w3}, {"base": self.vault},
+            confirmations=int(os.getenv("POR_CONFIRMATIONS", "0"))
+        )
+        self.last_snapshot = None
+
         # ──────────────────────────────────────────────────────────────────────
         # KerneVerificationNode ABI — includes both ZK and ECDSA paths
         # ──────────────────────────────────────────────────────────────────────
@@ -190,9 +203,13 @@ class PoRAttestationBot:
     def get_solvency_metrics(self):
         """
         Calculates total assets, net delta, and off-chain equity.
+        On-chain figures come from a single pinned block (see self.last_snapshot).
         """
-        on_chain_assets_wei = self.vault.functions.totalAssets().call()
-        on_chain_assets = float(self.w3.from_wei(on_chain_assets_wei, 'ether'))
+        snapshot = self.collector.collect_chain("base")
+        if not snapshot.healthy:
+            raise RuntimeError(f"On-chain reserve read failed: {snapshot.error}")
+        self.last_snapshot = snapshot
+        on_chain_assets = float(self.w3.from_wei(snapshot.total_assets_wei, 'ether'))
 
         off_chain_equity = 0.0
         short_size = 0.0
@@ -217,7 +234,7 @@ class PoRAttestationBot:
         net_delta: float,
         exchange_equity: float,
         timestamp: int
-    ) -> tuple[bytes32_type, str, bytes]:
+    ) -> tuple[bytes, str, bytes]:
         """
         Generates a ZK proof of solvency via the RISC Zero / Brevis coprocessor.
 
@@ -259,7 +276,8 @@ class PoRAttestationBot:
                 f"delta={net_delta:.8f}|"
                 f"exch_equity={exchange_equity:.8f}|"
                 f"ts={timestamp}|"
-                f"chain={self.w3.eth.chain_id}"
+                f"chain={self.w3.eth.chain_id}|"
+                f"block={self.last_snapshot.block_hash if self.last_snapshot else ''}"
             )
             # Deterministic nonce (in production: randomness from coprocessor)
             nonce = hashlib.sha256(f"{proof_input}|{secrets.token_hex(16)}".encode()).hexdigest()
@@ -328,14 +346,17 @@ class PoRAttestationBot:
     # Solvency Report
     # ──────────────────────────────────────────────────────────────────────────
 
-    def generate_solvency_report(self, is_zk: bool = False, proof_hash: str = ""):
+    def generate_solvency_report(self, is_zk: bool = False, proof_hash: str = "", metrics=None):
         """
         Generates a detailed solvency report and saves it to docs/reports/.
+        Pass the cycle's `metrics` to report on the same block the attestation used.
         """
-        on_chain, off_chain_equity, net_delta = self.get_solvency_metrics()
+        if metrics is None:
+            metrics = self.get_solvency_metrics()
+        on_chain, off_chain_equity, net_delta = metrics
+        snapshot               = self.last_snapshot
         total_assets           = on_chain + off_chain_equity
-        total_liabilities_wei  = self.vault.functions.totalSupply().call()
-        total_liabilities      = float(self.w3.from_wei(total_liabilities_wei, 'ether'))
+        total_liabilities      = float(self.w3.from_wei(snapshot.total_supply_wei, 'ether'))
 
         is_solvent = total_assets >= total_liabilities and net_delta <= 0.05
         status     = "SOLVENT" if is_solvent else "CRITICAL_RISK"
@@ -363,7 +384,8 @@ class PoRAttestationBot:
             f.write("- **Total Liabilities:** {:.4f} ETH-equiv\n".format(total_liabilities))
             f.write("- **Solvency Ratio:** {}\n".format(ratio_str))
             f.write("- **Net Delta:** {:.2f}%\n".format(net_delta * 100))
-            f.write("- **Vault:** `{}`\n\n".format(self.vault_address))
+            f.write("- **Vault:** `{}`\n".format(self.vault_address))
+            f.write("- **Block:** {} (`{}`)\n\n".format(snapshot.block_number, snapshot.block_hash))
             f.write("---\n*Generated by Kerne PoR Bot (ZK-Proof Solvency Attestation Mode)*")
 
         logger.success(f"Solvency report generated: {report_path}")
@@ -419,7 +441,10 @@ class PoRAttestationBot:
                 )
 
         # ── Step 2: Generate solvency report ─────────────────────────────────
-        self.generate_solvency_report(is_zk=used_zk_proof, proof_hash=proof_hash_hex)
+        self.generate_solvency_report(
+            is_zk=used_zk_proof, proof_hash=proof_hash_hex,
+            metrics=(on_chain, off_chain_equity, net_delta)
+        )
 
         # ── Step 3: Submit on-chain ───────────────────────────────────────────
         if not self.verification_node_address:
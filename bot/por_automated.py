@@ -1,4 +1,5 @@
 # Created: 2026-01-21
+# Updated: 2026-10-19 - Concurrent block-pinned reserve collection (Multicall3)
 """
 Kerne Protocol - Automated Proof of Reserve (PoR) System
 
@@ -27,6 +28,11 @@ from eth_account.messages import encode_defunct
 from dotenv import load_dotenv
 from loguru import logger
 
+try:
+    from bot.por_collector import ReserveCollector, ChainReserveSnapshot
+except ImportError:
+    from por_collector import ReserveCollector, ChainReserveSnapshot
+
 # Load environment
 load_dotenv()
 
@@ -44,6 +50,8 @@ class ChainMetrics:
     solvency_ratio: float
     rpc_healthy: bool
     timestamp: int
+    block_number: int = 0
+    block_hash: str = ""
 
 
 @dataclass
@@ -53,6 +61,7 @@ class AggregatedPoR:
     generated_at: str
     unix_timestamp: int
     block_heights: Dict[str, int]
+    block_hashes: Dict[str, str]
     
     # On-Chain Metrics (by chain)
     chains: List[Dict[str, Any]]
@@ -178,6 +187,13 @@ class AutomatedPoRBot:
         except Exception as e:
             logger.warning(f"ExchangeManager not available: {e}")
         
+        # Concurrent, block-pinned on-chain reads
+        self.collector = ReserveCollector(
+            self.web3_connections,
+            self.vault_contracts,
+            confirmations=int(os.getenv("POR_CONFIRMATIONS", "0")),
+        )
+        
         # ETH price for USD conversions (fallback)
         self.eth_price_usd = float(os.getenv("ETH_PRICE_USD", "3300"))
         
@@ -185,46 +201,16 @@ class AutomatedPoRBot:
         self.JSON_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
         self.HISTORY_DIR.mkdir(parents=True, exist_ok=True)
     
-    def get_chain_metrics(self, chain_key: str) -> Optional[ChainMetrics]:
-        """Get solvency metrics for a single chain."""
-        if chain_key not in self.web3_connections:
-            return None
-        
-        w3 = self.web3_connections[chain_key]
-        vault = self.vault_contracts[chain_key]
-        config = self.CHAINS[chain_key]
+    def _metrics_from_snapshot(self, snapshot: ChainReserveSnapshot) -> ChainMetrics:
+        """Convert a block-pinned reserve snapshot into chain metrics."""
+        config = self.CHAINS[snapshot.chain_key]
+        vault = self.vault_contracts.get(snapshot.chain_key)
         
-        try:
-            total_assets_wei = vault.functions.totalAssets().call()
-            total_supply_wei = vault.functions.totalSupply().call()
-            
-            total_assets_eth = float(w3.from_wei(total_assets_wei, 'ether'))
-            total_supply_eth = float(w3.from_wei(total_supply_wei, 'ether'))
-            
-            # Calculate solvency ratio
-            if total_supply_eth > 0:
-                solvency_ratio = total_assets_eth / total_supply_eth
-            else:
-                solvency_ratio = 1.0 if total_assets_eth >= 0 else 0.0
-            
+        if not snapshot.healthy:
             return ChainMetrics(
                 chain_id=config["chain_id"],
                 chain_name=config["name"],
-                vault_address=vault.address,
-                total_assets_wei=total_assets_wei,
-                total_assets_eth=total_assets_eth,
-                total_supply_wei=total_supply_wei,
-                total_supply_eth=total_supply_eth,
-                solvency_ratio=solvency_ratio,
-                rpc_healthy=True,
-                timestamp=int(time.time())
-            )
-        except Exception as e:
-            logger.error(f"Failed to get metrics for {chain_key}: {e}")
-            return ChainMetrics(
-                chain_id=config["chain_id"],
-                chain_name=config["name"],
-                vault_address=os.getenv(config["vault_env"], ""),
+                vault_address=vault.address if vault else os.getenv(config["vault_env"], ""),
                 total_assets_wei=0,
                 total_assets_eth=0.0,
                 total_supply_wei=0,
@@ -233,6 +219,36 @@ class AutomatedPoRBot:
                 rpc_healthy=False,
                 timestamp=int(time.time())
             )
+        
+        total_assets_eth = float(Web3.from_wei(snapshot.total_assets_wei, 'ether'))
+        total_supply_eth = float(Web3.from_wei(snapshot.total_supply_wei, 'ether'))
+        
+        # Calculate solvency ratio
+        if total_supply_eth > 0:
+            solvency_ratio = total_assets_eth / total_supply_eth
+        else:
+            solvency_ratio = 1.0 if total_assets_eth >= 0 else 0.0
+        
+        return ChainMetrics(
+            chain_id=config["chain_id"],
+            chain_name=config["name"],
+            vault_address=vault.address,
+            total_assets_wei=snapshot.total_assets_wei,
+            total_assets_eth=total_assets_eth,
+            total_supply_wei=snapshot.total_supply_wei,
+            total_supply_eth=total_supply_eth,
+            solvency_ratio=solvency_ratio,
+            rpc_healthy=True,
+            timestamp=snapshot.block_timestamp,
+            block_number=snapshot.block_number,
+            block_hash=snapshot.block_hash
+        )
+    
+    def get_chain_metrics(self, chain_key: str) -> Optional[ChainMetrics]:
+        """Get solvency metrics for a single chain, read at one pinned block."""
+        if chain_key not in self.web3_connections:
+            return None
+        return self._metrics_from_snapshot(self.collector.collect_chain(chain_key))
     
     def get_offchain_metrics(self) -> Dict[str, Any]:
         """Get off-chain CEX metrics (Hyperliquid)."""
@@ -288,19 +304,14 @@ class AutomatedPoRBot:
         timestamp = int(time.time())
         generated_at = datetime.now(tz=timezone.utc).isoformat()
         
-        # Collect chain metrics
-        chain_metrics: List[ChainMetrics] = []
-        block_heights: Dict[str, int] = {}
-        
-        for chain_key in self.CHAINS.keys():
-            metrics = self.get_chain_metrics(chain_key)
-            if metrics:
-                chain_metrics.append(metrics)
-                if chain_key in self.web3_connections:
-                    try:
-                        block_heights[chain_key] = self.web3_connections[chain_key].eth.block_number
-                    except:
-                        block_heights[chain_key] = 0
+        # Collect chain metrics (all chains concurrently, each pinned to one block)
+        snapshots = self.collector.collect()
+        chain_metrics: List[ChainMetrics] = [
+            self._metrics_from_snapshot(snapshots[chain_key])
+            for chain_key in self.CHAINS.keys() if chain_key in snapshots
+        ]
+        block_heights: Dict[str, int] = {key: snap.block_number for key, snap in snapshots.items()}
+        block_hashes: Dict[str, str] = {key: snap.block_hash for key, snap in snapshots.items()}
         
         # Aggregate on-chain totals
         total_onchain_assets = sum(m.total_assets_eth for m in chain_metrics)
@@ -348,6 +359,7 @@ class AutomatedPoRBot:
             "total_liabilities_eth": round(total_liabilities, 8),
             "solvency_ratio": round(aggregate_solvency_ratio, 6),
             "chains": [asdict(m) for m in chain_metrics],
+            "block_hashes": block_hashes,
             "offchain": offchain
         }
         
@@ -358,6 +370,7 @@ class AutomatedPoRBot:
             generated_at=generated_at,
             unix_timestamp=timestamp,
             block_heights=block_heights,
+            block_hashes=block_hashes,
             chains=[asdict(m) for m in chain_metrics],
             total_onchain_assets_eth=round(total_onchain_assets, 8),
             total_onchain_liabilities_eth=round(total_onchain_liabilities, 8),
@@ -451,6 +464,7 @@ class AutomatedPoRBot:
 - **Total Assets:** {chain['total_assets_eth']:.6f} ETH
 - **Total Supply:** {chain['total_supply_eth']:.6f} ETH  
 - **Chain Solvency:** {chain['solvency_ratio']:.2%}
+- **Block:** {chain.get('block_number', 0)} (`{chain.get('block_hash', '')}`)
 - **RPC Healthy:** {'✅' if chain['rpc_healthy'] else '❌'}
 
 """
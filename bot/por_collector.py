@@ -0,0 +1,175 @@
+# Created: 2026-10-19
+"""
+Kerne Protocol - Block-Pinned Multi-Chain Reserve Collector
+
+Reads vault `totalAssets` / `totalSupply` on every configured chain in
+parallel. Each chain's reads are pinned to a single block and batched
+through Multicall3, so assets and liabilities always come from the same
+state, and the block number + hash are returned for the attestation.
+Wall-clock time is bounded by the slowest chain instead of the sum.
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from web3 import Web3
+from loguru import logger
+
+# Multicall3 is deployed at the same address on Base, Arbitrum and mainnet
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+
+@dataclass
+class ChainReserveSnapshot:
+    """Vault reserves on one chain, read atomically at a single block."""
+    chain_key: str
+    block_number: int
+    block_hash: str
+    block_timestamp: int
+    total_assets_wei: int
+    total_supply_wei: int
+    healthy: bool
+    latency_ms: float
+    error: Optional[str] = None
+
+
+class ReserveCollector:
+    """
+    Concurrent, block-pinned collector for vault reserves across chains.
+
+    `confirmations` pins reads that many blocks behind the head, which keeps
+    the recorded block hash stable against shallow reorgs.
+    """
+
+    def __init__(self, web3_connections: Dict[str, Web3], vault_contracts: Dict[str, Any],
+                 confirmations: int = 0, timeout: float = 30.0):
+        self.web3_connections = web3_connections
+        self.vault_contracts = vault_contracts
+        self.confirmations = confirmations
+        self.timeout = timeout
+        self.multicalls = {
+            chain_key: w3.eth.contract(address=Web3.to_checksum_address(MULTICALL3_ADDRESS), abi=MULTICALL3_ABI)
+            for chain_key, w3 in web3_connections.items()
+        }
+        self.last_wall_time_ms = 0.0
+
+    def _pin_block(self, w3: Web3):
+        block = w3.eth.get_block("latest")
+        if self.confirmations > 0:
+            block = w3.eth.get_block(max(0, block["number"] - self.confirmations))
+        return block
+
+    def _read_reserves(self, chain_key: str, block_number: int) -> tuple[int, int]:
+        """totalAssets + totalSupply in one eth_call; falls back to two pinned calls."""
+        w3 = self.web3_connections[chain_key]
+        vault = self.vault_contracts[chain_key]
+        try:
+            calls = [
+                (vault.address, False, vault.encodeABI(fn_name="totalAssets")),
+                (vault.address, False, vault.encodeABI(fn_name="totalSupply")),
+            ]
+            results = self.multicalls[chain_key].functions.aggregate3(calls).call(block_identifier=block_number)
+            return tuple(w3.codec.decode(["uint256"], data)[0] for _, data in results)
+        except Exception as e:
+            logger.debug(f"Multicall3 unavailable on {chain_key} ({e}), using pinned direct calls")
+            return (
+                vault.functions.totalAssets().call(block_identifier=block_number),
+                vault.functions.totalSupply().call(block_identifier=block_number),
+            )
+
+    def collect_chain(self, chain_key: str) -> ChainReserveSnapshot:
+        """Pin one block on `chain_key` and read both reserve figures at it."""
+        started = time.perf_counter()
+        try:
+            block = self._pin_block(self.web3_connections[chain_key])
+            total_assets_wei, total_supply_wei = self._read_reserves(chain_key, block["number"])
+            return ChainReserveSnapshot(
+                chain_key=chain_key,
+                block_number=block["number"],
+                block_hash=Web3.to_hex(block["hash"]),
+                block_timestamp=block["timestamp"],
+                total_assets_wei=total_assets_wei,
+                total_supply_wei=total_supply_wei,
+                healthy=True,
+                latency_ms=(time.perf_counter() - started) * 1000,
+            )
+        except Exception as e:
+            logger.error(f"Failed to collect reserves for {chain_key}: {e}")
+            return self._unhealthy(chain_key, started, str(e))
+
+    def _unhealthy(self, chain_key: str, started: float, error: str) -> ChainReserveSnapshot:
+        return ChainReserveSnapshot(
+            chain_key=chain_key,
+            block_number=0,
+            block_hash="",
+            block_timestamp=0,
+            total_assets_wei=0,
+            total_supply_wei=0,
+            healthy=False,
+            latency_ms=(time.perf_counter() - started) * 1000,
+            error=error,
+        )
+
+    def collect(self) -> Dict[str, ChainReserveSnapshot]:
+        """
+        Collect every chain concurrently. A chain that errors or exceeds the
+        timeout is reported unhealthy rather than delaying the others.
+        """
+        started = time.perf_counter()
+        chain_keys = list(self.vault_contracts.keys())
+        if not chain_keys:
+            return {}
+
+        pool = ThreadPoolExecutor(max_workers=len(chain_keys))
+        futures = {pool.submit(self.collect_chain, key): key for key in chain_keys}
+        done, _ = wait(futures, timeout=self.timeout)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        snapshots = {}
+        for future, chain_key in futures.items():
+            if future in done:
+                snapshots[chain_key] = future.result()
+            else:
+                logger.error(f"Reserve collection for {chain_key} timed out after {self.timeout}s")
+                snapshots[chain_key] = self._unhealthy(chain_key, started, "timeout")
+
+        self.last_wall_time_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Collected reserves on {len(chain_keys)} chains in {self.last_wall_time_ms:.0f}ms "
+            f"(slowest chain {max(s.latency_ms for s in snapshots.values()):.0f}ms)"
+        )
+        return snapshots
@@ -1,10 +1,45 @@
 import json
 import os
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 from loguru import logger
-from chain_manager import ChainManager
+from web3 import Web3
+
+try:
+    from bot.chain_manager import ChainManager
+    from bot.por_collector import MULTICALL3_ADDRESS, MULTICALL3_ABI
+except ImportError:
+    from chain_manager import ChainManager
+    from por_collector import MULTICALL3_ADDRESS, MULTICALL3_ABI
 
 # Created: 2026-01-09
+# Updated: 2026-10-19 - Factory-wide, block-pinned Multicall3 reporting (generate_global_summary)
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+MULTICALL_CHUNK = 500  # calls per aggregate3, keeps each eth_call well under node gas caps
+
+FACTORY_ABI = [
+    {"inputs": [], "name": "getVaultsCount", "outputs": [{"name": "", "type": "uint256"}], "stateMutability": "view", "type": "function"},
+    {"inputs": [{"name": "", "type": "uint256"}], "name": "allVaults", "outputs": [{"name": "", "type": "address"}], "stateMutability": "view", "type": "function"},
+]
+
+# Vault fields read for every report: name -> output types
+VAULT_FIELDS = {
+    "totalAssets": ["uint256"],
+    "totalSupply": ["uint256"],
+    "getSolvencyRatio": ["uint256"],
+    "getProjectedAPY": ["uint256"],
+    "verificationNode": ["address"],
+    "whitelistEnabled": ["bool"],
+    "complianceHook": ["address"],
+}
+VAULT_REPORT_ABI = [
+    {"inputs": [], "name": name, "outputs": [{"name": "", "type": types[0]}], "stateMutability": "view", "type": "function"}
+    for name, types in VAULT_FIELDS.items()
+]
+
+# Minimal ABI for VerificationNode
+VERIFICATION_NODE_ABI = [{"inputs":[{"name":"vault","type":"address"}],"name":"latestAttestations","outputs":[{"name":"totalAssets","type":"uint256"},{"name":"timestamp","type":"uint256"},{"name":"verified","type":"bool"}],"stateMutability":"view","type":"function"}]
 
 class ReportingService:
     """
@@ -111,6 +146,110 @@ This certificate is generated based on real-time cryptographic attestations and
             logger.error(f"Failed to generate certificate: {e}")
             return None
 
+    def _multicall(self, calls: List[tuple], block_number: int) -> List[Optional[tuple]]:
+        """
+        Runs (target, calldata, output_types) calls through Multicall3 at one block,
+        in chunks. Returns decoded outputs, None where a call reverted.
+        """
+        w3 = self.chain.w3
+        multicall = w3.eth.contract(address=Web3.to_checksum_address(MULTICALL3_ADDRESS), abi=MULTICALL3_ABI)
+        decoded = []
+        for i in range(0, len(calls), MULTICALL_CHUNK):
+            chunk = calls[i:i + MULTICALL_CHUNK]
+            results = multicall.functions.aggregate3(
+                [(Web3.to_checksum_address(target), True, data) for target, data, _ in chunk]
+            ).call(block_identifier=block_number)
+            for (_, _, types), (success, data) in zip(chunk, results):
+                if not (success and data):
+                    decoded.append(None)
+                    continue
+                # Addresses come back lowercase; checksum them like contract .call() does
+                decoded.append(tuple(
+                    Web3.to_checksum_address(v) if t == "address" else v
+                    for t, v in zip(types, w3.codec.decode(types, data))
+                ))
+        return decoded
+
+    def fetch_vault_states(self, vault_addresses: List[str], block_number: int) -> List[Dict[str, Any]]:
+        """All report fields for every vault in two Multicall3 passes pinned to `block_number`."""
+        w3 = self.chain.w3
+        vaults = [Web3.to_checksum_address(a) for a in vault_addresses]
+        encoder = w3.eth.contract(abi=VAULT_REPORT_ABI)
+        calls = [
+            (vault, encoder.encodeABI(fn_name=name), types)
+            for vault in vaults
+            for name, types in VAULT_FIELDS.items()
+        ]
+        values = self._multicall(calls, block_number)
+
+        states = []
+        per_vault = len(VAULT_FIELDS)
+        for i, vault in enumerate(vaults):
+            row = values[i * per_vault:(i + 1) * per_vault]
+            state = {name: (out[0] if out is not None else None) for name, out in zip(VAULT_FIELDS, row)}
+            state["address"] = vault
+            state["proof_of_reserve_verified"] = False
+            states.append(state)
+
+        # Second pass: attestations for vaults that have a verification node
+        node_encoder = w3.eth.contract(abi=VERIFICATION_NODE_ABI)
+        attested = [s for s in states if s["verificationNode"] not in (None, ZERO_ADDRESS)]
+        attestations = self._multicall([
+            (s["verificationNode"], node_encoder.encodeABI(fn_name="latestAttestations", args=[s["address"]]),
+             ["uint256", "uint256", "bool"])
+            for s in attested
+        ], block_number)
+        for state, attestation in zip(attested, attestations):
+            state["proof_of_reserve_verified"] = bool(attestation and attestation[2])
+        return states
+
+    def enumerate_vaults(self, factory_address: str, block_number: int) -> List[str]:
+        """Every vault the factory has deployed, as of `block_number`."""
+        factory = self.chain.w3.eth.contract(address=Web3.to_checksum_address(factory_address), abi=FACTORY_ABI)
+        count = factory.functions.getVaultsCount().call(block_identifier=block_number)
+        outputs = self._multicall([
+            (factory.address, factory.encodeABI(fn_name="allVaults", args=[i]), ["address"])
+            for i in range(count)
+        ], block_number)
+        return [out[0] for out in outputs if out is not None]
+
+    def _build_vault_report(self, state: Dict[str, Any], block_number: int) -> Dict[str, Any]:
+        solvency_ratio = state["getSolvencyRatio"]
+        if solvency_ratio is None:
+            # Reverted or empty read: no evidence either way
+            health_status = "UNKNOWN"
+        else:
+            health_status = "HEALTHY" if solvency_ratio >= 10000 else "UNDERCOLLATERALIZED"
+        return {
+            "vault_address": state["address"],
+            "timestamp": datetime.now().isoformat(),
+            "block_number": block_number,
+            "metrics": {
+                "total_assets_wei": str(state["totalAssets"]),
+                "total_supply_shares": str(state["totalSupply"]),
+                "solvency_ratio_bps": solvency_ratio,
+                "projected_apy_bps": state["getProjectedAPY"],
+                "health_status": health_status,
+                "proof_of_reserve_verified": state["proof_of_reserve_verified"]
+            },
+            "execution_quality": {
+                "slippage_avg_bps": 12, # Simulated for now
+                "funding_capture_efficiency": 0.94,
+                "sharpe_ratio": 3.2,
+                "max_drawdown_bps": 45
+            },
+            "compliance": {
+                "whitelist_enabled": state["whitelistEnabled"],
+                "compliance_hook": state["complianceHook"]
+            }
+        }
+
+    def _write_json(self, filename: str, payload: Dict[str, Any]) -> str:
+        filepath = os.path.join(self.output_dir, filename)
+        with open(filepath, "w") as f:
+            json.dump(payload, f, indent=4)
+        return filepath
+
     def generate_vault_report(self, vault_address: str):
         """
         Generates a JSON report of vault performance.
@@ -119,54 +258,11 @@ This certificate is generated based on real-time cryptographic attestations and
         logger.info(f"Generating report for vault: {vault_address}")
         
         try:
-            vault = self.chain.w3.eth.contract(
-                address=vault_address,
-                abi=self.chain.vault.abi # Assuming same ABI for all vaults
-            )
-
-            total_assets = vault.functions.totalAssets().call()
-            total_supply = vault.functions.totalSupply().call()
-            solvency_ratio = vault.functions.getSolvencyRatio().call()
-            projected_apy = vault.functions.getProjectedAPY().call()
-            
-            # Fetch verification status
-            verification_node_address = vault.functions.verificationNode().call()
-            is_verified = False
-            if verification_node_address != "0x0000000000000000000000000000000000000000":
-                # Minimal ABI for VerificationNode
-                vn_abi = [{"inputs":[{"name":"vault","type":"address"}],"name":"latestAttestations","outputs":[{"name":"totalAssets","type":"uint256"},{"name":"timestamp","type":"uint256"},{"name":"verified","type":"bool"}],"stateMutability":"view","type":"function"}]
-                vn = self.chain.w3.eth.contract(address=verification_node_address, abi=vn_abi)
-                _, _, is_verified = vn.functions.latestAttestations(vault_address).call()
-
-            report = {
-                "vault_address": vault_address,
-                "timestamp": datetime.now().isoformat(),
-                "metrics": {
-                    "total_assets_wei": str(total_assets),
-                    "total_supply_shares": str(total_supply),
-                    "solvency_ratio_bps": solvency_ratio,
-                    "projected_apy_bps": projected_apy,
-                    "health_status": "HEALTHY" if solvency_ratio >= 10000 else "UNDERCOLLATERALIZED",
-                    "proof_of_reserve_verified": is_verified
-                },
-                "execution_quality": {
-                    "slippage_avg_bps": 12, # Simulated for now
-                    "funding_capture_efficiency": 0.94,
-                    "sharpe_ratio": 3.2,
-                    "max_drawdown_bps": 45
-                },
-                "compliance": {
-                    "whitelist_enabled": vault.functions.whitelistEnabled().call(),
-                    "compliance_hook": vault.functions.complianceHook().call()
-                }
-            }
+            block_number = self.chain.w3.eth.block_number
+            state = self.fetch_vault_states([vault_address], block_number)[0]
+            report = self._build_vault_report(state, block_number)
 
-            filename = f"report_{vault_address[:8]}_{datetime.now().strftime('%Y%m%d')}.json"
-            filepath = os.path.join(self.output_dir, filename)
-            
-            with open(filepath, "w") as f:
-                json.dump(report, f, indent=4)
-            
+            filepath = self._write_json(f"report_{vault_address[:8]}_{datetime.now().strftime('%Y%m%d')}.json", report)
             logger.success(f"Report generated: {filepath}")
             return report
 
@@ -176,11 +272,52 @@ This certificate is generated based on real-time cryptographic attestations and
 
     def generate_global_summary(self, factory_address: str):
         """
-        Generates a summary of all vaults deployed via a specific factory.
+        Generates per-vault reports and a summary of all vaults deployed via a specific factory,
+        all read at a single block.
         """
         logger.info(f"Generating global summary for factory: {factory_address}")
-        # Logic to iterate through allVaults and aggregate metrics
-        pass
+
+        try:
+            block_number = self.chain.w3.eth.block_number
+            vaults = self.enumerate_vaults(factory_address, block_number)
+            states = self.fetch_vault_states(vaults, block_number)
+            date = datetime.now().strftime('%Y%m%d')
+
+            reports = []
+            for state in states:
+                report = self._build_vault_report(state, block_number)
+                self._write_json(f"report_{state['address'][:8]}_{date}.json", report)
+                reports.append(report)
+
+            total_assets = sum(s["totalAssets"] or 0 for s in states)
+            weighted_apy = sum((s["getProjectedAPY"] or 0) * (s["totalAssets"] or 0) for s in states)
+            summary = {
+                "factory_address": factory_address,
+                "timestamp": datetime.now().isoformat(),
+                "block_number": block_number,
+                "vault_count": len(states),
+                "total_assets_wei": str(total_assets),
+                "total_supply_shares": str(sum(s["totalSupply"] or 0 for s in states)),
+                "tvl_weighted_apy_bps": weighted_apy // total_assets if total_assets else 0,
+                "healthy_vaults": sum(r["metrics"]["health_status"] == "HEALTHY" for r in reports),
+                "undercollateralized_vaults": [
+                    r["vault_address"] for r in reports if r["metrics"]["health_status"] == "UNDERCOLLATERALIZED"
+                ],
+                "unknown_health_vaults": [
+                    r["vault_address"] for r in reports if r["metrics"]["health_status"] == "UNKNOWN"
+                ],
+                "verified_vaults": sum(s["proof_of_reserve_verified"] for s in states),
+                "whitelisted_vaults": sum(bool(s["whitelistEnabled"]) for s in states),
+                "vaults": [r["vault_address"] for r in reports],
+            }
+
+            filepath = self._write_json(f"global_summary_{factory_address[:8]}_{date}.json", summary)
+            logger.success(f"Global summary generated for {len(states)} vaults at block {block_number}: {filepath}")
+            return summary
+
+        except Exception as e:
+            logger.error(f"Failed to generate global summary: {e}")
+            return None
 
 if __name__ == "__main__":
     # Example usage
@@ -1,54 +1,252 @@
+import heapq
+import json
+from dataclasses import dataclass, field
 from loguru import logger
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+# Default cost model for venues that don't declare one (see BaseExchange)
+DEFAULT_TAKER_FEE_BPS = 5.0
+DEFAULT_LATENCY_MS = 150.0
+# Expected adverse price drift per 100ms of order latency
+LATENCY_COST_BPS_PER_100MS = 0.5
+
+
+@dataclass
+class RouteLeg:
+    venue: str
+    size: float
+    avg_price: float        # volume-weighted fill price from the book walk
+    effective_price: float  # avg_price adjusted for fees and latency
+    levels_used: int
+
+
+@dataclass
+class RoutePlan:
+    side: str
+    requested: float
+    legs: Dict[str, RouteLeg] = field(default_factory=dict)
+    unfilled: float = 0.0
+    marginal_price: float = 0.0  # effective price of the last level taken on any venue
+    reference_price: float = 0.0  # best effective top-of-book across venues
+
+    @property
+    def filled(self) -> float:
+        return sum(leg.size for leg in self.legs.values())
+
+    @property
+    def avg_effective_price(self) -> float:
+        filled = self.filled
+        if filled <= 0:
+            return 0.0
+        return sum(leg.effective_price * leg.size for leg in self.legs.values()) / filled
+
+    @property
+    def slippage_bps(self) -> float:
+        """Execution cost vs the best effective top-of-book, in bps (always >= 0 when filled)."""
+        if self.reference_price <= 0 or self.filled <= 0:
+            return 0.0
+        sign = 1 if self.side == "buy" else -1
+        return sign * (self.avg_effective_price - self.reference_price) / self.reference_price * 10_000
+
+
+def effective_cost_multiplier(side: str, fee_bps: float, latency_ms: float) -> float:
+    """Per-unit price adjustment for taking liquidity on a venue: fees plus latency drift."""
+    cost_bps = fee_bps + LATENCY_COST_BPS_PER_100MS * latency_ms / 100
+    return 1 + cost_bps / 10_000 if side == "buy" else 1 - cost_bps / 10_000
+
+
+def solve_allocation(books: Dict[str, Dict], amount: float, side: str,
+                     venue_costs: Optional[Dict[str, tuple]] = None) -> RoutePlan:
+    """
+    Splits `amount` across venues so the marginal execution cost is equal on
+    every venue that receives size.
+
+    Each venue's cost curve is its full L2 book walked level by level, with
+    every price adjusted for that venue's taker fee and latency. Because the
+    curves are piecewise-linear and convex, taking the globally cheapest
+    level next (a k-way merge over the books) yields the optimal split: all
+    filled venues end at the same marginal effective price.
+
+    venue_costs: venue -> (taker_fee_bps, latency_ms); missing venues use defaults.
+    Pure function over recorded books, so it can be benchmarked offline.
+    """
+    side = side.lower()
+    side_key = 'asks' if side == 'buy' else 'bids'
+    venue_costs = venue_costs or {}
+    plan = RoutePlan(side=side, requested=amount)
+
+    # Heap entries: (sort_key, venue, level_idx); buys take the lowest effective
+    # ask first, sells the highest effective bid (negated for the min-heap)
+    heap = []
+    multipliers = {}
+    levels_by_venue = {}
+    for name, book in books.items():
+        levels = [(float(px), float(sz)) for px, sz, *_ in (book or {}).get(side_key, []) if float(sz) > 0]
+        if not levels:
+            continue
+        fee_bps, latency_ms = venue_costs.get(name, (DEFAULT_TAKER_FEE_BPS, DEFAULT_LATENCY_MS))
+        multipliers[name] = effective_cost_multiplier(side, fee_bps, latency_ms)
+        levels_by_venue[name] = levels
+        eff = levels[0][0] * multipliers[name]
+        heapq.heappush(heap, (eff if side == 'buy' else -eff, name, 0))
+
+    if heap:
+        plan.reference_price = abs(heap[0][0])
+
+    notional = {}
+    filled = {}
+    levels_used = {}
+    remaining = amount
+    while remaining > 1e-12 and heap:
+        key, name, idx = heapq.heappop(heap)
+        px, sz = levels_by_venue[name][idx]
+        take = min(sz, remaining)
+        filled[name] = filled.get(name, 0.0) + take
+        notional[name] = notional.get(name, 0.0) + take * px
+        levels_used[name] = idx + 1
+        remaining -= take
+        plan.marginal_price = abs(key)
+
+        if idx + 1 < len(levels_by_venue[name]):
+            eff = levels_by_venue[name][idx + 1][0] * multipliers[name]
+            heapq.heappush(heap, (eff if side == 'buy' else -eff, name, idx + 1))
+
+    for name, size in filled.items():
+        avg_px = notional[name] / size
+        plan.legs[name] = RouteLeg(
+            venue=name,
+            size=size,
+            avg_price=avg_px,
+            effective_price=avg_px * multipliers[name],
+            levels_used=levels_used[name],
+        )
+    plan.unfilled = max(remaining, 0.0)
+    return plan
+
+
+def simulate_fill(levels: List, size: float) -> Optional[float]:
+    """Average fill price for `size` against one side of a book; None if the book is too thin."""
+    notional = 0.0
+    remaining = size
+    for px, sz, *_ in levels:
+        take = min(float(sz), remaining)
+        notional += take * float(px)
+        remaining -= take
+        if remaining <= 1e-12:
+            return notional / size
+    return None
+
+
+def depth_share_distribution(books: Dict[str, Dict], amount: float, side: str) -> Dict[str, float]:
+    """Legacy split: proportional to each venue's depth within 1% of its best price (benchmark baseline)."""
+    side_key = 'asks' if side.lower() == 'buy' else 'bids'
+    depths = {}
+    for name, book in books.items():
+        levels = book.get(side_key, [])
+        if not levels:
+            continue
+        best_px = levels[0][0]
+        depths[name] = sum(sz for px, sz, *_ in levels if abs(px - best_px) / best_px <= 0.01)
+    total = sum(depths.values())
+    if total == 0:
+        return {}
+    return {name: depth / total * amount for name, depth in depths.items()}
+
+
+def benchmark(books: Dict[str, Dict], amounts: List[float], side: str,
+              venue_costs: Optional[Dict[str, tuple]] = None) -> List[Dict]:
+    """
+    Compares the depth-curve solver with the legacy 1%-depth split on recorded
+    books. Returns the all-in effective price of each method per order size.
+    """
+    side_key = 'asks' if side.lower() == 'buy' else 'bids'
+    venue_costs = venue_costs or {}
+    results = []
+    for amount in amounts:
+        plan = solve_allocation(books, amount, side, venue_costs)
+
+        legacy_cost = 0.0
+        legacy_filled = True
+        for name, size in depth_share_distribution(books, amount, side).items():
+            avg_px = simulate_fill(books[name].get(side_key, []), size)
+            if avg_px is None:
+                legacy_filled = False
+                break
+            fee_bps, latency_ms = venue_costs.get(name, (DEFAULT_TAKER_FEE_BPS, DEFAULT_LATENCY_MS))
+            legacy_cost += avg_px * effective_cost_multiplier(side, fee_bps, latency_ms) * size
+
+        legacy_px = legacy_cost / amount if legacy_filled else None
+        results.append({
+            "amount": amount,
+            "solver_price": plan.avg_effective_price if plan.unfilled == 0 else None,
+            "legacy_price": legacy_px,
+            "solver_slippage_bps": plan.slippage_bps,
+        })
+    return results
+
 
 class SmartRouter:
     """
     Smart Order Router for Kerne V2.
-    Calculates optimal order distribution across multiple CEXs 
+    Calculates optimal order distribution across multiple CEXs
     to minimize slippage and maximize capital efficiency.
     """
     def __init__(self, exchange_manager):
         self.em = exchange_manager
 
+    def _venue_costs(self) -> Dict[str, tuple]:
+        return {
+            name: (getattr(ex, "TAKER_FEE_BPS", DEFAULT_TAKER_FEE_BPS),
+                   getattr(ex, "EXPECTED_LATENCY_MS", DEFAULT_LATENCY_MS))
+            for name, ex in self.em.exchanges.items()
+        }
+
+    def plan_route(self, symbol: str, amount_eth: float, side: str) -> RoutePlan:
+        """Walks every venue's full book and returns the fee-aware, cost-equalised split."""
+        books = self.em.get_order_book(symbol)
+        return solve_allocation(books, amount_eth, side, self._venue_costs())
+
     def calculate_distribution(self, symbol: str, amount_eth: float, side: str) -> Dict[str, float]:
         """
         Determines how much of the total amount_eth should be routed to each exchange.
-        Uses order book depth analysis.
+        Uses a full depth-curve walk including venue fees and latency.
         """
         logger.info(f"🔍 Routing {amount_eth} {symbol} ({side}) across exchanges...")
-        books = self.em.get_order_book(symbol)
-        distribution = {}
-        
-        depths = {}
-        total_depth = 0
-        
-        for name, book in books.items():
-            side_key = 'asks' if side.lower() == 'buy' else 'bids'
-            levels = book.get(side_key, [])
-            
-            if not levels:
-                continue
-            
-            # Calculate depth within 1% of best price
-            best_px = levels[0][0]
-            depth = 0
-            for px, sz in levels:
-                if abs(px - best_px) / best_px <= 0.01:
-                    depth += sz
-                else:
-                    break
-            
-            depths[name] = depth
-            total_depth += depth
-            
-        if total_depth == 0:
+        plan = self.plan_route(symbol, amount_eth, side)
+
+        if not plan.legs:
             logger.warning("No depth found on any exchange. Falling back to equal distribution.")
             active_ex = list(self.em.exchanges.keys())
             return {name: amount_eth / len(active_ex) for name in active_ex}
-            
-        for name, depth in depths.items():
-            share = (depth / total_depth) * amount_eth
-            distribution[name] = share
-            logger.info(f"📍 Route: {name} -> {share:.4f} ETH ({ (depth/total_depth)*100:.1f}%)")
-            
+
+        distribution = {name: leg.size for name, leg in plan.legs.items()}
+        if plan.unfilled > 0:
+            # Beyond all visible depth: spread the rest in proportion to what each venue absorbed
+            logger.warning(f"Order exceeds visible depth by {plan.unfilled:.4f} ETH; scaling legs pro rata")
+            filled = plan.filled
+            distribution = {name: size / filled * amount_eth for name, size in distribution.items()}
+
+        for name, leg in plan.legs.items():
+            logger.info(
+                f"📍 Route: {name} -> {distribution[name]:.4f} ETH "
+                f"({distribution[name] / amount_eth * 100:.1f}%) @ avg {leg.avg_price:.2f} "
+                f"(eff {leg.effective_price:.2f}, {leg.levels_used} levels)"
+            )
+        logger.info(f"Expected slippage incl. fees: {plan.slippage_bps:.2f} bps")
+
         return distribution
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark SmartRouter against recorded order books")
+    parser.add_argument("books", help="JSON file: {venue: {'bids': [[px, sz], ...], 'asks': [...]}}")
+    parser.add_argument("--side", default="sell")
+    parser.add_argument("--amounts", default="1,10,50,100,250")
+    args = parser.parse_args()
+
+    with open(args.books) as f:
+        recorded = json.load(f)
+    for row in benchmark(recorded, [float(a) for a in args.amounts.split(",")], args.side):
+        print(row)
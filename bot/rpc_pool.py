@@ -0,0 +1,297 @@
+# Created: 2026-10-19
+"""
+Kerne RPC Pool - Shared, Health-Scored JSON-RPC Provider
+
+One pool per set of endpoint URLs, shared process-wide by every subsystem
+that asks for the same chain (ChainManager, ZINSolver, BalanceScanner):
+
+- Each endpoint keeps a pooled HTTP session plus EWMA latency and error
+  scores; a failing endpoint is put in an exponential cooldown.
+- Requests go to the best-scored endpoint. If it hasn't answered within a
+  few multiples of its usual latency, the same request is hedged to the
+  next endpoint and the first answer wins.
+- Errors and timeouts fail over to the remaining endpoints.
+- Calls issued concurrently from different threads are coalesced into a
+  single JSON-RPC batch POST.
+
+`get_web3(urls)` returns a Web3 backed by the shared pool, so existing
+contract code works unchanged.
+"""
+
+import itertools
+import json
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import requests
+from loguru import logger
+from web3 import Web3
+from web3._utils.encoding import Web3JsonEncoder
+from web3.middleware import geth_poa_middleware
+from web3.providers.base import JSONBaseProvider
+from web3.types import RPCEndpoint, RPCResponse
+
+# Methods that must reach exactly one node and are never hedged
+UNHEDGED_PREFIXES = ("eth_send", "eth_sign", "personal_", "eth_subscribe")
+# JSON-RPC error codes that mean "this node is overloaded", handled like transport errors
+RATE_LIMIT_CODES = (-32005, 429)
+
+EWMA_ALPHA = 0.2
+DEFAULT_LATENCY_S = 0.2  # optimistic prior so fresh endpoints get traffic
+MAX_COOLDOWN_S = 60.0
+
+
+class RpcEndpoint:
+    """One RPC URL with its own keep-alive session and health scores."""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=32)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.supports_batch = True
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def expected_latency(self) -> float:
+        return self.latency_ewma if self.latency_ewma is not None else DEFAULT_LATENCY_S
+
+    def score(self, now: float) -> float:
+        """Lower is better; endpoints in cooldown sort last."""
+        penalty = 1e6 if now < self.cooldown_until else 0.0
+        return penalty + self.expected_latency * (1 + 10 * self.error_ewma)
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.requests += 1
+            self.latency_ewma = latency if self.latency_ewma is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency_ewma
+            )
+            self.error_ewma *= (1 - EWMA_ALPHA)
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.error_ewma = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.error_ewma
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= 2:
+                self.cooldown_until = time.monotonic() + min(MAX_COOLDOWN_S, 2 ** self.consecutive_failures)
+
+    def post(self, body: Union[Dict, List[Dict]]) -> Any:
+        data = json.dumps(body, cls=Web3JsonEncoder)
+        resp = self.session.post(
+            self.url, data=data, headers={"Content-Type": "application/json"}, timeout=self.timeout
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+
+class RpcPool:
+    """
+    Health-scored, hedging, batching request pool over a set of RPC URLs.
+    Thread-safe; one dispatcher thread coalesces concurrent calls.
+    """
+
+    def __init__(self, urls: Sequence[str], name: str = "", timeout: float = 10.0,
+                 batch_window_s: float = 0.001, max_batch: int = 50,
+                 min_hedge_delay_s: float = 0.05, hedge_multiplier: float = 3.0):
+        self.name = name or "rpc"
+        self.endpoints = [RpcEndpoint(url, timeout) for url in dict.fromkeys(urls)]
+        if not self.endpoints:
+            raise ValueError(f"RpcPool '{self.name}' needs at least one URL")
+        self.timeout = timeout
+        self.batch_window_s = batch_window_s
+        self.max_batch = max_batch
+        self.min_hedge_delay_s = min_hedge_delay_s
+        self.hedge_multiplier = hedge_multiplier
+
+        self.hedged_requests = 0
+        self.batches_sent = 0
+        self.calls_batched = 0
+
+        self._ids = itertools.count(1)
+        self._queue: "queue.Queue[Tuple[Dict, Future]]" = queue.Queue()
+        # Separate executors: batch senders wait on endpoint posts
+        self._batch_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix=f"rpc-{self.name}-batch")
+        self._io_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix=f"rpc-{self.name}-io")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name=f"rpc-{self.name}-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def ranked_endpoints(self) -> List[RpcEndpoint]:
+        now = time.monotonic()
+        return sorted(self.endpoints, key=lambda ep: ep.score(now))
+
+    def request(self, method: str, params: Any) -> RPCResponse:
+        """Send one JSON-RPC call (possibly inside a batch) and wait for its response."""
+        payload = {"jsonrpc": "2.0", "method": method, "params": params or [], "id": next(self._ids)}
+        future: Future = Future()
+        self._queue.put((payload, future))
+        return future.result()
+
+    def _dispatch_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._batch_executor.submit(self._send_batch, batch)
+
+    def _send_batch(self, batch: List[Tuple[Dict, Future]]):
+        payloads = [payload for payload, _ in batch]
+        hedge = not any(p["method"].startswith(UNHEDGED_PREFIXES) for p in payloads)
+        self.batches_sent += 1
+        self.calls_batched += len(payloads)
+        try:
+            responses = self._send(payloads, hedge)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        by_id = {resp.get("id"): resp for resp in responses if isinstance(resp, dict)}
+        for payload, future in batch:
+            resp = by_id.get(payload["id"])
+            if resp is None:
+                future.set_exception(ConnectionError(f"No response for {payload['method']} from {self.name}"))
+            else:
+                future.set_result(resp)
+
+    def _hedge_delay(self, endpoint: RpcEndpoint) -> float:
+        return min(self.timeout, max(self.min_hedge_delay_s, self.hedge_multiplier * endpoint.expected_latency))
+
+    def _send(self, payloads: List[Dict], hedge: bool) -> List[Dict]:
+        """Best endpoint first; hedge to the next one if it's slow, fail over on errors."""
+        order = self.ranked_endpoints()
+        pending: Dict[Future, RpcEndpoint] = {}
+        next_idx = 0
+        last_error: Optional[Exception] = None
+
+        def launch():
+            nonlocal next_idx
+            endpoint = order[next_idx]
+            next_idx += 1
+            pending[self._io_executor.submit(self._post, endpoint, payloads)] = endpoint
+
+        launch()
+        while pending:
+            can_hedge = hedge and next_idx < len(order)
+            timeout = self._hedge_delay(order[next_idx - 1]) if can_hedge else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                self.hedged_requests += 1
+                launch()
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.debug(f"[{self.name}] {endpoint.url[:40]} failed: {e}")
+            if not pending and next_idx < len(order):
+                launch()
+
+        raise ConnectionError(f"All RPC endpoints failed for {self.name}: {last_error}")
+
+    def _post(self, endpoint: RpcEndpoint, payloads: List[Dict]) -> List[Dict]:
+        started = time.perf_counter()
+        try:
+            if len(payloads) > 1 and endpoint.supports_batch:
+                data = endpoint.post(payloads)
+                if not isinstance(data, list):
+                    # Batch rejected (e.g. provider disallows batches): remember and send singly
+                    endpoint.supports_batch = False
+                    data = [endpoint.post(p) for p in payloads]
+            elif len(payloads) > 1:
+                data = [endpoint.post(p) for p in payloads]
+            else:
+                data = [endpoint.post(payloads[0])]
+
+            for resp in data:
+                error = resp.get("error") if isinstance(resp, dict) else None
+                if error and error.get("code") in RATE_LIMIT_CODES:
+                    raise ConnectionError(f"Rate limited: {error.get('message')}")
+        except Exception:
+            endpoint.record_failure()
+            raise
+        endpoint.record_success(time.perf_counter() - started)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "hedged_requests": self.hedged_requests,
+            "batches_sent": self.batches_sent,
+            "calls_batched": self.calls_batched,
+            "endpoints": [
+                {
+                    "url": ep.url[:50],
+                    "latency_ms": round(ep.expected_latency * 1000, 1),
+                    "error_rate": round(ep.error_ewma, 3),
+                    "requests": ep.requests,
+                    "errors": ep.errors,
+                    "in_cooldown": time.monotonic() < ep.cooldown_until,
+                }
+                for ep in self.ranked_endpoints()
+            ],
+        }
+
+
+class PooledProvider(JSONBaseProvider):
+    """Web3 provider that routes every call through a shared RpcPool."""
+
+    def __init__(self, pool: RpcPool):
+        super().__init__()
+        self.pool = pool
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        return self.pool.request(method, params)
+
+
+_POOLS: Dict[Tuple[str, ...], RpcPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _normalize_urls(urls: Union[str, Sequence[str]]) -> Tuple[str, ...]:
+    if isinstance(urls, str):
+        urls = urls.split(",")
+    return tuple(u.strip().split()[0] for u in urls if u and u.strip().startswith("http"))
+
+
+def get_pool(urls: Union[str, Sequence[str]], name: str = "", **kwargs) -> RpcPool:
+    """Process-wide pool for this set of URLs (comma-separated string or list)."""
+    key = _normalize_urls(urls)
+    if not key:
+        raise ValueError(f"No usable RPC URLs for {name or 'pool'}")
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = RpcPool(key, name=name, **kwargs)
+            logger.info(f"RPC pool '{pool.name}' created with {len(key)} endpoint(s)")
+        return pool
+
+
+def get_web3(urls: Union[str, Sequence[str]], name: str = "", poa: bool = False) -> Web3:
+    """A Web3 backed by the shared pool. Cheap: connections live in the pool."""
+    w3 = Web3(PooledProvider(get_pool(urls, name)))
+    if poa:
+        w3.middleware_onion.inject(geth_poa_middleware, layer=0)
+    return w3
@@ -12,6 +12,11 @@ from dataclasses import dataclass, field
 from web3 import Web3
 from datetime import datetime, timedelta
 
+try:
+    from bot.sentinel.streaming_stats import RollingReturnStats, PnLTracker
+except ImportError:
+    from sentinel.streaming_stats import RollingReturnStats, PnLTracker
+
 @dataclass
 class VaultRiskProfile:
     vault_address: str
@@ -46,40 +51,39 @@ class RiskEngine:
             "hourly_loss_limit_usd": 10000, # $10k hourly stop
             "max_drawdown_pct": 0.02 # 2% max daily drawdown
         }
-        self.price_history = {} # symbol -> list of prices
-        self.pnl_snapshots = [] # List of (timestamp, equity)
+        self.return_stats: Dict[str, RollingReturnStats] = {} # symbol -> streaming return stats (last 100 prices)
+        self.pnl_tracker = PnLTracker(horizon_seconds=86400, windows=(3600, 86400))
         self.pnl_state = self.load_pnl_state()
-        self.ewma_state = {} # symbol -> {"mean": float, "variance": float}
         self.depeg_state = {} # token -> {"last_ratio": float, "breach_count": int}
 
+    def update_price(self, symbol: str, price: float) -> RollingReturnStats:
+        """Feeds one price tick into the symbol's streaming return statistics (O(log window))."""
+        stats = self.return_stats.get(symbol)
+        if stats is None:
+            stats = self.return_stats[symbol] = RollingReturnStats(window=99)
+        stats.update(price)
+        return stats
+
     def track_pnl(self, current_equity: float):
         now = time.time()
         if self.pnl_state["starting_equity"] == 0:
             self.pnl_state["starting_equity"] = current_equity
             self.save_pnl_state()
         
-        # Add snapshot
-        self.pnl_snapshots.append((now, current_equity))
-        # Keep only last 24h of snapshots (assuming 5 min intervals, ~288 snapshots)
-        self.pnl_snapshots = [s for s in self.pnl_snapshots if now - s[0] <= 86400]
+        # Add snapshot (24h horizon, amortized O(1) per tick)
+        self.pnl_tracker.add(current_equity, now)
 
         # Check for reset
         if now - self.pnl_state["last_reset"] > 86400:
             self.pnl_state["starting_equity"] = current_equity
             self.pnl_state["daily_realized_pnl"] = 0.0
             self.pnl_state["last_reset"] = now
+            self.pnl_tracker.reset_peak()
             self.save_pnl_state()
 
     def get_pnl_window(self, window_seconds: int) -> float:
         """Returns PnL over the specified window in seconds."""
-        if not self.pnl_snapshots: return 0.0
-        now = time.time()
-        start_equity = self.pnl_snapshots[0][1]
-        for ts, equity in reversed(self.pnl_snapshots):
-            if now - ts >= window_seconds:
-                start_equity = equity
-                break
-        return self.pnl_snapshots[-1][1] - start_equity
+        return self.pnl_tracker.window_pnl(window_seconds)
 
     async def emergency_unwind(self, vault_address: str, symbol: str = "ETH"):
         """
@@ -155,39 +159,14 @@ class RiskEngine:
 
     def calculate_volatility(self, symbol: str) -> float:
         """
-        Calculates realized volatility using adaptive EWMA (Exponentially Weighted Moving Average).
-        Higher recent volatility reduces the decay to react faster.
+        Realized volatility using adaptive EWMA (Exponentially Weighted Moving Average).
+        Higher recent volatility reduces the decay to react faster. The EWMA is
+        advanced once per tick in update_price, so this is a constant-time read.
         """
-        prices = self.price_history.get(symbol, [])
-        if len(prices) < 20:
+        stats = self.return_stats.get(symbol)
+        if stats is None:
             return 0.05 # Default 5% if insufficient data
-        
-        returns = np.diff(np.log(prices))
-        baseline_vol = np.std(returns) if len(returns) > 1 else 0.0
-        
-        # Adaptive decay: higher volatility => lower alpha (faster reaction)
-        alpha = 0.94 - min(0.10, baseline_vol * 2.0)
-        alpha = max(0.80, min(0.94, alpha))
-
-        # Initialize EWMA state if needed
-        if symbol not in self.ewma_state:
-            variance = np.var(returns) if len(returns) > 1 else 0.0025
-            self.ewma_state[symbol] = {"mean": 0.0, "variance": variance}
-
-        state = self.ewma_state[symbol]
-        mean = state["mean"]
-        variance = state["variance"]
-
-        for r in returns[-50:]:
-            mean = alpha * mean + (1 - alpha) * r
-            variance = alpha * variance + (1 - alpha) * ((r - mean) ** 2)
-
-        state["mean"] = mean
-        state["variance"] = variance
-        self.ewma_state[symbol] = state
-
-        vol = np.sqrt(variance)
-        return vol * np.sqrt(365 * 24 * 60) # Annualized
+        return stats.volatility() # Annualized
 
     def get_volatility_adjusted_thresholds(self, symbol: str) -> Dict:
         """
@@ -238,24 +217,22 @@ class RiskEngine:
             logger.error(f"Deep liquidity check failed: {e}")
             return False
 
-    def calculate_var(self, symbol: str, portfolio_value: float, confidence_level: float = 0.99) -> float:
+    def calculate_var(self, symbol: str, portfolio_value: float, confidence_level: float = 0.99, method: str = "parametric") -> float:
         """
-        Calculates Parametric Value at Risk (VaR).
+        Calculates Value at Risk from the streaming return window.
+        method="parametric": |mu - z * sigma|; method="historical": empirical loss quantile.
         """
-        prices = self.price_history.get(symbol, [])
-        if len(prices) < 20:
+        stats = self.return_stats.get(symbol)
+        if stats is None:
+            return portfolio_value * 0.05 # Default 5% risk
+
+        if method == "historical":
+            var_pct = stats.historical_var_pct(confidence_level)
+        else:
+            var_pct = stats.parametric_var_pct(confidence_level)
+
+        if var_pct is None:
             return portfolio_value * 0.05 # Default 5% risk
-        
-        returns = np.diff(np.log(prices))
-        mu = np.mean(returns)
-        sigma = np.std(returns)
-        
-        from scipy.stats import norm
-        z_score = norm.ppf(confidence_level)
-        
-        # VaR = Portfolio Value * (mu - z * sigma)
-        # We use absolute value for loss
-        var_pct = abs(mu - z_score * sigma)
         return portfolio_value * var_pct
 
     def calculate_health_score(self, profile: VaultRiskProfile) -> float:
@@ -322,10 +299,8 @@ class RiskEngine:
         symbol = vault_data.get("symbol", "ETH/USDT")
         current_price = vault_data["current_price"]
         
-        # Update price history
-        if symbol not in self.price_history: self.price_history[symbol] = []
-        self.price_history[symbol].append(current_price)
-        if len(self.price_history[symbol]) > 100: self.price_history[symbol].pop(0)
+        # Update streaming price statistics
+        self.update_price(symbol, current_price)
         
         vol = self.calculate_volatility(symbol)
         
@@ -356,6 +331,7 @@ class RiskEngine:
         
         # VaR Calculation
         var_99 = self.calculate_var(symbol, onchain_collateral, 0.99)
+        hist_var_99 = self.calculate_var(symbol, onchain_collateral, 0.99, method="historical")
         
         profile = VaultRiskProfile(
             vault_address=vault_data["address"],
@@ -367,7 +343,7 @@ class RiskEngine:
             volatility_24h=vol,
             health_score=0.0,
             daily_pnl_usd=daily_pnl,
-            risk_factors={"VaR_99": var_99, "HF": hf, "LiqPriceCEX": liq_price_cex, "HourlyPnL": hourly_pnl}
+            risk_factors={"VaR_99": var_99, "HistVaR_99": hist_var_99, "Drawdown": self.pnl_tracker.drawdown_pct(), "HF": hf, "LiqPriceCEX": liq_price_cex, "HourlyPnL": hourly_pnl}
         )
         
         profile.health_score = self.calculate_health_score(profile)
@@ -27,7 +27,9 @@ import sys
 import json
 import time
 import argparse
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Optional
@@ -44,6 +46,7 @@ DEFILLAMA_POOLS_URL = "https://yields.llama.fi/pools"
 DEFILLAMA_PROTOCOL_URL = "https://api.llama.fi/protocol/{slug}"
 
 MAPPINGS_PATH = Path(__file__).parent / "asset_mappings.json"
+LLAMA_CACHE_PATH = Path(__file__).parent.parent / "data" / "defillama_index_cache.json"
 YIELD_ROUTER_ABI = [
     {
         "inputs": [
@@ -83,6 +86,8 @@ RISK_TIERS = [
 
 # DeFiLlama fetch cache TTL seconds
 CACHE_TTL = 300  # 5 minutes
+DETAIL_CACHE_TTL = 3600  # protocol detail (audits, bounties) changes rarely
+DETAIL_FETCH_WORKERS = 8
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Data Classes
@@ -123,74 +128,198 @@ class AssetRiskScore:
 # ─────────────────────────────────────────────────────────────────────────────
 
 class DeFiLlamaClient:
-    """Thin wrapper around DeFiLlama public APIs with in-process caching."""
+    """
+    DeFiLlama public APIs behind an indexed, disk-persisted cache.
+
+    The protocols and pools datasets are downloaded once per refresh and
+    indexed into dicts (protocol slug / lowercase name, pool id), so every
+    per-asset lookup is O(1). The index is persisted to `cache_path`, letting
+    a warm restart serve lookups without the multi-MB download, and an
+    optional background thread refreshes it every CACHE_TTL seconds.
+    """
 
-    def __init__(self):
-        self._protocols_cache: Optional[list] = None
+    def __init__(self, cache_path: Optional[Path] = LLAMA_CACHE_PATH):
+        self.cache_path = cache_path
+        self._protocols_by_key: dict[str, dict] = {}
         self._protocols_ts: float = 0.0
-        self._pools_cache: Optional[list] = None
+        self._pools_by_id: dict[str, dict] = {}
         self._pools_ts: float = 0.0
+        self._detail_cache: dict[str, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": "KerneProtocol/1.0 RiskOracle"})
+        self._load_disk_cache()
 
-    def _get_protocols(self) -> list:
-        now = time.time()
-        if self._protocols_cache and now - self._protocols_ts < CACHE_TTL:
-            return self._protocols_cache
+    # ── Disk persistence ─────────────────────────────────────────────────────
+
+    def _load_disk_cache(self):
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            with open(self.cache_path, "r") as f:
+                cached = json.load(f)
+            self._protocols_by_key = cached.get("protocols", {})
+            self._protocols_ts = float(cached.get("protocols_ts", 0.0))
+            self._pools_by_id = cached.get("pools", {})
+            self._pools_ts = float(cached.get("pools_ts", 0.0))
+            self._detail_cache = {k: (float(v[0]), v[1]) for k, v in cached.get("details", {}).items()}
+            logger.info(
+                f"Loaded DeFiLlama index from disk: {len(self._pools_by_id)} pools, "
+                f"age {time.time() - self._pools_ts:.0f}s"
+            )
+        except Exception as e:
+            logger.warning(f"DeFiLlama disk cache unreadable: {e}")
+
+    def _save_disk_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            with self._lock:
+                snapshot = {
+                    "protocols": self._protocols_by_key,
+                    "protocols_ts": self._protocols_ts,
+                    "pools": self._pools_by_id,
+                    "pools_ts": self._pools_ts,
+                    "details": {k: list(v) for k, v in self._detail_cache.items()},
+                }
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self.cache_path)
+        except Exception as e:
+            logger.warning(f"DeFiLlama disk cache write failed: {e}")
+
+    # ── Dataset refresh ──────────────────────────────────────────────────────
+
+    def refresh_protocols(self) -> bool:
+        """Download /protocols and rebuild the slug/name index."""
         try:
             resp = self.session.get(DEFILLAMA_PROTOCOLS_URL, timeout=15)
             resp.raise_for_status()
-            self._protocols_cache = resp.json()
-            self._protocols_ts = now
-            logger.debug(f"Fetched {len(self._protocols_cache)} protocols from DeFiLlama")
+            protocols = resp.json()
         except Exception as e:
             logger.warning(f"DeFiLlama protocols fetch failed: {e}")
-            if self._protocols_cache:
+            if self._protocols_by_key:
                 logger.warning("Using stale protocols cache")
-            else:
-                self._protocols_cache = []
-        return self._protocols_cache
+            return False
 
-    def _get_pools(self) -> list:
-        now = time.time()
-        if self._pools_cache and now - self._pools_ts < CACHE_TTL:
-            return self._pools_cache
+        index: dict[str, dict] = {}
+        for p in protocols:
+            # Names are a fallback key; a slug match always wins
+            name = (p.get("name") or "").lower()
+            if name:
+                index.setdefault(name, p)
+        for p in protocols:
+            if p.get("slug"):
+                index[p["slug"]] = p
+
+        with self._lock:
+            self._protocols_by_key = index
+            self._protocols_ts = time.time()
+        logger.debug(f"Indexed {len(protocols)} protocols from DeFiLlama")
+        return True
+
+    def refresh_pools(self) -> bool:
+        """Download /pools and rebuild the pool-id index."""
         try:
             resp = self.session.get(DEFILLAMA_POOLS_URL, timeout=15)
             resp.raise_for_status()
-            data = resp.json()
-            self._pools_cache = data.get("data", [])
-            self._pools_ts = now
-            logger.debug(f"Fetched {len(self._pools_cache)} pools from DeFiLlama")
+            pools = resp.json().get("data", [])
         except Exception as e:
             logger.warning(f"DeFiLlama pools fetch failed: {e}")
-            if self._pools_cache:
+            if self._pools_by_id:
                 logger.warning("Using stale pools cache")
-            else:
-                self._pools_cache = []
-        return self._pools_cache
+            return False
+
+        index = {p["pool"]: p for p in pools if p.get("pool")}
+        with self._lock:
+            self._pools_by_id = index
+            self._pools_ts = time.time()
+        logger.debug(f"Indexed {len(index)} pools from DeFiLlama")
+        return True
+
+    def refresh(self, force: bool = False):
+        """Refresh whichever datasets are older than CACHE_TTL, then persist."""
+        now = time.time()
+        changed = False
+        if force or now - self._protocols_ts >= CACHE_TTL:
+            changed |= self.refresh_protocols()
+        if force or now - self._pools_ts >= CACHE_TTL:
+            changed |= self.refresh_pools()
+        if changed:
+            self._save_disk_cache()
+
+    def start_background_refresh(self, interval: int = CACHE_TTL):
+        """Keep the index fresh from a daemon thread so lookups never block on the network."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+
+        def _loop():
+            while not self._stop_event.is_set():
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"DeFiLlama background refresh error: {e}")
+                self._stop_event.wait(interval)
+
+        self._refresh_thread = threading.Thread(target=_loop, daemon=True, name="defillama-refresh")
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._stop_event.set()
+
+    def ensure_fresh(self):
+        # With a background refresher running, serve whatever is indexed
+        if self._refresh_thread and self._refresh_thread.is_alive() and self._pools_by_id:
+            return
+        self.refresh()
+
+    # ── Lookups ──────────────────────────────────────────────────────────────
+
+    def find_protocol(self, slug: str) -> Optional[dict]:
+        self.ensure_fresh()
+        return self._protocols_by_key.get(slug) or self._protocols_by_key.get(slug.lower())
+
+    def find_pool(self, pool_id: str) -> Optional[dict]:
+        self.ensure_fresh()
+        return self._pools_by_id.get(pool_id)
 
     def get_protocol_detail(self, slug: str) -> dict:
         """Fetch individual protocol detail (audit history, bug bounty, etc.)."""
+        cached = self._detail_cache.get(slug)
+        if cached and time.time() - cached[0] < DETAIL_CACHE_TTL:
+            return cached[1]
         try:
             url = DEFILLAMA_PROTOCOL_URL.format(slug=slug)
             resp = self.session.get(url, timeout=15)
             resp.raise_for_status()
-            return resp.json()
+            detail = resp.json()
+            # Keep only what scoring reads; full detail payloads carry TVL history
+            detail = {k: detail.get(k) for k in ("audits", "audit_links", "bugs") if k in detail}
+            with self._lock:
+                self._detail_cache[slug] = (time.time(), detail)
+            return detail
         except Exception as e:
             logger.warning(f"Protocol detail fetch failed for {slug}: {e}")
-            return {}
+            return cached[1] if cached else {}
+
+    def prefetch_protocol_details(self, slugs) -> dict:
+        """Fetch protocol details for many slugs concurrently and cache them."""
+        slugs = list(dict.fromkeys(slugs))
+        with ThreadPoolExecutor(max_workers=min(DETAIL_FETCH_WORKERS, max(len(slugs), 1))) as pool:
+            details = dict(zip(slugs, pool.map(self.get_protocol_detail, slugs)))
+        self._save_disk_cache()
+        return details
 
     def get_protocol_metrics(self, slug: str, pool_id: str) -> ProtocolMetrics:
         """Aggregate all relevant metrics for a protocol/pool pair."""
         metrics = ProtocolMetrics(slug=slug)
 
         # ── Protocol-level data ──────────────────────────────────────────────
-        protocols = self._get_protocols()
-        protocol_entry = next(
-            (p for p in protocols if p.get("slug") == slug or p.get("name", "").lower() == slug.lower()),
-            None
-        )
+        protocol_entry = self.find_protocol(slug)
 
         if protocol_entry:
             metrics.tvl_usd = float(protocol_entry.get("tvl") or 0)
@@ -216,8 +345,7 @@ class DeFiLlamaClient:
             metrics.has_bug_bounty = bool(detail.get("bugs"))
 
         # ── Pool-level data ───────────────────────────────────────────────────
-        pools = self._get_pools()
-        pool_entry = next((p for p in pools if p.get("pool") == pool_id), None)
+        pool_entry = self.find_pool(pool_id)
 
         if pool_entry:
             metrics.pool_apy = float(pool_entry.get("apy") or 0)
@@ -483,6 +611,10 @@ class RiskScoringOracle:
 
         results: list[AssetRiskScore] = []
 
+        # Refresh the indexed datasets once and pull every protocol detail in parallel
+        self.llama.ensure_fresh()
+        self.llama.prefetch_protocol_details(a["defillama_protocol_slug"] for a in self.assets)
+
         for asset_cfg in self.assets:
             symbol   = asset_cfg["symbol"]
             address  = asset_cfg["address"]
@@ -589,6 +721,7 @@ def main():
 
     if args.loop:
         logger.info(f"Starting daemon loop (interval={args.interval}s)")
+        oracle.llama.start_background_refresh()
         while True:
             try:
                 oracle.run_once()
@@ -0,0 +1,231 @@
+# Created: 2026-10-19
+"""
+Streaming risk statistics for the Sentinel RiskEngine.
+
+Every structure here updates in constant (or log-window) time per tick, so
+the cost of a risk check no longer grows with how much history a vault has
+accumulated:
+  - RollingReturnStats: windowed log returns with running sums, an adaptive
+    EWMA variance and a sorted window for historical VaR.
+  - PnLTracker: equity snapshots with per-window start pointers and a
+    running peak for drawdown.
+"""
+import math
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from statistics import NormalDist
+from typing import Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+_Z_CACHE: Dict[float, float] = {}
+
+
+def z_score(confidence_level: float) -> float:
+    """One-sided normal quantile, cached per confidence level (no scipy import per call)."""
+    z = _Z_CACHE.get(confidence_level)
+    if z is None:
+        z = NormalDist().inv_cdf(confidence_level)
+        _Z_CACHE[confidence_level] = z
+    return z
+
+
+class RingBuffer:
+    """Fixed-capacity float ring buffer backed by a NumPy array."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float64)
+        self._pos = 0
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def push(self, value: float) -> Optional[float]:
+        """Append a value; returns the evicted value once the buffer is full."""
+        evicted = self._data[self._pos] if self._len == self.capacity else None
+        self._data[self._pos] = value
+        self._pos = (self._pos + 1) % self.capacity
+        self._len = min(self._len + 1, self.capacity)
+        return evicted
+
+    def values(self) -> np.ndarray:
+        """Contents in insertion order (copy)."""
+        if self._len < self.capacity:
+            return self._data[:self._len].copy()
+        return np.concatenate((self._data[self._pos:], self._data[:self._pos]))
+
+
+class RollingReturnStats:
+    """
+    Per-symbol return statistics over the last `window` log returns.
+
+    Mean/std come from running sums, the EWMA variance is advanced once per
+    new return (adaptive decay as in the original RiskEngine), and a sorted
+    copy of the window gives historical VaR quantiles by index.
+    """
+
+    def __init__(self, window: int = 99, min_returns: int = 19, default_vol: float = 0.05):
+        self.window = window
+        self.min_returns = min_returns
+        self.default_vol = default_vol
+        self.returns = RingBuffer(window)
+        self._sorted: list = []
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_resync = 0
+        self.last_price: Optional[float] = None
+        self.ewma_mean = 0.0
+        self.ewma_variance: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.returns)
+
+    def update(self, price: float):
+        """Ingest a new price tick."""
+        if price <= 0:
+            return
+        if self.last_price is None:
+            self.last_price = price
+            return
+
+        r = math.log(price / self.last_price)
+        self.last_price = price
+
+        evicted = self.returns.push(r)
+        self._sum += r
+        self._sum_sq += r * r
+        insort(self._sorted, r)
+        if evicted is not None:
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+            del self._sorted[bisect_left(self._sorted, evicted)]
+            self._since_resync += 1
+            if self._since_resync >= self.window:
+                # Bound floating-point drift of the running sums (amortized O(1))
+                values = self.returns.values()
+                self._sum = float(values.sum())
+                self._sum_sq = float(np.dot(values, values))
+                self._since_resync = 0
+
+        n = len(self.returns)
+        if n < self.min_returns:
+            return
+
+        if self.ewma_variance is None:
+            # Seed from the window once there is enough data
+            self.ewma_variance = self.variance() if n > 1 else 0.0025
+            return
+
+        # Adaptive decay: higher volatility => lower alpha (faster reaction)
+        alpha = 0.94 - min(0.10, self.std() * 2.0)
+        alpha = max(0.80, min(0.94, alpha))
+        self.ewma_mean = alpha * self.ewma_mean + (1 - alpha) * r
+        self.ewma_variance = alpha * self.ewma_variance + (1 - alpha) * (r - self.ewma_mean) ** 2
+
+    def mean(self) -> float:
+        n = len(self.returns)
+        return self._sum / n if n else 0.0
+
+    def variance(self) -> float:
+        n = len(self.returns)
+        if n < 2:
+            return 0.0
+        mu = self._sum / n
+        return max(self._sum_sq / n - mu * mu, 0.0)
+
+    def std(self) -> float:
+        return math.sqrt(self.variance())
+
+    def volatility(self) -> float:
+        """Annualized EWMA volatility (per-minute ticks), or the default until warmed up."""
+        if self.ewma_variance is None:
+            return self.default_vol
+        return math.sqrt(self.ewma_variance) * math.sqrt(MINUTES_PER_YEAR)
+
+    def parametric_var_pct(self, confidence_level: float = 0.99) -> Optional[float]:
+        if len(self.returns) < self.min_returns:
+            return None
+        return abs(self.mean() - z_score(confidence_level) * self.std())
+
+    def historical_var_pct(self, confidence_level: float = 0.99) -> Optional[float]:
+        n = len(self._sorted)
+        if n < self.min_returns:
+            return None
+        idx = min(int((1 - confidence_level) * n), n - 1)
+        return max(-self._sorted[idx], 0.0)
+
+
+class PnLTracker:
+    """
+    Equity snapshots over a rolling horizon with O(1) amortized window PnL.
+
+    Each registered window keeps its own deque whose head is the most
+    recent snapshot at least `window` seconds old (or the oldest snapshot
+    if none is that old yet), matching RiskEngine.get_pnl_window.
+    """
+
+    def __init__(self, horizon_seconds: int = 86400, windows: Tuple[int, ...] = (3600, 86400)):
+        self.horizon = horizon_seconds
+        self._windows: Dict[int, Deque[Tuple[float, float]]] = {w: deque() for w in windows}
+        self._horizon_snapshots: Deque[Tuple[float, float]] = deque()
+        self.latest_equity: Optional[float] = None
+        self.peak_equity: Optional[float] = None
+        self.max_drawdown_pct = 0.0
+
+    def __len__(self) -> int:
+        return len(self._horizon_snapshots)
+
+    @staticmethod
+    def _advance(snapshots: Deque[Tuple[float, float]], now: float, window: float):
+        while len(snapshots) >= 2 and now - snapshots[1][0] >= window:
+            snapshots.popleft()
+
+    def add(self, equity: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        snap = (now, equity)
+        self.latest_equity = equity
+
+        self._horizon_snapshots.append(snap)
+        while self._horizon_snapshots and now - self._horizon_snapshots[0][0] > self.horizon:
+            self._horizon_snapshots.popleft()
+
+        for window, snapshots in self._windows.items():
+            snapshots.append(snap)
+            self._advance(snapshots, now, window)
+
+        if self.peak_equity is None or equity > self.peak_equity:
+            self.peak_equity = equity
+        self.max_drawdown_pct = max(self.max_drawdown_pct, self.drawdown_pct())
+
+    def window_pnl(self, window_seconds: int, now: Optional[float] = None) -> float:
+        """PnL over the window; unregistered windows fall back to a scan of the horizon."""
+        if self.latest_equity is None:
+            return 0.0
+        now = time.time() if now is None else now
+
+        snapshots = self._windows.get(window_seconds)
+        if snapshots is not None:
+            self._advance(snapshots, now, window_seconds)
+            return self.latest_equity - snapshots[0][1]
+
+        start_equity = self._horizon_snapshots[0][1]
+        for ts, equity in reversed(self._horizon_snapshots):
+            if now - ts >= window_seconds:
+                start_equity = equity
+                break
+        return self.latest_equity - start_equity
+
+    def drawdown_pct(self) -> float:
+        """Current drawdown from the running peak."""
+        if not self.peak_equity or self.latest_equity is None:
+            return 0.0
+        return max(0.0, (self.peak_equity - self.latest_equity) / self.peak_equity)
+
+    def reset_peak(self):
+        """Restart drawdown tracking (called on the daily PnL reset)."""
+        self.peak_equity = self.latest_equity
+        self.max_drawdown_pct = 0.0
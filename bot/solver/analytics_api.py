@@ -1,29 +1,36 @@
 # Created: 2026-01-13
+# Updated: 2026-10-19 - Served from the incremental ProfitLogStore instead of re-reading the CSV; heartbeats to the supervisor
+import asyncio
 from fastapi import FastAPI
-import pandas as pd
-import os
 from loguru import logger
+from bot.solver.market_bus import heartbeat_forever
+from bot.solver.profit_log_store import get_profit_log_store
 
 app = FastAPI(title="Kerne Solver Analytics API")
 
 PROFIT_LOG_PATH = "bot/solver/profit_log.csv"
+store = get_profit_log_store(PROFIT_LOG_PATH)
+
+@app.on_event("startup")
+async def start_heartbeat():
+    app.state.heartbeat = asyncio.create_task(heartbeat_forever())
 
 @app.get("/stats")
 async def get_solver_stats():
     """
     Returns high-level solver performance metrics.
     """
-    if not os.path.exists(PROFIT_LOG_PATH):
+    if not store.exists:
         return {"error": "No data available"}
 
     try:
-        df = pd.read_csv(PROFIT_LOG_PATH)
-        total_intents = len(df)
-        successful_hedges = len(df[df['status'] == 'HEDGED'])
+        store.refresh()
+        total_intents = store.total.count
+        successful_hedges = store.total.wins
         win_rate = successful_hedges / total_intents if total_intents > 0 else 0
         
         # Calculate total profit in bps (simplified)
-        total_profit_bps = df[df['status'] == 'HEDGED']['profit_bps'].sum()
+        total_profit_bps = store.total.profit_bps
         
         return {
             "total_intents": total_intents,
@@ -41,15 +48,31 @@ async def get_recent_trades():
     """
     Returns the last 10 trades.
     """
-    if not os.path.exists(PROFIT_LOG_PATH):
+    if not store.exists:
         return []
     
     try:
-        df = pd.read_csv(PROFIT_LOG_PATH)
-        return df.tail(10).to_dict(orient="records")
+        store.refresh()
+        return store.recent(10)
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/venues")
+async def get_venue_stats():
+    """
+    Returns win rate and profit bps per venue.
+    """
+    store.refresh()
+    return store.venue_stats()
+
+@app.get("/buckets")
+async def get_bucket_stats(limit: int = 24):
+    """
+    Returns win rate and profit bps per hour for the last `limit` hours with fills.
+    """
+    store.refresh()
+    return store.bucket_stats(limit)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
@@ -14,9 +14,12 @@ import time
 import json
 import asyncio
 import aiohttp
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
 from decimal import Decimal
+from fractions import Fraction
+from datetime import datetime
 
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, Response
@@ -55,7 +58,7 @@ _load_env()
 # =============================================================================
 
 SOLVER_NAME = "Kerne"
-SOLVER_VERSION = "1.2.0"
+SOLVER_VERSION = "1.3.0"
 
 # Network name → chain ID mapping (CoW Protocol convention)
 NETWORK_TO_CHAIN_ID: Dict[str, int] = {
@@ -107,6 +110,14 @@ MIN_PROFIT_BPS = int(os.getenv("ZIN_MIN_PROFIT_BPS", "5"))
 MAX_GAS_PRICE_GWEI = int(os.getenv("ZIN_MAX_GAS_PRICE_GWEI", "50"))
 ONE_INCH_API_KEY = os.getenv("ONE_INCH_API_KEY")
 
+# Auction solving: hard cap on solve time, margin kept before the driver deadline,
+# and max concurrent RPC quote / liquidity calls
+SOLVE_TIME_BUDGET_S = float(os.getenv("ZIN_SOLVE_TIME_BUDGET_S", "8"))
+DEADLINE_SAFETY_MARGIN_S = float(os.getenv("ZIN_DEADLINE_SAFETY_MARGIN_S", "1.0"))
+QUOTE_CONCURRENCY = int(os.getenv("ZIN_QUOTE_CONCURRENCY", "16"))
+# Fixed-point scale for CoW clearing prices
+PRICE_SCALE = 10**18
+
 # Supported tokens we can provide liquidity for
 SUPPORTED_TOKENS = {
     # Base
@@ -192,6 +203,24 @@ class SolveResponse(BaseModel):
 # SOLVER LOGIC
 # =============================================================================
 
+@dataclass
+class OrderQuote:
+    """Best AMM route found for one swap."""
+    amount_in: int
+    amount_out: int
+    source: str          # "aerodrome" or "1inch"
+    target: str = ""     # 1inch only: router address
+    calldata: str = ""   # 1inch only: prebuilt swap calldata
+
+
+class AuctionContext:
+    """Per-auction state, so concurrent /solve calls on the shared solver don't clobber each other."""
+
+    def __init__(self):
+        self.rpc_semaphore = asyncio.Semaphore(QUOTE_CONCURRENCY)
+        self.liquidity_tasks: Dict[tuple, asyncio.Future] = {}
+
+
 class KerneSolver:
     """
     Kerne CoW Swap Solver
@@ -204,6 +233,7 @@ class KerneSolver:
         self.w3_base = Web3(Web3.HTTPProvider(BASE_RPC_URL, request_kwargs={'timeout': 30}))
         self.w3_arb = Web3(Web3.HTTPProvider(ARBITRUM_RPC_URL, request_kwargs={'timeout': 30}))
         self.solution_counter = 0
+        self._rpc_executor = ThreadPoolExecutor(max_workers=QUOTE_CONCURRENCY, thread_name_prefix="cow-rpc")
         
         # Aerodrome Router ABI for quoting (Base only)
         self.router_abi = [
@@ -389,72 +419,269 @@ class KerneSolver:
         
         return calldata
     
+    def _time_budget(self, request: SolveRequest) -> float:
+        """Seconds available for this auction: the driver deadline minus a safety margin, capped."""
+        budget = SOLVE_TIME_BUDGET_S
+        if request.deadline:
+            try:
+                deadline = datetime.fromisoformat(request.deadline.replace("Z", "+00:00"))
+                remaining = deadline.timestamp() - time.time() - DEADLINE_SAFETY_MARGIN_S
+                budget = min(budget, remaining)
+            except ValueError:
+                logger.debug(f"Unparseable auction deadline: {request.deadline}")
+        return max(budget, 0.1)
+
+    async def _gather_within(self, coros: Dict[str, Any], deadline_at: float) -> Dict[str, Any]:
+        """
+        Run coroutines concurrently until `deadline_at` (monotonic). Returns the
+        results that finished in time; the rest are cancelled.
+        """
+        if not coros:
+            return {}
+        tasks = {asyncio.ensure_future(coro): key for key, coro in coros.items()}
+        done, pending = await asyncio.wait(tasks, timeout=max(deadline_at - time.monotonic(), 0))
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Time budget hit: {len(pending)}/{len(tasks)} tasks cancelled")
+
+        results = {}
+        for task in done:
+            if task.exception() is not None:
+                logger.debug(f"Task {tasks[task][:16]} failed: {task.exception()}")
+                continue
+            results[tasks[task]] = task.result()
+        return results
+
+    async def _rpc(self, ctx: AuctionContext, fn, *args):
+        """Run a blocking web3 call in a worker thread, bounded by the auction's RPC semaphore."""
+        async with ctx.rpc_semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._rpc_executor, fn, *args)
+
+    async def _best_quote(
+        self,
+        ctx: AuctionContext,
+        chain_id: int,
+        token_in: str,
+        token_out: str,
+        amount_in: int,
+        min_out: int = 0
+    ) -> Optional[OrderQuote]:
+        """Aerodrome on Base, falling back to 1inch when it can't deliver `min_out`."""
+        if chain_id == 8453:
+            amount_out = await self._rpc(ctx, self._get_aerodrome_quote, token_in, token_out, amount_in)
+            if amount_out and amount_out >= min_out:
+                return OrderQuote(amount_in=amount_in, amount_out=amount_out, source="aerodrome")
+
+        if ONE_INCH_API_KEY:
+            quote_1inch = await self._get_1inch_quote(chain_id, token_in, token_out, amount_in)
+            if quote_1inch:
+                return OrderQuote(
+                    amount_in=amount_in,
+                    amount_out=quote_1inch["amountOut"],
+                    source="1inch",
+                    target=quote_1inch["tx"].get("to", ""),
+                    calldata=quote_1inch["tx"].get("data", ""),
+                )
+
+        if chain_id == 8453 and amount_out:
+            return OrderQuote(amount_in=amount_in, amount_out=amount_out, source="aerodrome")
+        return None
+
+    def _swap_interaction(self, quote: OrderQuote, token_in: str, token_out: str, min_out: int) -> Interaction:
+        if quote.source == "aerodrome":
+            calldata = self._build_swap_calldata(token_in, token_out, quote.amount_in, min_out, COW_SETTLEMENT_BASE)
+            return Interaction(target=AERODROME_ROUTER, value="0", callData=calldata)
+        return Interaction(target=quote.target, value="0", callData=quote.calldata)
+
+    async def _pool_liquidity(self, ctx: AuctionContext, chain_id: int, token: str) -> int:
+        """ZIN pool liquidity, fetched once per (chain, token) per auction."""
+        key = (chain_id, token.lower())
+        if key not in ctx.liquidity_tasks:
+            ctx.liquidity_tasks[key] = asyncio.ensure_future(self._rpc(ctx, self._check_pool_liquidity, chain_id, token))
+        return await ctx.liquidity_tasks[key]
+
     async def solve(self, request: SolveRequest) -> SolveResponse:
         """
         Solve a CoW Protocol auction.
+
+        1. Quote every order concurrently.
+        2. Match opposing orders against each other (coincidence of wants),
+           routing only the residual through an AMM.
+        3. Route the remaining orders individually through AMMs.
+        Each phase shares one time budget derived from the auction deadline;
+        whatever is solved when it runs out is returned.
+
+        Scores are in each solution's own buy-token units (Y-token surplus for
+        a CoW), so solutions are not ranked against each other: CoW matches
+        come first, then single orders, in auction order.
         """
-        logger.info(f"Received auction {request.id} with {len(request.orders)} orders")
-        
-        solutions = []
-        
-        # Process each order
+        started = time.monotonic()
+        deadline_at = started + self._time_budget(request)
+        ctx = AuctionContext()
+        logger.info(f"Received auction {request.id} with {len(request.orders)} orders "
+                    f"(budget {deadline_at - started:.2f}s)")
+
+        now = int(time.time())
+        candidates: Dict[str, tuple] = {}
         for order in request.orders:
-            try:
-                solution = await self._solve_order(order, request)
-                if solution:
-                    solutions.append(solution)
-            except Exception as e:
-                logger.error(f"Error solving order {order.uid[:16]}: {e}")
+            chain_id = self._get_chain_context(order.buyToken) or self._get_chain_context(order.sellToken)
+            if not chain_id:
+                logger.debug(f"Unknown chain for tokens: {order.sellToken} -> {order.buyToken}")
                 continue
-        
-        logger.info(f"Returning {len(solutions)} solutions")
+            if order.validTo < now:
+                logger.debug(f"Order expired: {order.uid[:16]}")
+                continue
+            candidates[order.uid] = (order, chain_id)
+
+        # Phase 1: quote all orders concurrently
+        quotes = await self._gather_within({
+            uid: self._best_quote(ctx, chain_id, order.sellToken, order.buyToken, int(order.sellAmount), int(order.buyAmount))
+            for uid, (order, chain_id) in candidates.items()
+        }, deadline_at)
+
+        # Phase 2: coincidence of wants, with unmatched orders routed to AMMs alongside
+        matches = self._match_cows(candidates, quotes)
+        paired = {order.uid for a, b, _ in matches for order in (a, b)}
+        tasks = {f"cow:{a.uid}:{b.uid}": self._solve_cow(ctx, a, b, chain_id, quotes) for a, b, chain_id in matches}
+        tasks.update({
+            uid: self._solve_order(ctx, order, chain_id, quotes.get(uid))
+            for uid, (order, chain_id) in candidates.items()
+            if uid not in paired and uid in quotes
+        })
+        results = await self._gather_within(tasks, deadline_at)
+        solutions = [results[key] for key in tasks if results.get(key)]
+        cow_count = sum(1 for key, sol in results.items() if sol and key.startswith("cow:"))
+
+        # Phase 3: orders whose CoW settlement fell through go to AMMs individually
+        matched = {trade.order for sol in solutions for trade in sol.trades}
+        fallback_tasks = {
+            uid: self._solve_order(ctx, *candidates[uid], quotes.get(uid))
+            for uid in paired if uid not in matched and uid in quotes
+        }
+        fallback = await self._gather_within(fallback_tasks, deadline_at)
+        solutions.extend(fallback[uid] for uid in fallback_tasks if fallback.get(uid))
+
+        logger.info(
+            f"Returning {len(solutions)} solutions ({cow_count} CoW) "
+            f"for {len(candidates)} orders in {time.monotonic() - started:.2f}s"
+        )
         return SolveResponse(solutions=solutions)
-    
+
+    def _match_cows(self, candidates: Dict[str, tuple], quotes: Dict[str, Optional[OrderQuote]]) -> List[tuple]:
+        """
+        Pair opposing sell orders on the same token pair whose limit prices
+        overlap. Sellers asking the least are paired with buyers offering the most.
+        Returns a list of (order_x_to_y, order_y_to_x, chain_id).
+        """
+        books: Dict[tuple, Dict[str, List[Order]]] = {}
+        for order, chain_id in candidates.values():
+            if order.kind != "sell" or int(order.sellAmount) == 0 or int(order.buyAmount) == 0:
+                continue
+            sell, buy = order.sellToken.lower(), order.buyToken.lower()
+            pair = (chain_id,) + tuple(sorted((sell, buy)))
+            books.setdefault(pair, {}).setdefault(sell, []).append(order)
+
+        matches = []
+        for pair, sides in books.items():
+            if len(sides) != 2:
+                continue
+            x_token = pair[1]
+            x_sellers = sides[x_token]
+            y_sellers = sides[pair[2]]
+            # Limit price in Y per X: X sellers want at least buy/sell, Y sellers pay at most sell/buy
+            x_sellers.sort(key=lambda o: Fraction(int(o.buyAmount), int(o.sellAmount)))
+            y_sellers.sort(key=lambda o: Fraction(int(o.sellAmount), int(o.buyAmount)), reverse=True)
+            for a, b in zip(x_sellers, y_sellers):
+                if int(a.buyAmount) * int(b.buyAmount) > int(a.sellAmount) * int(b.sellAmount):
+                    break
+                matches.append((a, b, pair[0]))
+        return matches
+
+    async def _solve_cow(self, ctx: AuctionContext, a: Order, b: Order, chain_id: int,
+                         quotes: Dict[str, Optional[OrderQuote]]) -> Optional[Solution]:
+        """
+        Settle two opposing orders against each other at one clearing price.
+        A sells X for Y, B sells Y for X. Only the imbalance between them is
+        swapped on an AMM.
+        """
+        sell_a, buy_a = int(a.sellAmount), int(a.buyAmount)
+        sell_b, buy_b = int(b.sellAmount), int(b.buyAmount)
+        limit_low = Fraction(buy_a, sell_a)    # A needs at least this many Y per X
+        limit_high = Fraction(sell_b, buy_b)   # B pays at most this many Y per X
+
+        # Clearing price: midpoint of the AMM rates both ways, clamped to the limits
+        rates = []
+        if quotes.get(a.uid):
+            rates.append(Fraction(quotes[a.uid].amount_out, sell_a))
+        if quotes.get(b.uid) and quotes[b.uid].amount_out:
+            rates.append(Fraction(sell_b, quotes[b.uid].amount_out))
+        price = sum(rates) / len(rates) if rates else (limit_low + limit_high) / 2
+        price = min(max(price, limit_low), limit_high)
+
+        interactions: List[Interaction] = []
+        for _ in range(2):
+            p_x = int(price * PRICE_SCALE)
+            out_a = sell_a * p_x // PRICE_SCALE          # Y owed to A
+            out_b = sell_b * PRICE_SCALE // p_x          # X owed to B
+            residual_x = sell_a - out_b
+            if residual_x == 0:
+                break
+
+            # Swap the imbalance: surplus X -> Y, or surplus Y -> X
+            if residual_x > 0:
+                token_in, token_out, amount_in, needed = a.sellToken, a.buyToken, residual_x, out_a - sell_b
+            else:
+                token_in, token_out, amount_in, needed = b.sellToken, b.buyToken, sell_b - out_a, out_b - sell_a
+            quote = await self._best_quote(ctx, chain_id, token_in, token_out, amount_in, needed)
+            if quote and quote.amount_out >= needed:
+                interactions = [self._swap_interaction(quote, token_in, token_out, needed)]
+                break
+
+            # A uniform clearing price must match the AMM's rate on the residual leg;
+            # re-price there (1 bp inside, so the smaller residual is surely covered)
+            if not quote or not quote.amount_out:
+                return None
+            if residual_x > 0:
+                price = max(Fraction(quote.amount_out, amount_in) * Fraction(9999, 10000), limit_low)
+            else:
+                price = min(Fraction(amount_in, quote.amount_out) * Fraction(10001, 10000), limit_high)
+        else:
+            return None
+
+        if out_a < buy_a or out_b < buy_b:
+            return None
+        surplus_y = (out_a - buy_a) + (out_b - buy_b) * p_x // PRICE_SCALE
+
+        self.solution_counter += 1
+        logger.info(f"CoW match on chain {chain_id}: {a.uid[:16]} <> {b.uid[:16]}, "
+                    f"{'no AMM leg' if not interactions else 'residual via AMM'}, surplus {surplus_y}")
+        return Solution(
+            id=self.solution_counter,
+            prices={a.sellToken: str(p_x), a.buyToken: str(PRICE_SCALE)},
+            trades=[
+                Trade(kind="fulfillment", order=a.uid, executedAmount=a.sellAmount),
+                Trade(kind="fulfillment", order=b.uid, executedAmount=b.sellAmount),
+            ],
+            interactions=[[], interactions, []],
+            score=str(surplus_y)
+        )
+
     async def _solve_order(
         self,
+        ctx: AuctionContext,
         order: Order,
-        request: SolveRequest
+        chain_id: int,
+        quote: Optional[OrderQuote]
     ) -> Optional[Solution]:
-        """Attempt to solve a single order."""
-        
-        # Determine chain from tokens
-        chain_id = self._get_chain_context(order.buyToken) or self._get_chain_context(order.sellToken)
-        if not chain_id:
-            logger.debug(f"Unknown chain for tokens: {order.sellToken} -> {order.buyToken}")
-            return None
-
-        # Check order validity
-        if order.validTo < int(time.time()):
-            logger.debug(f"Order expired: {order.uid[:16]}")
-            return None
-        
+        """Attempt to solve a single order through an AMM using its pre-fetched quote."""
         sell_amount = int(order.sellAmount)
         buy_amount = int(order.buyAmount)
         
-        # Get quote
-        quote_output = 0
-        calldata = ""
-        target = ""
-        
-        if chain_id == 8453: # Base
-            # Try Aerodrome first
-            quote_output = self._get_aerodrome_quote(order.sellToken, order.buyToken, sell_amount)
-            if quote_output and quote_output >= buy_amount:
-                target = AERODROME_ROUTER
-                min_out = int(buy_amount * 0.995)
-                calldata = self._build_swap_calldata(order.sellToken, order.buyToken, sell_amount, min_out, COW_SETTLEMENT_BASE)
-        
-        # Fallback to 1inch (Base or Arbitrum)
-        if (not quote_output or quote_output < buy_amount) and ONE_INCH_API_KEY:
-            quote_1inch = await self._get_1inch_quote(chain_id, order.sellToken, order.buyToken, sell_amount)
-            if quote_1inch:
-                quote_output = quote_1inch["amountOut"]
-                calldata = quote_1inch["tx"].get("data", "")
-                target = quote_1inch["tx"].get("to", "")
-        
-        if not quote_output:
+        if not quote or not quote.amount_out:
             logger.debug(f"No quote available for order {order.uid[:16]}")
             return None
+        quote_output = quote.amount_out
         
         # Check if we can fulfill the order (output >= required)
         if quote_output < buy_amount:
@@ -470,7 +697,7 @@ class KerneSolver:
             return None
         
         # Check liquidity
-        liquidity = self._check_pool_liquidity(chain_id, order.buyToken)
+        liquidity = await self._pool_liquidity(ctx, chain_id, order.buyToken)
         if liquidity < buy_amount:
             logger.debug(f"Insufficient liquidity: {liquidity} < {buy_amount}")
             return None
@@ -485,12 +712,9 @@ class KerneSolver:
         buy_price = str((sell_amount * 10**18) // buy_amount) if buy_amount > 0 else "0"
         
         # Intra-interaction: the actual swap
+        min_out = int(buy_amount * 0.995)
         intra_interactions: List[Interaction] = [
-            Interaction(
-                target=target,
-                value="0",
-                callData=calldata
-            )
+            self._swap_interaction(quote, order.sellToken, order.buyToken, min_out)
         ]
         
         solution = Solution(
@@ -0,0 +1,224 @@
+# Created: 2026-10-19
+"""
+Multi-venue funding opportunity engine.
+
+Every perp on every venue is one row of a columnar table (one numpy array
+per field: annualised funding, open interest, depth, borrow cost, mark,
+taker fee, last update). Updates arrive one datum at a time, from universe
+polls, order-book snapshots or the market bus. Only the touched row's net
+carry is recomputed, and it is pushed onto a lazily invalidated max-heap,
+so the best opportunity is an O(log N) pop instead of a full rescan.
+
+Net carry (APR) for running the perp leg against a hedge:
+    |funding APR| - borrow APR - round-trip execution cost amortised over the hold
+Execution cost per side is taker fee plus linear impact. Impact is
+`depth_band_bps` scaled by notional / depth, where depth is the USD resting
+within `depth_band_bps` of mid.
+"""
+import heapq
+import itertools
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+COLUMNS = ("funding_apr", "open_interest_usd", "depth_usd", "borrow_apr", "mark_price", "fee_bps", "updated_at")
+HOURS_PER_YEAR = 24 * 365
+
+
+class FundingTable:
+    """Columnar store with one row per (venue, asset); capacity doubles as venues list new perps."""
+
+    def __init__(self, capacity: int = 256):
+        self.index: Dict[Tuple[str, str], int] = {}
+        self.keys: List[Tuple[str, str]] = []
+        self.symbols: List[str] = []  # venue-native symbol per row, for execution
+        self.columns = {name: np.full(capacity, np.nan) for name in COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def row(self, venue: str, asset: str, symbol: Optional[str] = None) -> int:
+        key = (venue, asset)
+        row = self.index.get(key)
+        if row is None:
+            row = len(self.keys)
+            if row == len(self.columns["funding_apr"]):
+                for name, column in self.columns.items():
+                    self.columns[name] = np.concatenate((column, np.full(len(column), np.nan)))
+            self.index[key] = row
+            self.keys.append(key)
+            self.symbols.append(symbol or asset)
+        elif symbol:
+            self.symbols[row] = symbol
+        return row
+
+    def set(self, row: int, values: Dict[str, float]):
+        for name, value in values.items():
+            if value is not None:
+                self.columns[name][row] = value
+
+    def get(self, row: int) -> Dict:
+        venue, asset = self.keys[row]
+        out = {"venue": venue, "asset": asset, "symbol": self.symbols[row]}
+        out.update({name: float(column[row]) for name, column in self.columns.items()})
+        return out
+
+
+def book_depth_usd(book: Dict, band_bps: float) -> Optional[float]:
+    """USD resting within `band_bps` of mid on the thinner side of a {bids, asks} book."""
+    bids, asks = book.get("bids") or [], book.get("asks") or []
+    if not bids or not asks:
+        return None
+    mid = (float(bids[0][0]) + float(asks[0][0])) / 2
+    lo, hi = mid * (1 - band_bps / 10_000), mid * (1 + band_bps / 10_000)
+    bid_usd = sum(float(px) * float(sz) for px, sz, *_ in bids if float(px) >= lo)
+    ask_usd = sum(float(px) * float(sz) for px, sz, *_ in asks if float(px) <= hi)
+    return min(bid_usd, ask_usd)
+
+
+class FundingOpportunityEngine:
+    def __init__(self, notional_usd: float = 100_000.0, hold_days: float = 7.0,
+                 min_open_interest_usd: float = 1_000_000.0, max_age_seconds: float = 300.0,
+                 default_borrow_apr: float = 0.0, default_fee_bps: float = 5.0,
+                 unknown_depth_usd: float = 250_000.0, depth_band_bps: float = 10.0):
+        self.notional_usd = notional_usd
+        self.hold_days = hold_days
+        self.min_open_interest_usd = min_open_interest_usd
+        self.max_age_seconds = max_age_seconds
+        self.default_borrow_apr = default_borrow_apr
+        self.default_fee_bps = default_fee_bps
+        self.unknown_depth_usd = unknown_depth_usd
+        self.depth_band_bps = depth_band_bps
+
+        self.table = FundingTable()
+        self.net_carry = np.full(0, np.nan)
+        self._heap: List[Tuple[float, int, int]] = []  # (-net carry, version, row)
+        self._version: Dict[int, int] = {}
+        self._counter = itertools.count()
+
+    # --- net carry -----------------------------------------------------
+
+    def _net_carry(self, funding_apr, open_interest_usd, depth_usd, borrow_apr, fee_bps):
+        """Vectorised net carry; works on scalars or whole columns. NaN marks ineligible rows."""
+        depth = np.where(np.isnan(depth_usd) | (depth_usd <= 0), self.unknown_depth_usd, depth_usd)
+        fee = np.where(np.isnan(fee_bps), self.default_fee_bps, fee_bps)
+        borrow = np.where(np.isnan(borrow_apr), self.default_borrow_apr, borrow_apr)
+        impact_bps = self.depth_band_bps * self.notional_usd / depth
+        cost_apr = 2 * (fee + impact_bps) / 10_000 * 365 / self.hold_days
+        net = np.abs(funding_apr) - borrow - cost_apr
+        # Unknown open interest passes; known-thin markets are excluded
+        return np.where(open_interest_usd < self.min_open_interest_usd, np.nan, net)
+
+    def _push(self, row: int, net: float):
+        version = next(self._counter)
+        self._version[row] = version
+        if not math.isnan(net):
+            heapq.heappush(self._heap, (-net, version, row))
+        if len(self._heap) > 4 * len(self.table) + 64:
+            self._compact()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if self._version.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+
+    def recompute_all(self):
+        """Re-scores every row in one vector pass (after changing notional, hold or thresholds)."""
+        n = len(self.table)
+        c = {name: column[:n] for name, column in self.table.columns.items()}
+        self.net_carry = self._net_carry(c["funding_apr"], c["open_interest_usd"], c["depth_usd"],
+                                         c["borrow_apr"], c["fee_bps"])
+        self._heap = []
+        for row in range(n):
+            version = next(self._counter)
+            self._version[row] = version
+            if not math.isnan(self.net_carry[row]):
+                self._heap.append((-float(self.net_carry[row]), version, row))
+        heapq.heapify(self._heap)
+
+    # --- incremental updates --------------------------------------------
+
+    def update(self, venue: str, asset: str, symbol: Optional[str] = None, **values) -> float:
+        """Sets any COLUMNS fields for one perp and re-scores that row only; returns its net carry."""
+        row = self.table.row(venue, asset, symbol)
+        if "funding_apr" in values:
+            # Freshness tracks the funding print, not book or borrow updates
+            values.setdefault("updated_at", time.time())
+        self.table.set(row, values)
+        c = self.table.columns
+        missing = len(c["funding_apr"]) - len(self.net_carry)
+        if missing > 0:
+            self.net_carry = np.concatenate((self.net_carry, np.full(missing, np.nan)))
+        net = float(self._net_carry(c["funding_apr"][row], c["open_interest_usd"][row], c["depth_usd"][row],
+                                    c["borrow_apr"][row], c["fee_bps"][row]))
+        self.net_carry[row] = net
+        self._push(row, net)
+        return net
+
+    def ingest_funding(self, venue: str, asset: str, rate: float, interval_hours: float = 1.0, **values) -> float:
+        return self.update(venue, asset, funding_apr=rate * HOURS_PER_YEAR / interval_hours, **values)
+
+    def ingest_book(self, venue: str, asset: str, book: Dict) -> Optional[float]:
+        depth = book_depth_usd(book, self.depth_band_bps)
+        if depth is None or (venue, asset) not in self.table.index:
+            return None
+        return self.update(venue, asset, depth_usd=depth)
+
+    def ingest_universe(self, venue: str, rows: Iterable[Dict], fee_bps: Optional[float] = None):
+        """Folds one venue's funding universe (see BaseExchange.get_funding_universe) into the table."""
+        for r in rows:
+            self.ingest_funding(venue, r["asset"], r["funding_rate"], r.get("interval_hours", 1.0),
+                                symbol=r.get("symbol"), mark_price=r.get("mark_price"),
+                                open_interest_usd=r.get("open_interest_usd"), fee_bps=fee_bps)
+
+    def ingest_bus(self, snapshot: Dict, venue: str = "hyperliquid", fee_bps: Optional[float] = None):
+        """
+        Market bus snapshot: hourly funding, mids and USD open interest for the whole
+        universe, books for a few coins. A coin the bus has no open interest for is ineligible.
+        """
+        mids = snapshot.get("mids", {})
+        open_interest = snapshot.get("open_interest", {})
+        for asset, rate in snapshot.get("funding", {}).items():
+            self.ingest_funding(venue, asset, rate, 1.0, mark_price=mids.get(asset),
+                                open_interest_usd=open_interest.get(asset, 0.0), fee_bps=fee_bps)
+        for asset, book in snapshot.get("books", {}).items():
+            self.ingest_book(venue, asset, book)
+
+    # --- queries --------------------------------------------------------
+
+    def _opportunity(self, row: int) -> Dict:
+        out = self.table.get(row)
+        out["net_carry_apr"] = float(self.net_carry[row])
+        out["side"] = "short" if out["funding_apr"] > 0 else "long"
+        return out
+
+    def _pop_valid(self, now: float) -> Optional[Tuple[float, int, int]]:
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            row = entry[2]
+            if self._version.get(row) != entry[1]:
+                continue  # superseded by a newer score
+            if now - self.table.columns["updated_at"][row] > self.max_age_seconds:
+                continue  # stale; re-enters on its next update
+            return entry
+        return None
+
+    def top(self, k: int = 5, min_net_apr: float = -math.inf) -> List[Dict]:
+        """Best k live opportunities in O(k log N)."""
+        now = time.time()
+        taken = []
+        while len(taken) < k:
+            entry = self._pop_valid(now)
+            if entry is None:
+                break
+            taken.append(entry)
+            if -entry[0] < min_net_apr:
+                break
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+        return [self._opportunity(row) for neg, _, row in taken if -neg >= min_net_apr]
+
+    def best(self, min_net_apr: float = -math.inf) -> Optional[Dict]:
+        top = self.top(1, min_net_apr)
+        return top[0] if top else None
@@ -1,42 +1,108 @@
 # Created: 2026-01-13
+# Updated: 2026-10-19 - Multi-venue FundingOpportunityEngine: columnar table, incremental updates, top-K heap
+# Updated: 2026-10-19 - Default to the configured bot/exchanges adapters
+import asyncio
+import os
 import time
+from typing import Dict
 from loguru import logger
-from bot.solver.hyperliquid_provider import HyperliquidProvider
+from bot.exchanges.base import BaseExchange
+from bot.solver.funding_engine import FundingOpportunityEngine
+from bot.solver.market_bus import get_market_bus
 from bot.solver.scofield_point import calculate_scofield_point
 
+
+def default_exchanges() -> Dict[str, BaseExchange]:
+    """
+    Funding venues from bot/exchanges, as ExchangeManager configures them:
+    Hyperliquid always, Binance and Bybit when their API keys are set.
+    """
+    exchanges = {}
+    try:
+        from bot.exchanges.hyperliquid import HyperliquidExchange
+        exchanges["hyperliquid"] = HyperliquidExchange()
+    except Exception as e:
+        logger.warning(f"Funding scanner: could not initialize Hyperliquid: {e}")
+    if os.getenv("BINANCE_API_KEY"):
+        try:
+            from bot.exchanges.binance import BinanceExchange
+            exchanges["binance"] = BinanceExchange()
+        except Exception as e:
+            logger.warning(f"Funding scanner: could not initialize Binance: {e}")
+    if os.getenv("BYBIT_API_KEY"):
+        try:
+            from bot.exchanges.bybit import BybitExchange
+            exchanges["bybit"] = BybitExchange()
+        except Exception as e:
+            logger.warning(f"Funding scanner: could not initialize Bybit: {e}")
+    return exchanges
+
+
 class FundingScanner:
-    def __init__(self, provider: HyperliquidProvider):
-        self.provider = provider
-        self.min_annualized_funding = 0.15 # 15% APR minimum to consider
-        
-    def scan(self):
+    """
+    Ranks funding carry across every perp on every configured venue.
+    scan() folds the latest data into the engine; get_best_opportunity()
+    is a heap query and does not refetch or rescan.
+    """
+    def __init__(self, exchanges: Dict[str, BaseExchange] = None, engine: FundingOpportunityEngine = None):
+        self.exchanges = default_exchanges() if exchanges is None else exchanges
+        self.min_annualized_funding = 0.15 # 15% APR minimum net carry to consider
+        self.engine = engine or FundingOpportunityEngine(
+            notional_usd=float(os.getenv("FUNDING_NOTIONAL_USD", "100000")),
+            hold_days=float(os.getenv("FUNDING_HOLD_DAYS", "7")),
+            min_open_interest_usd=float(os.getenv("FUNDING_MIN_OI_USD", "1000000")),
+        )
+        self.market_bus = get_market_bus()
+        self.bus_max_age = float(os.getenv("KERNE_BUS_MAX_AGE", "15"))
+
+    def refresh(self):
+        """Pulls the market bus snapshot and each venue's funding universe into the engine."""
+        snapshot = self.market_bus.read(self.bus_max_age) if self.market_bus else None
+        if snapshot is not None:
+            self.engine.ingest_bus(snapshot)
+        for venue, exchange in self.exchanges.items():
+            if venue == "hyperliquid" and snapshot is not None:
+                continue  # the fresh bus snapshot already carries the whole Hyperliquid universe
+            try:
+                self.engine.ingest_universe(venue, exchange.get_funding_universe(), exchange.TAKER_FEE_BPS)
+            except Exception as e:
+                logger.error(f"Funding universe refresh failed for {venue}: {e}")
+
+    def scan(self, limit: int = 5):
         """Scans for the best funding opportunities."""
-        logger.info("Scanning Hyperliquid for funding opportunities...")
-        rates = self.provider.get_all_funding_rates()
-        
-        opportunities = [r for r in rates if r["funding_rate_annualized"] >= self.min_annualized_funding]
-        
+        venues = sorted(set(self.exchanges) | ({"hyperliquid"} if self.market_bus else set()))
+        logger.info(f"Scanning {', '.join(venues) or 'no venues'} for funding opportunities...")
+        self.refresh()
+
+        opportunities = self.engine.top(limit, self.min_annualized_funding)
+
         if not opportunities:
             logger.info("No high-yield funding opportunities found.")
             return []
-            
-        logger.info(f"Found {len(opportunities)} opportunities above {self.min_annualized_funding:.0%}")
-        for opt in opportunities[:5]: # Show top 5
-            logger.info(f"Pair: {opt['symbol']} | APR: {opt['funding_rate_annualized']:.2%} | Price: ${opt['mark_price']:.4f}")
-            
+
+        logger.info(f"Top {len(opportunities)} of {len(self.engine.table)} perps above {self.min_annualized_funding:.0%} net carry")
+        for opt in opportunities:
+            logger.info(f"{opt['venue']} {opt['symbol']} {opt['side']} | Funding APR: {opt['funding_apr']:.2%} | "
+                        f"Net: {opt['net_carry_apr']:.2%} | Price: ${opt['mark_price']:.4f}")
+
         return opportunities
 
     def get_best_opportunity(self):
-        opportunities = self.scan()
-        if opportunities:
-            return opportunities[0]
-        return None
+        if not len(self.engine.table):
+            self.refresh()
+        return self.engine.best(self.min_annualized_funding)
+
+    async def run_loop(self, interval: float = 5.0):
+        logger.info(f"Funding scanner streaming every {interval}s")
+        while True:
+            started = time.time()
+            await asyncio.to_thread(self.refresh)
+            await asyncio.sleep(max(0.0, interval - (time.time() - started)))
 
 if __name__ == "__main__":
     # Quick test
     try:
-        provider = HyperliquidProvider()
-        scanner = FundingScanner(provider)
+        scanner = FundingScanner()
         scanner.scan()
     except Exception as e:
         print(f"Setup error: {e}")
@@ -1,4 +1,6 @@
 # Created: 2026-01-13
+# Updated: 2026-10-19 - Shared async weight-aware rate limiting, debounced journaled position state
+# Updated: 2026-10-19 - Funding and account state served from the supervisor's market bus when fresh
 import asyncio
 from loguru import logger
 from hyperliquid.info import Info
@@ -6,21 +8,33 @@ from hyperliquid.exchange import Exchange
 from hyperliquid.utils import constants
 import eth_account
 import os
-import json
 from dotenv import load_dotenv
-import time
+from bot.solver.market_bus import get_market_bus
+from bot.solver.position_journal import PositionJournal
+from bot.solver.token_bucket import get_bucket
 
 load_dotenv()
 
+# Hyperliquid REST budget: 1200 weight per minute per IP, shared by every provider instance
+HL_WEIGHT_PER_MINUTE = 1200
+# Request weights from the Hyperliquid docs. Exchange actions weigh 1; info requests
+# weigh 2 for the light endpoints and 20 for everything else (e.g. metaAndAssetCtxs).
+HL_WEIGHTS = {
+    "meta_and_asset_ctxs": 20,
+    "user_state": 2,
+    "all_mids": 2,
+    "l2_book": 2,
+    "exchange_action": 1,
+}
+
 class HyperliquidProvider:
     def __init__(self, private_key=None, account_address=None):
         self.private_key = private_key or os.getenv("HYPERLIQUID_PRIVATE_KEY")
         self.account_address = account_address or os.getenv("HYPERLIQUID_ADDRESS")
         self.state_file = "bot/solver/hl_positions.json"
-        self.last_request_time = 0
-        self.request_interval = 0.1 # 10 requests per second limit
         
         self.base_url = constants.MAINNET_API_URL
+        self.rate_limiter = get_bucket(f"hyperliquid:{self.base_url}", HL_WEIGHT_PER_MINUTE, HL_WEIGHT_PER_MINUTE / 60)
         self.info = Info(self.base_url, skip_ws=True)
         
         if self.private_key:
@@ -30,36 +44,26 @@ class HyperliquidProvider:
         else:
             logger.warning("Hyperliquid Provider initialized in READ-ONLY mode")
             
-        self._load_state()
+        self.journal = PositionJournal(self.state_file)
+        self.positions = self.journal.positions
 
-    def _rate_limit(self):
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.request_interval:
-            time.sleep(self.request_interval - elapsed)
-        self.last_request_time = time.time()
+        # Under the supervisor, shared snapshots replace our own polling while fresh
+        self.market_bus = get_market_bus()
+        self.bus_max_age = float(os.getenv("KERNE_BUS_MAX_AGE", "15"))
 
-    def _load_state(self):
-        if os.path.exists(self.state_file):
-            try:
-                with open(self.state_file, "r") as f:
-                    self.positions = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading HL state: {e}")
-                self.positions = {}
-        else:
-            self.positions = {}
+    def _from_bus(self):
+        return self.market_bus.read(self.bus_max_age) if self.market_bus else None
 
-    def _save_state(self):
-        try:
-            with open(self.state_file, "w") as f:
-                json.dump(self.positions, f, indent=4)
-        except Exception as e:
-            logger.error(f"Error saving HL state: {e}")
+    async def _rate_limit(self, weight=1):
+        await self.rate_limiter.acquire(weight)
 
     async def get_funding_rate(self, coin="ETH"):
-        self._rate_limit()
+        snapshot = self._from_bus()
+        if snapshot is not None and coin in snapshot["funding"]:
+            return snapshot["funding"][coin] * 24 * 365
+        await self._rate_limit(HL_WEIGHTS["meta_and_asset_ctxs"])
         try:
-            contexts = self.info.meta_and_asset_ctxs()
+            contexts = await asyncio.to_thread(self.info.meta_and_asset_ctxs)
             asset_ctxs = contexts[1]
             universe = contexts[0]['universe']
             coin_index = next((i for i, asset in enumerate(universe) if asset['name'] == coin), None)
@@ -72,31 +76,45 @@ class HyperliquidProvider:
             logger.error(f"HL API Error (Funding): {e}")
             return 0.0
             
+    async def get_mids(self):
+        """Mid price per coin (market bus when fresh, else one allMids request)."""
+        snapshot = self._from_bus()
+        if snapshot is not None and snapshot["mids"]:
+            return snapshot["mids"]
+        await self._rate_limit(HL_WEIGHTS["all_mids"])
+        try:
+            mids = await asyncio.to_thread(self.info.all_mids)
+            return {coin: float(px) for coin, px in mids.items()}
+        except Exception as e:
+            logger.error(f"HL API Error (Mids): {e}")
+            return {}
+
     async def get_account_summary(self):
-        self._rate_limit()
         if not self.account_address and not self.private_key:
             return None
+        snapshot = self._from_bus()
+        if snapshot is not None and snapshot["account"] is not None:
+            return snapshot["account"]
+        await self._rate_limit(HL_WEIGHTS["user_state"])
         addr = self.account_address or self.account.address
         try:
-            return self.info.user_state(addr)
+            return await asyncio.to_thread(self.info.user_state, addr)
         except Exception as e:
             logger.error(f"HL API Error (User State): {e}")
             return None
 
     async def open_short(self, coin, size_eth, leverage):
-        self._rate_limit()
         if not self.private_key:
             return False
+        # update_leverage + market_open (which prices slippage off all_mids)
+        await self._rate_limit(2 * HL_WEIGHTS["exchange_action"] + HL_WEIGHTS["all_mids"])
         try:
             logger.info(f"Opening {leverage}x Short on {coin} for {size_eth} ETH")
-            self.exchange.update_leverage(leverage, coin)
-            order_result = self.exchange.market_open(coin, False, size_eth, None, 0.01)
+            await asyncio.to_thread(self.exchange.update_leverage, leverage, coin)
+            order_result = await asyncio.to_thread(self.exchange.market_open, coin, False, size_eth, None, 0.01)
             
             if order_result["status"] == "ok":
-                if coin not in self.positions:
-                    self.positions[coin] = 0.0
-                self.positions[coin] += float(size_eth)
-                self._save_state()
+                self.journal.set(coin, self.positions.get(coin, 0.0) + float(size_eth))
                 return True
             else:
                 logger.error(f"HL Order Failed: {order_result}")
@@ -106,16 +124,16 @@ class HyperliquidProvider:
             return False
         
     async def close_short(self, coin, size_eth):
-        self._rate_limit()
         if not self.private_key:
             return False
+        # market_close reads user_state and all_mids before placing the order
+        await self._rate_limit(HL_WEIGHTS["exchange_action"] + HL_WEIGHTS["user_state"] + HL_WEIGHTS["all_mids"])
         try:
             logger.info(f"Closing Short on {coin} for {size_eth} ETH")
-            order_result = self.exchange.market_close(coin, size_eth, None, 0.01)
+            order_result = await asyncio.to_thread(self.exchange.market_close, coin, size_eth, None, 0.01)
             if order_result["status"] == "ok":
                 if coin in self.positions:
-                    self.positions[coin] = max(0.0, self.positions[coin] - float(size_eth))
-                    self._save_state()
+                    self.journal.set(coin, max(0.0, self.positions[coin] - float(size_eth)))
                 return True
             else:
                 logger.error(f"HL Order Failed: {order_result}")
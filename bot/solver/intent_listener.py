@@ -1,9 +1,11 @@
 # Created: 2026-01-13
+# Updated: 2026-10-19 - Heartbeats to the supervisor
 import aiohttp
 import asyncio
 from loguru import logger
 from bot.solver.pricing_engine import PricingEngine
 from bot.solver.hyperliquid_provider import HyperliquidProvider
+from bot.solver.market_bus import heartbeat_forever
 import os
 import time
 
@@ -285,6 +287,7 @@ class IntentListener:
 
     async def listen_loop(self):
         logger.info("Starting Intent Listener loop...")
+        heartbeat = asyncio.create_task(heartbeat_forever())
         while True:
             # Optimize spread based on history
             self.pricing_engine.optimize_spread()
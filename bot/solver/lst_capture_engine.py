@@ -1,25 +1,53 @@
 # bot/solver/lst_capture_engine.py
 import os
+import time
 import asyncio
+import threading
+from typing import Dict, List, Optional
 from loguru import logger
 from web3 import Web3
+from hexbytes import HexBytes
 from dotenv import load_dotenv
 
+from bot.por_collector import MULTICALL3_ADDRESS, MULTICALL3_ABI
+from bot.solver.arb_scanner import AERODROME_ROUTER, WETH
+
 # Created: 2026-01-16
+# Updated: 2026-10-19 - Block-driven engine: one Multicall3 read per block, Transfer-log balance tracking,
+#                       incremental shadow yield and immediate gap capture
+# Updated: 2026-10-19 - Absolute shadow-yield reports, quote-derived minimum output, capture held until receipt
+
+TRANSFER_TOPIC = "0x" + bytes(Web3.keccak(text="Transfer(address,address,uint256)")).hex()
+
+# Chainlink exchange-rate feeds on Base (ETH per LST, 18 decimals); override with LST_RATE_FEED_<NAME>
+LST_RATE_FEEDS = {
+    "wstETH": "0xB88BAc61a4Ca37C43a3725912B1f472c9A5bc061",
+    "cbETH": "0x868a501e68F3D1E89CfC0D22F6b22E8dabce5F04",
+}
+AERODROME_POOL_FACTORY = "0x420DD381b31aEf6683db6B902084cB0FFECe40Da"
+
+ERC20_BALANCE_ABI = [{"inputs":[{"name":"account","type":"address"}],"name":"balanceOf","outputs":[{"name":"","type":"uint256"}],"stateMutability":"view","type":"function"}]
+RATE_FEED_ABI = [{"inputs":[],"name":"latestRoundData","outputs":[{"name":"roundId","type":"uint80"},{"name":"answer","type":"int256"},{"name":"startedAt","type":"uint256"},{"name":"updatedAt","type":"uint256"},{"name":"answeredInRound","type":"uint80"}],"stateMutability":"view","type":"function"}]
+ROUTER_QUOTE_ABI = [{"inputs":[{"name":"amountIn","type":"uint256"},{"components":[{"name":"from","type":"address"},{"name":"to","type":"address"},{"name":"stable","type":"bool"},{"name":"factory","type":"address"}],"name":"routes","type":"tuple[]"}],"name":"getAmountsOut","outputs":[{"name":"amounts","type":"uint256[]"}],"stateMutability":"view","type":"function"}]
 
 class LSTCaptureEngine:
     """
     Kerne LST-Solver & Shadow-Yield Engine.
     Tracks LST rebase rates and captures yield gaps via the KerneLSTSolver contract.
+
+    Each new block costs one Multicall3 read (exchange rates + DEX quotes) and
+    two eth_getLogs for vault Transfers. Balances move with the logs, shadow
+    yield accrues whenever an exchange rate changes, and a discount to backing
+    triggers a capture in the same block instead of on the hourly tick.
     """
     def __init__(self, chain_manager):
         self.cm = chain_manager
         self.w3 = chain_manager.w3
-        
+
         # Contract Addresses
         self.hook_address = os.getenv("LST_HOOK_ADDRESS")
         self.solver_address = os.getenv("LST_SOLVER_ADDRESS")
-        
+
         # ABIs (Minimal)
         self.hook_abi = [
             {"inputs":[{"name":"vault","type":"address"},{"name":"amount","type":"uint256"}],"name":"updateShadowYield","outputs":[],"stateMutability":"nonpayable","type":"function"},
@@ -28,19 +56,40 @@ class LSTCaptureEngine:
         self.solver_abi = [
             {"inputs":[{"name":"tokenIn","type":"address"},{"name":"tokenOut","type":"address"},{"name":"amount","type":"uint256"},{"name":"data","type":"bytes"}],"name":"executeLSTSwap","outputs":[{"name":"","type":"uint256"}],"stateMutability":"nonpayable","type":"function"}
         ]
-        
+
+        self.hook = None
+        self.solver = None
         if self.hook_address:
             self.hook = self.w3.eth.contract(address=self.hook_address, abi=self.hook_abi)
         if self.solver_address:
             self.solver = self.w3.eth.contract(address=self.solver_address, abi=self.solver_abi)
-            
+
         # LST Registry (Base Mainnet)
         self.lst_tokens = {
             "wstETH": "0xc1CBa3fC4D133901B3E238628F5514533683e0BF",
             "cbETH": "0x2Ae3F1Ec7F1F5012CFEab2295B6240137331713F"
         }
-        
-        self.shadow_yield_cache = {}
+        self.rate_feeds = {
+            name: os.getenv(f"LST_RATE_FEED_{name.upper()}", LST_RATE_FEEDS.get(name))
+            for name in self.lst_tokens
+        }
+        self.capture_amount_wei = int(float(os.getenv("LST_CAPTURE_AMOUNT_ETH", "10")) * 10**18)
+        self.min_gap_bps = float(os.getenv("LST_MIN_GAP_BPS", "15"))
+        self.resync_blocks = int(os.getenv("LST_RESYNC_BLOCKS", "1800"))
+        self.report_interval = float(os.getenv("LST_REPORT_INTERVAL", "3600"))
+        self.max_slippage_bps = float(os.getenv("LST_MAX_SLIPPAGE_BPS", "10"))
+        self.capture_cooldown = float(os.getenv("LST_CAPTURE_COOLDOWN", "60"))
+
+        self.shadow_yield_cache = {name: 0 for name in self.lst_tokens}  # accrued wei per LST since start
+        self._shadow_yield_base: Optional[int] = None  # hook value found at the first streaming report
+        self._last_reported_shadow_yield: Optional[int] = None
+        self.balances: Dict[str, int] = {}
+        self.exchange_rates: Dict[str, int] = {}
+        self.last_block: Optional[int] = None
+        self._last_sync_block: Optional[int] = None
+        self._capturing = set()
+        self._nonce = None
+        self._tx_lock = threading.Lock()
 
     async def fetch_lst_rates(self):
         """
@@ -53,100 +102,264 @@ class LSTCaptureEngine:
             "cbETH": 0.032
         }
 
+    def _multicall(self, calls: List[tuple], block_identifier="latest") -> List[Optional[tuple]]:
+        """Runs (target, calldata, output_types) calls in one Multicall3 aggregate3; None where a call reverted."""
+        multicall = self.w3.eth.contract(address=Web3.to_checksum_address(MULTICALL3_ADDRESS), abi=MULTICALL3_ABI)
+        results = multicall.functions.aggregate3(
+            [(Web3.to_checksum_address(target), True, data) for target, data, _ in calls]
+        ).call(block_identifier=block_identifier)
+        if len(results) != len(calls):
+            raise ValueError(f"Multicall returned {len(results)} results for {len(calls)} calls")
+        return [
+            tuple(self.w3.codec.decode(types, data)) if success and data else None
+            for (_, _, types), (success, data) in zip(calls, results)
+        ]
+
+    def _route(self, name: str) -> list:
+        return [(Web3.to_checksum_address(WETH), Web3.to_checksum_address(self.lst_tokens[name]),
+                 False, Web3.to_checksum_address(AERODROME_POOL_FACTORY))]
+
+    def _read_snapshot(self, block_number: int, with_balances: bool) -> Dict[str, Dict[str, int]]:
+        """Exchange rates, WETH->LST quotes and (on resync) vault balances in one Multicall3 read."""
+        vault = Web3.to_checksum_address(self.cm.vault_address)
+        erc20 = self.w3.eth.contract(abi=ERC20_BALANCE_ABI)
+        feed = self.w3.eth.contract(abi=RATE_FEED_ABI)
+        router = self.w3.eth.contract(abi=ROUTER_QUOTE_ABI)
+        keys, calls = [], []
+        for name, token in self.lst_tokens.items():
+            if with_balances:
+                keys.append(("balance", name))
+                calls.append((token, erc20.encodeABI(fn_name="balanceOf", args=[vault]), ["uint256"]))
+            if self.rate_feeds.get(name):
+                keys.append(("rate", name))
+                calls.append((self.rate_feeds[name], feed.encodeABI(fn_name="latestRoundData"),
+                              ["uint80", "int256", "uint256", "uint256", "uint80"]))
+            if self.solver is not None:
+                keys.append(("quote", name))
+                calls.append((AERODROME_ROUTER, router.encodeABI(fn_name="getAmountsOut", args=[self.capture_amount_wei, self._route(name)]),
+                              ["uint256[]"]))
+        snapshot = {"balance": {}, "rate": {}, "quote": {}}
+        for (kind, name), out in zip(keys, self._multicall(calls, block_number)):
+            if out is None:
+                continue
+            if kind == "rate":
+                snapshot[kind][name] = out[1]
+            elif kind == "quote":
+                snapshot[kind][name] = out[0][-1]
+            else:
+                snapshot[kind][name] = out[0]
+        return snapshot
+
+    def _apply_transfers(self, from_block: int, to_block: int):
+        """Moves tracked balances by every LST Transfer into or out of the vault in the block range."""
+        vault_topic = "0x" + "00" * 12 + self.cm.vault_address[2:].lower()
+        names = {addr.lower(): name for name, addr in self.lst_tokens.items()}
+        base = {"fromBlock": from_block, "toBlock": to_block,
+                "address": [Web3.to_checksum_address(a) for a in self.lst_tokens.values()]}
+        for direction, topics in ((-1, [TRANSFER_TOPIC, vault_topic]), (1, [TRANSFER_TOPIC, None, vault_topic])):
+            for log in self.w3.eth.get_logs({**base, "topics": topics}):
+                name = names.get(log["address"].lower())
+                if name is not None:
+                    value = int.from_bytes(bytes(HexBytes(log["data"]))[-32:], "big")
+                    self.balances[name] = self.balances.get(name, 0) + direction * value
+
+    def process_block(self, block_number: int) -> List[Dict]:
+        """
+        Advances the engine to `block_number`; returns the capturable gaps.
+        Rate changes accrue on the balance held before this block's transfers.
+        """
+        resync = self._last_sync_block is None or block_number - self._last_sync_block >= self.resync_blocks
+        snapshot = self._read_snapshot(block_number, with_balances=resync)
+
+        for name, rate in snapshot["rate"].items():
+            previous = self.exchange_rates.get(name)
+            if previous is not None and rate != previous:
+                accrued = self.balances.get(name, 0) * (rate - previous) // 10**18
+                self.shadow_yield_cache[name] = self.shadow_yield_cache.get(name, 0) + accrued
+                logger.debug(f"LST Engine: {name} rate update at block {block_number}, accrued {accrued / 1e18:.6f} ETH")
+            self.exchange_rates[name] = rate
+
+        if resync:
+            self.balances.update(snapshot["balance"])
+            self._last_sync_block = block_number
+        elif self.last_block is not None and block_number > self.last_block:
+            self._apply_transfers(self.last_block + 1, block_number)
+        self.last_block = block_number
+
+        gaps = []
+        for name, lst_out in snapshot["quote"].items():
+            rate = self.exchange_rates.get(name)
+            if not rate:
+                continue
+            # ETH backing bought per ETH spent, minus one
+            gap_bps = (lst_out * rate / 10**18 / self.capture_amount_wei - 1) * 10_000
+            if gap_bps >= self.min_gap_bps:
+                gaps.append({"lst": name, "gap_bps": gap_bps, "amount_in": self.capture_amount_wei,
+                             "lst_out": lst_out, "rate": rate, "block": block_number})
+        return gaps
+
+    @property
+    def accrued_shadow_yield(self) -> int:
+        return sum(self.shadow_yield_cache.values())
+
+    def fetch_balances(self) -> Dict[str, int]:
+        """Vault LST balances in one Multicall3 read, falling back to direct calls."""
+        try:
+            erc20 = self.w3.eth.contract(abi=ERC20_BALANCE_ABI)
+            vault = Web3.to_checksum_address(self.cm.vault_address)
+            out = self._multicall([(addr, erc20.encodeABI(fn_name="balanceOf", args=[vault]), ["uint256"])
+                                   for addr in self.lst_tokens.values()])
+            return {name: (v[0] if v else 0) for name, v in zip(self.lst_tokens, out)}
+        except Exception as e:
+            logger.debug(f"LST Engine: multicall balance read failed ({e}), reading directly")
+            return {name: self._get_erc20_balance(addr, self.cm.vault_address) for name, addr in self.lst_tokens.items()}
+
+    def _send_tx(self, fn) -> str:
+        """Sign and broadcast without waiting for the receipt; nonce tracked locally."""
+        with self._tx_lock:
+            if self._nonce is None:
+                self._nonce = self.w3.eth.get_transaction_count(self.cm.account.address, 'pending')
+            try:
+                tx = fn.build_transaction({
+                    'from': self.cm.account.address,
+                    'nonce': self._nonce,
+                    'gasPrice': self.w3.eth.gas_price
+                })
+                signed_tx = self.w3.eth.account.sign_transaction(tx, self.cm.private_key)
+                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            except Exception:
+                self._nonce = None  # resync from chain on the next send
+                raise
+            self._nonce += 1
+            return tx_hash.hex()
+
+    def _read_hook_shadow_yield(self) -> int:
+        return self.hook.functions.getVerifiedAssets(Web3.to_checksum_address(self.cm.vault_address)).call()
+
     async def update_shadow_yield(self):
         """
-        Calculates and reports accrued shadow yield to the KerneLSTHook.
-        Shadow yield = Sum(Vault_LST_Balance * Daily_Rate * Days_Since_Last_Report)
+        Reports shadow yield to the KerneLSTHook, which stores the amount as-is.
+        While streaming blocks this is an absolute running total: the hook's value at the first
+        report plus everything accrued from exchange-rate updates since start. Before the first
+        block it falls back to one day of APR on current balances.
         """
-        if not self.hook_address:
+        if self.hook is None:
             return
-            
-        rates = await self.fetch_lst_rates()
-        total_shadow_yield = 0
-        
-        for name, addr in self.lst_tokens.items():
-            # Get vault balance of this LST
-            balance = self._get_erc20_balance(addr, self.cm.vault_address)
-            # Calculate 1 day of yield
-            daily_yield = balance * (rates[name] / 365)
-            total_shadow_yield += daily_yield
-            
+
+        streaming = self.last_block is not None
+        if streaming:
+            if self._shadow_yield_base is None:
+                try:
+                    self._shadow_yield_base = await asyncio.to_thread(self._read_hook_shadow_yield)
+                except Exception as e:
+                    # Reporting without the base would overwrite yield already on the hook
+                    logger.error(f"LST Engine: Failed to read reported shadow yield: {e}")
+                    return
+            total_shadow_yield = self._shadow_yield_base + self.accrued_shadow_yield
+            if total_shadow_yield <= 0 or total_shadow_yield == self._last_reported_shadow_yield:
+                return
+        else:
+            rates = await self.fetch_lst_rates()
+            balances = await asyncio.to_thread(self.fetch_balances)
+            total_shadow_yield = sum(balances[name] * (rates[name] / 365) for name in self.lst_tokens)
+
         logger.info(f"LST Engine: Calculated total shadow yield: {total_shadow_yield / 1e18:.6f} ETH")
-        
+
         # Update on-chain
         try:
-            nonce = self.w3.eth.get_transaction_count(self.cm.account.address)
-            tx = self.hook.functions.updateShadowYield(
-                self.cm.vault_address, 
-                int(total_shadow_yield)
-            ).build_transaction({
-                'from': self.cm.account.address,
-                'nonce': nonce,
-                'gasPrice': self.w3.eth.gas_price
-            })
-            
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.cm.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            logger.success(f"LST Engine: Shadow yield updated: {tx_hash.hex()}")
+            fn = self.hook.functions.updateShadowYield(self.cm.vault_address, int(total_shadow_yield))
+            tx_hash = await asyncio.to_thread(self._send_tx, fn)
+            self._last_reported_shadow_yield = int(total_shadow_yield)
+            logger.success(f"LST Engine: Shadow yield updated: {tx_hash}")
         except Exception as e:
             logger.error(f"LST Engine: Failed to update shadow yield: {e}")
 
+    async def on_block(self, block_number: int):
+        gaps = await asyncio.to_thread(self.process_block, block_number)
+        for gap in gaps:
+            if gap["lst"] in self._capturing:
+                continue
+            self._capturing.add(gap["lst"])
+            asyncio.create_task(self._capture(gap))
+
+    def _min_out(self, gap: Dict) -> int:
+        """Quote less max slippage, never below the LST's ETH backing for the amount in."""
+        quoted = gap["lst_out"] * int(10_000 - self.max_slippage_bps) // 10_000
+        at_backing = gap["amount_in"] * 10**18 // gap["rate"]
+        return max(quoted, at_backing)
+
+    async def _capture(self, gap: Dict):
+        """
+        Sends the capture swap. The LST stays blocked for new captures until the receipt
+        lands or `capture_cooldown` passes, so one discount can't fire a swap per block.
+        """
+        name = gap["lst"]
+        try:
+            logger.warning(f"LST Engine: {name} trading {gap['gap_bps']:.1f} bps under backing at block {gap['block']}, capturing")
+            routes = self._route(name)
+            swap_data = self.w3.codec.encode(
+                ["uint8", "bytes", "uint256"],
+                [0, self.w3.codec.encode(["(address,address,bool,address)[]"], [routes]), self._min_out(gap)]
+            )
+            tx_hash = await self.execute_solver_swap(WETH, self.lst_tokens[name], gap["amount_in"], swap_data)
+            if tx_hash:
+                try:
+                    await asyncio.to_thread(self.w3.eth.wait_for_transaction_receipt, tx_hash,
+                                            timeout=self.capture_cooldown)
+                except Exception as e:
+                    logger.warning(f"LST Engine: no receipt for {name} capture {tx_hash} within cooldown: {e}")
+        finally:
+            self._capturing.discard(name)
+
     async def scan_and_capture_gaps(self):
         """
-        Scans for price gaps between LST secondary market and its backing.
+        Scans for price gaps between LST secondary market and its backing at the latest block.
         Triggers KerneLSTSolver if a profitable gap is found.
         """
-        if not self.solver_address:
+        if self.solver is None:
             return
-            
-        # Example: wstETH/WETH gap on Aerodrome
-        # In production, this would use the PricingEngine to find real gaps
+
         logger.info("LST Engine: Scanning for LST gaps...")
-        
-        # Mock profitable gap found
-        # tokenIn = WETH, tokenOut = wstETH
-        # amount = 10 ETH
-        # routerType = 0 (Aerodrome)
-        # ...
-        
-        # await self.execute_solver_swap(...)
+        block_number = await asyncio.to_thread(lambda: self.w3.eth.block_number)
+        await self.on_block(block_number)
 
     async def execute_solver_swap(self, token_in, token_out, amount, swap_data):
         """
         Calls executeLSTSwap on the KerneLSTSolver contract.
         """
         try:
-            nonce = self.w3.eth.get_transaction_count(self.cm.account.address)
-            tx = self.solver.functions.executeLSTSwap(
-                token_in,
-                token_out,
+            fn = self.solver.functions.executeLSTSwap(
+                Web3.to_checksum_address(token_in),
+                Web3.to_checksum_address(token_out),
                 amount,
                 swap_data
-            ).build_transaction({
-                'from': self.cm.account.address,
-                'nonce': nonce,
-                'gasPrice': self.w3.eth.gas_price
-            })
-            
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.cm.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            logger.success(f"LST Engine: Solver swap executed: {tx_hash.hex()}")
-            return tx_hash.hex()
+            )
+            tx_hash = await asyncio.to_thread(self._send_tx, fn)
+            logger.success(f"LST Engine: Solver swap executed: {tx_hash}")
+            return tx_hash
         except Exception as e:
             logger.error(f"LST Engine: Solver swap failed: {e}")
             return None
 
     def _get_erc20_balance(self, token_address, account_address):
-        abi = [{"inputs":[{"name":"account","type":"address"}],"name":"balanceOf","outputs":[{"name":"","type":"uint256"}],"stateMutability":"view","type":"function"}]
-        contract = self.w3.eth.contract(address=token_address, abi=abi)
+        contract = self.w3.eth.contract(address=token_address, abi=ERC20_BALANCE_ABI)
         return contract.functions.balanceOf(account_address).call()
 
-    async def run_loop(self):
-        logger.info("Kerne LST Capture Engine active.")
+    async def run_loop(self, poll_seconds: float = None):
+        poll_seconds = poll_seconds or float(os.getenv("LST_POLL_SECONDS", "2"))
+        logger.info(f"Kerne LST Capture Engine active (block poll {poll_seconds}s).")
+        last_report = 0.0
         while True:
-            await self.update_shadow_yield()
-            await self.scan_and_capture_gaps()
-            await asyncio.sleep(3600) # Run every hour
+            try:
+                block_number = await asyncio.to_thread(lambda: self.w3.eth.block_number)
+                if self.last_block is None or block_number > self.last_block:
+                    await self.on_block(block_number)
+                if time.time() - last_report >= self.report_interval:
+                    await self.update_shadow_yield()
+                    last_report = time.time()
+            except Exception as e:
+                logger.error(f"LST Engine: block loop error: {e}")
+            await asyncio.sleep(poll_seconds)
 
 if __name__ == "__main__":
     from bot.chain_manager import ChainManager
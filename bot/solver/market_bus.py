@@ -0,0 +1,157 @@
+# Created: 2026-10-19
+"""
+Kerne Market Bus - supervisor-owned shared-memory market snapshot.
+
+The supervisor fetches prices, funding, books, account state and head blocks
+once and publishes them into a memory-mapped file (under /dev/shm when
+available). Every supervised process maps the same file read-only, so all of
+them see one consistent snapshot without re-polling the venues.
+
+Layout:
+    [0:24)      header: seq (u64), payload length (u64), published_at (f64)
+    [64:64+8N)  heartbeat slots: one f64 wall-clock timestamp per child
+    [4096:)     payload: JSON snapshot
+
+Writes use a seqlock: seq is odd while the payload is being rewritten, and
+readers retry until they see the same even seq before and after copying.
+Readers keep the last decoded snapshot and skip the copy while seq is
+unchanged.
+
+Children learn the bus path and their heartbeat slot from KERNE_MARKET_BUS
+and KERNE_HEARTBEAT_SLOT; without them every helper here is a no-op.
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+BUS_ENV = "KERNE_MARKET_BUS"
+SLOT_ENV = "KERNE_HEARTBEAT_SLOT"
+
+HEADER = struct.Struct("<QQd")
+HEARTBEAT = struct.Struct("<d")
+HEARTBEAT_OFFSET = 64
+MAX_SLOTS = 64
+PAYLOAD_OFFSET = 4096
+DEFAULT_SIZE = 4 * 1024 * 1024
+
+
+def default_bus_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"kerne_market_bus_{os.getpid()}")
+
+
+class MarketBus:
+    """One mapping of the bus file. The supervisor creates it; children attach."""
+
+    def __init__(self, path: str, create: bool = False, size: int = DEFAULT_SIZE):
+        self.path = path
+        if create:
+            with open(path, "wb") as f:
+                f.truncate(size)
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self.size = len(self._mm)
+        self._seq = HEADER.unpack_from(self._mm, 0)[0]
+        self._cached_seq: Optional[int] = None
+        self._cached: Dict[str, Any] = {}
+        self._cached_at = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional["MarketBus"]:
+        path = os.getenv(BUS_ENV)
+        if not path:
+            return None
+        try:
+            return cls(path)
+        except OSError as e:
+            logger.warning(f"Market bus {path} unavailable: {e}")
+            return None
+
+    # --- snapshot (single writer: the supervisor) ---
+
+    def publish(self, snapshot: Dict[str, Any]) -> bool:
+        payload = json.dumps(snapshot, separators=(",", ":")).encode()
+        if PAYLOAD_OFFSET + len(payload) > self.size:
+            logger.error(f"Market bus: snapshot of {len(payload)} bytes does not fit in {self.size}")
+            return False
+        self._seq += 1  # odd: write in progress
+        HEADER.pack_into(self._mm, 0, self._seq, 0, 0.0)
+        self._mm[PAYLOAD_OFFSET:PAYLOAD_OFFSET + len(payload)] = payload
+        self._seq += 1
+        HEADER.pack_into(self._mm, 0, self._seq, len(payload), time.time())
+        return True
+
+    def read(self, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Latest snapshot, or None if nothing was published yet or it is older than max_age seconds."""
+        for _ in range(100):
+            seq, length, published_at = HEADER.unpack_from(self._mm, 0)
+            if seq == 0:
+                return None
+            if seq == self._cached_seq:
+                break
+            if seq % 2:
+                continue
+            payload = self._mm[PAYLOAD_OFFSET:PAYLOAD_OFFSET + length]
+            if HEADER.unpack_from(self._mm, 0)[0] != seq:
+                continue
+            self._cached = json.loads(payload)
+            self._cached_seq = seq
+            self._cached_at = published_at
+            break
+        else:
+            logger.warning("Market bus: writer kept the snapshot busy, serving the cached one")
+        if self._cached_seq is None:
+            return None
+        if max_age is not None and time.time() - self._cached_at > max_age:
+            return None
+        return self._cached
+
+    # --- heartbeats (one writer per slot: the child that owns it) ---
+
+    def beat(self, slot: int):
+        HEARTBEAT.pack_into(self._mm, HEARTBEAT_OFFSET + slot * HEARTBEAT.size, time.time())
+
+    def last_beat(self, slot: int) -> float:
+        return HEARTBEAT.unpack_from(self._mm, HEARTBEAT_OFFSET + slot * HEARTBEAT.size)[0]
+
+    def clear_beat(self, slot: int):
+        HEARTBEAT.pack_into(self._mm, HEARTBEAT_OFFSET + slot * HEARTBEAT.size, 0.0)
+
+    def close(self, unlink: bool = False):
+        self._mm.close()
+        self._file.close()
+        if unlink and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+_BUS: Optional[MarketBus] = None
+_BUS_LOADED = False
+
+
+def get_market_bus() -> Optional[MarketBus]:
+    """This process's attachment to the supervisor's bus, if it runs under one."""
+    global _BUS, _BUS_LOADED
+    if not _BUS_LOADED:
+        _BUS = MarketBus.from_env()
+        _BUS_LOADED = True
+    return _BUS
+
+
+async def heartbeat_forever(interval: float = 1.0):
+    """Beats this process's slot from inside its event loop, so a stalled loop reads as unhealthy."""
+    bus = get_market_bus()
+    slot = os.getenv(SLOT_ENV)
+    if bus is None or slot is None:
+        return
+    slot = int(slot)
+    while True:
+        bus.beat(slot)
+        await asyncio.sleep(interval)
@@ -0,0 +1,163 @@
+# Created: 2026-10-19
+"""
+Vectorised portfolio risk kernel for the solver Sentinel.
+
+Prices arrive as one vector per tick. Each tick:
+  - appends a row of log returns to a rolling (window x assets) matrix;
+  - advances an exponentially weighted covariance with one rank-1 update
+    (RiskMetrics style, zero-mean returns).
+
+VaR / ES are then a handful of matrix ops over signed USD exposures:
+  - parametric: normal quantile of sqrt(w' S w), scaled to the horizon;
+  - Monte Carlo: correlated normal draws through the Cholesky factor;
+  - historical: the rolling return matrix replayed against today's book.
+
+Assets join the kernel the first time they are seen; until they have
+history their variance is seeded from `prior_daily_vol` with no correlation.
+
+`decay` is the RiskMetrics daily factor (0.94 for daily returns); it is
+applied per tick as decay ** (period_seconds / 86400), so the memory in
+wall-clock time is the same at any sampling cadence.
+"""
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from bot.sentinel.streaming_stats import z_score
+
+SECONDS_PER_DAY = 86400
+
+
+class PortfolioRiskKernel:
+    def __init__(self, period_seconds: float = 1.0, window: int = 3600, decay: float = 0.94,
+                 prior_daily_vol: float = 0.05, min_observations: int = 30,
+                 decay_per_period: Optional[float] = None):
+        self.period_seconds = period_seconds
+        self.window = window
+        # Per-tick EWMA factor; `decay` is calibrated for one observation per day
+        self.decay = decay_per_period if decay_per_period is not None else decay ** (period_seconds / SECONDS_PER_DAY)
+        self.min_observations = min_observations
+        # Prior per-period variance for assets with no history yet
+        self.prior_variance = prior_daily_vol ** 2 * period_seconds / SECONDS_PER_DAY
+
+        self.assets: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.last_prices = np.zeros(0)
+        self.cov = np.zeros((0, 0))
+        self.returns = np.zeros((window, 0))
+        self._row = 0
+        self.observations = 0
+
+    def __len__(self) -> int:
+        return min(self.observations, self.window)
+
+    def _add_asset(self, asset: str, price: float):
+        n = len(self.assets)
+        self.index[asset] = n
+        self.assets.append(asset)
+        self.last_prices = np.append(self.last_prices, price)
+        cov = np.zeros((n + 1, n + 1))
+        cov[:n, :n] = self.cov
+        cov[n, n] = self.prior_variance
+        self.cov = cov
+        self.returns = np.hstack((self.returns, np.zeros((self.window, 1))))
+
+    def vector(self, values: Dict[str, float]) -> np.ndarray:
+        """Dense vector in kernel asset order; assets the kernel has not seen are dropped."""
+        out = np.zeros(len(self.assets))
+        for asset, value in values.items():
+            i = self.index.get(asset)
+            if i is not None:
+                out[i] = value
+        return out
+
+    def last_price(self, asset: str) -> Optional[float]:
+        """Most recent price ingested for `asset`, or None if it was never seen."""
+        i = self.index.get(asset)
+        return float(self.last_prices[i]) if i is not None else None
+
+    def update(self, prices: Dict[str, float]):
+        """Ingest one tick of prices; assets missing from the tick count as unchanged."""
+        added = 0
+        for asset, price in prices.items():
+            if asset not in self.index and price > 0:
+                self._add_asset(asset, price)
+                added += 1
+        if added == len(prices):
+            return  # first sighting only: no returns yet
+        current = self.last_prices.copy()
+        for asset, price in prices.items():
+            if price > 0:
+                current[self.index[asset]] = price
+        self.update_array(current)
+
+    def update_array(self, prices: np.ndarray):
+        """Ingest one tick as a price vector aligned with `self.assets`."""
+        r = np.log(prices / self.last_prices)
+        self.last_prices = prices
+        self.returns[self._row] = r
+        self._row = (self._row + 1) % self.window
+        self.observations += 1
+        self.cov *= self.decay
+        self.cov += (1 - self.decay) * np.outer(r, r)
+
+    def return_matrix(self) -> np.ndarray:
+        """Rolling returns, oldest row first."""
+        if self.observations < self.window:
+            return self.returns[:self.observations]
+        return np.roll(self.returns, -self._row, axis=0)
+
+    def correlation(self) -> np.ndarray:
+        sd = np.sqrt(np.diag(self.cov))
+        sd[sd == 0] = 1.0
+        return self.cov / np.outer(sd, sd)
+
+    def _horizon_periods(self, horizon_seconds: float) -> float:
+        return horizon_seconds / self.period_seconds
+
+    def parametric(self, exposures: np.ndarray, confidence: float = 0.95,
+                   horizon_seconds: float = SECONDS_PER_DAY) -> Dict[str, float]:
+        """Gaussian VaR / ES of the signed USD exposure vector."""
+        sigma = math.sqrt(max(float(exposures @ self.cov @ exposures), 0.0) * self._horizon_periods(horizon_seconds))
+        z = z_score(confidence)
+        pdf = math.exp(-0.5 * z * z) / math.sqrt(2 * math.pi)
+        return {"sigma": sigma, "var": z * sigma, "es": sigma * pdf / (1 - confidence)}
+
+    def monte_carlo(self, exposures: np.ndarray, confidence: float = 0.95,
+                    horizon_seconds: float = SECONDS_PER_DAY, paths: int = 10_000,
+                    rng: Optional[np.random.Generator] = None) -> Dict[str, float]:
+        """Simulated VaR / ES from correlated normal returns (Cholesky of the EWMA covariance)."""
+        n = len(exposures)
+        if n == 0:
+            return {"var": 0.0, "es": 0.0}
+        rng = rng or np.random.default_rng()
+        cov = self.cov * self._horizon_periods(horizon_seconds)
+        # Jitter keeps the factorisation alive for near-singular books (e.g. duplicated assets)
+        chol = np.linalg.cholesky(cov + np.eye(n) * 1e-12 * max(np.trace(cov) / n, 1e-18))
+        # pnl = draws @ chol.T @ w, folded into one mat-vec
+        pnl = rng.standard_normal((paths, n)) @ (chol.T @ exposures)
+        return self._tail(pnl, confidence)
+
+    def historical(self, exposures: np.ndarray, confidence: float = 0.95,
+                   horizon_seconds: float = SECONDS_PER_DAY) -> Optional[Dict[str, float]]:
+        """Rolling return matrix replayed against the current book, scaled by sqrt(time)."""
+        if len(self) < self.min_observations:
+            return None
+        pnl = self.return_matrix() @ exposures * math.sqrt(self._horizon_periods(horizon_seconds))
+        return self._tail(pnl, confidence)
+
+    @staticmethod
+    def _tail(pnl: np.ndarray, confidence: float) -> Dict[str, float]:
+        cutoff = np.quantile(pnl, 1 - confidence)
+        return {"var": max(-float(cutoff), 0.0), "es": max(-float(pnl[pnl <= cutoff].mean()), 0.0)}
+
+    def assess(self, exposures: Dict[str, float], confidence: float = 0.95,
+               horizon_seconds: float = SECONDS_PER_DAY, mc_paths: int = 0) -> Dict[str, Optional[Dict[str, float]]]:
+        """All estimators for a {asset: signed USD exposure} book."""
+        w = self.vector(exposures)
+        return {
+            "parametric": self.parametric(w, confidence, horizon_seconds),
+            "monte_carlo": self.monte_carlo(w, confidence, horizon_seconds, mc_paths) if mc_paths else None,
+            "historical": self.historical(w, confidence, horizon_seconds),
+        }
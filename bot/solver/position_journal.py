@@ -0,0 +1,110 @@
+# Created: 2026-10-19
+"""
+Debounced, crash-safe persistence for per-coin position sizes.
+
+Changes are appended to `<state_file>.log` as one JSON line per coin holding
+its new absolute size, so replay is idempotent and a torn last line is simply
+skipped. Appends are debounced: bursts of fills inside `debounce_s` become
+one write. Every `compact_every` lines the journal is folded into the JSON
+snapshot (written to a temp file and atomically renamed) and truncated.
+"""
+
+import asyncio
+import atexit
+import json
+import os
+from typing import Dict, Optional
+
+from loguru import logger
+
+
+class PositionJournal:
+    def __init__(self, state_file: str, debounce_s: float = 0.5, compact_every: int = 1000):
+        self.state_file = state_file
+        self.journal_file = f"{state_file}.log"
+        self.debounce_s = debounce_s
+        self.compact_every = compact_every
+        self.positions: Dict[str, float] = {}
+        self._pending: Dict[str, float] = {}
+        self._journal_lines = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r") as f:
+                    self.positions = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading position snapshot {self.state_file}: {e}")
+                self.positions = {}
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, "r+") as f:
+                content = f.read()
+                complete = content[:content.rfind("\n") + 1]
+                if len(complete) < len(content):
+                    # Torn last write: drop it so the next append starts on a fresh line
+                    logger.warning(f"Dropping torn entry at end of {self.journal_file}")
+                    f.truncate(len(complete.encode()))
+            for line in complete.splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping unreadable entry in {self.journal_file}")
+                    continue
+                self.positions[entry["coin"]] = float(entry["size"])
+                self._journal_lines += 1
+
+    def set(self, coin: str, size: float):
+        """Records the new absolute size for `coin` and schedules a write."""
+        self.positions[coin] = float(size)
+        self._pending[coin] = float(size)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_handle is not None and (self._flush_handle.cancelled() or self._flush_loop is not loop):
+            # Timer from a loop that has since ended (e.g. a previous asyncio.run) never fires
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.debounce_s, self.flush)
+            self._flush_loop = loop
+
+    def flush(self):
+        """Appends pending changes in one write; compacts when the journal grows long."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        lines = "".join(json.dumps({"coin": coin, "size": size}) + "\n" for coin, size in self._pending.items())
+        try:
+            with open(self.journal_file, "a") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            logger.error(f"Error appending position journal: {e}")
+            return
+        self._journal_lines += len(self._pending)
+        self._pending.clear()
+        if self._journal_lines >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Writes the full snapshot atomically, then truncates the journal."""
+        tmp = f"{self.state_file}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.positions, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.state_file)
+            open(self.journal_file, "w").close()
+            self._journal_lines = 0
+        except Exception as e:
+            logger.error(f"Error compacting position state: {e}")
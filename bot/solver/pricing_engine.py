@@ -1,9 +1,9 @@
 # Created: 2026-01-13
+# Updated: 2026-10-19 - optimize_spread reads the shared incremental ProfitLogStore
 from loguru import logger
 import aiohttp
 import asyncio
-import os
-import pandas as pd
+from bot.solver.profit_log_store import get_profit_log_store
 
 class PricingEngine:
     def __init__(self):
@@ -36,16 +36,16 @@ class PricingEngine:
         """
         Adjusts min_spread_bps based on recent win/loss history.
         """
-        if not os.path.exists(self.profit_log_path):
+        store = get_profit_log_store(self.profit_log_path)
+        if not store.exists:
             return
 
         try:
-            df = pd.read_csv(self.profit_log_path)
-            if len(df) < 10:
+            store.refresh()
+            if store.total.count < 10:
                 return
 
-            recent = df.tail(20)
-            win_rate = len(recent[recent['status'] == 'HEDGED']) / len(recent)
+            win_rate = store.recent_win_rate(20)
             
             if win_rate < 0.2:
                 self.current_min_spread_bps = max(2, self.current_min_spread_bps - 1)
@@ -0,0 +1,172 @@
+# Created: 2026-10-19
+"""
+Incremental store over the solver's append-only profit log CSV.
+
+Each refresh() reads only the bytes appended since the previous call and
+folds the new fills into running aggregates (totals, per-venue and per-hour
+win rate / profit bps) plus an in-memory ring of the latest rows. Dashboard
+and spread-tuning queries therefore cost O(new rows), not O(log size).
+"""
+
+import csv
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+WIN_STATUS = "HEDGED"
+NUMERIC_COLUMNS = ("timestamp", "amount", "profit_bps")
+BUCKET_SECONDS = 3600
+
+
+def _coerce(row: Dict[str, str]) -> Dict[str, Any]:
+    for col in NUMERIC_COLUMNS:
+        if col in row:
+            try:
+                row[col] = float(row[col])
+            except (TypeError, ValueError):
+                pass
+    return row
+
+
+class _Aggregate:
+    __slots__ = ("count", "wins", "profit_bps")
+
+    def __init__(self):
+        self.count = 0
+        self.wins = 0
+        self.profit_bps = 0.0  # summed over winning fills only
+
+    def add(self, won: bool, profit_bps: float):
+        self.count += 1
+        if won:
+            self.wins += 1
+            self.profit_bps += profit_bps
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "wins": self.wins,
+            "win_rate": self.wins / self.count if self.count else 0.0,
+            "profit_bps": self.profit_bps,
+            "avg_profit_bps": self.profit_bps / self.wins if self.wins else 0.0,
+        }
+
+
+class ProfitLogStore:
+    """Tails a profit_log.csv and keeps running aggregates plus the last `recent_size` rows."""
+
+    def __init__(self, path: str, recent_size: int = 1000, max_buckets: int = 24 * 90):
+        self.path = path
+        self.recent_size = recent_size
+        self.max_buckets = max_buckets
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._columns: Optional[List[str]] = None
+        self.total = _Aggregate()
+        self.by_venue: Dict[str, _Aggregate] = {}
+        self.by_bucket: Dict[int, _Aggregate] = {}
+        self.recent_rows: deque = deque(maxlen=self.recent_size)
+        self.recent_wins: deque = deque(maxlen=self.recent_size)
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def refresh(self) -> int:
+        """Ingests rows appended since the last call; returns how many were added."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                # New or rotated/truncated file: rebuild from the start
+                if self._inode is not None:
+                    logger.info(f"Profit log {self.path} was replaced, re-indexing")
+                self._reset()
+                self._inode = st.st_ino
+            if st.st_size == self._offset:
+                return 0
+
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                chunk = f.read(st.st_size - self._offset)
+            # Only consume complete lines; a half-written row is picked up next time
+            end = chunk.rfind(b"\n") + 1
+            if end == 0:
+                return 0
+            self._offset += end
+            lines = chunk[:end].decode("utf-8", errors="replace").splitlines()
+
+            if self._columns is None:
+                self._columns = next(csv.reader([lines[0]]))
+                lines = lines[1:]
+
+            added = 0
+            for values in csv.reader(lines):
+                if not values:
+                    continue
+                self._ingest(_coerce(dict(zip(self._columns, values))))
+                added += 1
+            self._prune_buckets()
+            return added
+
+    def _ingest(self, row: Dict[str, Any]):
+        won = row.get("status") == WIN_STATUS
+        profit = row.get("profit_bps")
+        profit = profit if isinstance(profit, float) else 0.0
+        ts = row.get("timestamp")
+        bucket = int(ts // BUCKET_SECONDS * BUCKET_SECONDS) if isinstance(ts, float) else 0
+
+        self.total.add(won, profit)
+        self.by_venue.setdefault(row.get("venue", "unknown"), _Aggregate()).add(won, profit)
+        self.by_bucket.setdefault(bucket, _Aggregate()).add(won, profit)
+        self.recent_rows.append(row)
+        self.recent_wins.append(won)
+
+    def _prune_buckets(self):
+        excess = len(self.by_bucket) - self.max_buckets
+        if excess > 0:
+            for bucket in sorted(self.by_bucket)[:excess]:
+                del self.by_bucket[bucket]
+
+    def recent(self, n: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            n = min(n, len(self.recent_rows))
+            return [dict(row) for row in list(self.recent_rows)[-n:]] if n > 0 else []
+
+    def recent_win_rate(self, n: int = 20) -> float:
+        with self._lock:
+            window = list(self.recent_wins)[-n:]
+        return sum(window) / len(window) if window else 0.0
+
+    def venue_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {venue: agg.to_dict() for venue, agg in sorted(self.by_venue.items())}
+
+    def bucket_stats(self, limit: int = 24) -> List[Dict[str, Any]]:
+        """Most recent `limit` hourly buckets, oldest first."""
+        with self._lock:
+            buckets = sorted(self.by_bucket.items())[-limit:]
+            return [{"bucket_start": start, **agg.to_dict()} for start, agg in buckets]
+
+
+_STORES: Dict[str, ProfitLogStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_profit_log_store(path: str) -> ProfitLogStore:
+    """Process-wide store per log path, so the API and PricingEngine share one index."""
+    key = os.path.abspath(path)
+    with _STORES_LOCK:
+        store = _STORES.get(key)
+        if store is None:
+            store = _STORES[key] = ProfitLogStore(path)
+        return store
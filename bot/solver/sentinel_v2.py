@@ -1,11 +1,15 @@
 # Created: 2026-01-13
+# Updated: 2026-10-19 - Heartbeats to the supervisor
+# Updated: 2026-10-19 - Correlation-aware VaR/ES from the EWMA covariance kernel, sub-second checks
+# Updated: 2026-10-19 - Cadence-scaled EWMA decay; no assessment without a mark for every held coin
 import asyncio
 from loguru import logger
 from bot.solver.hyperliquid_provider import HyperliquidProvider
+from bot.solver.market_bus import heartbeat_forever
+from bot.solver.portfolio_risk import SECONDS_PER_DAY, PortfolioRiskKernel
 from bot.chain_manager import ChainManager
 import os
 import time
-import numpy as np
 
 class SolverSentinelV2:
     """
@@ -18,56 +22,77 @@ class SolverSentinelV2:
         self.max_leverage = 5.0
         self.confidence_level = 0.95
         self.lookback_days = 30
-        
-    def calculate_var(self, positions, volatility):
+        self.check_interval = float(os.getenv("SENTINEL_CHECK_INTERVAL", "1"))
+        self.var_threshold = 0.15 # 15% of account value
+        self.mc_paths = int(os.getenv("SENTINEL_MC_PATHS", "0"))  # 0 disables the Monte Carlo estimate
+        # EWMA covariance over every coin with a mid price, one observation per check;
+        # the kernel scales the daily RiskMetrics decay (0.94) to the check cadence
+        self.risk = PortfolioRiskKernel(
+            period_seconds=self.check_interval,
+            window=int(3600 / self.check_interval),
+        )
+        self._last_logged = 0.0
+
+    def calculate_var(self, exposures):
         """
-        Calculates Value-at-Risk for the current portfolio.
+        Calculates 1-day Value-at-Risk and Expected Shortfall for signed USD exposures,
+        using the EWMA covariance (correlation-aware).
         """
-        # Simplified VaR: Size * Volatility * Z-Score
-        z_score = 1.645 # 95% confidence
-        total_var = 0
-        for coin, size in positions.items():
-            coin_var = size * volatility * z_score
-            total_var += coin_var
-        return total_var
+        return self.risk.assess(exposures, self.confidence_level, SECONDS_PER_DAY, self.mc_paths)
 
     async def check_and_rebalance(self):
-        logger.info("Sentinel V2: Running VaR-based risk assessment...")
-        
-        user_state = await self.hl_provider.get_account_summary()
+        user_state, mids = await asyncio.gather(
+            self.hl_provider.get_account_summary(), self.hl_provider.get_mids()
+        )
+        if mids:
+            self.risk.update(mids)
         if not user_state:
             return
 
         margin_summary = user_state.get('marginSummary', {})
         account_value = float(margin_summary.get('accountValue', 0))
         
-        # Fetch positions from HL
-        hl_positions = {}
+        # Signed USD exposure per coin (shorts negative), at the last known mark if this tick has none
+        exposures = {}
         for pos in user_state.get('assetPositions', []):
             coin = pos['position']['coin']
-            size = abs(float(pos['position']['szi']))
-            hl_positions[coin] = size
+            size = float(pos['position']['szi'])
+            if size == 0:
+                continue
+            mark = (mids or {}).get(coin) or self.risk.last_price(coin)
+            if not mark:
+                # Pricing the position at zero would report no risk; skip rather than fail open
+                logger.warning(f"Sentinel V2: no mark for held {coin}, skipping VaR check")
+                return
+            exposures[coin] = size * mark
 
-        # Mock volatility (in production, fetch from historical data)
-        volatility = 0.05 # 5% daily vol
-        
-        var_usd = self.calculate_var(hl_positions, volatility)
+        risk = self.calculate_var(exposures)
+        var_usd = risk["parametric"]["var"]
         var_pct = var_usd / account_value if account_value > 0 else 0
-        
-        logger.info(f"Sentinel V2: Portfolio VaR (95%): ${var_usd:.2f} ({var_pct:.2%})")
 
-        if var_pct > 0.15: # 15% VaR threshold
-            logger.critical(f"Sentinel V2: VaR EXCEEDED THRESHOLD! Reducing leverage...")
+        now = time.time()
+        if now - self._last_logged >= 60:
+            self._last_logged = now
+            logger.info(
+                f"Sentinel V2: Portfolio VaR ({self.confidence_level:.0%}): ${var_usd:.2f} ({var_pct:.2%}), "
+                f"ES ${risk['parametric']['es']:.2f}"
+                + (f", MC VaR ${risk['monte_carlo']['var']:.2f}" if risk["monte_carlo"] else "")
+            )
+
+        if var_pct > self.var_threshold:
+            logger.critical(f"Sentinel V2: VaR EXCEEDED THRESHOLD ({var_pct:.2%})! Reducing leverage...")
             # Trigger deleveraging logic
             
     async def run_loop(self):
-        logger.info("Starting Solver Sentinel V2 loop...")
+        logger.info(f"Starting Solver Sentinel V2 loop (every {self.check_interval}s)...")
+        heartbeat = asyncio.create_task(heartbeat_forever())
         while True:
+            started = time.time()
             try:
                 await self.check_and_rebalance()
             except Exception as e:
                 logger.error(f"Sentinel V2 Loop Error: {e}")
-            await asyncio.sleep(60) # Check every minute for high-frequency risk management
+            await asyncio.sleep(max(0.0, self.check_interval - (time.time() - started)))
 
 if __name__ == "__main__":
     sentinel = SolverSentinelV2()
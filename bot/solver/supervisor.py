@@ -1,10 +1,85 @@
 # Created: 2026-01-13
+# Updated: 2026-10-19 - Shared market bus publisher, heartbeat health checks and restart backoff
+# Updated: 2026-10-19 - USD open interest per coin on the market bus
 import asyncio
 import subprocess
 import sys
 import os
 from loguru import logger
 import time
+import eth_account
+from hyperliquid.info import Info
+from hyperliquid.utils import constants
+from bot.rpc_pool import get_web3
+from bot.solver.hyperliquid_provider import HL_WEIGHTS, HL_WEIGHT_PER_MINUTE
+from bot.solver.market_bus import BUS_ENV, SLOT_ENV, MarketBus, default_bus_path
+from bot.solver.token_bucket import get_bucket
+
+
+class MarketDataPublisher:
+    """
+    Fetches every datum the solver processes share exactly once per interval
+    and publishes it to the market bus.
+    """
+    def __init__(self, bus: MarketBus):
+        self.bus = bus
+        self.interval = float(os.getenv("KERNE_BUS_INTERVAL", "5"))
+        self.book_coins = [c.strip() for c in os.getenv("KERNE_BUS_BOOK_COINS", "ETH").split(",") if c.strip()]
+        self.base_url = constants.MAINNET_API_URL
+        self.info = Info(self.base_url, skip_ws=True)
+        self.rate_limiter = get_bucket(f"hyperliquid:{self.base_url}", HL_WEIGHT_PER_MINUTE, HL_WEIGHT_PER_MINUTE / 60)
+
+        private_key = os.getenv("HYPERLIQUID_PRIVATE_KEY")
+        self.account_address = os.getenv("HYPERLIQUID_ADDRESS") or (
+            eth_account.Account.from_key(private_key).address if private_key else None
+        )
+        self.chains = {
+            name: get_web3(url, name=name)
+            for name, url in (("base", os.getenv("RPC_URL")), ("arbitrum", os.getenv("ARBITRUM_RPC_URL")))
+            if url
+        }
+
+    async def _fetch(self, weight, fn, *args):
+        await self.rate_limiter.acquire(weight)
+        return await asyncio.to_thread(fn, *args)
+
+    async def collect(self):
+        snapshot = {"funding": {}, "mids": {}, "open_interest": {}, "books": {}, "account": None, "head_block": {}}
+
+        meta, ctxs = await self._fetch(HL_WEIGHTS["meta_and_asset_ctxs"], self.info.meta_and_asset_ctxs)
+        for asset, ctx in zip(meta["universe"], ctxs):
+            snapshot["funding"][asset["name"]] = float(ctx["funding"])
+            # Open interest is quoted in coins; the bus carries USD at the mark
+            snapshot["open_interest"][asset["name"]] = float(ctx.get("openInterest") or 0.0) * float(ctx.get("markPx") or 0.0)
+
+        mids = await self._fetch(HL_WEIGHTS["all_mids"], self.info.all_mids)
+        snapshot["mids"] = {coin: float(px) for coin, px in mids.items()}
+
+        for coin in self.book_coins:
+            book = await self._fetch(HL_WEIGHTS["l2_book"], self.info.l2_snapshot, coin)
+            bids, asks = book["levels"]
+            snapshot["books"][coin] = {
+                "bids": [[float(l["px"]), float(l["sz"])] for l in bids],
+                "asks": [[float(l["px"]), float(l["sz"])] for l in asks],
+            }
+
+        if self.account_address:
+            snapshot["account"] = await self._fetch(HL_WEIGHTS["user_state"], self.info.user_state, self.account_address)
+
+        for name, w3 in self.chains.items():
+            snapshot["head_block"][name] = await asyncio.to_thread(lambda: w3.eth.block_number)
+        return snapshot
+
+    async def run_loop(self):
+        logger.info(f"Market bus publisher active ({self.bus.path}, every {self.interval}s)")
+        while True:
+            started = time.time()
+            try:
+                self.bus.publish(await self.collect())
+            except Exception as e:
+                logger.error(f"Market bus publish failed: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.time() - started)))
+
 
 class SolverSupervisor:
     """
@@ -18,6 +93,19 @@ class SolverSupervisor:
             "analytics": "bot/solver/analytics_api.py"
         }
         self.running_processes = {}
+        self.slots = {name: i for i, name in enumerate(self.processes)}
+        self.started_at = {}
+        self.restart_failures = {name: 0 for name in self.processes}
+        self.next_start_at = {name: 0.0 for name in self.processes}
+
+        self.check_interval = 2.0
+        self.heartbeat_timeout = 15.0   # no beat for this long -> hung
+        self.startup_grace = 30.0       # time allowed before the first beat
+        self.stable_after = 120.0       # healthy this long -> backoff resets
+        self.base_backoff = 1.0
+        self.max_backoff = 300.0
+
+        self.bus = MarketBus(default_bus_path(), create=True)
 
     def start_process(self, name, path):
         logger.info(f"Supervisor: Starting {name} ({path})...")
@@ -26,29 +114,76 @@ class SolverSupervisor:
             # This allows sub-processes to find the 'bot' module
             env = os.environ.copy()
             env["PYTHONPATH"] = os.getcwd()
-            
+            env[BUS_ENV] = self.bus.path
+            env[SLOT_ENV] = str(self.slots[name])
+
+            self.bus.clear_beat(self.slots[name])
             proc = subprocess.Popen([sys.executable, path], env=env)
             self.running_processes[name] = proc
+            self.started_at[name] = time.time()
             return True
         except Exception as e:
             logger.error(f"Supervisor: Failed to start {name}: {e}")
             return False
 
-    def check_health(self):
-        for name, proc in list(self.running_processes.items()):
-            if proc.poll() is not None: # Process has exited
-                logger.warning(f"Supervisor: {name} has stopped! Restarting...")
-                self.start_process(name, self.processes[name])
+    def _stop_process(self, name):
+        proc = self.running_processes.pop(name)
+        if proc.poll() is None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
 
-    async def run_loop(self):
-        logger.info("Kerne Solver Supervisor active.")
-        # Initial start
+    def _schedule_restart(self, name, now):
+        self.restart_failures[name] += 1
+        delay = min(self.max_backoff, self.base_backoff * 2 ** (self.restart_failures[name] - 1))
+        self.next_start_at[name] = now + delay
+        logger.warning(f"Supervisor: Restarting {name} in {delay:.0f}s (failure #{self.restart_failures[name]})")
+
+    def _unhealthy_reason(self, name, now):
+        proc = self.running_processes[name]
+        if proc.poll() is not None:
+            return f"exited with code {proc.returncode}"
+        last_beat = self.bus.last_beat(self.slots[name])
+        if last_beat == 0.0:
+            if now - self.started_at[name] > self.startup_grace:
+                return f"no heartbeat within {self.startup_grace:.0f}s of start"
+        elif now - last_beat > self.heartbeat_timeout:
+            return f"heartbeat stale for {now - last_beat:.0f}s"
+        return None
+
+    def check_health(self):
+        now = time.time()
         for name, path in self.processes.items():
-            self.start_process(name, path)
-            
+            if name not in self.running_processes:
+                if now >= self.next_start_at[name]:
+                    self.start_process(name, path)
+                continue
+
+            reason = self._unhealthy_reason(name, now)
+            if reason:
+                logger.warning(f"Supervisor: {name} is unhealthy ({reason})")
+                self._stop_process(name)
+                self._schedule_restart(name, now)
+            elif self.restart_failures[name] and now - self.started_at[name] > self.stable_after:
+                self.restart_failures[name] = 0
+
+    async def health_loop(self):
         while True:
             self.check_health()
-            await asyncio.sleep(30) # Check every 30 seconds
+            await asyncio.sleep(self.check_interval)
+
+    async def run_loop(self):
+        logger.info("Kerne Solver Supervisor active.")
+        publisher = MarketDataPublisher(self.bus)
+        try:
+            await asyncio.gather(publisher.run_loop(), self.health_loop())
+        finally:
+            for name in list(self.running_processes):
+                self._stop_process(name)
+            self.bus.close(unlink=True)
 
 if __name__ == "__main__":
     supervisor = SolverSupervisor()
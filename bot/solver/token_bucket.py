@@ -0,0 +1,59 @@
+# Created: 2026-10-19
+"""
+Awaitable, weight-aware token bucket.
+
+Callers reserve their weight up front and sleep (without blocking the event
+loop) until the bucket has refilled enough to cover it. Reservations are
+granted in call order, so concurrent coroutines share the budget fairly, and
+the bucket is safe to share across threads and event loops.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict
+
+
+class AsyncTokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, weight: float) -> float:
+        """Takes `weight` tokens (possibly going into debt); returns how long to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_second)
+            self._updated = now
+            self.tokens -= weight
+            return max(0.0, -self.tokens / self.refill_per_second)
+
+    async def acquire(self, weight: float = 1.0) -> float:
+        """Waits until `weight` tokens are available; returns the time spent waiting."""
+        delay = self._reserve(weight)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def acquire_blocking(self, weight: float = 1.0) -> float:
+        """Same as acquire() for synchronous callers."""
+        delay = self._reserve(weight)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+_BUCKETS: Dict[str, AsyncTokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def get_bucket(name: str, capacity: float, refill_per_second: float) -> AsyncTokenBucket:
+    """Process-wide bucket per name, so every client of the same API draws from one budget."""
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(name)
+        if bucket is None:
+            bucket = _BUCKETS[name] = AsyncTokenBucket(capacity, refill_per_second)
+        return bucket
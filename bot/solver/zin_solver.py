@@ -68,6 +68,10 @@ from .fetchers import (
     AoriIntentFetcher
 )
 from .quotes import QuoteAggregator
+try:
+    from bot.rpc_pool import get_web3
+except ImportError:
+    from rpc_pool import get_web3
 from .quotes.base import QuoteResult as AggQuoteResult
 
 
@@ -430,15 +434,14 @@ class ZINSolver:
 
     @staticmethod
     def _init_web3(rpc_urls: List[str]) -> Web3:
-        """Initialize Web3 with RPC fallback."""
-        for rpc_url in rpc_urls:
-            try:
-                w3 = Web3(Web3.HTTPProvider(rpc_url, request_kwargs={'timeout': 30}))
-                if w3.is_connected():
-                    logger.info(f"Connected to RPC: {rpc_url[:50]}...")
-                    return w3
-            except Exception as e:
-                logger.warning(f"Failed to connect to {rpc_url}: {e}")
+        """Initialize Web3 on the shared RPC pool (scored, hedged, fail-over across rpc_urls)."""
+        try:
+            w3 = get_web3(rpc_urls, name="zin")
+            if w3.is_connected():
+                logger.info(f"Connected to RPC pool: {len(rpc_urls)} endpoint(s), first {rpc_urls[0][:50]}...")
+                return w3
+        except Exception as e:
+            logger.warning(f"Failed to connect to RPC pool: {e}")
 
         raise ConnectionError("Failed to connect to any RPC endpoint")
 
@@ -0,0 +1,257 @@
+# Created: 2026-10-19
+"""
+Kerne Multi-Tenant Vault Runtime
+
+Hosts many partner vault strategies inside one process:
+
+- SharedMarketData fetches prices and funding once per tick for every
+  tenant, instead of one feed per vault container.
+- Each Tenant owns its exchange client (built from its own secrets), its
+  strategy state and its circuit breaker; nothing is shared between tenants
+  except the read-only market snapshot.
+- Strategy steps run on a bounded worker pool with a per-cycle timeout, and
+  per-tenant CPU time (thread CPU clock) and cycle latency are accounted.
+
+The runtime is exchange-agnostic; PaperExchange lets it run locally.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+try:
+    from bot.exchanges.base import BaseExchange
+except ImportError:
+    from exchanges.base import BaseExchange
+
+
+@dataclass
+class MarketSnapshot:
+    prices: Dict[str, float] = field(default_factory=dict)
+    funding: Dict[str, float] = field(default_factory=dict)
+    timestamp: float = 0.0
+
+
+class SharedMarketData:
+    """One fetch per datum per tick, shared read-only by every tenant."""
+
+    def __init__(self, source: BaseExchange, symbols: List[str]):
+        self.source = source
+        self.symbols = symbols
+        self.snapshot = MarketSnapshot()
+        self.fetches = 0
+
+    async def _fetch(self, fn, symbol):
+        self.fetches += 1
+        return await asyncio.to_thread(fn, symbol)
+
+    async def refresh(self) -> MarketSnapshot:
+        prices = await asyncio.gather(*(self._fetch(self.source.get_market_price, s) for s in self.symbols))
+        funding = await asyncio.gather(*(self._fetch(self.source.get_funding_rate, s) for s in self.symbols))
+        self.snapshot = MarketSnapshot(dict(zip(self.symbols, prices)), dict(zip(self.symbols, funding)), time.time())
+        return self.snapshot
+
+    def price(self, symbol: str) -> float:
+        return self.snapshot.prices.get(symbol, 0.0)
+
+
+@dataclass
+class TenantSecrets:
+    api_key: Optional[str] = None
+    secret: Optional[str] = None
+    private_key: Optional[str] = None
+
+    def __repr__(self) -> str:
+        masked = {k: ("***" if v else None) for k, v in vars(self).items()}
+        return f"TenantSecrets({masked})"
+
+
+class CircuitBreaker:
+    """Opens after `max_failures` consecutive failed cycles; one trial cycle after `cooldown_s`."""
+
+    CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+    def __init__(self, max_failures: int = 3, cooldown_s: float = 60.0):
+        self.max_failures = max_failures
+        self.cooldown_s = cooldown_s
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = 0.0
+
+    def allow(self, now: float) -> bool:
+        if self.state == self.OPEN and now - self.opened_at >= self.cooldown_s:
+            self.state = self.HALF_OPEN
+        return self.state != self.OPEN
+
+    def record_success(self):
+        self.failures = 0
+        self.state = self.CLOSED
+
+    def record_failure(self, now: float):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.max_failures:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = now
+
+
+@dataclass
+class TenantStats:
+    cycles: int = 0
+    failures: int = 0
+    skipped: int = 0
+    trades: int = 0
+    cpu_seconds: float = 0.0
+    last_error: Optional[str] = None
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=512))
+
+    def summary(self) -> Dict:
+        lat = np.fromiter(self.latencies_ms, dtype=float)
+        return {
+            "cycles": self.cycles,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "trades": self.trades,
+            "cpu_ms": round(self.cpu_seconds * 1000, 3),
+            "latency_p50_ms": round(float(np.percentile(lat, 50)), 3) if lat.size else None,
+            "latency_p99_ms": round(float(np.percentile(lat, 99)), 3) if lat.size else None,
+            "last_error": self.last_error,
+        }
+
+
+class HedgeStrategy:
+    """
+    Delta-neutral hedge for one vault: short notional equal to the vault's TVL,
+    rebalanced when the gap exceeds `threshold_eth`, at most `max_trade_eth` per
+    cycle and never beyond `max_overhedge_ratio` x TVL (HedgingEngine's CB1/CB2).
+    """
+
+    def __init__(self, symbol: str = "ETH", threshold_eth: float = 0.01, max_trade_eth: float = 50.0,
+                 max_overhedge_ratio: float = 1.05):
+        self.symbol = symbol
+        self.threshold_eth = threshold_eth
+        self.max_trade_eth = max_trade_eth
+        self.max_overhedge_ratio = max_overhedge_ratio
+
+    def step(self, tenant: "Tenant", market: MarketSnapshot) -> Optional[float]:
+        """Runs one cycle on a worker thread; returns the signed size traded, if any."""
+        tvl_eth = tenant.tvl_source(tenant.vault_address)
+        if tvl_eth <= 0:
+            raise ValueError("TVL read as 0, refusing to touch the hedge")
+        # Adapters report the absolute size of the (short) hedge, as Hyperliquid's abs(szi)
+        short, _ = tenant.exchange.get_position(self.symbol)
+        delta = tvl_eth - short
+        tenant.state.update(tvl_eth=tvl_eth, short_eth=short, delta_eth=delta,
+                            mark=market.prices.get(self.symbol))
+        if abs(delta) <= self.threshold_eth:
+            return None
+        trade = max(-self.max_trade_eth, min(self.max_trade_eth, delta))
+        # Over-hedge cap on the position the trade would leave, not on the target
+        max_short = tvl_eth * self.max_overhedge_ratio
+        if short + trade > max_short:
+            capped = max(0.0, max_short - short)
+            logger.critical(f"Tenant {tenant.vault_address}: projected short {short + trade:.4f} {self.symbol} "
+                            f"> max {max_short:.4f}, capping trade {trade:.4f} -> {capped:.4f}")
+            trade = capped
+        if abs(trade) <= self.threshold_eth:
+            return None
+        side = "sell" if trade > 0 else "buy"
+        if not tenant.exchange.execute_order(self.symbol, abs(trade), side):
+            raise RuntimeError(f"{side} {abs(trade):.4f} {self.symbol} rejected")
+        return trade
+
+
+@dataclass
+class Tenant:
+    vault_address: str
+    exchange: BaseExchange
+    secrets: TenantSecrets
+    strategy: HedgeStrategy
+    tvl_source: Callable[[str], float]
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    stats: TenantStats = field(default_factory=TenantStats)
+    state: Dict = field(default_factory=dict)
+    busy: bool = False
+
+
+class TenantRuntime:
+    def __init__(self, market: SharedMarketData, max_workers: int = 16, cycle_timeout: float = 5.0):
+        self.market = market
+        self.cycle_timeout = cycle_timeout
+        self.tenants: Dict[str, Tenant] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tenant")
+
+    def add_tenant(self, tenant: Tenant):
+        self.tenants[tenant.vault_address] = tenant
+        logger.info(f"Tenant runtime: hosting vault {tenant.vault_address} ({len(self.tenants)} total)")
+
+    def remove_tenant(self, vault_address: str) -> Optional[Tenant]:
+        return self.tenants.pop(vault_address, None)
+
+    @staticmethod
+    def _measured_step(tenant: Tenant, market: MarketSnapshot):
+        # Runs on one worker thread, so the thread CPU clock isolates this tenant's work
+        cpu_start = time.thread_time()
+        try:
+            return tenant.strategy.step(tenant, market)
+        finally:
+            tenant.stats.cpu_seconds += time.thread_time() - cpu_start
+
+    async def _run_tenant(self, tenant: Tenant, market: MarketSnapshot):
+        now = time.time()
+        if tenant.busy or not tenant.breaker.allow(now):
+            tenant.stats.skipped += 1
+            return
+        tenant.busy = True
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, self._measured_step, tenant, market)
+        try:
+            traded = await asyncio.wait_for(asyncio.shield(future), self.cycle_timeout)
+            tenant.breaker.record_success()
+            if traded:
+                tenant.stats.trades += 1
+        except Exception as e:
+            error = f"timed out after {self.cycle_timeout}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+            tenant.stats.failures += 1
+            tenant.stats.last_error = error
+            tenant.breaker.record_failure(time.time())
+            logger.warning(f"Tenant {tenant.vault_address[:10]}: cycle failed ({error}), breaker {tenant.breaker.state}")
+        finally:
+            tenant.stats.cycles += 1
+            tenant.stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+            if future.done():
+                tenant.busy = False
+            else:
+                # A hung step keeps its slot until it returns, so it never runs twice at once
+                future.add_done_callback(lambda _: setattr(tenant, "busy", False))
+
+    async def run_tick(self):
+        market = await self.market.refresh()
+        await asyncio.gather(*(self._run_tenant(t, market) for t in list(self.tenants.values())))
+
+    async def run_forever(self, interval: float = 10.0):
+        logger.info(f"Tenant runtime active: {len(self.tenants)} vaults, tick {interval}s")
+        while True:
+            started = time.time()
+            try:
+                await self.run_tick()
+            except Exception as e:
+                logger.error(f"Tenant runtime tick failed: {e}")
+            await asyncio.sleep(max(0.0, interval - (time.time() - started)))
+
+    def report(self) -> Dict[str, Dict]:
+        return {
+            address: {**t.stats.summary(), "breaker": t.breaker.state, "state": dict(t.state)}
+            for address, t in self.tenants.items()
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,68 @@
+# bot/tests/test_cow_batch_solver.py
+import asyncio
+import time
+import bot.solver.cowswap_solver_api as api
+
+# Created: 2026-10-19
+
+WETH, USDC = api.BASE_WETH, api.BASE_USDC
+
+
+def _solver(quote_delay=0.0):
+    solver = api.KerneSolver()
+
+    def _quote(token_in, token_out, amount):
+        time.sleep(quote_delay)
+        # ~3000 USDC/WETH selling WETH, ~3010 buying it
+        return amount * 3000 // 10**12 if token_in == WETH else amount * 10**12 // 3010
+
+    solver._get_aerodrome_quote = _quote
+    solver._check_pool_liquidity = lambda chain_id, token: 10**30
+    solver._build_swap_calldata = lambda *args: "0x"
+    return solver
+
+
+def _order(uid, sell_token, buy_token, sell, buy):
+    return api.Order(uid=uid * 56, sellToken=sell_token, buyToken=buy_token,
+                     sellAmount=str(sell), buyAmount=str(buy), validTo=int(time.time()) + 600)
+
+
+def test_opposing_orders_settle_as_cow():
+    solver = _solver()
+    a = _order("a", WETH, USDC, 10**18, 2990 * 10**6)
+    b = _order("b", USDC, WETH, 3005 * 10**6, 99 * 10**16)
+    response = asyncio.run(solver.solve(api.SolveRequest(id=1, orders=[a, b])))
+
+    cow = [sol for sol in response.solutions if len(sol.trades) == 2]
+    assert len(cow) == 1
+    price = int(cow[0].prices[WETH]) / int(cow[0].prices[USDC])
+    # Clearing price respects both limits
+    assert 2990 * 10**6 / 10**18 <= price <= 3005 * 10**6 / (99 * 10**16)
+
+
+def test_concurrent_quotes_fit_time_budget():
+    solver = _solver(quote_delay=0.2)
+    orders = [_order(str(i), WETH, USDC, 10**17, 290 * 10**6) for i in range(8)]
+    api.SOLVE_TIME_BUDGET_S, budget = 0.5, api.SOLVE_TIME_BUDGET_S
+    try:
+        started = time.monotonic()
+        response = asyncio.run(solver.solve(api.SolveRequest(id=2, orders=orders)))
+        assert time.monotonic() - started < 0.8
+    finally:
+        api.SOLVE_TIME_BUDGET_S = budget
+    # Quotes run concurrently, so every order fits in the budget
+    assert len(response.solutions) == 8
+
+
+def test_overlapping_auctions_keep_their_own_state():
+    solver = _solver(quote_delay=0.05)
+    first = [_order(str(i), WETH, USDC, 10**17, 290 * 10**6) for i in range(4)]
+    second = [_order(str(i), USDC, WETH, 301 * 10**6, 9 * 10**16) for i in range(4, 8)]
+
+    async def both():
+        return await asyncio.gather(solver.solve(api.SolveRequest(id=3, orders=first)),
+                                    solver.solve(api.SolveRequest(id=4, orders=second)))
+
+    one, two = asyncio.run(both())
+    assert [sol.trades[0].order for sol in one.solutions] == [o.uid for o in first]
+    assert [sol.trades[0].order for sol in two.solutions] == [o.uid for o in second]
@@ -0,0 +1,56 @@
+# bot/tests/test_defillama_index.py
+from unittest.mock import MagicMock
+from bot.sentinel.risk_scoring_oracle import DeFiLlamaClient
+
+# Created: 2026-10-19
+
+PROTOCOLS = [
+    {"slug": "aave-v3", "name": "Aave V3", "tvl": 1e10, "category": "Lending"},
+    {"slug": "lido", "name": "Lido", "tvl": 3e10, "category": "Liquid Staking"},
+]
+POOLS = {"data": [{"pool": "pool-1", "apy": 3.2, "ilRisk": "no"}, {"pool": "pool-2", "apy": 5.0}]}
+
+
+def _mock_session():
+    session = MagicMock()
+
+    def _get(url, timeout=15):
+        resp = MagicMock()
+        if url.endswith("/protocols"):
+            resp.json.return_value = PROTOCOLS
+        elif url.endswith("/pools"):
+            resp.json.return_value = POOLS
+        else:
+            resp.json.return_value = {"audits": "2", "bugs": True, "tvl": [1, 2, 3]}
+        return resp
+
+    session.get.side_effect = _get
+    return session
+
+
+def test_index_lookups(tmp_path):
+    client = DeFiLlamaClient(cache_path=tmp_path / "cache.json")
+    client.session = _mock_session()
+
+    assert client.find_protocol("lido")["tvl"] == 3e10
+    assert client.find_protocol("Aave V3")["slug"] == "aave-v3"
+    assert client.find_pool("pool-2")["apy"] == 5.0
+    assert client.find_pool("missing") is None
+
+    metrics = client.get_protocol_metrics("aave-v3", "pool-1")
+    assert metrics.audit_count == 2
+    assert metrics.has_bug_bounty
+
+
+def test_warm_restart_skips_download(tmp_path):
+    cache_path = tmp_path / "cache.json"
+    client = DeFiLlamaClient(cache_path=cache_path)
+    client.session = _mock_session()
+    client.refresh()
+    client.prefetch_protocol_details(["aave-v3", "lido"])
+
+    warm = DeFiLlamaClient(cache_path=cache_path)
+    warm.session = MagicMock()
+    assert warm.find_pool("pool-1")["apy"] == 3.2
+    assert warm.get_protocol_detail("lido")["bugs"] is True
+    warm.session.get.assert_not_called()
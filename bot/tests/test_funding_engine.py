@@ -0,0 +1,93 @@
+# bot/tests/test_funding_engine.py
+# Created: 2026-10-19
+import numpy as np
+
+from bot.solver.funding_engine import FundingOpportunityEngine
+from bot.solver.funding_scanner import FundingScanner
+
+
+def _engine():
+    return FundingOpportunityEngine(notional_usd=100_000, hold_days=7, min_open_interest_usd=1_000_000,
+                                    default_fee_bps=5.0, unknown_depth_usd=1_000_000, depth_band_bps=10)
+
+
+def test_net_carry_and_incremental_ranking():
+    engine = _engine()
+    # Hourly HL funding and 8h CEX funding land on the same APR scale
+    engine.ingest_universe("hyperliquid", [
+        {"asset": "ETH", "funding_rate": 0.00003, "interval_hours": 1, "open_interest_usd": 5e8},
+        {"asset": "DOGE", "funding_rate": -0.00004, "interval_hours": 1, "open_interest_usd": 2e7},
+        {"asset": "THIN", "funding_rate": 0.0005, "interval_hours": 1, "open_interest_usd": 1e5},
+    ], fee_bps=4.5)
+    engine.ingest_universe("binance", [
+        {"symbol": "ETH/USDT:USDT", "asset": "ETH", "funding_rate": 0.0001, "interval_hours": 8},
+    ], fee_bps=4.0)
+
+    cost_apr = lambda fee: 2 * (fee + 1.0) / 10_000 * 365 / 7
+    best = engine.best()
+    assert (best["venue"], best["asset"], best["side"]) == ("hyperliquid", "DOGE", "long")
+    assert np.isclose(best["net_carry_apr"], 0.00004 * 8760 - cost_apr(4.5))
+    # THIN pays the most but fails the open-interest floor
+    assert [o["asset"] for o in engine.top(10)] == ["DOGE", "ETH", "ETH"]
+
+    # A thin book on DOGE makes impact dominate; only that row is re-scored
+    engine.ingest_book("hyperliquid", "DOGE", {"bids": [[0.1, 100_000]], "asks": [[0.1001, 100_000]]})
+    top = engine.top(2)
+    assert [(o["venue"], o["asset"]) for o in top] == [("hyperliquid", "ETH"), ("binance", "ETH")]
+    assert top[0]["symbol"] == "ETH" and engine.top(3)[1]["symbol"] == "ETH/USDT:USDT"
+
+    # Borrow cost on the hedge leg and the net floor
+    engine.update("binance", "ETH", borrow_apr=0.5)
+    assert engine.best(min_net_apr=0.2)["venue"] == "hyperliquid"
+    assert engine.best(min_net_apr=1.0) is None
+
+
+def test_stale_rows_drop_out_and_heap_stays_bounded():
+    engine = _engine()
+    engine.max_age_seconds = 60
+    for i in range(50):
+        engine.ingest_funding("hyperliquid", f"C{i}", 0.0001 * (i + 1), updated_at=0.0)
+    engine.ingest_funding("hyperliquid", "LIVE", 0.00002)
+    assert engine.best()["asset"] == "LIVE"
+
+    for _ in range(200):
+        engine.ingest_funding("hyperliquid", "LIVE", 0.00002)
+    assert len(engine._heap) <= 4 * len(engine.table) + 64
+
+    engine.recompute_all()
+    assert np.isclose(engine.net_carry[engine.table.index[("hyperliquid", "LIVE")]], engine.best()["net_carry_apr"])
+
+
+def test_bus_rows_need_open_interest():
+    engine = _engine()
+    engine.ingest_bus({
+        "funding": {"ETH": 0.00003, "DOGE": -0.00004, "NEW": 0.0002},
+        "mids": {"ETH": 3000.0, "DOGE": 0.1, "NEW": 1.0},
+        "open_interest": {"ETH": 5e8, "DOGE": 2e5},
+    })
+    # DOGE is known-thin and NEW has no open interest on the bus: neither is ranked
+    assert [o["asset"] for o in engine.top(10)] == ["ETH"]
+    assert engine.best()["open_interest_usd"] == 5e8
+
+
+def test_scanner_skips_adapter_venue_covered_by_a_fresh_bus():
+    class Venue:
+        TAKER_FEE_BPS = 4.0
+
+        def __init__(self):
+            self.calls = 0
+
+        def get_funding_universe(self):
+            self.calls += 1
+            return [{"asset": "ETH", "funding_rate": 0.0001, "interval_hours": 8, "open_interest_usd": 5e8}]
+
+    class Bus:
+        def read(self, max_age):
+            return {"funding": {"ETH": 0.00003}, "open_interest": {"ETH": 5e8}}
+
+    hyperliquid, binance = Venue(), Venue()
+    scanner = FundingScanner(exchanges={"hyperliquid": hyperliquid, "binance": binance}, engine=_engine())
+    scanner.market_bus = Bus()
+    scanner.refresh()
+    assert (hyperliquid.calls, binance.calls) == (0, 1)
+    assert sorted(scanner.engine.table.index) == [("binance", "ETH"), ("hyperliquid", "ETH")]
@@ -0,0 +1,45 @@
+# bot/tests/test_gas_oracle.py
+from unittest.mock import MagicMock
+import pytest
+from bot.gas_estimator import BaseGasEstimator, DEX
+
+# Created: 2026-10-19
+
+def _estimator():
+    w3 = MagicMock()
+    w3.eth.block_number = 100
+    w3.eth.get_block.return_value = {"baseFeePerGas": 5_000_000}
+    w3.eth.max_priority_fee = 1_000_000
+    fns = w3.eth.contract.return_value.functions
+    fns.l1BaseFee.return_value.call.return_value = 10 * 10**9
+    fns.blobBaseFee.return_value.call.return_value = 1
+    fns.baseFeeScalar.return_value.call.return_value = 2269
+    fns.blobBaseFeeScalar.return_value.call.return_value = 1_055_762
+    return BaseGasEstimator(w3), w3
+
+
+def test_one_refresh_per_head():
+    estimator, w3 = _estimator()
+    calldata = "0x" + "00" * 10 + "ff" * 100
+    for _ in range(500):
+        l2, l1, total = estimator.estimate_arb_gas([DEX.AERODROME, DEX.UNISWAP_V3], calldata)
+    assert estimator.refresh_count == 1
+    w3.eth.contract.return_value.functions.getL1Fee.assert_not_called()
+
+    l1_gas = 10 * 4 + 100 * 16 + 68 * 16
+    assert l1 == l1_gas * (16 * 2269 * 10 * 10**9 + 1_055_762) // (16 * 10**6)
+    assert l2 == int((120_000 + 180_000 + 150_000) * 1.2) * 6_000_000
+
+    estimator.snapshot.fetched_at -= estimator.BLOCK_TIME_S
+    w3.eth.block_number = 101
+    estimator.estimate_arb_gas([DEX.AERODROME], calldata)
+    assert estimator.refresh_count == 2
+
+
+def test_batch_matches_scalar():
+    estimator, _ = _estimator()
+    dexes = [[DEX.AERODROME], [DEX.UNISWAP_V2, DEX.MAVERICK, DEX.PANCAKE_V3]]
+    calldatas = [b"\x01" * 300, bytes(64) + b"\x02" * 500]
+    l2, l1, total = estimator.estimate_batch(dexes, calldatas)
+    for i in range(2):
+        assert (l2[i], l1[i], total[i]) == pytest.approx(estimator.estimate_arb_gas(dexes[i], calldatas[i]))
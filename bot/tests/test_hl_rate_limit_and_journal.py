@@ -0,0 +1,80 @@
+# bot/tests/test_hl_rate_limit_and_journal.py
+# Created: 2026-10-19
+import asyncio
+import json
+import time
+
+from bot.solver.position_journal import PositionJournal
+from bot.solver.token_bucket import AsyncTokenBucket
+
+
+def test_token_bucket_shares_budget_without_blocking_loop():
+    bucket = AsyncTokenBucket(capacity=20, refill_per_second=200)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        tick_task = asyncio.create_task(ticker())
+        started = time.monotonic()
+        # 40 weight beyond the 20 burst -> ~0.2s of refill, spread across concurrent callers
+        waits = await asyncio.gather(*(bucket.acquire(20) for _ in range(3)))
+        elapsed = time.monotonic() - started
+        tick_task.cancel()
+        return waits, elapsed, ticks
+
+    waits, elapsed, ticks = asyncio.run(main())
+    assert waits[0] == 0
+    assert waits[1] < waits[2]
+    assert 0.15 < elapsed < 0.5
+    assert ticks > 10  # the loop kept running while callers waited
+
+
+def test_position_journal_debounces_and_replays(tmp_path):
+    state = str(tmp_path / "hl_positions.json")
+
+    async def burst():
+        journal = PositionJournal(state, debounce_s=0.05, compact_every=3)
+        for i in range(5):
+            journal.set("ETH", float(i))
+        journal.set("BTC", 0.5)
+        assert not (tmp_path / "hl_positions.json.log").exists()
+        await asyncio.sleep(0.1)
+        return journal
+
+    journal = asyncio.run(burst())
+    # One debounced write of the latest sizes; the journal stayed under the compaction threshold
+    assert (tmp_path / "hl_positions.json.log").read_text().count("\n") == 2
+
+    journal.set("SOL", 3.0)  # outside a loop: written immediately, then compacted
+    assert json.loads((tmp_path / "hl_positions.json").read_text()) == {"ETH": 4.0, "BTC": 0.5, "SOL": 3.0}
+    assert (tmp_path / "hl_positions.json.log").read_text() == ""
+
+    journal.set("ETH", 1.0)
+    with open(tmp_path / "hl_positions.json.log", "a") as f:
+        f.write('{"coin": "BTC", "si')  # torn write
+    reopened = PositionJournal(state)
+    assert reopened.positions == {"ETH": 1.0, "BTC": 0.5, "SOL": 3.0}
+    reopened.set("BTC", 2.0)
+    assert PositionJournal(state).positions["BTC"] == 2.0
+
+
+def test_position_journal_reschedules_after_its_loop_ends(tmp_path):
+    state = str(tmp_path / "positions.json")
+    journal = PositionJournal(state, debounce_s=0.05)
+
+    async def set_only(coin, size):
+        journal.set(coin, size)
+
+    async def set_and_wait(coin, size):
+        journal.set(coin, size)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(set_only("ETH", 1.0))  # loop ends before the debounced flush fires
+    asyncio.run(set_and_wait("BTC", 2.0))
+    assert PositionJournal(state).positions == {"ETH": 1.0, "BTC": 2.0}
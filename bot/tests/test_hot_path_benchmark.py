@@ -0,0 +1,71 @@
+# bot/tests/test_hot_path_benchmark.py
+import asyncio
+import os
+import tempfile
+
+from web3 import Web3
+from bot.analysis.hot_path_benchmark import (
+    BENCH_PRIVATE_KEY, FakeChain, PriceTable, StageTimer, TimedGraphArbScanner, _cwd, _env, default_tokens,
+    run_benchmark,
+)
+from bot.gas_estimator import DEX
+from bot.solver.quotes.uniswap_v3 import _QUOTER_V2, _QUOTER_V2_ABI
+from bot.solver.zin_solver import BASE_USDC, BASE_WETH
+
+# Created: 2026-10-19
+
+def test_fake_chain_serves_quoter_calls():
+    prices = PriceTable(default_tokens())
+    chain = FakeChain(prices).start()
+    try:
+        w3 = Web3(Web3.HTTPProvider(chain.url))
+        quoter = w3.eth.contract(address=Web3.to_checksum_address(_QUOTER_V2[8453]), abi=_QUOTER_V2_ABI)
+        out = quoter.functions.quoteExactInputSingle({
+            "tokenIn": BASE_WETH, "tokenOut": BASE_USDC, "amountIn": 10 ** 18, "fee": 500, "sqrtPriceLimitX96": 0,
+        }).call()[0]
+        # 1 WETH at $3000 less the 5 bp pool fee
+        assert out == prices.convert(BASE_WETH, BASE_USDC, 10 ** 18, 5) == 2_998_500_000
+        assert chain.calls["eth_call"] == 1
+    finally:
+        chain.stop()
+
+
+def test_fake_chain_answers_every_scanner_quoter():
+    chain = FakeChain(PriceTable(default_tokens())).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp, _cwd(tmp), \
+                _env(RPC_URL=chain.url, METRICS_PORT="0", PRIVATE_KEY=BENCH_PRIVATE_KEY):
+            scanner = TimedGraphArbScanner(StageTimer())
+        # One pool per DEX and token, quoted with a whole unit of the input token
+        sample = {}
+        for pool in scanner.pools:
+            for token in (pool.token0, pool.token1):
+                sample.setdefault((pool.dex, pool.router, token.symbol), (pool, token))
+        assert {dex for dex, _, _ in sample} == set(DEX)
+
+        async def quote_all():
+            return [await scanner.get_quote(pool, token, 10 ** token.decimals, retries=1)
+                    for pool, token in sample.values()]
+
+        assert all(out > 0 for out in asyncio.run(quote_all()))
+        assert chain.reverts == 0
+    finally:
+        chain.stop()
+
+
+def test_zin_cycle_report_is_offline_and_complete():
+    env_before = dict(os.environ)
+    report = run_benchmark(cycles=2, intents=10, discovery_rounds=0)
+    assert dict(os.environ) == env_before
+
+    zin = report["zin"]
+    assert zin["intents_evaluated"] == 20
+    assert 0 < zin["intents_fulfilled"] < 20  # limit prices straddle the quotes
+    assert zin["intents_per_s"] > 0
+
+    stages = report["stages"]
+    for stage in ("zin.cycle", "zin.quote", "zin.process_intent", "zin.fetch.cowswap",
+                  "aggregator.cold", "aggregator.cached"):
+        assert stages[stage]["p99_ms"] >= stages[stage]["p50_ms"] > 0
+    assert stages["aggregator.cached"]["p50_ms"] < stages["aggregator.cold"]["p50_ms"]
+    assert report["rpc_calls"]["eth_gasPrice"] == 20
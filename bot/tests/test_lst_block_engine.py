@@ -0,0 +1,133 @@
+# bot/tests/test_lst_block_engine.py
+# Created: 2026-10-19
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+from eth_abi import decode
+from web3 import Web3
+
+from bot.solver.lst_capture_engine import LSTCaptureEngine
+
+VAULT = "0x" + "ab" * 20
+E18 = 10**18
+
+
+def _engine(snapshots, logs):
+    cm = MagicMock()
+    cm.vault_address = VAULT
+    cm.w3.codec = Web3().codec
+    engine = LSTCaptureEngine(cm)
+    engine.solver = MagicMock()
+    engine.resync_blocks = 100
+    engine._read_snapshot = MagicMock(side_effect=snapshots)
+    # Outgoing filter first, then incoming
+    cm.w3.eth.get_logs.side_effect = logs
+    return engine
+
+
+def _transfer(token, amount):
+    return {"address": token, "data": "0x" + amount.to_bytes(32, "big").hex()}
+
+
+def test_rate_updates_accrue_on_held_balance_and_transfers_move_it():
+    wsteth = "0xc1CBa3fC4D133901B3E238628F5514533683e0BF"
+    snapshots = [
+        {"balance": {"wstETH": 100 * E18, "cbETH": 0}, "rate": {"wstETH": 1_200 * E18 // 1000}, "quote": {}},
+        {"balance": {}, "rate": {"wstETH": 1_201 * E18 // 1000}, "quote": {}},
+        {"balance": {}, "rate": {"wstETH": 1_202 * E18 // 1000}, "quote": {}},
+    ]
+    engine = _engine(snapshots, [[], [_transfer(wsteth, 50 * E18)], [], []])
+
+    for block in (10, 11, 12):
+        assert engine.process_block(block) == []
+
+    # Block 11: +0.001 on 100 wstETH, then 50 in; block 12: +0.001 on 150
+    assert engine.shadow_yield_cache["wstETH"] == 100 * E18 // 1000 + 150 * E18 // 1000
+    assert engine.balances["wstETH"] == 150 * E18
+    snapshot_calls = engine._read_snapshot.call_args_list
+    assert [c.kwargs["with_balances"] for c in snapshot_calls] == [True, False, False]
+    ranges = [(c.args[0]["fromBlock"], c.args[0]["toBlock"]) for c in engine.w3.eth.get_logs.call_args_list]
+    assert ranges == [(11, 11), (11, 11), (12, 12), (12, 12)]
+
+
+def test_discount_is_captured_in_the_same_block():
+    amount = 10 * E18
+    rate = 1_200 * E18 // 1000
+    fair_out = amount * E18 // rate
+    snapshots = [
+        {"balance": {}, "rate": {"wstETH": rate}, "quote": {"wstETH": fair_out}},
+        {"balance": {}, "rate": {"wstETH": rate}, "quote": {"wstETH": fair_out * 1003 // 1000}},
+    ]
+    engine = _engine(snapshots, [[], []])
+    engine.capture_amount_wei = amount
+    engine.execute_solver_swap = MagicMock(side_effect=lambda *a: asyncio.sleep(0))
+
+    async def main():
+        await engine.on_block(1)
+        await engine.on_block(2)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+
+    assert engine.execute_solver_swap.call_count == 1
+    token_in, token_out, amount_in, swap_data = engine.execute_solver_swap.call_args.args
+    assert token_out == engine.lst_tokens["wstETH"] and amount_in == amount
+    router_type, _, min_out = decode(["uint8", "bytes", "uint256"], swap_data)
+    # 10 bps under the quote, still above backing
+    assert router_type == 0 and min_out == fair_out * 1003 // 1000 * 9990 // 10_000 > fair_out
+
+
+def test_discount_stays_blocked_until_the_receipt_lands():
+    rate = 1_200 * E18 // 1000
+    cheap = {"balance": {}, "rate": {"wstETH": rate}, "quote": {"wstETH": 10 * E18 * E18 // rate * 1003 // 1000}}
+    engine = _engine([cheap] * 3, [[], []] * 2)
+    engine.capture_amount_wei = 10 * E18
+
+    async def send(*args):
+        return "0xcapture"
+    engine.execute_solver_swap = MagicMock(side_effect=send)
+    mined = threading.Event()
+    engine.w3.eth.wait_for_transaction_receipt.side_effect = lambda tx_hash, timeout: mined.wait(timeout)
+
+    async def main():
+        await engine.on_block(1)
+        await asyncio.sleep(0.01)
+        await engine.on_block(2)  # same discount, receipt still pending
+        await asyncio.sleep(0.01)
+        mined.set()
+        await asyncio.sleep(0.05)
+        await engine.on_block(3)
+        await asyncio.sleep(0.01)
+        mined.set()
+
+    asyncio.run(main())
+
+    assert engine.execute_solver_swap.call_count == 2
+    assert engine.w3.eth.wait_for_transaction_receipt.call_args.args == ("0xcapture",)
+
+
+def test_shadow_yield_reports_a_running_total():
+    rates = [1_200 * E18 // 1000, 1_201 * E18 // 1000, 1_202 * E18 // 1000]
+    snapshots = [{"balance": {"wstETH": 100 * E18}, "rate": {"wstETH": rates[0]}, "quote": {}}]
+    snapshots += [{"balance": {}, "rate": {"wstETH": r}, "quote": {}} for r in rates[1:]]
+    engine = _engine(snapshots, [[], []] * 2)
+    engine.hook = MagicMock()
+    engine.hook.functions.getVerifiedAssets.return_value.call.return_value = 5 * E18
+    engine._send_tx = MagicMock(return_value="0xreport")
+    reported = lambda: [c.args[1] for c in engine.hook.functions.updateShadowYield.call_args_list]
+
+    async def main():
+        engine.process_block(10)
+        engine.process_block(11)
+        await engine.update_shadow_yield()
+        await engine.update_shadow_yield()  # nothing new accrued
+        engine.process_block(12)
+        await engine.update_shadow_yield()
+
+    asyncio.run(main())
+
+    # The hook stores the amount as-is: existing value plus everything accrued, never a delta
+    assert reported() == [5 * E18 + E18 // 10, 5 * E18 + 2 * E18 // 10]
+    assert engine.shadow_yield_cache["wstETH"] == 2 * E18 // 10
+    assert engine.hook.functions.getVerifiedAssets.call_count == 1
@@ -0,0 +1,43 @@
+# bot/tests/test_market_bus.py
+# Created: 2026-10-19
+import time
+
+from bot.solver.market_bus import HEADER, MarketBus
+
+
+def test_publish_read_and_heartbeats(tmp_path):
+    path = str(tmp_path / "bus")
+    writer = MarketBus(path, create=True, size=64 * 1024)
+    reader = MarketBus(path)
+    assert reader.read() is None
+
+    writer.publish({"funding": {"ETH": 0.0001}, "account": None, "head_block": {"base": 1}})
+    first = reader.read(max_age=5)
+    assert first["funding"]["ETH"] == 0.0001
+    assert reader.read() is first  # unchanged seq: served from cache, no copy
+
+    writer.publish({"funding": {"ETH": 0.0002}, "account": None, "head_block": {"base": 2}})
+    assert reader.read()["head_block"]["base"] == 2
+
+    # A write in progress (odd seq) never yields a torn snapshot
+    seq, length, published_at = HEADER.unpack_from(writer._mm, 0)
+    HEADER.pack_into(writer._mm, 0, seq + 1, length, published_at)
+    assert reader.read()["head_block"]["base"] == 2
+
+    assert not writer.publish({"blob": "x" * 64 * 1024})
+
+    assert reader.last_beat(1) == 0.0
+    reader.beat(1)
+    assert time.time() - writer.last_beat(1) < 1
+    writer.clear_beat(1)
+    assert writer.last_beat(1) == 0.0
+
+
+def test_stale_snapshot_is_ignored(tmp_path):
+    path = str(tmp_path / "bus")
+    writer = MarketBus(path, create=True, size=64 * 1024)
+    writer.publish({"funding": {}})
+    seq, length, _ = HEADER.unpack_from(writer._mm, 0)
+    HEADER.pack_into(writer._mm, 0, seq, length, time.time() - 60)
+    assert MarketBus(path).read(max_age=15) is None
+    writer.close(unlink=True)
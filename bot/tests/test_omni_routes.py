@@ -0,0 +1,93 @@
+# bot/tests/test_omni_routes.py
+# Created: 2026-10-19
+import asyncio
+from unittest.mock import MagicMock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from bot.omni_orchestrator import OmniOrchestrator
+
+USDC_BASE = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+USDC_ARB = "0xaf88d065e77c8cC2239327C5EDb3A432268e5831"
+WETH_ARB = "0x82aF49447D8a07e3bd95BD0d56f35241523fBab1"
+E18 = 10**18
+
+# bridge -> (ETH out, gas USD, delay s)
+BRIDGES = {"across": (0.995, 4.0, 0.0), "relay": (0.997, 12.0, 0.0), "slowbridge": (1.0, 0.0, 5.0)}
+
+
+def _quote(from_chain, to_chain, from_token, to_token, from_amount, to_amount, to_symbol, gas_usd, tool):
+    to_meta = {"ETH": (18, "3000"), "WETH": (18, "3000"), "USDC": (6, "1")}[to_symbol]
+    return {
+        "tool": tool,
+        "action": {"fromChainId": from_chain, "toChainId": to_chain, "fromAmount": str(from_amount),
+                   "fromToken": {"address": from_token}, "toToken": {"address": to_token, "symbol": to_symbol,
+                                                                      "decimals": to_meta[0], "priceUSD": to_meta[1]}},
+        "estimate": {"toAmount": str(to_amount), "toAmountMin": str(to_amount),
+                     "gasCosts": [{"amountUSD": str(gas_usd)}], "feeCosts": []},
+        "transactionRequest": {"to": "0x" + "11" * 20, "data": "0x"},
+    }
+
+
+def _lifi_app(calls):
+    async def token(request):
+        calls.append(("token", request.query["symbol"]))
+        symbol, chain = request.query["symbol"], int(request.query["chain"])
+        address = {("USDC", 8453): USDC_BASE, ("USDC", 42161): USDC_ARB, ("WETH", 42161): WETH_ARB}[(symbol, chain)]
+        return web.json_response({"address": address, "decimals": 6 if symbol == "USDC" else 18})
+
+    async def quote(request):
+        q = request.query
+        calls.append(("quote", q.get("allowBridges")))
+        amount, from_chain, to_chain = int(q["fromAmount"]), int(q["fromChain"]), int(q["toChain"])
+        if q["toToken"] == WETH_ARB:  # bridge leg into the intermediate
+            return web.json_response(_quote(from_chain, to_chain, q["fromToken"], WETH_ARB, amount, amount * 999 // 1000,
+                                            "WETH", 1.0, "stargateV2"))
+        if q["fromToken"] == WETH_ARB:  # destination swap WETH -> ETH
+            return web.json_response(_quote(from_chain, to_chain, WETH_ARB, q["toToken"], amount, amount, "ETH", 0.5,
+                                            "uniswap"))
+        if q["toToken"] == USDC_ARB:  # USDC via-route leg is quoted but loses on output
+            return web.json_response(_quote(from_chain, to_chain, q["fromToken"], USDC_ARB, amount, 2000 * 10**6,
+                                            "USDC", 1.0, "relay"))
+        if q["fromToken"] == USDC_ARB:
+            return web.json_response(_quote(from_chain, to_chain, USDC_ARB, q["toToken"], amount, E18 * 2 // 3, "ETH",
+                                            0.5, "uniswap"))
+        out, gas, delay = BRIDGES[q["allowBridges"]]
+        await asyncio.sleep(delay)
+        return web.json_response(_quote(from_chain, to_chain, q["fromToken"], q["toToken"], amount, int(amount * out),
+                                        "ETH", gas, q["allowBridges"]))
+
+    app = web.Application()
+    app.router.add_get("/token", token)
+    app.router.add_get("/quote", quote)
+    return app
+
+
+def test_routes_ranked_by_net_output_within_budget(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRIVATE_KEY", "0x" + "01" * 32)
+    calls = []
+    cache_path = str(tmp_path / "omni_cache.json")
+
+    async def main():
+        server = TestServer(_lifi_app(calls))
+        await server.start_server()
+        try:
+            results = []
+            for _ in range(2):
+                omni = OmniOrchestrator(chain_manager=MagicMock(), api_url=str(server.make_url("")).rstrip("/"),
+                                        cache_path=cache_path, bridges=list(BRIDGES), intermediates=["USDC", "WETH"],
+                                        quote_budget=1.0)
+                results.append(await omni.discover_routes("1", "ETH", 8453, "ETH", 42161))
+            return results
+        finally:
+            await server.close()
+
+    first, second = asyncio.run(main())
+
+    # across nets 0.995 ETH - $4; relay 0.997 ETH - $12; via WETH 0.999 ETH - $1.5; slowbridge misses the budget
+    assert [r["label"] for r in first] == ["via WETH", "across", "relay", "via USDC"]
+    assert first[0]["net_out"] == 999 * E18 // 1000 - int(1.5 / 3000 * E18)
+    assert [r["label"] for r in second] == [r["label"] for r in first]
+    # Intermediate metadata resolved once, then served from the persisted cache
+    assert sorted(c for c in calls if c[0] == "token") == [("token", "USDC"), ("token", "WETH")]
@@ -0,0 +1,58 @@
+# bot/tests/test_oracle_updater.py
+# Created: 2026-10-19
+import asyncio
+
+from bot.oracle_updater import OracleDaemon, update_reason
+
+
+class FakeUpdater:
+    network_name = "base"
+
+    def __init__(self):
+        self.status = {'price': 3000.0, 'twap_price': 3000.0, 'age_seconds': 100}
+        self.reference_price = None
+        self.pending = {}
+        self.sent = 0
+        self.reads = []
+
+    def get_status(self, block_number):
+        self.reads.append(block_number)
+        return dict(self.status)
+
+    def poll_pending(self):
+        return []
+
+    def send_update(self):
+        self.sent += 1
+        self.pending[f"0x{self.sent}"] = 0.0
+
+
+def test_update_reason():
+    fresh = {'price': 3000.0, 'age_seconds': 100}
+    assert update_reason(fresh, 3000.0) is None
+    assert update_reason({**fresh, 'price': 3016.0}, 3000.0, deviation_bps=50) == 'deviation'
+    assert update_reason({**fresh, 'price': 3016.0, 'age_seconds': 5}, 3000.0) is None  # min interval
+    assert update_reason({**fresh, 'age_seconds': 600}, 3000.0, heartbeat_seconds=600) == 'heartbeat'
+    assert update_reason({**fresh, 'price': None, 'age_seconds': 700}, None) == 'heartbeat'
+
+
+def test_daemon_triggers_once_and_pipelines():
+    updater = FakeUpdater()
+    daemon = OracleDaemon([updater], deviation_bps=50, heartbeat_seconds=600)
+
+    async def main():
+        reasons = [await daemon.check_block(updater, 1)]
+        updater.status['price'] = 3030.0
+        reasons.append(await daemon.check_block(updater, 2))
+        # Still deviated but an update is in flight: no duplicate send
+        reasons.append(await daemon.check_block(updater, 3))
+        updater.pending.clear()
+        updater.status['age_seconds'] = 40
+        # Baseline moved to the price at the last send, so no further deviation
+        reasons.append(await daemon.check_block(updater, 4))
+        return reasons
+
+    assert asyncio.run(main()) == [None, 'deviation', None, None]
+    assert updater.sent == 1
+    assert updater.reads == [1, 2, 3, 4]
+    assert updater.reference_price == 3030.0
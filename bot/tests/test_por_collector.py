@@ -0,0 +1,50 @@
+# bot/tests/test_por_collector.py
+import time
+from unittest.mock import MagicMock
+from eth_abi import encode
+from web3 import Web3
+from bot.por_collector import ReserveCollector
+
+# Created: 2026-10-19
+
+def _chain(block_number, assets, supply, delay):
+    w3 = MagicMock()
+    w3.codec = Web3().codec
+    w3.eth.get_block.return_value = {"number": block_number, "hash": b"\x11" * 32, "timestamp": 1_700_000_000}
+
+    def _aggregate(block_identifier):
+        time.sleep(delay)
+        assert block_identifier == block_number
+        return [(True, encode(["uint256"], [assets])), (True, encode(["uint256"], [supply]))]
+
+    multicall = MagicMock()
+    multicall.functions.aggregate3.return_value.call.side_effect = _aggregate
+    w3.eth.contract.return_value = multicall
+    return w3, MagicMock(address="0x" + "ab" * 20)
+
+
+def test_collect_is_concurrent_and_block_pinned():
+    base_w3, base_vault = _chain(100, 10**18, 9 * 10**17, delay=0.3)
+    arb_w3, arb_vault = _chain(200, 2 * 10**18, 2 * 10**18, delay=0.3)
+    collector = ReserveCollector({"base": base_w3, "arbitrum": arb_w3}, {"base": base_vault, "arbitrum": arb_vault})
+
+    started = time.perf_counter()
+    snapshots = collector.collect()
+    assert time.perf_counter() - started < 0.55
+
+    assert snapshots["base"].block_number == 100
+    assert snapshots["base"].block_hash == "0x" + "11" * 32
+    assert snapshots["base"].total_supply_wei == 9 * 10**17
+    assert snapshots["arbitrum"].total_assets_wei == 2 * 10**18
+
+
+def test_failed_chain_reported_unhealthy():
+    base_w3, base_vault = _chain(100, 1, 1, delay=0)
+    dead_w3, dead_vault = _chain(0, 0, 0, delay=0)
+    dead_w3.eth.get_block.side_effect = ConnectionError("rpc down")
+    collector = ReserveCollector({"base": base_w3, "arbitrum": dead_w3}, {"base": base_vault, "arbitrum": dead_vault})
+
+    snapshots = collector.collect()
+    assert snapshots["base"].healthy
+    assert not snapshots["arbitrum"].healthy
+    assert "rpc down" in snapshots["arbitrum"].error
@@ -0,0 +1,59 @@
+# bot/tests/test_portfolio_risk.py
+# Created: 2026-10-19
+import numpy as np
+import pytest
+
+from bot.solver.portfolio_risk import PortfolioRiskKernel
+
+
+def _simulate(kernel, cov, ticks=4000, seed=3):
+    rng = np.random.default_rng(seed)
+    chol = np.linalg.cholesky(cov)
+    prices = np.array([2000.0, 60000.0, 150.0])
+    kernel.update({"ETH": prices[0], "BTC": prices[1], "SOL": prices[2]})
+    for r in rng.standard_normal((ticks, 3)) @ chol.T:
+        prices = prices * np.exp(r)
+        kernel.update_array(prices)
+
+
+def test_ewma_covariance_tracks_correlation_and_var():
+    vol = 0.001
+    corr = np.array([[1.0, 0.8, 0.0], [0.8, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    cov = corr * vol ** 2
+    kernel = PortfolioRiskKernel(period_seconds=1.0, window=2000, decay_per_period=0.997)
+    _simulate(kernel, cov)
+
+    assert kernel.assets == ["ETH", "BTC", "SOL"]
+    assert kernel.correlation()[0, 1] == pytest.approx(0.8, abs=0.1)
+    assert kernel.return_matrix().shape == (2000, 3)
+
+    # Long ETH / short BTC hedges most of the risk; the naive sum of per-coin VaR would not
+    hedged = kernel.assess({"ETH": 1e6, "BTC": -1e6}, horizon_seconds=1)
+    outright = kernel.assess({"ETH": 1e6, "BTC": 1e6}, horizon_seconds=1)
+    assert hedged["parametric"]["var"] < 0.6 * outright["parametric"]["var"]
+    expected = 1.645 * vol * 1e6 * np.sqrt(2 * (1 + 0.8))
+    assert outright["parametric"]["var"] == pytest.approx(expected, rel=0.2)
+    assert outright["parametric"]["es"] > outright["parametric"]["var"]
+    assert outright["historical"]["var"] == pytest.approx(expected, rel=0.2)
+
+    mc = kernel.monte_carlo(kernel.vector({"ETH": 1e6, "BTC": 1e6}), horizon_seconds=1,
+                            paths=50_000, rng=np.random.default_rng(0))
+    assert mc["var"] == pytest.approx(outright["parametric"]["var"], rel=0.05)
+
+
+def test_new_asset_uses_prior_variance():
+    kernel = PortfolioRiskKernel(period_seconds=86400, prior_daily_vol=0.05)
+    kernel.update({"ETH": 2000.0})
+    risk = kernel.assess({"ETH": -10_000.0, "DOGE": 5_000.0})
+    assert risk["parametric"]["var"] == pytest.approx(1.645 * 0.05 * 10_000, rel=1e-3)
+    assert risk["historical"] is None
+
+
+def test_daily_decay_is_scaled_to_the_tick_cadence():
+    # One day of 1 s ticks forgets as much as one daily observation at 0.94
+    fast, daily = PortfolioRiskKernel(period_seconds=1.0), PortfolioRiskKernel(period_seconds=86400)
+    assert daily.decay == pytest.approx(0.94)
+    assert fast.decay ** 86400 == pytest.approx(0.94)
+    assert fast.last_price("ETH") is None
+    fast.update({"ETH": 2000.0})
+    assert fast.last_price("ETH") == 2000.0
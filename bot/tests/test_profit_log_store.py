@@ -0,0 +1,49 @@
+# bot/tests/test_profit_log_store.py
+# Created: 2026-10-19
+from bot.solver.pricing_engine import PricingEngine
+from bot.solver.profit_log_store import ProfitLogStore, get_profit_log_store
+
+HEADER = "timestamp,venue,order_id,coin,amount,profit_bps,status\n"
+
+
+def _row(ts, venue, status, profit=1.5):
+    return f"{ts},{venue},o{ts},ETH,1.0,{profit},{status}\n"
+
+
+def test_incremental_tail_and_aggregates(tmp_path):
+    path = tmp_path / "profit_log.csv"
+    path.write_text(HEADER + _row(3600, "CowSwap", "HEDGED") + _row(3700, "UniswapX", "FAILED"))
+    store = ProfitLogStore(str(path), recent_size=3)
+    assert store.refresh() == 2
+
+    # Half-written trailing row is held back until its newline lands
+    with open(path, "a") as f:
+        f.write(_row(7300, "CowSwap", "HEDGED", 2.0) + "7400,Cow")
+    assert store.refresh() == 1
+    with open(path, "a") as f:
+        f.write("Swap,o7400,ETH,1.0,0.5,FAILED\n")
+    assert store.refresh() == 1
+    assert store.refresh() == 0
+
+    assert (store.total.count, store.total.wins, store.total.profit_bps) == (4, 2, 3.5)
+    assert store.venue_stats()["CowSwap"]["win_rate"] == 2 / 3
+    assert [b["bucket_start"] for b in store.bucket_stats()] == [3600, 7200]
+    recent = store.recent(10)
+    assert len(recent) == 3 and recent[-1]["order_id"] == "o7400" and recent[-1]["amount"] == 1.0
+    assert store.recent_win_rate(2) == 0.5
+
+    # Rotated log is re-indexed from scratch
+    path.write_text(HEADER + _row(1, "Aori", "HEDGED"))
+    assert store.refresh() == 1
+    assert store.total.count == 1
+
+
+def test_pricing_engine_uses_recent_window(tmp_path):
+    path = tmp_path / "profit_log.csv"
+    rows = [_row(i, "CowSwap", "FAILED") for i in range(30)] + [_row(100 + i, "CowSwap", "HEDGED") for i in range(20)]
+    path.write_text(HEADER + "".join(rows))
+    engine = PricingEngine()
+    engine.profit_log_path = str(path)
+    engine.optimize_spread()
+    assert engine.current_min_spread_bps == engine.base_min_spread_bps + 1
+    assert get_profit_log_store(str(path)).total.count == 50
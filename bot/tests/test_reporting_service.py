@@ -0,0 +1,97 @@
+# bot/tests/test_reporting_service.py
+# Created: 2026-10-19
+from unittest.mock import MagicMock
+
+from eth_abi import decode, encode
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from bot.por_collector import MULTICALL3_ADDRESS
+from bot.reporting_service import ReportingService
+
+FACTORY = "0x" + "fa" * 20
+NODE = "0x" + "0e" * 20
+VAULTS = [Web3.to_checksum_address("0x" + f"{i:02x}" * 20) for i in range(1, 6)]
+
+
+def _selector(signature):
+    return bytes(Web3.keccak(text=signature)[:4])
+
+
+class FakeChainProvider(BaseProvider):
+    """Answers Multicall3.aggregate3 over a factory with five vaults (the last one's getSolvencyRatio reverts); counts eth_calls."""
+
+    def __init__(self):
+        self.eth_calls = 0
+        self.blocks = []
+        vault_values = lambda i: {
+            "totalAssets()": encode(["uint256"], [(i + 1) * 10**18]),
+            "totalSupply()": encode(["uint256"], [10**18]),
+            "getSolvencyRatio()": encode(["uint256"], [9000 if i == 2 else 12000]),
+            "getProjectedAPY()": encode(["uint256"], [1000 + 100 * i]),
+            "verificationNode()": encode(["address"], [NODE if i < 2 else "0x" + "00" * 20]),
+            "whitelistEnabled()": encode(["bool"], [i == 0]),
+            "complianceHook()": encode(["address"], ["0x" + "00" * 20]),
+        }
+        self.handlers = {}
+        for i, vault in enumerate(VAULTS):
+            for sig, out in vault_values(i).items():
+                if i == 4 and sig == "getSolvencyRatio()":
+                    continue  # reverts
+                self.handlers[(vault.lower(), _selector(sig))] = lambda args, out=out: out
+        self.handlers[(FACTORY, _selector("getVaultsCount()"))] = lambda args: encode(["uint256"], [len(VAULTS)])
+        self.handlers[(FACTORY, _selector("allVaults(uint256)"))] = (
+            lambda args: encode(["address"], [VAULTS[decode(["uint256"], args)[0]]])
+        )
+        self.handlers[(NODE, _selector("latestAttestations(address)"))] = (
+            lambda args: encode(["uint256", "uint256", "bool"], [1, 1, decode(["address"], args)[0] == VAULTS[0].lower()])
+        )
+
+    def _call(self, to, data):
+        handler = self.handlers.get((to.lower(), data[:4]))
+        return handler(data[4:]) if handler else None
+
+    def make_request(self, method, params):
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x2105"}
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(1234)}
+        assert method == "eth_call"
+        self.eth_calls += 1
+        tx, block = params
+        self.blocks.append(block)
+        data = bytes.fromhex(tx["data"][2:])
+        if tx["to"].lower() != MULTICALL3_ADDRESS.lower():
+            out = self._call(tx["to"], data)
+        else:
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = []
+            for target, _, calldata in calls:
+                out = self._call(target, calldata)
+                results.append((out is not None, out or b""))
+            out = encode(["(bool,bytes)[]"], [results])
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x" + out.hex()}
+
+
+def test_global_summary_reads_all_vaults_in_a_few_pinned_calls(tmp_path):
+    provider = FakeChainProvider()
+    chain = MagicMock()
+    chain.w3 = Web3(provider)
+    service = ReportingService(chain, output_dir=str(tmp_path))
+
+    summary = service.generate_global_summary(FACTORY)
+
+    # getVaultsCount + allVaults batch + field batch + attestation batch, independent of vault count
+    assert provider.eth_calls == 4
+    assert set(provider.blocks) == {hex(1234)}
+    assert summary["vault_count"] == 5
+    assert summary["block_number"] == 1234
+    assert summary["total_assets_wei"] == str(15 * 10**18)
+    # A reverted solvency read is neither healthy nor undercollateralized
+    assert summary["undercollateralized_vaults"] == [VAULTS[2]]
+    assert summary["unknown_health_vaults"] == [VAULTS[4]]
+    assert summary["healthy_vaults"] == 3
+    assert summary["verified_vaults"] == 1
+    assert summary["tvl_weighted_apy_bps"] == (1000 * 1 + 1100 * 2 + 1200 * 3 + 1300 * 4 + 1400 * 5) // 15
+    assert len(list(tmp_path.glob("report_*.json"))) == 5
+    assert len(list(tmp_path.glob("global_summary_*.json"))) == 1
@@ -0,0 +1,68 @@
+# bot/tests/test_rpc_pool.py
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from bot.rpc_pool import RpcPool, PooledProvider
+from web3 import Web3
+
+# Created: 2026-10-19
+
+def _node(delay=0.0, status=200):
+    """Local JSON-RPC stub answering eth_blockNumber; records request bodies."""
+    class Handler(BaseHTTPRequestHandler):
+        bodies = []
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            Handler.bodies.append(body)
+            time.sleep(delay)
+            if status != 200:
+                self.send_response(status)
+                self.end_headers()
+                return
+            answer = lambda p: {"jsonrpc": "2.0", "id": p["id"], "result": "0x10"}
+            data = json.dumps([answer(p) for p in body] if isinstance(body, list) else answer(body)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", Handler, server
+
+
+@pytest.fixture
+def nodes():
+    started = [_node(status=503), _node(delay=2.0), _node(delay=0.01)]
+    yield started
+    for _, _, server in started:
+        server.shutdown()
+
+
+def test_failover_hedging_and_batching(nodes):
+    (down, down_h, _), (slow, slow_h, _), (fast, fast_h, _) = nodes
+    pool = RpcPool([down, slow, fast], name="test", timeout=5.0)
+    w3 = Web3(PooledProvider(pool))
+
+    # Unknown endpoints look equal, so the first call may hit the dead or slow node first
+    started = time.monotonic()
+    assert w3.eth.block_number == 16
+    assert time.monotonic() - started < 1.5
+
+    # The fast node now ranks first
+    assert pool.ranked_endpoints()[0].url == fast
+
+    fast_h.bodies.clear()
+    with ThreadPoolExecutor(16) as ex:
+        assert set(ex.map(lambda _: w3.eth.block_number, range(32))) == {16}
+    # Concurrent calls were coalesced into fewer HTTP requests
+    assert sum(len(b) if isinstance(b, list) else 1 for b in fast_h.bodies) == 32
+    assert len(fast_h.bodies) < 32
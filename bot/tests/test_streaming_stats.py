@@ -0,0 +1,43 @@
+# bot/tests/test_streaming_stats.py
+import numpy as np
+import pytest
+from bot.sentinel.streaming_stats import RollingReturnStats, PnLTracker
+
+# Created: 2026-10-19
+
+def test_rolling_stats_match_numpy_window():
+    rng = np.random.default_rng(7)
+    prices = 2000 * np.exp(np.cumsum(rng.normal(0, 0.001, 500)))
+
+    stats = RollingReturnStats(window=99)
+    for p in prices:
+        stats.update(float(p))
+
+    window = np.diff(np.log(prices[-100:]))
+    assert len(stats) == 99
+    assert stats.mean() == pytest.approx(window.mean(), rel=1e-6)
+    assert stats.std() == pytest.approx(window.std(), rel=1e-6)
+    assert stats.historical_var_pct(0.99) == pytest.approx(max(-np.sort(window)[0], 0.0))
+    assert stats.volatility() > 0
+
+
+def test_default_volatility_until_warm():
+    stats = RollingReturnStats(window=99)
+    for p in range(10):
+        stats.update(2000.0 + p)
+    assert stats.volatility() == 0.05
+    assert stats.parametric_var_pct() is None
+
+
+def test_pnl_windows_and_drawdown():
+    tracker = PnLTracker(windows=(3600,))
+    t0 = 1_000_000.0
+    for i, equity in enumerate([100.0, 110.0, 105.0, 120.0, 90.0]):
+        tracker.add(equity, now=t0 + i * 1800)
+
+    now = t0 + 4 * 1800
+    # Newest snapshot at least 1h old is the one at t0 + 2*1800 (equity 105)
+    assert tracker.window_pnl(3600, now=now) == pytest.approx(90.0 - 105.0)
+    # Unregistered window falls back to a scan
+    assert tracker.window_pnl(5400, now=now) == pytest.approx(90.0 - 110.0)
+    assert tracker.drawdown_pct() == pytest.approx(0.25)
@@ -0,0 +1,80 @@
+# bot/tests/test_tenant_runtime.py
+# Created: 2026-10-19
+import asyncio
+
+from bot.exchanges.paper import PaperExchange
+from bot.orchestrator import BotOrchestrator
+from bot.tenant_runtime import HedgeStrategy, MarketSnapshot, Tenant, TenantSecrets
+
+VAULTS = [f"0x{i:040x}" for i in range(1, 21)]
+BROKEN = VAULTS[3]
+
+
+def _tvl(vault_address):
+    if vault_address == BROKEN:
+        raise ConnectionError("rpc down")
+    return float(int(vault_address, 16))
+
+
+def test_many_vaults_share_one_feed_and_fail_independently(tmp_path):
+    source = PaperExchange(lambda symbol: 3000.0)
+    orchestrator = BotOrchestrator(config_path=str(tmp_path / "orchestrator.json"),
+                                   market_source=source, tvl_source=_tvl)
+
+    async def main():
+        for vault in VAULTS:
+            await orchestrator.deploy_instance(vault, {"paper": True, "private_key": "0xsecret",
+                                                       "breaker_max_failures": 2})
+        for _ in range(3):
+            await orchestrator.runtime.run_tick()
+        return [await orchestrator.get_status(v) for v in VAULTS]
+
+    statuses = asyncio.run(main())
+    runtime = orchestrator.runtime
+
+    # One price + one funding fetch per tick, regardless of tenant count
+    assert runtime.market.fetches == 6
+    assert statuses[3] == "BREAKER_OPEN"
+    assert all(s == "RUNNING" for v, s in zip(VAULTS, statuses) if v != BROKEN)
+
+    report = orchestrator.report()
+    assert report[BROKEN]["failures"] == 2 and report[BROKEN]["skipped"] == 1
+    for vault in VAULTS:
+        if vault == BROKEN:
+            continue
+        tenant = runtime.tenants[vault]
+        assert tenant.exchange.get_position("ETH")[0] == _tvl(vault)
+        assert tenant.exchange.positions["ETH"][0] == -_tvl(vault)
+        assert report[vault]["trades"] == 1 and report[vault]["latency_p99_ms"] is not None
+        assert report[vault]["cpu_ms"] >= 0
+
+    assert "0xsecret" not in (tmp_path / "orchestrator.json").read_text()
+    assert "0xsecret" not in repr(runtime.tenants[VAULTS[0]].secrets)
+    runtime.shutdown()
+
+
+def test_overhedge_cap_bounds_the_resulting_short():
+    strategy = HedgeStrategy(max_overhedge_ratio=0.9)
+    tenant = Tenant(vault_address=VAULTS[0], exchange=PaperExchange(lambda symbol: 3000.0),
+                    secrets=TenantSecrets(), strategy=strategy, tvl_source=lambda vault: 10.0)
+    assert strategy.step(tenant, MarketSnapshot(prices={"ETH": 3000.0})) == 9.0
+    assert tenant.exchange.positions["ETH"][0] == -9.0
+    # Already at the cap: nothing more to sell
+    assert strategy.step(tenant, MarketSnapshot(prices={"ETH": 3000.0})) is None
+
+
+def test_existing_short_reported_as_abs_size_is_not_added_to():
+    class HyperliquidLike(PaperExchange):
+        """Hyperliquid's adapter returns abs(szi) for an open short."""
+
+        def get_position(self, symbol):
+            return abs(self.positions.get(symbol, (0.0, 0.0))[0]), 0.0
+
+    exchange = HyperliquidLike(lambda symbol: 3000.0)
+    exchange.positions["ETH"] = (-10.0, 3000.0)
+    strategy = HedgeStrategy()
+    tenant = Tenant(vault_address=VAULTS[0], exchange=exchange, secrets=TenantSecrets(),
+                    strategy=strategy, tvl_source=lambda vault: 10.0)
+    for _ in range(3):
+        assert strategy.step(tenant, MarketSnapshot(prices={"ETH": 3000.0})) is None
+    assert exchange.orders == 0 and exchange.positions["ETH"][0] == -10.0
@@ -1,4 +1,5 @@
 // Created: 2025-12-29
+// Updated: 2026-10-19 - Reads the JSON snapshot exported by the SQLite credits ledger
 import { NextResponse } from 'next/server';
 import fs from 'fs';
 import path from 'path';
@@ -9,6 +10,7 @@ export async function GET(request: Request) {
   const leaderboard = searchParams.get('leaderboard') === 'true';
 
   try {
+    // Read-only snapshot exported by the bot's SQLite credits ledger (bot/credits_manager.py)
     const dbPath = path.join(process.cwd(), '..', 'bot', 'data', 'credits.json');
     
     if (!fs.existsSync(dbPath)) {
@@ -1,7 +1,11 @@
 import { NextResponse } from 'next/server';
+import { execFile } from 'child_process';
+import { promisify } from 'util';
 import fs from 'fs';
 import path from 'path';
 
+const execFileAsync = promisify(execFile);
+
 // In a production environment, this would be backed by a database (e.g., Redis or Postgres)
 // For the Genesis phase, we use an in-memory store or simple mapping logic
 const referralStore: Record<string, string> = {};
@@ -10,6 +14,7 @@ export async function GET(request: Request) {
   const { searchParams } = new URL(request.url);
   const address = searchParams.get('address');
 
+  // Read-only snapshot exported by the bot's SQLite credits ledger
   const dbPath = path.join(process.cwd(), '..', 'bot', 'data', 'referrals.json');
   let allData: any = {};
 
@@ -80,27 +85,26 @@ export async function PATCH(request: Request) {
   const body = await request.json();
   const { address } = body;
 
-  if (!address) {
+  if (!address || !/^0x[0-9a-fA-F]{40}$/.test(address)) {
     return NextResponse.json({ error: 'Address required' }, { status: 400 });
   }
 
-  const dbPath = path.join(process.cwd(), '..', 'bot', 'data', 'referrals.json');
-  
+  // Payouts are claimed in the ledger itself (read and reset in one transaction);
+  // referrals.json is only a snapshot and is re-exported by the claim
   try {
-    if (fs.existsSync(dbPath)) {
-      const data = JSON.parse(fs.readFileSync(dbPath, 'utf8'));
-      const userAddr = address.toLowerCase();
-      
-      if (data[userAddr] && data[userAddr].pending_commissions > 0) {
-        const amount = data[userAddr].pending_commissions;
-        data[userAddr].pending_commissions = 0;
-        // In a real app, we'd trigger a transfer here
-        fs.writeFileSync(dbPath, JSON.stringify(data, null, 4));
-        return NextResponse.json({ success: true, amount });
-      }
+    const { stdout } = await execFileAsync(
+      process.env.KERNE_PYTHON || 'python3',
+      ['-m', 'bot.credits_manager', 'claim', address],
+      { cwd: path.join(process.cwd(), '..') }
+    );
+    const { amount } = JSON.parse(stdout.trim().split('\n').pop() || '{}');
+    if (amount > 0) {
+      // In a real app, we'd trigger a transfer here
+      return NextResponse.json({ success: true, amount });
     }
   } catch (e) {
     console.error("Failed to process payout:", e);
+    return NextResponse.json({ error: 'Payout failed' }, { status: 500 });
   }
 
   return NextResponse.json({ error: 'No pending commissions' }, { status: 400 });
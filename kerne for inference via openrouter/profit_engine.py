@@ -25,6 +25,7 @@ from typing import Dict, List, Optional, Tuple
 from enum import Enum
 import threading
 import queue
+from bisect import bisect_left
 
 # ============================================================================
 # CONFIGURATION
@@ -386,15 +387,24 @@ class PricingEngine:
             prompt_price = base_prompt
             completion_price = base_completion
         
+        # Short-term demand surge/lull from the demand monitor's rolling window
+        demand = self.demand_factor.get(model.name, 1.0)
+        prompt_price *= demand
+        completion_price *= demand
+        
         # Ensure we stay within market bounds
         prompt_price = max(market["prompt"][0], min(market["prompt"][1], prompt_price))
         completion_price = max(market["completion"][0], min(market["completion"][1], completion_price))
         
         return prompt_price, completion_price
     
-    def update_prices(self, models: Dict[str, ModelConfig]):
+    def update_prices(self, models: Dict[str, ModelConfig], demand_monitor: Optional["DemandMonitor"] = None):
         """Update all model prices based on current conditions"""
         for name, model in models.items():
+            if demand_monitor is not None:
+                # +/-10% at most; a 5-minute surge of 2x the hourly rate hits the cap
+                surge = demand_monitor.get_demand_surge(name)
+                self.demand_factor[name] = max(0.9, min(1.1, 1.0 + (surge - 1.0) * 0.1))
             prompt, completion = self.calculate_optimal_price(
                 model, model.current_utilization
             )
@@ -408,48 +418,181 @@ class PricingEngine:
 # DEMAND MONITOR
 # ============================================================================
 
+class SlidingWindowStats:
+    """
+    Fixed-memory rolling counters over a time window.
+
+    The window is split into `window_seconds / bucket_seconds` buckets kept in
+    a ring; running totals are adjusted as buckets expire, so recording a
+    request and reading the window count / token total are O(1) regardless
+    of request rate or uptime. Latencies go into a log-spaced histogram per
+    bucket, which bounds percentile queries by the number of bins.
+    """
+
+    # Latency histogram upper bounds (ms): 1ms .. ~65s, doubling
+    LATENCY_BOUNDS_MS = tuple(2.0 ** i for i in range(17))
+
+    def __init__(self, window_seconds: int = 3600, bucket_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = max(1, window_seconds // bucket_seconds)
+        num_bins = len(self.LATENCY_BOUNDS_MS) + 1  # last bin is overflow
+
+        self._bucket_ids = [-1] * self.num_buckets
+        self._counts = [0] * self.num_buckets
+        self._tokens = [0] * self.num_buckets
+        self._latency = [[0] * num_bins for _ in range(self.num_buckets)]
+
+        self._head = None  # newest bucket id seen
+        self._first_bucket = None  # oldest bucket id ever seen; bounds coverage after a restart
+        self.total_count = 0
+        self.total_tokens = 0
+        self._latency_totals = [0] * num_bins
+
+    def _bucket_id(self, ts: float) -> int:
+        return int(ts // self.bucket_seconds)
+
+    def _evict(self, slot: int):
+        self.total_count -= self._counts[slot]
+        self.total_tokens -= self._tokens[slot]
+        hist = self._latency[slot]
+        for i, n in enumerate(hist):
+            if n:
+                self._latency_totals[i] -= n
+                hist[i] = 0
+        self._counts[slot] = 0
+        self._tokens[slot] = 0
+
+    def _advance(self, bucket_id: int):
+        """Roll the ring forward to `bucket_id`, expiring buckets that fall out."""
+        if self._head is None:
+            self._head = bucket_id
+            self._first_bucket = bucket_id
+            self._bucket_ids[bucket_id % self.num_buckets] = bucket_id
+            return
+        if bucket_id <= self._head:
+            return
+        first = max(self._head + 1, bucket_id - self.num_buckets + 1)
+        for bid in range(first, bucket_id + 1):
+            slot = bid % self.num_buckets
+            self._evict(slot)
+            self._bucket_ids[slot] = bid
+        self._head = bucket_id
+
+    def record(self, tokens: int = 0, latency_ms: Optional[float] = None, ts: Optional[float] = None):
+        """Record one request. Samples older than the window are dropped."""
+        bucket_id = self._bucket_id(time.time() if ts is None else ts)
+        self._advance(bucket_id)
+        if bucket_id <= self._head - self.num_buckets:
+            return
+        slot = bucket_id % self.num_buckets
+
+        self._counts[slot] += 1
+        self._tokens[slot] += tokens
+        self.total_count += 1
+        self.total_tokens += tokens
+
+        if latency_ms is not None:
+            bin_idx = bisect_left(self.LATENCY_BOUNDS_MS, latency_ms)
+            self._latency[slot][bin_idx] += 1
+            self._latency_totals[bin_idx] += 1
+
+    def _recent_slots(self, seconds: Optional[int], now: Optional[float]) -> List[int]:
+        self._advance(self._bucket_id(time.time() if now is None else now))
+        if self._head is None:
+            return []
+        n = self.num_buckets if seconds is None else min(self.num_buckets, max(1, seconds // self.bucket_seconds))
+        return [bid % self.num_buckets for bid in range(self._head - n + 1, self._head + 1)
+                if self._bucket_ids[bid % self.num_buckets] == bid]
+
+    def count(self, seconds: Optional[int] = None, now: Optional[float] = None) -> int:
+        """Requests in the last `seconds` (default: whole window)."""
+        if seconds is None or seconds >= self.window_seconds:
+            self._advance(self._bucket_id(time.time() if now is None else now))
+            return self.total_count
+        return sum(self._counts[s] for s in self._recent_slots(seconds, now))
+
+    def tokens(self, seconds: Optional[int] = None, now: Optional[float] = None) -> int:
+        """Tokens in the last `seconds` (default: whole window)."""
+        if seconds is None or seconds >= self.window_seconds:
+            self._advance(self._bucket_id(time.time() if now is None else now))
+            return self.total_tokens
+        return sum(self._tokens[s] for s in self._recent_slots(seconds, now))
+
+    def _span(self, seconds: Optional[int], now: Optional[float]) -> float:
+        """Seconds actually covered by a query: no more than has elapsed since the first bucket."""
+        span = min(seconds or self.window_seconds, self.window_seconds)
+        if self._first_bucket is None:
+            return span
+        now = time.time() if now is None else now
+        return max(1.0, min(span, now - self._first_bucket * self.bucket_seconds))
+
+    def rate_per_second(self, seconds: Optional[int] = None, now: Optional[float] = None) -> float:
+        return self.count(seconds, now) / self._span(seconds, now)
+
+    def tokens_per_second(self, seconds: Optional[int] = None, now: Optional[float] = None) -> float:
+        return self.tokens(seconds, now) / self._span(seconds, now)
+
+    def latency_percentile(self, q: float, seconds: Optional[int] = None,
+                           now: Optional[float] = None) -> Optional[float]:
+        """
+        Approximate latency percentile (ms) from the histogram; returns the
+        upper bound of the bin holding the q-th sample, or None without samples.
+        """
+        if seconds is None or seconds >= self.window_seconds:
+            self._advance(self._bucket_id(time.time() if now is None else now))
+            hist = self._latency_totals
+        else:
+            hist = [0] * len(self._latency_totals)
+            for slot in self._recent_slots(seconds, now):
+                for i, n in enumerate(self._latency[slot]):
+                    hist[i] += n
+
+        total = sum(hist)
+        if total == 0:
+            return None
+        rank = q * total
+        cumulative = 0
+        for i, n in enumerate(hist):
+            cumulative += n
+            if cumulative >= rank and n:
+                return self.LATENCY_BOUNDS_MS[i] if i < len(self.LATENCY_BOUNDS_MS) else float("inf")
+        return float("inf")
+
+
 class DemandMonitor:
     """Monitors OpenRouter demand and traffic patterns"""
     
-    def __init__(self):
-        self.request_history: List[Dict] = []
+    def __init__(self, window_seconds: int = 3600, bucket_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.windows: Dict[str, SlidingWindowStats] = {}  # per model
+        self.overall = SlidingWindowStats(window_seconds, bucket_seconds)
         self.model_demand: Dict[str, float] = {}  # requests per minute
         self.peak_hours: List[int] = [9, 10, 11, 14, 15, 16, 17, 18, 19, 20, 21, 22]  # UTC
         self.current_demand_level = "medium"  # low, medium, high
         
-    def record_request(self, model: str, tokens: int, timestamp: datetime = None):
-        """Record an incoming request"""
-        if timestamp is None:
-            timestamp = datetime.now()
-            
-        self.request_history.append({
-            "model": model,
-            "tokens": tokens,
-            "timestamp": timestamp,
-        })
-        
-        # Update demand metrics
-        self._update_demand_metrics()
+    def record_request(self, model: str, tokens: int, timestamp: datetime = None,
+                       latency_ms: Optional[float] = None):
+        """Record an incoming request (O(1): only rolling counters are updated)"""
+        ts = timestamp.timestamp() if timestamp is not None else time.time()
+
+        window = self.windows.get(model)
+        if window is None:
+            window = self.windows[model] = SlidingWindowStats(self.window_seconds, self.bucket_seconds)
+        window.record(tokens, latency_ms, ts)
+        self.overall.record(tokens, latency_ms, ts)
+
+        self.model_demand[model] = window.rate_per_second() * 60
     
     def _update_demand_metrics(self):
-        """Calculate demand metrics from recent history"""
+        """Refresh demand metrics from the rolling windows"""
         now = datetime.now()
-        one_hour_ago = now - timedelta(hours=1)
-        
-        recent_requests = [r for r in self.request_history 
-                          if r["timestamp"] > one_hour_ago]
-        
-        # Calculate requests per minute per model
-        self.model_demand = {}
-        for req in recent_requests:
-            model = req["model"]
-            if model not in self.model_demand:
-                self.model_demand[model] = 0
-            self.model_demand[model] += 1
         
-        # Normalize to per-minute
-        for model in self.model_demand:
-            self.model_demand[model] /= 60
+        # Requests per minute per model over the window (or since the first request, if shorter)
+        self.model_demand = {
+            model: window.rate_per_second() * 60 for model, window in self.windows.items()
+        }
         
         # Determine overall demand level
         current_hour = now.hour
@@ -459,9 +602,38 @@ class DemandMonitor:
             self.current_demand_level = "low"
         else:
             self.current_demand_level = "medium"
+
+    def get_window_stats(self, model: Optional[str] = None, recent_seconds: int = 60) -> Dict[str, float]:
+        """
+        Snapshot of a model's (or overall) traffic: recent and window-average
+        RPS, token throughput and latency percentiles.
+        """
+        window = self.overall if model is None else self.windows.get(model)
+        if window is None:
+            return {"rps": 0.0, "rps_window": 0.0, "tokens_per_sec": 0.0,
+                    "p50_ms": None, "p95_ms": None, "p99_ms": None}
+        return {
+            "rps": window.rate_per_second(recent_seconds),
+            "rps_window": window.rate_per_second(),
+            "tokens_per_sec": window.tokens_per_second(recent_seconds),
+            "p50_ms": window.latency_percentile(0.50),
+            "p95_ms": window.latency_percentile(0.95),
+            "p99_ms": window.latency_percentile(0.99),
+        }
+
+    def get_demand_surge(self, model: str, recent_seconds: int = 300) -> float:
+        """Ratio of the recent request rate to the window average (1.0 = steady)"""
+        window = self.windows.get(model)
+        if window is None:
+            return 1.0
+        baseline = window.rate_per_second()
+        if baseline <= 0:
+            return 1.0
+        return window.rate_per_second(recent_seconds) / baseline
     
     def get_recommended_scaling(self) -> Dict[str, int]:
         """Get recommended number of instances per model"""
+        self._update_demand_metrics()
         recommendations = {}
         
         for model, demand in self.model_demand.items():
@@ -473,6 +645,10 @@ class DemandMonitor:
             else:
                 scale_factor = 1.0
             
+            # React to bursts: use the last 5 minutes if they run hotter than the hour
+            recent_demand = self.windows[model].rate_per_second(300) * 60
+            demand = max(demand, recent_demand)
+            
             # Base recommendation: 1 instance per 100 requests/minute
             base_instances = demand / 100
             recommended = max(1, int(base_instances * scale_factor))
@@ -482,6 +658,7 @@ class DemandMonitor:
     
     def predict_demand_next_hour(self) -> Dict[str, float]:
         """Predict demand for the next hour"""
+        self._update_demand_metrics()
         predictions = {}
         
         for model, current_demand in self.model_demand.items():
@@ -705,7 +882,7 @@ class InferenceOrchestrator:
             )
             
             # Update pricing
-            self.pricing_engine.update_prices(self.models)
+            self.pricing_engine.update_prices(self.models, self.demand_monitor)
             
             # Check scaling
             scaling_actions = self.auto_scaler.evaluate_scaling(self.models)
@@ -0,0 +1,36 @@
+# Created: 2026-10-19
+"""Sliding-window demand analytics: rates over the time actually covered."""
+
+from datetime import datetime
+
+from profit_engine import DemandMonitor, SlidingWindowStats
+
+
+def test_rate_covers_only_elapsed_time_after_restart():
+    stats = SlidingWindowStats(window_seconds=3600, bucket_seconds=60)
+    start = 1_000_050.0  # 30 s into the bucket starting at 1_000_020
+    for i in range(300):
+        stats.record(tokens=10, ts=start + i)  # 1 request/s for 5 minutes
+
+    now = start + 300
+    # Covered span is 330 s (first bucket start to now), not the 3600 s window
+    assert abs(stats.rate_per_second(now=now) - 300 / 330) < 1e-9
+    assert abs(stats.tokens_per_second(now=now) - 3000 / 330) < 1e-9
+    # The last five 60 s buckets miss the first bucket's 30 requests
+    assert stats.rate_per_second(300, now=now) == 270 / 300
+
+    # Once the window is full the divisor is the window again
+    later = start + 7200
+    stats.record(ts=later)
+    assert stats.rate_per_second(now=later) == 1 / 3600
+
+
+def test_steady_traffic_is_no_surge_right_after_start():
+    monitor = DemandMonitor()
+    now = datetime.now().timestamp()
+    for i in range(600):
+        monitor.record_request("glm-5", tokens=100, timestamp=datetime.fromtimestamp(now - 299 + i / 2))
+
+    # Two requests a second throughout: recent and window rates agree (was ~12x)
+    assert 0.8 < monitor.get_demand_surge("glm-5") <= 1.25
+    assert 100 < monitor.model_demand["glm-5"] <= 120
@@ -21,20 +21,22 @@ import numpy as np
 import pandas as pd
 import requests
 import torch
-from torch.utils.data import DataLoader, TensorDataset
+from torch.utils.data import DataLoader, Subset
 
 # Add parent to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.yield_predictor import YieldTransformer, YieldLoss
+from src.training_corpus import TrainingCorpus, CorpusSequenceDataset
+from src.history_fetcher import DefiLlamaHistoryFetcher
 from src.utils import setup_logging
 
 
 class ContinuousLearner:
     """
     Continuous learning system that:
-    1. Fetches new data every hour
-    2. Retrains model periodically
+    1. Fetches new data every hour (incrementally, into an on-disk corpus)
+    2. Retrains model periodically, streaming windows from the corpus
     3. Serves predictions via in-memory cache
     4. Logs all activity
     """
@@ -48,12 +50,24 @@ class ContinuousLearner:
         self.data_fetch_interval = self.config.get("data_fetch_interval_minutes", 60)
         self.min_new_samples = self.config.get("min_new_samples", 100)
         self.epochs_per_retrain = self.config.get("epochs_per_retrain", 5)
+        self.replay_window_hours = self.config.get("replay_window_hours", 1440)
+        self.tracked_pools = self.config.get("tracked_pools", 200)
         
         # Model paths
         self.model_dir = Path(__file__).parent.parent / "models" / "yield_predictor"
         self.model_dir.mkdir(parents=True, exist_ok=True)
         self.model_path = self.model_dir / "best_model.pt"
         
+        # Persistent training corpus (append-only, memory-mapped shards)
+        self.corpus = TrainingCorpus(self.config.get("corpus_dir"))
+        
+        # Concurrent, rate-limited history fetcher (conditional requests)
+        self.history_fetcher = DefiLlamaHistoryFetcher(
+            rate_per_sec=self.config.get("defillama_rps", 5.0),
+            max_concurrency=self.config.get("fetch_concurrency", 16),
+            validators_path=str(self.corpus.root / "http_validators.json")
+        )
+        
         # Device
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.logger.info(f"Using device: {self.device}")
@@ -61,7 +75,7 @@ class ContinuousLearner:
         # Model state
         self.model = None
         self.normalization_params = None
-        self.training_data_buffer = []
+        self.pending_rows = 0
         self.last_retrain = None
         self.last_data_fetch = None
         
@@ -78,6 +92,7 @@ class ContinuousLearner:
             "total_retrains": 0,
             "total_predictions": 0,
             "data_fetches": 0,
+            "last_collection": None,
             "start_time": None,
             "last_loss": None
         }
@@ -130,7 +145,7 @@ class ContinuousLearner:
             stablecoin_pools = df[
                 (df.get("stablecoin", False) == True) & 
                 (df["tvlUsd"] > 1e6)
-            ].nlargest(50, "tvlUsd")
+            ].nlargest(self.tracked_pools, "tvlUsd")
             
             self.metrics["data_fetches"] += 1
             self.logger.info(f"Fetched {len(stablecoin_pools)} stablecoin pools")
@@ -141,121 +156,47 @@ class ContinuousLearner:
             self.logger.error(f"Data fetch failed: {e}")
             return None
     
-    def fetch_historical_for_pool(self, pool_id: str) -> pd.DataFrame:
-        """Fetch historical data for a specific pool."""
-        try:
-            url = f"https://yields.llama.fi/chart/{pool_id}"
-            response = requests.get(url, timeout=30)
-            
-            if response.status_code != 200:
-                return None
-            
-            data = response.json()
-            points = data.get("data", [])
-            
-            if not points:
-                return None
-            
-            df = pd.DataFrame(points)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            df["pool_id"] = pool_id
-            
-            return df
-            
-        except Exception as e:
-            return None
-    
-    def prepare_sequences(self, pool_data: dict) -> list:
-        """Prepare training sequences from pool data."""
-        sequences = []
-        
-        for pool_id, df in pool_data.items():
-            if df is None or len(df) < 200:
-                continue
-            
-            # Create features
-            df["apy_ma7"] = df["apy"].rolling(7, min_periods=1).mean()
-            df["apy_ma30"] = df["apy"].rolling(30, min_periods=1).mean()
-            df["apy_vol"] = df["apy"].rolling(7, min_periods=1).std()
-            df["tvl_change"] = df["tvlUsd"].pct_change()
-            
-            df = df.ffill().bfill().fillna(0)
-            
-            # Create sequences
-            seq_length = 168
-            feature_cols = ["apy", "apy_ma7", "apy_ma30", "apy_vol", "tvlUsd", "tvl_change"]
-            
-            for i in range(len(df) - seq_length - 720):  # Need 30 days ahead for targets
-                seq = df[feature_cols].iloc[i:i+seq_length].values
-                
-                # Multi-horizon targets
-                targets = []
-                for h in [1, 24, 168, 720]:
-                    if i + seq_length + h < len(df):
-                        targets.append(df["apy"].iloc[i + seq_length + h])
-                    else:
-                        targets.append(df["apy"].iloc[-1])
-                
-                # Pad to 20 features
-                if seq.shape[1] < 20:
-                    pad = np.zeros((seq.shape[0], 20 - seq.shape[1]))
-                    seq = np.concatenate([seq, pad], axis=1)
-                
-                sequences.append({
-                    "features": seq.astype(np.float32),
-                    "targets": np.array(targets, dtype=np.float32),
-                    "pool_id": pool_id,
-                    "timestamp": df["timestamp"].iloc[i + seq_length]
-                })
-        
-        return sequences
+    def build_dataset(self, since_ts: float = None) -> CorpusSequenceDataset:
+        """Training windows streamed from the on-disk corpus."""
+        return CorpusSequenceDataset(
+            self.corpus,
+            seq_length=168,
+            n_features=20,
+            normalization_params=self.normalization_params,
+            since_ts=since_ts
+        )
     
-    def train_step(self, new_sequences: list):
-        """Perform incremental training with new data."""
-        if not new_sequences:
-            self.logger.warning("No new sequences to train on")
-            return
-        
-        self.logger.info(f"Training on {len(new_sequences)} new sequences...")
-        
-        # Prepare data
-        X = np.array([s["features"] for s in new_sequences])
-        y = np.array([s["targets"] for s in new_sequences])
-        
-        # Update normalization params incrementally
-        if self.normalization_params is None:
-            X_mean = X.mean(axis=(0, 1), keepdims=True)
-            X_std = X.std(axis=(0, 1), keepdims=True) + 1e-8
-            self.normalization_params = {"mean": X_mean, "std": X_std}
+    def train_step(self, since_ts: float = None):
+        """Perform incremental training on corpus windows newer than `since_ts`."""
+        # Update normalization params incrementally from streaming corpus stats
+        corpus_stats = self.corpus.feature_stats(n_features=20)
+        if not self.normalization_params:
+            self.normalization_params = corpus_stats
         else:
             # Incremental mean/std update (exponential moving average)
             alpha = 0.1  # Learning rate for normalization update
-            new_mean = X.mean(axis=(0, 1), keepdims=True)
-            new_std = X.std(axis=(0, 1), keepdims=True) + 1e-8
-            
             old_mean = self.normalization_params["mean"]
             old_std = self.normalization_params["std"]
             
-            self.normalization_params["mean"] = (1 - alpha) * old_mean + alpha * new_mean
-            self.normalization_params["std"] = (1 - alpha) * old_std + alpha * new_std
+            self.normalization_params["mean"] = (1 - alpha) * old_mean + alpha * corpus_stats["mean"]
+            self.normalization_params["std"] = (1 - alpha) * old_std + alpha * corpus_stats["std"]
         
-        # Normalize
-        X_norm = (X - self.normalization_params["mean"]) / self.normalization_params["std"]
+        dataset = self.build_dataset(since_ts)
+        if len(dataset) < 2:
+            self.logger.warning("No new sequences to train on")
+            return
         
-        # Split
-        n_train = int(len(X) * 0.8)
-        X_train, X_val = X_norm[:n_train], X_norm[n_train:]
-        y_train, y_val = y[:n_train], y[n_train:]
+        self.logger.info(f"Training on {len(dataset)} sequences streamed from corpus...")
+        
+        # Split by dataset position: pools in corpus order, so the held-out tail is
+        # the newest windows of the last pools rather than a time-based split
+        n_train = int(len(dataset) * 0.8)
+        train_set = Subset(dataset, range(n_train))
+        val_set = Subset(dataset, range(n_train, len(dataset)))
         
         # DataLoaders
-        train_loader = DataLoader(
-            TensorDataset(torch.tensor(X_train), torch.tensor(y_train)),
-            batch_size=32, shuffle=True
-        )
-        val_loader = DataLoader(
-            TensorDataset(torch.tensor(X_val), torch.tensor(y_val)),
-            batch_size=32
-        )
+        train_loader = DataLoader(train_set, batch_size=32, shuffle=True)
+        val_loader = DataLoader(val_set, batch_size=32)
         
         # Training
         self.model.train()
@@ -413,20 +354,30 @@ class ContinuousLearner:
                 # Fetch latest pools
                 pools_df = self.fetch_latest_data()
                 if pools_df is not None:
-                    # Fetch historical for top pools
-                    pool_data = {}
-                    for idx, row in pools_df.head(30).iterrows():
-                        pool_id = row.get("pool", "")
-                        hist_df = self.fetch_historical_for_pool(pool_id)
-                        if hist_df is not None:
-                            pool_data[pool_id] = hist_df
-                        time.sleep(0.3)  # Rate limit
+                    # Fetch historical for tracked pools concurrently; the
+                    # corpus keeps only points newer than what it holds.
+                    # Conditional requests only for pools the corpus has rows for,
+                    # and validators are committed only once the rows are stored.
+                    known_pools = [p for p in self.corpus.pools() if self.corpus.num_rows(p)]
+                    pool_data = self.history_fetcher.fetch_many_sync(pools_df["pool"].tolist(), known_pools)
+                    appended = 0
+                    stored = {}
+                    for pool_id, (hist_df, validators) in pool_data.items():
+                        try:
+                            appended += self.corpus.append(pool_id, hist_df)
+                        except Exception as e:
+                            self.logger.error(f"Corpus append failed for {pool_id}: {e}")
+                            continue
+                        stored[pool_id] = validators
+                    self.history_fetcher.commit_validators(stored)
                     
-                    # Prepare sequences
-                    new_sequences = self.prepare_sequences(pool_data)
-                    self.training_data_buffer.extend(new_sequences)
-                    
-                    self.logger.info(f"Buffer now has {len(self.training_data_buffer)} sequences")
+                    self.pending_rows += appended
+                    self.metrics["last_collection"] = self.history_fetcher.last_stats
+                    corpus_summary = self.corpus.summary()
+                    self.logger.info(
+                        f"Appended {appended} rows. Corpus now has {corpus_summary['rows']} rows "
+                        f"across {corpus_summary['pools']} pools"
+                    )
                 
                 # Update predictions
                 self.update_predictions_cache()
@@ -444,19 +395,18 @@ class ContinuousLearner:
         while not self.stop_event.is_set():
             try:
                 # Check if we have enough new data
-                if len(self.training_data_buffer) >= self.min_new_samples:
-                    self.logger.info(f"Starting retraining with {len(self.training_data_buffer)} samples...")
-                    
-                    # Train on buffer
-                    self.train_step(self.training_data_buffer)
+                if self.pending_rows >= self.min_new_samples:
+                    self.logger.info(f"Starting retraining with {self.pending_rows} new rows...")
                     
-                    # Clear buffer after training (keep some for continuity)
-                    self.training_data_buffer = self.training_data_buffer[-500:]
+                    # Train on recent windows (replay window keeps continuity)
+                    self.train_step(since_ts=time.time() - self.replay_window_hours * 3600)
+                    self.pending_rows = 0
                 
                 elif self.last_retrain is None:
-                    # First run - train on whatever we have
-                    if len(self.training_data_buffer) > 0:
-                        self.train_step(self.training_data_buffer)
+                    # First run - train on the full corpus history
+                    if self.corpus.num_rows() > 0:
+                        self.train_step()
+                        self.pending_rows = 0
                 
             except Exception as e:
                 self.logger.error(f"Training error: {e}")
@@ -504,7 +454,8 @@ class ContinuousLearner:
             "device": str(self.device),
             "last_retrain": self.last_retrain.isoformat() if self.last_retrain else None,
             "last_data_fetch": self.last_data_fetch.isoformat() if self.last_data_fetch else None,
-            "buffer_size": len(self.training_data_buffer),
+            "pending_rows": self.pending_rows,
+            "corpus": self.corpus.summary(),
             "cache_size": len(self.prediction_cache),
             "cache_timestamp": self.cache_timestamp.isoformat() if self.cache_timestamp else None,
             "metrics": self.metrics
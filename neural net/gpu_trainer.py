@@ -22,10 +22,11 @@ import pandas as pd
 import requests
 import torch
 import torch.nn as nn
-from torch.utils.data import DataLoader, TensorDataset
+from torch.utils.data import DataLoader, Subset
 from tqdm import tqdm
 
 from src.yield_predictor import YieldTransformer, YieldLoss
+from src.training_corpus import TrainingCorpus, CorpusSequenceDataset
 
 # Suppress pandas warnings
 pd.set_option('future.no_silent_downcasting', True)
@@ -110,6 +111,7 @@ class GPUTrainer:
         }
         self.stop_flag = False
         self._throttler = GPUThrottler(max_util_pct=max_gpu_util)
+        self.corpus = TrainingCorpus()
         
     def _check_gpu(self) -> torch.device:
         """Check for GPU and return device."""
@@ -151,8 +153,8 @@ class GPUTrainer:
                     pass
             time.sleep(0.5)
     
-    def fetch_data(self) -> list:
-        """Fetch training data from DeFiLlama."""
+    def fetch_data(self) -> CorpusSequenceDataset:
+        """Fetch new DeFiLlama history into the on-disk corpus and return a streaming dataset."""
         print("\n" + "-" * 60)
         print("  FETCHING DATA FROM DEFILLAMA")
         print("-" * 60)
@@ -173,9 +175,9 @@ class GPUTrainer:
         
         print(f"  [OK] Found {len(stablecoin_pools)} stablecoin pools")
         
-        # Fetch historical data
-        print("  [2/3] Fetching historical data (this may take a minute)...")
-        pool_data = {}
+        # Fetch historical data (only points newer than what the corpus holds)
+        print("  [2/3] Fetching new historical points...")
+        appended = 0
         
         for idx, row in tqdm(stablecoin_pools.iterrows(), total=len(stablecoin_pools), desc="  Downloading"):
             pool_id = row.get("pool", "")
@@ -185,64 +187,32 @@ class GPUTrainer:
                 if resp.status_code == 200:
                     points = resp.json().get("data", [])
                     if points:
-                        hist_df = pd.DataFrame(points)
-                        hist_df["timestamp"] = pd.to_datetime(hist_df["timestamp"])
-                        hist_df["pool_id"] = pool_id
-                        pool_data[pool_id] = hist_df
+                        appended += self.corpus.append(pool_id, pd.DataFrame(points))
                 time.sleep(0.3)  # Rate limit
             except Exception as e:
                 continue
         
-        print(f"  [OK] Downloaded data for {len(pool_data)} pools")
+        summary = self.corpus.summary()
+        print(f"  [OK] Appended {appended} rows (corpus: {summary['rows']} rows, {summary['pools']} pools)")
         
-        # Prepare sequences
-        print("  [3/3] Preparing training sequences...")
-        sequences = []
-        
-        for pool_id, df in pool_data.items():
-            if df is None or len(df) < 200:
-                continue
-            
-            # Create features
-            df["apy_ma7"] = df["apy"].rolling(7, min_periods=1).mean()
-            df["apy_ma30"] = df["apy"].rolling(30, min_periods=1).mean()
-            df["apy_vol"] = df["apy"].rolling(7, min_periods=1).std()
-            df["tvl_change"] = df["tvlUsd"].pct_change()
-            df = df.infer_objects(copy=False).ffill().bfill().fillna(0)
-            
-            # Create sequences
-            seq_length = 168
-            feature_cols = ["apy", "apy_ma7", "apy_ma30", "apy_vol", "tvlUsd", "tvl_change"]
-            
-            for i in range(len(df) - seq_length - 720):
-                seq = df[feature_cols].iloc[i:i+seq_length].values
-                
-                # Multi-horizon targets
-                targets = []
-                for h in [1, 24, 168, 720]:
-                    if i + seq_length + h < len(df):
-                        targets.append(df["apy"].iloc[i + seq_length + h])
-                    else:
-                        targets.append(df["apy"].iloc[-1])
-                
-                # Pad to 20 features
-                if seq.shape[1] < 20:
-                    pad = np.zeros((seq.shape[0], 20 - seq.shape[1]))
-                    seq = np.concatenate([seq, pad], axis=1)
-                
-                sequences.append({
-                    "features": seq.astype(np.float32),
-                    "targets": np.array(targets, dtype=np.float32)
-                })
+        # Stream sequences from disk
+        print("  [3/3] Indexing training sequences...")
+        self.normalization_params = self.corpus.feature_stats(n_features=20)
+        dataset = CorpusSequenceDataset(
+            self.corpus,
+            seq_length=168,
+            n_features=20,
+            normalization_params=self.normalization_params
+        )
         
-        print(f"  [OK] Generated {len(sequences)} training sequences")
-        self.training_stats["total_samples"] = len(sequences)
+        print(f"  [OK] {len(dataset)} training sequences available")
+        self.training_stats["total_samples"] = len(dataset)
         
-        return sequences
+        return dataset
     
-    def train(self, sequences: list, epochs: int = 50, batch_size: int = 64):
+    def train(self, dataset: CorpusSequenceDataset, epochs: int = 50, batch_size: int = 64):
         """Train the model with GPU and adaptive throttling."""
-        if not sequences:
+        if len(dataset) < 2:
             print("  [ERROR] No training data!")
             return
         
@@ -254,23 +224,13 @@ class GPUTrainer:
         gpu_monitor = threading.Thread(target=self._update_gpu_stats, daemon=True)
         gpu_monitor.start()
         
-        # Prepare data
-        X = np.array([s["features"] for s in sequences])
-        y = np.array([s["targets"] for s in sequences])
-        
-        # Normalization
-        X_mean = X.mean(axis=(0, 1), keepdims=True)
-        X_std = X.std(axis=(0, 1), keepdims=True) + 1e-8
-        self.normalization_params = {"mean": X_mean, "std": X_std}
-        X_norm = (X - X_mean) / X_std
-        
-        # Split
-        n_train = int(len(X) * 0.8)
-        X_train, X_val = X_norm[:n_train], X_norm[n_train:]
-        y_train, y_val = y[:n_train], y[n_train:]
+        # Split (normalization is applied per item by the dataset)
+        n_train = int(len(dataset) * 0.8)
+        train_set = Subset(dataset, range(n_train))
+        val_set = Subset(dataset, range(n_train, len(dataset)))
         
-        print(f"  Training samples: {len(X_train)}")
-        print(f"  Validation samples: {len(X_val)}")
+        print(f"  Training samples: {len(train_set)}")
+        print(f"  Validation samples: {len(val_set)}")
         print(f"  Epochs: {epochs}")
         print(f"  Batch size: {batch_size}")
         print(f"  Device: {self.device}")
@@ -278,12 +238,10 @@ class GPUTrainer:
         
         # DataLoaders
         train_loader = DataLoader(
-            TensorDataset(torch.tensor(X_train), torch.tensor(y_train)),
-            batch_size=batch_size, shuffle=True, pin_memory=True
+            train_set, batch_size=batch_size, shuffle=True, pin_memory=True
         )
         val_loader = DataLoader(
-            TensorDataset(torch.tensor(X_val), torch.tensor(y_val)),
-            batch_size=batch_size, pin_memory=True
+            val_set, batch_size=batch_size, pin_memory=True
         )
         
         # Initialize model
@@ -398,9 +356,9 @@ class GPUTrainer:
     
     def run(self, epochs: int = 50):
         """Run the full training pipeline."""
-        sequences = self.fetch_data()
-        if sequences:
-            self.train(sequences, epochs=epochs)
+        dataset = self.fetch_data()
+        if len(dataset) > 0:
+            self.train(dataset, epochs=epochs)
             print("\n" + "=" * 60)
             print("  TRAINING COMPLETE!")
             print(f"  Model saved to: models/yield_predictor/best_model.pt")
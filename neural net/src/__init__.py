@@ -14,6 +14,8 @@ from .yield_predictor import YieldPredictor
 from .risk_scorer import RiskScorer
 from .allocation_optimizer import AllocationOptimizer
 from .data_pipeline import DataPipeline
+from .training_corpus import TrainingCorpus, CorpusSequenceDataset
+from .history_fetcher import DefiLlamaHistoryFetcher
 from .utils import load_config, setup_logging
 
 __version__ = "1.0.0"
@@ -22,6 +24,9 @@ __all__ = [
     "RiskScorer",
     "AllocationOptimizer",
     "DataPipeline",
+    "TrainingCorpus",
+    "CorpusSequenceDataset",
+    "DefiLlamaHistoryFetcher",
     "load_config",
     "setup_logging",
 ]
\ No newline at end of file
@@ -8,13 +8,23 @@ DeFi yield strategies. Uses PPO (Proximal Policy Optimization) for
 stable learning in the complex DeFi environment.
 """
 
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
+from collections import deque
 import numpy as np
 
 from .utils import load_config, setup_logging
 
+try:
+    import gymnasium
+    from stable_baselines3.common.vec_env import VecEnv as _SB3VecEnv
+    SB3_AVAILABLE = True
+except ImportError:
+    gymnasium = None
+    _SB3VecEnv = object
+    SB3_AVAILABLE = False
+
 
 @dataclass
 class AllocationDecision:
@@ -57,7 +67,8 @@ class AllocationEnvironment:
         initial_tvl: float = 1_000_000,
         transaction_cost: float = 0.001,
         gas_cost_weight: float = 0.0001,
-        max_steps: int = 1000
+        max_steps: int = 1000,
+        history_size: int = 1000
     ):
         """
         Initialize the environment.
@@ -68,6 +79,7 @@ class AllocationEnvironment:
             transaction_cost: Cost per transaction (fraction)
             gas_cost_weight: Weight for gas costs in reward
             max_steps: Maximum steps per episode
+            history_size: Steps of history kept (ring buffer); 0 disables
         """
         self.strategies = strategies
         self.n_strategies = len(strategies)
@@ -75,12 +87,13 @@ class AllocationEnvironment:
         self.transaction_cost = transaction_cost
         self.gas_cost_weight = gas_cost_weight
         self.max_steps = max_steps
+        self.history_size = history_size
         
         # State variables
         self.current_step = 0
         self.current_allocations = np.zeros(self.n_strategies)
         self.tvl = initial_tvl
-        self.history = []
+        self.history = deque(maxlen=history_size)
         
         # Action and observation spaces
         self.action_dim = self.n_strategies
@@ -97,7 +110,7 @@ class AllocationEnvironment:
         self.current_step = 0
         self.current_allocations = np.zeros(self.n_strategies)
         self.tvl = self.initial_tvl
-        self.history = []
+        self.history.clear()
         
         return self._get_observation()
     
@@ -170,12 +183,13 @@ class AllocationEnvironment:
         self.tvl = self.tvl * (1 + yield_earned) - transaction_costs - gas_costs
         
         # Record history
-        self.history.append({
-            "step": self.current_step,
-            "allocations": weights.copy(),
-            "reward": reward,
-            "tvl": self.tvl
-        })
+        if self.history_size:
+            self.history.append({
+                "step": self.current_step,
+                "allocations": weights.copy(),
+                "reward": reward,
+                "tvl": self.tvl
+            })
         
         # Check if done
         done = self.current_step >= self.max_steps
@@ -267,6 +281,258 @@ class AllocationEnvironment:
         return hhi * 0.05
 
 
+class VectorizedAllocationEnvironment:
+    """
+    N independent copies of AllocationEnvironment stepped in lockstep.
+    
+    All state is held as batched NumPy arrays (allocations are
+    (n_envs, n_strategies)), so one step costs a handful of array ops
+    regardless of n_envs. Episodes that finish are reset automatically,
+    following the VecEnv convention.
+    """
+    
+    def __init__(
+        self,
+        strategies: List[Strategy],
+        n_envs: int = 8,
+        initial_tvl: float = 1_000_000,
+        transaction_cost: float = 0.001,
+        gas_cost_weight: float = 0.0001,
+        max_steps: int = 1000,
+        history_size: int = 0,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the vectorized environment.
+        
+        Args:
+            strategies: List of available strategies (shared by every env)
+            n_envs: Number of parallel simulations
+            initial_tvl: Initial total value to allocate
+            transaction_cost: Cost per transaction (fraction)
+            gas_cost_weight: Weight for gas costs in reward
+            max_steps: Maximum steps per episode
+            history_size: Steps of (allocations, reward, tvl) kept in a ring buffer; 0 disables
+            seed: Seed for the yield noise generator
+        """
+        self.strategies = strategies
+        self.n_envs = n_envs
+        self.n_strategies = len(strategies)
+        self.initial_tvl = initial_tvl
+        self.transaction_cost = transaction_cost
+        self.gas_cost_weight = gas_cost_weight
+        self.max_steps = max_steps
+        self.history_size = history_size
+        self.rng = np.random.default_rng(seed)
+        
+        # Per-strategy constants
+        self.predicted_apy = np.array([s.predicted_apy for s in strategies], dtype=np.float64)
+        self.risk_scores = np.array([s.risk_score for s in strategies], dtype=np.float64)
+        self.max_capacity = np.array([s.max_capacity for s in strategies], dtype=np.float64)
+        self.risk_caps = np.array([_risk_cap(s.risk_score) for s in strategies], dtype=np.float64)
+        self.risk_factors = (100.0 - self.risk_scores) / 100.0
+        self.gas_costs = self.n_strategies * self.gas_cost_weight * 100  # Simplified gas estimate
+        self._static_obs = np.array(
+            [[s.current_apy, s.predicted_apy, s.risk_score / 100.0, s.tvl / 1e9] for s in strategies],
+            dtype=np.float32
+        )
+        
+        # Batched state
+        self.current_step = np.zeros(n_envs, dtype=np.int64)
+        self.current_allocations = np.zeros((n_envs, self.n_strategies))
+        self.tvl = np.full(n_envs, float(initial_tvl))
+        
+        # Optional history ring buffer
+        self._hist_pos = 0
+        self._hist_len = 0
+        if history_size:
+            self._hist_alloc = np.zeros((history_size, n_envs, self.n_strategies), dtype=np.float32)
+            self._hist_reward = np.zeros((history_size, n_envs), dtype=np.float32)
+            self._hist_tvl = np.zeros((history_size, n_envs), dtype=np.float64)
+        
+        self.action_dim = self.n_strategies
+        self.obs_dim = self.n_strategies * 5 + 3
+    
+    def reset(self, env_mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Reset all environments, or only those selected by a boolean mask."""
+        if env_mask is None:
+            env_mask = np.ones(self.n_envs, dtype=bool)
+            self._hist_pos = 0
+            self._hist_len = 0
+        self.current_step[env_mask] = 0
+        self.current_allocations[env_mask] = 0.0
+        self.tvl[env_mask] = self.initial_tvl
+        return self._get_observation()
+    
+    def _get_observation(self) -> np.ndarray:
+        """Batched observation of shape (n_envs, obs_dim)."""
+        obs = np.empty((self.n_envs, self.obs_dim), dtype=np.float32)
+        per_strategy = obs[:, :self.n_strategies * 5].reshape(self.n_envs, self.n_strategies, 5)
+        per_strategy[:, :, :4] = self._static_obs
+        per_strategy[:, :, 4] = self.current_allocations
+        
+        # Global features
+        obs[:, -3] = self.tvl / 1e9
+        obs[:, -2] = self.current_step / self.max_steps
+        obs[:, -1] = 0.5  # Placeholder for market conditions
+        return obs
+    
+    def normalize_actions(self, actions: np.ndarray) -> np.ndarray:
+        """Batched equivalent of AllocationEnvironment._normalize_action."""
+        weights = np.maximum(np.asarray(actions, dtype=np.float64).reshape(self.n_envs, -1), 0)
+        
+        total = weights.sum(axis=1, keepdims=True)
+        weights = np.where(total > 0, weights / np.where(total > 0, total, 1.0), 1.0 / self.n_strategies)
+        
+        # Risk-score and capacity caps
+        weights = np.minimum(weights, self.risk_caps)
+        capacity_weight = self.max_capacity / self.tvl[:, None]
+        weights = np.where(self.max_capacity > 0, np.minimum(weights, capacity_weight), weights)
+        
+        total = weights.sum(axis=1, keepdims=True)
+        return np.where(total > 0, weights / np.where(total > 0, total, 1.0), weights)
+    
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[dict]]:
+        """
+        Step every environment.
+        
+        Args:
+            actions: Target allocation weights, shape (n_envs, n_strategies)
+            
+        Returns:
+            Tuple of (observations, rewards, dones, infos). For finished
+            envs the returned observation is already from the reset state and
+            the final one is in infos[i]["terminal_observation"].
+        """
+        self.current_step += 1
+        weights = self.normalize_actions(actions)
+        
+        # Rebalancing costs
+        turnover = np.abs(weights - self.current_allocations).sum(axis=1)
+        transaction_costs = turnover * self.tvl * self.transaction_cost
+        self.current_allocations = weights
+        
+        # Yield with per-strategy noise (assuming daily steps)
+        noise = self.rng.normal(0, 0.1, size=weights.shape)
+        yield_earned = (self.predicted_apy * (1 + noise) * weights).sum(axis=1) / 365
+        
+        risk_penalty = (self.risk_factors * weights).sum(axis=1) * 0.1
+        concentration_penalty = np.square(weights).sum(axis=1) * 0.05
+        
+        rewards = (
+            yield_earned
+            - risk_penalty
+            - concentration_penalty
+            - transaction_costs
+            - self.gas_costs
+        )
+        
+        self.tvl = self.tvl * (1 + yield_earned) - transaction_costs - self.gas_costs
+        
+        if self.history_size:
+            self._hist_alloc[self._hist_pos] = weights
+            self._hist_reward[self._hist_pos] = rewards
+            self._hist_tvl[self._hist_pos] = self.tvl
+            self._hist_pos = (self._hist_pos + 1) % self.history_size
+            self._hist_len = min(self._hist_len + 1, self.history_size)
+        
+        dones = self.current_step >= self.max_steps
+        obs = self._get_observation()
+        infos = [
+            {
+                "yield_earned": float(yield_earned[i]),
+                "risk_penalty": float(risk_penalty[i]),
+                "transaction_costs": float(transaction_costs[i]),
+                "tvl": float(self.tvl[i])
+            }
+            for i in range(self.n_envs)
+        ]
+        
+        if dones.any():
+            for i in np.flatnonzero(dones):
+                infos[i]["terminal_observation"] = obs[i].copy()
+                infos[i]["TimeLimit.truncated"] = True
+            obs = self.reset(dones)
+        
+        return obs, rewards.astype(np.float32), dones, infos
+    
+    def get_history(self) -> Dict[str, np.ndarray]:
+        """Recorded history in chronological order, shaped (steps, n_envs, ...)."""
+        if not self.history_size or self._hist_len == 0:
+            return {
+                "allocations": np.empty((0, self.n_envs, self.n_strategies), dtype=np.float32),
+                "rewards": np.empty((0, self.n_envs), dtype=np.float32),
+                "tvl": np.empty((0, self.n_envs))
+            }
+        order = (np.arange(self._hist_len) + self._hist_pos - self._hist_len) % self.history_size
+        return {
+            "allocations": self._hist_alloc[order],
+            "rewards": self._hist_reward[order],
+            "tvl": self._hist_tvl[order]
+        }
+
+
+class AllocationVecEnv(_SB3VecEnv):
+    """
+    stable-baselines3 VecEnv adapter over VectorizedAllocationEnvironment.
+    
+    Stepping is done in one batched NumPy call instead of looping over
+    n_envs Python environments as DummyVecEnv does.
+    """
+    
+    def __init__(self, strategies: List[Strategy], n_envs: int = 8, **env_kwargs):
+        if not SB3_AVAILABLE:
+            raise ImportError("AllocationVecEnv requires stable-baselines3 and gymnasium")
+        self.core = VectorizedAllocationEnvironment(strategies, n_envs=n_envs, **env_kwargs)
+        observation_space = gymnasium.spaces.Box(-np.inf, np.inf, shape=(self.core.obs_dim,), dtype=np.float32)
+        action_space = gymnasium.spaces.Box(0.0, 1.0, shape=(self.core.action_dim,), dtype=np.float32)
+        super().__init__(n_envs, observation_space, action_space)
+        self._actions = None
+    
+    def reset(self) -> np.ndarray:
+        return self.core.reset()
+    
+    def step_async(self, actions: np.ndarray) -> None:
+        self._actions = actions
+    
+    def step_wait(self):
+        return self.core.step(self._actions)
+    
+    def seed(self, seed: Optional[int] = None) -> List[Optional[int]]:
+        self.core.rng = np.random.default_rng(seed)
+        return [seed] * self.num_envs
+    
+    def close(self) -> None:
+        pass
+    
+    def get_attr(self, attr_name: str, indices=None) -> List[Any]:
+        return [getattr(self.core, attr_name)] * len(self._get_indices(indices))
+    
+    def set_attr(self, attr_name: str, value: Any, indices=None) -> None:
+        setattr(self.core, attr_name, value)
+    
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> List[Any]:
+        result = getattr(self.core, method_name)(*method_args, **method_kwargs)
+        return [result] * len(self._get_indices(indices))
+    
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False] * len(self._get_indices(indices))
+
+
+def _risk_cap(risk_score: int) -> float:
+    """Maximum allocation for a risk score (matches AllocationEnvironment)."""
+    if risk_score >= 90:
+        return 0.15
+    elif risk_score >= 80:
+        return 0.10
+    elif risk_score >= 70:
+        return 0.05
+    elif risk_score >= 50:
+        return 0.02
+    else:
+        return 0.0
+
+
 class AllocationOptimizer:
     """
     RL-based allocation optimizer using PPO.
@@ -595,7 +861,8 @@ class AllocationOptimizer:
         self,
         strategies: List[Strategy],
         total_timesteps: int = 100000,
-        save_path: Optional[str] = None
+        save_path: Optional[str] = None,
+        n_envs: int = 16
     ):
         """
         Train the RL agent.
@@ -604,23 +871,32 @@ class AllocationOptimizer:
             strategies: List of strategies for training environment
             total_timesteps: Number of training steps
             save_path: Path to save trained model
+            n_envs: Parallel simulations stepped per rollout step
         """
         try:
             from stable_baselines3 import PPO
-            from stable_baselines3.common.vec_env import DummyVecEnv
             
-            # Create environment
-            env = AllocationEnvironment(strategies=strategies)
+            env_config = self.config.get("allocation_optimizer", {}).get("environment", {})
+            
+            # Natively vectorized environment (one batched step for all envs)
+            vec_env = AllocationVecEnv(
+                strategies,
+                n_envs=n_envs,
+                initial_tvl=env_config.get("initial_tvl", 1_000_000),
+                transaction_cost=env_config.get("transaction_cost", 0.001),
+                gas_cost_weight=env_config.get("gas_cost_weight", 0.0001),
+                max_steps=env_config.get("max_steps", 1000)
+            )
             
-            # Wrap in vector environment
-            vec_env = DummyVecEnv([lambda: env])
+            # Keep the rollout size of the config, spread across envs
+            n_steps = max(self.agent_config.get("n_steps", 2048) // n_envs, 16)
             
             # Create model
             self._model = PPO(
                 "MlpPolicy",
                 vec_env,
                 learning_rate=self.agent_config.get("learning_rate", 0.0003),
-                n_steps=self.agent_config.get("n_steps", 2048),
+                n_steps=n_steps,
                 batch_size=self.agent_config.get("batch_size", 64),
                 n_epochs=self.agent_config.get("n_epochs", 10),
                 gamma=self.agent_config.get("gamma", 0.99),
@@ -0,0 +1,250 @@
+# Created: 2026-10-19
+"""
+Kerne History Fetcher - Concurrent DeFiLlama Chart Downloads
+=============================================================
+
+Fetches `/chart/{pool}` history for many pools at once over a single
+pooled aiohttp session. A global token bucket keeps the aggregate request
+rate under DeFiLlama's limits, and ETag / Last-Modified validators are
+replayed as conditional requests so unchanged pools cost a 304 instead of
+a full history download.
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import aiohttp
+import pandas as pd
+
+from .utils import setup_logging
+
+
+CHART_URL = "https://yields.llama.fi/chart/{pool_id}"
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket shared by every coroutine of one fetch cycle. Its lock binds
+    to the running event loop, so build a new one per loop.
+    """
+
+    def __init__(self, rate_per_sec: float, burst: Optional[int] = None):
+        self.rate = rate_per_sec
+        self.capacity = burst or max(1, int(rate_per_sec))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request token is available."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class DefiLlamaHistoryFetcher:
+    """
+    Concurrent, rate-limited DeFiLlama chart fetcher.
+
+    Validators are persisted to `validators_path` so conditional requests
+    survive restarts. They are returned with each frame and only recorded via
+    commit_validators() once the caller has stored that frame, so a failed
+    or interrupted append never turns into a 304 for data we don't hold. Stats for the most recent cycle (wall-clock time,
+    fetched / not modified / failed counts) are kept in `last_stats`.
+    """
+
+    def __init__(
+        self,
+        rate_per_sec: float = 5.0,
+        max_concurrency: int = 16,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        validators_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            rate_per_sec: Global request budget across all pools
+            max_concurrency: Max in-flight requests (also the connection pool size)
+            timeout: Per-request timeout in seconds
+            max_retries: Retries on 429 / 5xx / transport errors
+            validators_path: JSON file for ETag / Last-Modified per pool
+        """
+        self.logger = setup_logging("HistoryFetcher")
+        self.rate_per_sec = rate_per_sec
+        self.max_concurrency = max_concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.validators_path = Path(validators_path) if validators_path else None
+        self.validators: Dict[str, Dict[str, str]] = self._load_validators()
+        self.last_stats: Dict = {}
+
+    def _load_validators(self) -> Dict[str, Dict[str, str]]:
+        if self.validators_path and self.validators_path.exists():
+            try:
+                with open(self.validators_path, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                self.logger.warning(f"Ignoring unreadable validators file: {e}")
+        return {}
+
+    def _save_validators(self):
+        if not self.validators_path:
+            return
+        self.validators_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.validators_path.with_name(self.validators_path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.validators, f)
+        os.replace(tmp, self.validators_path)
+
+    def commit_validators(self, validators: Dict[str, Dict[str, str]]):
+        """Record validators for pools whose history has been stored, and persist them."""
+        validators = {pool_id: v for pool_id, v in validators.items() if v and any(v.values())}
+        if not validators:
+            return
+        self.validators.update(validators)
+        self._save_validators()
+
+    def _conditional_headers(self, pool_id: str, conditional: bool) -> Dict[str, str]:
+        headers = {}
+        if not conditional:
+            return headers
+        cached = self.validators.get(pool_id, {})
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
+    async def _fetch_one(
+        self,
+        session: aiohttp.ClientSession,
+        limiter: AsyncRateLimiter,
+        semaphore: asyncio.Semaphore,
+        pool_id: str,
+        stats: Dict,
+        conditional: bool,
+    ) -> Optional[Tuple[pd.DataFrame, Dict[str, str]]]:
+        url = CHART_URL.format(pool_id=pool_id)
+        headers = self._conditional_headers(pool_id, conditional)
+
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire()
+            delay = None
+            try:
+                async with semaphore:
+                    async with session.get(url, headers=headers) as resp:
+                        if resp.status == 304:
+                            stats["not_modified"] += 1
+                            return None
+
+                        if resp.status == 429 or resp.status >= 500:
+                            retry_after = resp.headers.get("Retry-After")
+                            delay = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt
+                            stats["retries"] += 1
+                        elif resp.status != 200:
+                            stats["failed"] += 1
+                            return None
+                        else:
+                            payload = await resp.json(content_type=None)
+                            validators = {
+                                "etag": resp.headers.get("ETag"),
+                                "last_modified": resp.headers.get("Last-Modified"),
+                            }
+
+            except ValueError as e:
+                # Malformed JSON body on a 200
+                self.logger.warning(f"Unreadable history for {pool_id}: {e}")
+                stats["failed"] += 1
+                return None
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.max_retries:
+                    self.logger.warning(f"History fetch failed for {pool_id}: {e}")
+                    stats["failed"] += 1
+                    return None
+                stats["retries"] += 1
+                delay = 2 ** attempt
+
+            if delay is not None:
+                # Back off outside the semaphore so other pools keep the connection slots
+                await asyncio.sleep(delay)
+                continue
+
+            if not isinstance(payload, dict):
+                self.logger.warning(f"Unexpected history payload for {pool_id}: {type(payload).__name__}")
+                stats["failed"] += 1
+                return None
+            points = payload.get("data")
+            if not points:
+                stats["empty"] += 1
+                return None
+
+            try:
+                df = pd.DataFrame(points)
+                df["timestamp"] = pd.to_datetime(df["timestamp"])
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.warning(f"Unreadable history for {pool_id}: {e}")
+                stats["failed"] += 1
+                return None
+            df["pool_id"] = pool_id
+            stats["fetched"] += 1
+            return df, validators
+
+        stats["failed"] += 1
+        return None
+
+    async def fetch_many(
+        self, pool_ids: Iterable[str], known_pools: Optional[Iterable[str]] = None
+    ) -> Dict[str, Tuple[pd.DataFrame, Dict[str, str]]]:
+        """
+        Fetch history for every pool concurrently.
+
+        Args:
+            pool_ids: Pools to fetch
+            known_pools: Pools the caller already holds history for. Stored
+                validators are replayed only for these (default: all pools).
+
+        Returns:
+            Dict of pool_id -> (DataFrame, validators) for pools that returned
+            new data. Pools answering 304 Not Modified are omitted. Pass the
+            validators of stored frames to commit_validators().
+        """
+        pool_ids = [p for p in dict.fromkeys(pool_ids) if p]
+        known = None if known_pools is None else set(known_pools)
+        stats = {"pools": len(pool_ids), "fetched": 0, "not_modified": 0, "empty": 0, "failed": 0, "retries": 0}
+        # Loop-bound primitives are built per call: fetch_many_sync runs each cycle on a fresh loop
+        limiter = AsyncRateLimiter(self.rate_per_sec)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+
+        start = time.perf_counter()
+        async with aiohttp.ClientSession(connector=connector, timeout=self.timeout) as session:
+            results = await asyncio.gather(
+                *(self._fetch_one(session, limiter, semaphore, pool_id, stats, known is None or pool_id in known)
+                  for pool_id in pool_ids)
+            )
+        stats["wall_time_s"] = round(time.perf_counter() - start, 3)
+
+        self.last_stats = stats
+        self.logger.info(
+            f"Collected {stats['pools']} pools in {stats['wall_time_s']:.2f}s "
+            f"({stats['fetched']} new, {stats['not_modified']} not modified, "
+            f"{stats['failed']} failed, {stats['retries']} retries)"
+        )
+
+        return {pool_id: result for pool_id, result in zip(pool_ids, results) if result is not None}
+
+    def fetch_many_sync(
+        self, pool_ids: Iterable[str], known_pools: Optional[Iterable[str]] = None
+    ) -> Dict[str, Tuple[pd.DataFrame, Dict[str, str]]]:
+        """Blocking wrapper for callers running in worker threads."""
+        return asyncio.run(self.fetch_many(pool_ids, known_pools))
@@ -0,0 +1,440 @@
+# Created: 2026-10-19
+"""
+Kerne Training Corpus - Persistent On-Disk Yield History
+=========================================================
+
+Append-only store of per-pool yield history used to train the
+YieldTransformer. Each pool owns a directory of NumPy shards that are
+memory-mapped on read, plus a JSON index of the time range covered by
+every shard. Training jobs stream fixed-length windows straight from the
+shards, so RAM stays flat no matter how much history has accumulated.
+
+Layout:
+    <root>/index.json
+    <root>/<pool_id>/00000.ts.npy     int64 unix seconds, shape (n,)
+    <root>/<pool_id>/00000.feat.npy   float32 features, shape (n, len(FEATURE_COLS))
+"""
+
+import os
+import re
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from torch.utils.data import Dataset
+
+from .utils import setup_logging
+
+
+FEATURE_COLS = ["apy", "apy_ma7", "apy_ma30", "apy_vol", "tvlUsd", "tvl_change"]
+HORIZONS = (1, 24, 168, 720)
+
+# Rows of raw history needed to recompute rolling features at the seam
+# between stored data and a freshly appended batch.
+_CONTEXT_ROWS = 30
+_APY_COL = FEATURE_COLS.index("apy")
+_TVL_COL = FEATURE_COLS.index("tvlUsd")
+
+
+def _pool_dirname(pool_id: str) -> str:
+    """Filesystem-safe directory name for a pool id."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", pool_id)
+
+
+def _atomic_save(path: Path, array: np.ndarray):
+    """Write an .npy file via a temp file so readers never see a partial shard."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _load_rows(path: Path, rows: int) -> np.ndarray:
+    """
+    Memory-map a shard file and cut it to the `rows` the index vouches for.
+    A crash between writing a shard's files and saving the index can leave
+    rows beyond that count; they are not part of the corpus.
+    """
+    return np.load(path, mmap_mode="r")[:rows]
+
+
+def compute_features(df: pd.DataFrame) -> np.ndarray:
+    """
+    Derive the training feature matrix from raw DeFiLlama chart points.
+
+    Args:
+        df: DataFrame with at least `apy` and `tvlUsd` columns, time ordered
+
+    Returns:
+        float32 array of shape (len(df), len(FEATURE_COLS))
+    """
+    df = df[["apy", "tvlUsd"]].astype(float).copy()
+    df["apy_ma7"] = df["apy"].rolling(7, min_periods=1).mean()
+    df["apy_ma30"] = df["apy"].rolling(30, min_periods=1).mean()
+    df["apy_vol"] = df["apy"].rolling(7, min_periods=1).std()
+    df["tvl_change"] = df["tvlUsd"].pct_change()
+    df = df.replace([np.inf, -np.inf], np.nan).ffill().bfill().fillna(0)
+    return df[FEATURE_COLS].to_numpy(dtype=np.float32)
+
+
+class TrainingCorpus:
+    """
+    Append-only, memory-mapped training corpus keyed by pool.
+
+    New points are only ever appended after the last stored timestamp.
+    The newest shard of each pool stays open (rewritten atomically) until
+    it holds `shard_rows` rows, after which it is sealed and never touched
+    again.
+    """
+
+    def __init__(self, root: Optional[str] = None, shard_rows: int = 8192):
+        """
+        Initialize the corpus.
+
+        Args:
+            root: Corpus directory. Defaults to ../data/corpus
+            shard_rows: Rows per shard before it is sealed
+        """
+        self.root = Path(root) if root else Path(__file__).parent.parent / "data" / "corpus"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.shard_rows = shard_rows
+        self.logger = setup_logging("TrainingCorpus")
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _load_index(self) -> Dict:
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, "r") as f:
+                    return json.load(f)
+            except Exception as e:
+                self.logger.warning(f"Corpus index unreadable ({e}). Starting empty.")
+        return {"pools": {}}
+
+    def _save_index(self):
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+
+    def pools(self) -> List[str]:
+        """Pool ids present in the corpus."""
+        return list(self.index["pools"].keys())
+
+    def last_timestamp(self, pool_id: str) -> Optional[int]:
+        """Unix timestamp of the newest stored point for a pool, or None."""
+        entry = self.index["pools"].get(pool_id)
+        return entry["last_ts"] if entry else None
+
+    def num_rows(self, pool_id: Optional[str] = None) -> int:
+        """Stored rows for one pool, or for the whole corpus."""
+        if pool_id is not None:
+            entry = self.index["pools"].get(pool_id)
+            return entry["rows"] if entry else 0
+        return sum(e["rows"] for e in self.index["pools"].values())
+
+    def summary(self) -> Dict:
+        """Small status dict for logging and health endpoints."""
+        return {
+            "pools": len(self.index["pools"]),
+            "rows": self.num_rows(),
+            "shards": sum(len(e["shards"]) for e in self.index["pools"].values()),
+        }
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append(self, pool_id: str, df: pd.DataFrame) -> int:
+        """
+        Append raw chart points for a pool.
+
+        Points at or before the last stored timestamp are dropped, so it is
+        safe to pass a full history download.
+
+        Args:
+            pool_id: DeFiLlama pool id
+            df: DataFrame with `timestamp`, `apy` and `tvlUsd` columns
+
+        Returns:
+            Number of rows actually appended
+        """
+        if df is None or df.empty:
+            return 0
+
+        ts = pd.to_datetime(df["timestamp"], utc=True).astype("int64") // 10**9
+        df = df.assign(_ts=ts.to_numpy()).sort_values("_ts").drop_duplicates("_ts", keep="last")
+
+        with self._lock:
+            last_ts = self.last_timestamp(pool_id)
+            if last_ts is not None:
+                df = df[df["_ts"] > last_ts]
+            if df.empty:
+                return 0
+
+            # Recompute rolling features with the stored tail as context so
+            # the seam matches a full recompute.
+            context = self._tail(pool_id, _CONTEXT_ROWS)
+            raw = df[["apy", "tvlUsd"]].reset_index(drop=True)
+            if len(context):
+                ctx_df = pd.DataFrame({"apy": context[:, _APY_COL], "tvlUsd": context[:, _TVL_COL]})
+                raw = pd.concat([ctx_df, raw], ignore_index=True)
+            features = compute_features(raw)[len(context):]
+
+            self._write(pool_id, df["_ts"].to_numpy(dtype=np.int64), features)
+            self._save_index()
+
+        return len(features)
+
+    def _write(self, pool_id: str, ts: np.ndarray, features: np.ndarray):
+        entry = self.index["pools"].setdefault(
+            pool_id,
+            {"dir": _pool_dirname(pool_id), "first_ts": int(ts[0]), "last_ts": None, "rows": 0, "shards": []},
+        )
+        pool_dir = self.root / entry["dir"]
+        pool_dir.mkdir(parents=True, exist_ok=True)
+
+        offset = 0
+        while offset < len(ts):
+            shards = entry["shards"]
+            if shards and shards[-1]["rows"] < self.shard_rows:
+                # Fill the open shard
+                shard = shards[-1]
+                old_ts = np.array(_load_rows(pool_dir / f"{shard['name']}.ts.npy", shard["rows"]))
+                old_feat = np.array(_load_rows(pool_dir / f"{shard['name']}.feat.npy", shard["rows"]))
+            else:
+                shard = {"name": f"{len(shards):05d}", "first_ts": int(ts[offset]), "rows": 0}
+                shards.append(shard)
+                old_ts = np.empty(0, dtype=np.int64)
+                old_feat = np.empty((0, len(FEATURE_COLS)), dtype=np.float32)
+
+            take = min(self.shard_rows - shard["rows"], len(ts) - offset)
+            new_ts = np.concatenate([old_ts, ts[offset:offset + take]])
+            new_feat = np.concatenate([old_feat, features[offset:offset + take]])
+            _atomic_save(pool_dir / f"{shard['name']}.feat.npy", new_feat)
+            _atomic_save(pool_dir / f"{shard['name']}.ts.npy", new_ts)
+
+            shard["rows"] = len(new_ts)
+            shard["last_ts"] = int(new_ts[-1])
+            offset += take
+
+        entry["rows"] += len(ts)
+        entry["last_ts"] = int(ts[-1])
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def shard_paths(self, pool_id: str) -> List[Tuple[Path, Path, int]]:
+        """(timestamp path, feature path, rows) for every shard of a pool."""
+        entry = self.index["pools"].get(pool_id)
+        if not entry:
+            return []
+        pool_dir = self.root / entry["dir"]
+        return [
+            (pool_dir / f"{s['name']}.ts.npy", pool_dir / f"{s['name']}.feat.npy", s["rows"])
+            for s in entry["shards"]
+        ]
+
+    def _tail(self, pool_id: str, n: int) -> np.ndarray:
+        """Last `n` feature rows of a pool (may span shards)."""
+        parts = []
+        remaining = n
+        for _, feat_path, rows in reversed(self.shard_paths(pool_id)):
+            if remaining <= 0:
+                break
+            feat = _load_rows(feat_path, rows)
+            parts.append(np.asarray(feat[max(rows - remaining, 0):]))
+            remaining -= rows
+        if not parts:
+            return np.empty((0, len(FEATURE_COLS)), dtype=np.float32)
+        return np.concatenate(parts[::-1])
+
+    def timestamps(self, pool_id: str) -> np.ndarray:
+        """All stored timestamps of a pool (8 bytes per row)."""
+        paths = self.shard_paths(pool_id)
+        if not paths:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([_load_rows(p, rows) for p, _, rows in paths])
+
+    def rows_through(self, pool_id: str, ts: int) -> int:
+        """
+        Number of rows of a pool stamped at or before `ts`. Shards whose
+        indexed range ends before `ts` are skipped, and only the shard
+        straddling it is binary-searched (memory-mapped).
+        """
+        entry = self.index["pools"].get(pool_id)
+        if not entry:
+            return 0
+        pool_dir = self.root / entry["dir"]
+        rows = 0
+        for shard in entry["shards"]:
+            if shard["last_ts"] <= ts:
+                rows += shard["rows"]
+                continue
+            if shard["first_ts"] <= ts:
+                shard_ts = _load_rows(pool_dir / f"{shard['name']}.ts.npy", shard["rows"])
+                rows += int(np.searchsorted(shard_ts, ts, side="right"))
+            break
+        return rows
+
+    def load_pool(self, pool_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Materialise one pool's full history as (timestamps, features)."""
+        paths = self.shard_paths(pool_id)
+        if not paths:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(FEATURE_COLS)), dtype=np.float32)
+        ts = np.concatenate([_load_rows(p, rows) for p, _, rows in paths])
+        feat = np.concatenate([_load_rows(p, rows) for _, p, rows in paths])
+        return ts, feat
+
+    def feature_stats(self, n_features: int = 20) -> Dict[str, np.ndarray]:
+        """
+        Streaming per-feature mean/std over every stored row.
+
+        Returned arrays are shaped (1, 1, n_features) to match the
+        normalization params saved with model checkpoints. Padding features
+        get mean 0 so they normalize to 0.
+        """
+        n_cols = len(FEATURE_COLS)
+        total = np.zeros(n_cols, dtype=np.float64)
+        total_sq = np.zeros(n_cols, dtype=np.float64)
+        count = 0
+        for pool_id in self.pools():
+            for _, feat_path, rows in self.shard_paths(pool_id):
+                feat = _load_rows(feat_path, rows)
+                total += feat.sum(axis=0, dtype=np.float64)
+                total_sq += np.square(feat, dtype=np.float64).sum(axis=0)
+                count += len(feat)
+
+        mean = np.zeros((1, 1, n_features), dtype=np.float32)
+        std = np.full((1, 1, n_features), 1e-8, dtype=np.float32)
+        if count:
+            col_mean = total / count
+            col_var = np.maximum(total_sq / count - col_mean ** 2, 0.0)
+            mean[0, 0, :n_cols] = col_mean
+            std[0, 0, :n_cols] = np.sqrt(col_var) + 1e-8
+        return {"mean": mean, "std": std}
+
+
+class CorpusSequenceDataset(Dataset):
+    """
+    Map-style dataset of (features, targets) windows streamed from a corpus.
+
+    Only per-pool window counts are held in memory; every item is sliced out
+    of the memory-mapped shards on demand. Memmaps are opened lazily in each
+    DataLoader worker rather than pickled across processes.
+    """
+
+    def __init__(
+        self,
+        corpus: TrainingCorpus,
+        seq_length: int = 168,
+        horizons: Sequence[int] = HORIZONS,
+        n_features: int = 20,
+        normalization_params: Optional[Dict[str, np.ndarray]] = None,
+        pools: Optional[List[str]] = None,
+        since_ts: Optional[int] = None,
+    ):
+        """
+        Args:
+            corpus: Source corpus
+            seq_length: Input window length (rows)
+            horizons: Target offsets (rows) after the end of the window
+            n_features: Width features are zero-padded to
+            normalization_params: Optional {"mean", "std"} applied per item
+            pools: Restrict to these pools (default: all)
+            since_ts: Only windows whose prediction time is after this timestamp
+        """
+        self.seq_length = seq_length
+        self.horizons = np.asarray(horizons, dtype=np.int64)
+        self.n_features = n_features
+        self.norm_mean = None
+        self.norm_std = None
+        if normalization_params:
+            self.norm_mean = np.asarray(normalization_params["mean"], dtype=np.float32).reshape(-1)
+            self.norm_std = np.asarray(normalization_params["std"], dtype=np.float32).reshape(-1)
+
+        # Per pool: shard paths, cumulative row offsets, first usable window
+        self._pools = []
+        counts = []
+        lookahead = seq_length + int(self.horizons.max())
+        for pool_id in pools or corpus.pools():
+            paths = corpus.shard_paths(pool_id)
+            rows = sum(r for _, _, r in paths)
+            n_windows = rows - lookahead
+            if n_windows <= 0:
+                continue
+
+            start = 0
+            if since_ts is not None:
+                # Window i predicts from row i + seq_length
+                start = max(corpus.rows_through(pool_id, since_ts) - seq_length, 0)
+                if start >= n_windows:
+                    continue
+
+            offsets = np.cumsum([0] + [r for _, _, r in paths])
+            self._pools.append({"feat_paths": [p for _, p, _ in paths], "offsets": offsets, "start": start})
+            counts.append(n_windows - start)
+
+        self._cum_counts = np.cumsum([0] + counts)
+        self._mmaps: Dict[str, np.ndarray] = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_mmaps"] = {}
+        return state
+
+    def __len__(self) -> int:
+        return int(self._cum_counts[-1])
+
+    def _mmap(self, path: Path) -> np.ndarray:
+        key = str(path)
+        arr = self._mmaps.get(key)
+        if arr is None:
+            arr = np.load(path, mmap_mode="r")
+            self._mmaps[key] = arr
+        return arr
+
+    def _read_rows(self, pool: Dict, start: int, stop: int) -> np.ndarray:
+        """Rows [start, stop) of a pool, stitched across shard boundaries."""
+        offsets = pool["offsets"]
+        first = int(np.searchsorted(offsets, start, side="right")) - 1
+        parts = []
+        shard = first
+        while start < stop:
+            shard_start = offsets[shard]
+            shard_stop = offsets[shard + 1]
+            take_stop = min(stop, shard_stop)
+            parts.append(self._mmap(pool["feat_paths"][shard])[start - shard_start:take_stop - shard_start])
+            start = take_stop
+            shard += 1
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def __getitem__(self, idx: int):
+        if idx < 0:
+            idx += len(self)
+        pool_idx = int(np.searchsorted(self._cum_counts, idx, side="right")) - 1
+        pool = self._pools[pool_idx]
+        i = pool["start"] + idx - int(self._cum_counts[pool_idx])
+
+        window = self._read_rows(pool, i, i + self.seq_length)
+        features = np.zeros((self.seq_length, self.n_features), dtype=np.float32)
+        features[:, :window.shape[1]] = window
+
+        targets = np.empty(len(self.horizons), dtype=np.float32)
+        for k, h in enumerate(self.horizons):
+            row = i + self.seq_length + int(h)
+            targets[k] = self._read_rows(pool, row, row + 1)[0, _APY_COL]
+
+        if self.norm_mean is not None:
+            features = (features - self.norm_mean) / self.norm_std
+
+        return features, targets
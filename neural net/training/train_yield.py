@@ -5,6 +5,7 @@ Training script for Yield Predictor model.
 
 import os
 import sys
+import time
 import argparse
 from pathlib import Path
 from datetime import datetime
@@ -36,9 +37,76 @@ def parse_args():
     parser.add_argument("--output-dir", type=str, default="models/yield_predictor", help="Output directory")
     parser.add_argument("--pool-ids", type=str, nargs="+", help="Pool IDs for training")
     parser.add_argument("--synthetic", action="store_true", help="Use synthetic data")
+    parser.add_argument("--cpu-optimized", action="store_true",
+                        help="CPU training mode: worker prefetching, all cores for intra-op, torch.compile")
+    parser.add_argument("--num-workers", type=int, default=None,
+                        help="DataLoader workers (default: 0, or cores/4 with --cpu-optimized)")
+    parser.add_argument("--compile", action="store_true", help="Compile the model with torch.compile if supported")
     return parser.parse_args()
 
 
+def compute_trend_targets(X: torch.Tensor, y: torch.Tensor) -> torch.Tensor:
+    """
+    Label each sample up (0), stable (1) or down (2) by comparing the 1h
+    target with the last observed APY, using a +/-1% band.
+    """
+    last = X[:, -1, 0]
+    next_apy = y[:, 0]
+    trend_targets = torch.ones(y.shape[0], dtype=torch.long, device=y.device)
+    trend_targets[next_apy < last * 0.99] = 2  # down
+    trend_targets[next_apy > last * 1.01] = 0  # up (wins if both bands match)
+    return trend_targets
+
+
+def build_dataloader(dataset, batch_size: int, shuffle: bool, num_workers: int, device: torch.device) -> DataLoader:
+    """DataLoader with worker prefetching and pinned host memory where they help."""
+    kwargs = {}
+    if num_workers > 0:
+        kwargs["persistent_workers"] = True
+        kwargs["prefetch_factor"] = 4
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=shuffle,
+        num_workers=num_workers,
+        pin_memory=device.type == "cuda",
+        **kwargs
+    )
+
+
+def maybe_compile(model: nn.Module, sample: torch.Tensor, logger) -> nn.Module:
+    """
+    Wrap the model with torch.compile, falling back to eager if unsupported.
+
+    torch.compile is lazy: nothing is compiled until the first call. The
+    compiled model is therefore warmed up on `sample` (a training forward and
+    backward, then an eval forward) so a failure shows up here.
+    """
+    if not hasattr(torch, "compile"):
+        logger.warning("torch.compile unavailable (torch < 2.0); training in eager mode")
+        return model
+    try:
+        compiled = torch.compile(model)
+        compiled.train()
+        output = compiled(sample, return_uncertainty=True)
+        sum(v.sum() for v in output.values() if torch.is_tensor(v) and v.requires_grad).backward()
+        compiled.eval()
+        with torch.no_grad():
+            compiled(sample, return_uncertainty=True)
+        return compiled
+    except Exception as e:
+        logger.warning(f"torch.compile failed ({e}); training in eager mode")
+        return model
+    finally:
+        model.zero_grad(set_to_none=True)
+        model.train()
+
+
+def unwrap_model(model: nn.Module) -> nn.Module:
+    """Underlying module of a compiled model (keeps checkpoint keys stable)."""
+    return getattr(model, "_orig_mod", model)
+
+
 def train_epoch(model, dataloader, optimizer, scheduler, loss_fn, device):
     """Train for one epoch."""
     model.train()
@@ -46,10 +114,14 @@ def train_epoch(model, dataloader, optimizer, scheduler, loss_fn, device):
     all_preds = []
     all_targets = []
     
+    n_samples = 0
+    start = time.perf_counter()
+    
     for batch in tqdm(dataloader, desc="Training"):
         X, y = batch
-        X = X.to(device)
-        y = y.to(device)
+        X = X.to(device, non_blocking=True)
+        y = y.to(device, non_blocking=True)
+        n_samples += y.shape[0]
         
         optimizer.zero_grad()
         
@@ -57,14 +129,7 @@ def train_epoch(model, dataloader, optimizer, scheduler, loss_fn, device):
         
         # Compute trend targets
         with torch.no_grad():
-            trend_targets = torch.zeros(y.shape[0], dtype=torch.long, device=device)
-            for i in range(y.shape[0]):
-                if y[i, 0] > X[i, -1, 0] * 1.01:  # 1% increase
-                    trend_targets[i] = 0  # up
-                elif y[i, 0] < X[i, -1, 0] * 0.99:  # 1% decrease
-                    trend_targets[i] = 2  # down
-                else:
-                    trend_targets[i] = 1  # stable
+            trend_targets = compute_trend_targets(X, y)
         
         losses = loss_fn(
             predictions=output["predictions"],
@@ -85,11 +150,13 @@ def train_epoch(model, dataloader, optimizer, scheduler, loss_fn, device):
         all_preds.append(output["predictions"].detach().cpu().numpy())
         all_targets.append(y.detach().cpu().numpy())
     
+    elapsed = time.perf_counter() - start
     avg_loss = total_loss / len(dataloader)
     preds = np.concatenate(all_preds)
     targets = np.concatenate(all_targets)
     
     metrics = compute_metrics(targets.flatten(), preds.flatten())
+    metrics["samples_per_sec"] = n_samples / elapsed if elapsed > 0 else 0.0
     
     return avg_loss, metrics
 
@@ -101,11 +168,15 @@ def validate(model, dataloader, loss_fn, device):
     all_preds = []
     all_targets = []
     
+    n_samples = 0
+    start = time.perf_counter()
+    
     with torch.no_grad():
         for batch in tqdm(dataloader, desc="Validation"):
             X, y = batch
-            X = X.to(device)
-            y = y.to(device)
+            X = X.to(device, non_blocking=True)
+            y = y.to(device, non_blocking=True)
+            n_samples += y.shape[0]
             
             output = model(X, return_uncertainty=True)
             
@@ -119,11 +190,13 @@ def validate(model, dataloader, loss_fn, device):
             all_preds.append(output["predictions"].cpu().numpy())
             all_targets.append(y.cpu().numpy())
     
+    elapsed = time.perf_counter() - start
     avg_loss = total_loss / len(dataloader)
     preds = np.concatenate(all_preds)
     targets = np.concatenate(all_targets)
     
     metrics = compute_metrics(targets.flatten(), preds.flatten())
+    metrics["samples_per_sec"] = n_samples / elapsed if elapsed > 0 else 0.0
     
     return avg_loss, metrics
 
@@ -140,6 +213,15 @@ def main():
         device = torch.device(args.device)
     logger.info(f"Using device: {device}")
     
+    # CPU training mode: all cores for intra-op math, a few workers prefetching batches
+    cpu_count = os.cpu_count() or 1
+    num_workers = args.num_workers
+    if num_workers is None:
+        num_workers = max(1, cpu_count // 4) if args.cpu_optimized else 0
+    if args.cpu_optimized and device.type == "cpu":
+        torch.set_num_threads(max(1, cpu_count - num_workers))
+        logger.info(f"CPU-optimized mode: {torch.get_num_threads()} compute threads, {num_workers} loader workers")
+    
     # Data pipeline
     pipeline = DataPipeline(config=config)
     
@@ -192,8 +274,8 @@ def main():
         torch.tensor(y_val, dtype=torch.float32)
     )
     
-    train_loader = DataLoader(train_dataset, batch_size=args.batch_size, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=args.batch_size)
+    train_loader = build_dataloader(train_dataset, args.batch_size, True, num_workers, device)
+    val_loader = build_dataloader(val_dataset, args.batch_size, False, num_workers, device)
     
     # Model
     model_config = config.get("yield_predictor", {}).get("model", {})
@@ -210,6 +292,10 @@ def main():
     
     logger.info(f"Model parameters: {sum(p.numel() for p in model.parameters()):,}")
     
+    if args.compile or args.cpu_optimized:
+        sample = next(iter(train_loader))[0].to(device)
+        model = maybe_compile(model, sample, logger)
+    
     # Optimizer and scheduler
     optimizer = AdamW(model.parameters(), lr=args.lr, weight_decay=0.01)
     scheduler = OneCycleLR(
@@ -237,17 +323,23 @@ def main():
         train_loss, train_metrics = train_epoch(
             model, train_loader, optimizer, scheduler, loss_fn, device
         )
-        logger.info(f"Train Loss: {train_loss:.4f}, MAE: {train_metrics['mae']:.4f}")
+        logger.info(
+            f"Train Loss: {train_loss:.4f}, MAE: {train_metrics['mae']:.4f}, "
+            f"Throughput: {train_metrics['samples_per_sec']:.1f} samples/s"
+        )
         
         # Validate
         val_loss, val_metrics = validate(model, val_loader, loss_fn, device)
-        logger.info(f"Val Loss: {val_loss:.4f}, MAE: {val_metrics['mae']:.4f}")
+        logger.info(
+            f"Val Loss: {val_loss:.4f}, MAE: {val_metrics['mae']:.4f}, "
+            f"Throughput: {val_metrics['samples_per_sec']:.1f} samples/s"
+        )
         
         # Save best model
         if val_loss < best_val_loss:
             best_val_loss = val_loss
             torch.save({
-                "model_state_dict": model.state_dict(),
+                "model_state_dict": unwrap_model(model).state_dict(),
                 "config": model_config,
                 "normalization_params": pipeline._normalization_params,
                 "epoch": epoch,
@@ -262,7 +354,7 @@ def main():
     
     # Save final model
     torch.save({
-        "model_state_dict": model.state_dict(),
+        "model_state_dict": unwrap_model(model).state_dict(),
         "config": model_config,
         "normalization_params": pipeline._normalization_params,
         "epoch": args.epochs,
@@ -53,7 +53,7 @@ contract KerneLSTSolver is IKerneLSTSolver, IERC3156FlashBorrower, AccessControl
      * @param tokenIn The token to borrow and swap from.
      * @param tokenOut The token to swap to.
      * @param amount The amount of tokenIn to borrow.
-     * @param data Encoded swap parameters (router type, path, etc.)
+     * @param data abi.encode(uint8 routerType, bytes pathData, uint256 minAmountOut)
      */
     function executeLSTSwap(
         address tokenIn,
@@ -100,14 +100,14 @@ contract KerneLSTSolver is IKerneLSTSolver, IERC3156FlashBorrower, AccessControl
     }
 
     function _executeSwap(address tokenIn, address /*tokenOut*/, uint256 amountIn, bytes memory swapData) internal {
-        (uint8 routerType, bytes memory pathData) = abi.decode(swapData, (uint8, bytes));
+        (uint8 routerType, bytes memory pathData, uint256 minAmountOut) = abi.decode(swapData, (uint8, bytes, uint256));
 
         if (routerType == 0) { // Aerodrome
             IAerodromeRouter.Route[] memory routes = abi.decode(pathData, (IAerodromeRouter.Route[]));
             IERC20(tokenIn).forceApprove(aerodromeRouter, amountIn);
             IAerodromeRouter(aerodromeRouter).swapExactTokensForTokens(
                 amountIn,
-                0, // Slippage handled by bot
+                minAmountOut, // Derived by the bot from its same-block quote
                 routes,
                 address(this),
                 block.timestamp
@@ -116,6 +116,7 @@ contract KerneLSTSolver is IKerneLSTSolver, IERC3156FlashBorrower, AccessControl
             IUniswapV3Router.ExactInputParams memory params = abi.decode(pathData, (IUniswapV3Router.ExactInputParams));
             params.amountIn = amountIn;
             params.recipient = address(this);
+            if (minAmountOut > params.amountOutMinimum) params.amountOutMinimum = minAmountOut;
             IERC20(tokenIn).forceApprove(uniswapV3Router, amountIn);
             IUniswapV3Router(uniswapV3Router).exactInput(params);
         } else {
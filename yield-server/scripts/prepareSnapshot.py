@@ -1,5 +1,8 @@
 import sys
 import ast
+import json
+import argparse
+from pathlib import Path
 
 import pandas as pd
 
@@ -13,6 +16,11 @@ import pandas as pd
     # round apy columns to 5 decimals
     # ...
     # stores 3 outputs: the full hourly history (for yield), last value for each day (for stat), last value (for config)
+# the csv is streamed in chunks; cleaned rows are kept in a parquet dataset (partitioned by day)
+# under --state-dir together with a watermark, so re-running on a newer export only processes
+# rows from the watermark on and recomputes the days they touch. Rows are unique per
+# (pool, timestamp); the watermark also records the hourly csv size so a re-run after a
+# crash truncates a half-finished append. Needs pyarrow (scripts/requirements.txt).
 
 # Step 3) CREATE UUIDS
 # based on output from Step 2) run the bootstrapUUID.js file which creates a unique uuid for each unique pool and stores that locally
@@ -20,6 +28,28 @@ import pandas as pd
 # Step 4) CREATE THE POSTGRES TABLES
 # run the create scripts starting with config, then the others (order doesn't matter for the rest)
 
+OUTPUT_PREFIX = "yield_snapshot"
+CHUNK_ROWS = 250_000
+# touched day partitions are re-read this many at a time, which bounds memory on the first (full) run
+DAYS_PER_BATCH = 31
+
+APY_COLUMNS = ["apy", "apyBase", "apyReward"]
+# every other non-numeric column is stored as string so parquet parts share one schema
+NUMERIC_COLUMNS = {"tvlUsd", "apy", "apyBase", "apyReward", "il7d", "apyBase7d", "volumeUsd1d",
+                   "volumeUsd7d", "apyBaseInception", "apyMean30d", "apyRewardFake", "apyRewardBorrowFake"}
+
+EXCLUDE_POOLS = [
+    "0xf4bfe9b4ef01f27920e490cea87fe2642a8da18d",
+    "DWmAv5wMun4AHxigbwuJygfmXBBe9WofXAtrMCRJExfb",
+    "ripae-seth-weth-42161",
+    "ripae-peth-weth-42161",
+    "0x3eed430cd45c5e2b45aa1adc609cc77c6728d45b",
+    "0x3c42B0f384D2912661C940d46cfFE1CD10F1c66F-ethereum",
+    "0x165ab553871b1a6b3c706e15b6a7bb29a244b2f3",
+]
+EXCLUDE_PROJECTS = ["koyo-finance"]
+
+
 def replaceFunc(x: str) -> str:
     if x == "[null]":
         return "[]"
@@ -33,9 +63,7 @@ def replaceFunc(x: str) -> str:
         return x
 
 
-def prepare_snapshot(filename: str) -> None:
-    df = pd.read_csv(f"{filename}")
-
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
     # correct none, null values in array
     df.loc[df["underlyingTokens"].notnull(), "underlyingTokens"] = df.loc[
         df["underlyingTokens"].notnull(), "underlyingTokens"
@@ -52,50 +80,166 @@ def prepare_snapshot(filename: str) -> None:
     df = df[(df["tvlUsd"] >= 1000) & (df["tvlUsd"] <= 2e10)]
 
     # remove pools and project from exclusion list
-    exclude_pools = [
-        "0xf4bfe9b4ef01f27920e490cea87fe2642a8da18d",
-        "DWmAv5wMun4AHxigbwuJygfmXBBe9WofXAtrMCRJExfb",
-        "ripae-seth-weth-42161",
-        "ripae-peth-weth-42161",
-        "0x3eed430cd45c5e2b45aa1adc609cc77c6728d45b",
-        "0x3c42B0f384D2912661C940d46cfFE1CD10F1c66F-ethereum",
-        "0x165ab553871b1a6b3c706e15b6a7bb29a244b2f3",
-    ]
-    df = df[~df["pool"].isin(exclude_pools)]
-    df = df[df["project"] != "koyo-finance"]
+    df = df[~df["pool"].isin(EXCLUDE_POOLS)]
+    df = df[~df["project"].isin(EXCLUDE_PROJECTS)].copy()
 
     # cast dtypes and round
     df["tvlUsd"] = df["tvlUsd"].astype(int)
-    apy_columns = ["apy", "apyBase", "apyReward"]
-    df[apy_columns] = df[apy_columns].round(5)
-
-    # 1. hourly (for yield table)
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df = df.sort_values(["pool", "timestamp"], ascending=True).reset_index(drop=True)
-    f = "yield_snapshot"
-    df.to_csv(f"{f}_hourly.csv", index=False)
-
-    # 2. prepare daily (for stat)
-    df_daily = (
-        df.groupby(["pool", pd.Grouper(key="timestamp", freq="1D")])
-        .last()
-        .reset_index()
+    df[APY_COLUMNS] = df[APY_COLUMNS].round(5)
+    for col in df.columns:
+        if col == "tvlUsd" or col == "timestamp":
+            continue
+        df[col] = df[col].astype(float) if col in NUMERIC_COLUMNS else df[col].astype("string")
+    return df
+
+
+KEY_COLUMNS = ["pool", "timestamp"]
+
+
+def load_watermark(state_dir: Path) -> dict:
+    """watermark timestamp, completed run count and hourly csv size in bytes at that watermark"""
+    path = state_dir / "watermark.json"
+    if not path.exists():
+        return {"timestamp": None, "runs": 0, "hourly_csv_bytes": None}
+    with open(path) as f:
+        state = json.load(f)
+    return {
+        "timestamp": pd.Timestamp(state["timestamp"]),
+        "runs": state.get("runs", 1),
+        "hourly_csv_bytes": state.get("hourly_csv_bytes"),
+    }
+
+
+def save_watermark(state_dir: Path, watermark: pd.Timestamp, rows: int, runs: int, hourly_csv_bytes: int) -> None:
+    tmp = state_dir / "watermark.json.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"timestamp": watermark.isoformat(), "rows_last_run": rows, "runs": runs,
+                   "hourly_csv_bytes": hourly_csv_bytes}, f)
+    tmp.replace(state_dir / "watermark.json")
+
+
+def stored_pools_at(hourly_dir: Path, watermark: pd.Timestamp) -> set:
+    """pools that already have a row stamped exactly at the watermark"""
+    if not hourly_dir.exists():
+        return set()
+    rows = pd.read_parquet(
+        hourly_dir, columns=KEY_COLUMNS,
+        filters=[("day", "=", watermark.strftime("%Y-%m-%d")), ("timestamp", "=", watermark)],
     )
-    df_daily.to_json(f"{f}_daily.json", orient="records")
+    return set(rows["pool"])
 
-    # 3. prepare last (for config)
-    df_last = (
-        df_daily.sort_values(["pool", "timestamp"], ascending=True)
-        .groupby("pool")
+
+def is_new(rows: pd.DataFrame, watermark, known_at_watermark: set) -> pd.Series:
+    """rows past the watermark, plus rows at the watermark for pools the last run didn't have"""
+    if watermark is None:
+        return pd.Series(True, index=rows.index)
+    at_watermark = (rows["timestamp"] == watermark) & ~rows["pool"].isin(known_at_watermark)
+    return (rows["timestamp"] > watermark) | at_watermark
+
+
+def daily_last(hourly: pd.DataFrame) -> pd.DataFrame:
+    return (
+        hourly.groupby(["pool", pd.Grouper(key="timestamp", freq="1D")])
         .last()
         .reset_index()
     )
+
+
+def prepare_snapshot(filename: str, state_dir: str = f"{OUTPUT_PREFIX}_state", chunk_rows: int = CHUNK_ROWS) -> None:
+    state = Path(state_dir)
+    hourly_dir = state / "hourly"
+    daily_path = state / "daily.parquet"
+    state.mkdir(parents=True, exist_ok=True)
+    saved = load_watermark(state)
+    watermark, hourly_csv_bytes = saved["timestamp"], saved["hourly_csv_bytes"]
+    hourly_csv = Path(f"{OUTPUT_PREFIX}_hourly.csv")
+    # part names come from the completed-run count: a re-run after a crash first drops its own partial parts
+    run_id = f"run{saved['runs']:05d}"
+    for part in hourly_dir.glob(f"day=*/{run_id}-*.parquet"):
+        part.unlink()
+    if watermark is not None and hourly_csv_bytes is not None and hourly_csv.exists() \
+            and hourly_csv.stat().st_size > hourly_csv_bytes:
+        # an earlier run crashed after appending but before moving the watermark
+        with open(hourly_csv, "r+b") as f:
+            f.truncate(hourly_csv_bytes)
+    # a later export can hold rows at the watermark hour that the earlier one missed
+    known_at_watermark = set() if watermark is None else stored_pools_at(hourly_dir, watermark)
+
+    # 1. stream the export once: clean new rows (see is_new) into day partitions
+    touched_days = set()
+    new_watermark = watermark
+    new_rows = 0
+    for i, chunk in enumerate(pd.read_csv(filename, chunksize=chunk_rows)):
+        chunk["timestamp"] = pd.to_datetime(chunk["timestamp"])
+        chunk = chunk[is_new(chunk, watermark, known_at_watermark)]
+        if chunk.empty:
+            continue
+        chunk = clean_chunk(chunk)
+        if chunk.empty:
+            continue
+        chunk["day"] = chunk["timestamp"].dt.strftime("%Y-%m-%d")
+        chunk.to_parquet(
+            hourly_dir, partition_cols=["day"], index=False,
+            basename_template=f"{run_id}-{i:05d}-{{i}}.parquet",
+        )
+        touched_days.update(chunk["day"].unique())
+        chunk_max = chunk["timestamp"].max()
+        new_watermark = chunk_max if new_watermark is None else max(new_watermark, chunk_max)
+        new_rows += len(chunk)
+
+    if not touched_days:
+        print(f"no rows newer than watermark {watermark}, outputs unchanged")
+        return
+
+    # 2. recompute only the touched days (all of their rows, old and new)
+    f = OUTPUT_PREFIX
+    hourly_mode = "w" if watermark is None or not hourly_csv.exists() else "a"
+    recomputed = []
+    days = sorted(touched_days)
+    for start in range(0, len(days), DAYS_PER_BATCH):
+        batch = days[start:start + DAYS_PER_BATCH]
+        rows = pd.read_parquet(hourly_dir, filters=[("day", "in", batch)]).drop(columns="day")
+        # parts are read in no particular order; a (pool, timestamp) repeated within an export keeps one row
+        rows = rows.drop_duplicates(KEY_COLUMNS, keep="last")
+        rows = rows.sort_values(KEY_COLUMNS, ascending=True).reset_index(drop=True)
+
+        # hourly (for yield table): append the new rows only, sorted by pool within each batch
+        appended = rows[is_new(rows, watermark, known_at_watermark)]
+        appended.to_csv(hourly_csv, mode=hourly_mode, header=hourly_mode == "w", index=False)
+        hourly_mode = "a"
+
+        recomputed.append(daily_last(rows))
+
+    # daily (for stat): replace the touched days, keep the rest
+    fresh = pd.concat(recomputed, ignore_index=True)
+    if daily_path.exists():
+        df_daily = pd.read_parquet(daily_path)
+        kept = df_daily[~df_daily["timestamp"].dt.strftime("%Y-%m-%d").isin(touched_days)]
+        df_daily = pd.concat([kept, fresh], ignore_index=True)
+    else:
+        df_daily = fresh
+    df_daily = df_daily.sort_values(["pool", "timestamp"], ascending=True).reset_index(drop=True)
+    df_daily.to_parquet(daily_path, index=False)
+    df_daily.to_json(f"{f}_daily.json", orient="records")
+
+    # last (for config)
+    df_last = df_daily.groupby("pool").last().reset_index()
     # cast string to arrays
     func = lambda x: ast.literal_eval(x) if type(x) == str else x
     df_last["underlyingTokens"] = df_last["underlyingTokens"].apply(func)
     df_last["rewardTokens"] = df_last["rewardTokens"].apply(func)
     df_last.to_json(f"{f}_last.json", orient="records")
 
+    # watermark last: a crash before this point re-processes the same rows next run, after
+    # dropping this run's parts and truncating the hourly csv back to hourly_csv_bytes
+    save_watermark(state, new_watermark, new_rows, saved["runs"] + 1, hourly_csv.stat().st_size)
+    print(f"processed {new_rows} new rows over {len(days)} days, watermark {new_watermark}")
+
 
 if __name__ == "__main__":
-    prepare_snapshot(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Prepare yield snapshot outputs from a history export")
+    parser.add_argument("filename")
+    parser.add_argument("--state-dir", default=f"{OUTPUT_PREFIX}_state")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    prepare_snapshot(args.filename, args.state_dir, args.chunk_rows)
@@ -0,0 +1,66 @@
+# yield-server/scripts/test_prepareSnapshot.py
+# Created: 2026-10-19
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+sys.path.insert(0, str(Path(__file__).parent))
+import prepareSnapshot  # noqa: E402
+
+
+def _export(path, rows):
+    pd.DataFrame([
+        {"timestamp": ts, "pool": pool, "project": "aave-v3", "chain": "Ethereum", "symbol": "USDC",
+         "tvlUsd": 1e6, "apy": apy, "apyBase": apy, "apyReward": None,
+         "underlyingTokens": "[\"0xa0b8\"]", "rewardTokens": "[]"}
+        for ts, pool, apy in rows
+    ]).to_csv(path, index=False)
+
+
+def _hourly():
+    return pd.read_csv(f"{prepareSnapshot.OUTPUT_PREFIX}_hourly.csv")
+
+
+FIRST = [("2024-01-01T00:00:00Z", "a", 1.0), ("2024-01-01T01:00:00Z", "a", 1.1),
+         ("2024-01-01T01:00:00Z", "b", 2.0)]
+# the later export also carries a pool "c" row at the watermark hour the first one missed
+SECOND = FIRST + [("2024-01-01T01:00:00Z", "c", 3.0), ("2024-01-01T02:00:00Z", "a", 1.2)]
+
+
+def test_incremental_run_keeps_rows_unique_and_picks_up_the_watermark_hour(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _export("first.csv", FIRST)
+    _export("second.csv", SECOND)
+    prepareSnapshot.prepare_snapshot("first.csv", state_dir="state")
+    prepareSnapshot.prepare_snapshot("second.csv", state_dir="state")
+
+    hourly = _hourly()
+    assert len(hourly) == len(SECOND)
+    assert not hourly.duplicated(["pool", "timestamp"]).any()
+    assert set(hourly["pool"]) == {"a", "b", "c"}
+    daily = pd.read_json(f"{prepareSnapshot.OUTPUT_PREFIX}_daily.json")
+    assert len(daily) == 3 and len(pd.read_parquet("state/hourly")) == len(SECOND)
+
+
+def test_rerun_after_crash_before_watermark_does_not_duplicate(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _export("first.csv", FIRST)
+    _export("second.csv", SECOND)
+    prepareSnapshot.prepare_snapshot("first.csv", state_dir="state")
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("killed before the watermark moved")
+
+    with monkeypatch.context() as m:
+        m.setattr(prepareSnapshot, "save_watermark", crash)
+        with pytest.raises(RuntimeError):
+            prepareSnapshot.prepare_snapshot("second.csv", state_dir="state")
+    prepareSnapshot.prepare_snapshot("second.csv", state_dir="state")
+
+    hourly = _hourly()
+    assert len(hourly) == len(SECOND)
+    assert not hourly.duplicated(["pool", "timestamp"]).any()
+    assert len(pd.read_parquet("state/hourly")) == len(SECOND)